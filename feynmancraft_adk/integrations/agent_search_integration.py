@@ -23,6 +23,8 @@ from particlephysics_mcp import (
     list_decays_experimental
 )
 
+from ..tools.physics.particle_extractor import extract_particles
+
 logger = logging.getLogger(__name__)
 
 
@@ -122,35 +124,16 @@ async def enhanced_agent_search_with_particle_info(
 
 def extract_particles_from_query(query: str) -> List[str]:
     """
-    Extract common particle names from a query string.
-    Simple keyword-based extraction for common particles.
-    """
-    query_lower = query.lower()
-    
-    # Common particles to look for
-    particle_keywords = {
-        "electron": ["electron", "e-", "e+", "positron"],
-        "muon": ["muon", "mu-", "mu+", "antimuon"],
-        "tau": ["tau", "tau-", "tau+", "tauon"],
-        "neutrino": ["neutrino", "nu_e", "nu_mu", "nu_tau"],
-        "photon": ["photon", "gamma", "light"],
-        "proton": ["proton", "p"],
-        "neutron": ["neutron", "n"],
-        "pion": ["pion", "pi+", "pi-", "pi0"],
-        "kaon": ["kaon", "k+", "k-", "k0"],
-        "quark": ["quark", "up", "down", "charm", "strange", "top", "bottom"],
-        "gluon": ["gluon", "g"],
-        "w_boson": ["w boson", "w+", "w-"],
-        "z_boson": ["z boson", "z0", "z"],
-        "higgs": ["higgs", "h"]
-    }
-    
-    found_particles = []
-    for particle, keywords in particle_keywords.items():
-        if any(keyword in query_lower for keyword in keywords):
-            found_particles.append(particle)
+    Extract the particles named in a query string.
     
-    return found_particles
+    Args:
+        query: Free text, LaTeX or process notation
+        
+    Returns:
+        Canonical particle names (e.g. "e-", "nu_e_bar"); family words such as
+        "neutrino" contribute every particle they can stand for
+    """
+    return extract_particles(query).names
 
 
 async def quick_particle_validation_for_agent(particles: List[str]) -> Dict[str, Any]:
@@ -3,6 +3,7 @@
 import asyncio
 import logging
 import sys
+from fractions import Fraction
 from pathlib import Path
 from typing import Dict, Any, List, Optional
 
@@ -64,21 +65,60 @@ async def get_particle_properties_mcp(name: str) -> Optional[Dict[str, Any]]:
         logger.error(f"Error getting properties for particle '{name}': {e}")
         return None
 
-async def validate_quantum_numbers_mcp(particle_data: Dict[str, Any]) -> Optional[Dict[str, Any]]:
-    """Validate quantum numbers of a particle using MCP.
+async def validate_quantum_numbers_mcp(particle_data: Any) -> Optional[Dict[str, Any]]:
+    """Validate quantum numbers of a particle or process against the local particle table.
     
     Args:
-        particle_data: Dictionary containing particle information
+        particle_data: Particle name, process ("initial -> final"), or a dictionary
+            with "process" or "name" and optional claimed "charge", "baryon_number" and "spin"
         
     Returns:
         Validation result dictionary or None if failed
     """
+    # Imported here: the physics tools package imports this module
+    from ...tools.physics.conservation import check_conservation, resolve_particle
+    
     try:
         logger.info("Validating quantum numbers")
-        # For now, return a simple validation
+        data = particle_data if isinstance(particle_data, dict) else {"name": str(particle_data)}
+        name = str(data.get("name") or data.get("particle") or "")
+        process = data.get("process") or (name if "->" in name or "→" in name else None)
+        
+        if process:
+            report = check_conservation(process).to_dict()
+            return {
+                "valid": report["allowed"],
+                "message": "; ".join(v["message"] for v in report["violations"]) or report["status"],
+                **report
+            }
+        
+        particle = resolve_particle(name)
+        if particle is None:
+            return {
+                "valid": None,
+                "message": f"Particle '{name}' is not in the local quantum number table"
+            }
+        
+        quantum_numbers = {
+            "charge": particle.charge,
+            "baryon_number": particle.baryon_number,
+            "spin": particle.spin,
+        }
+        mismatches = [
+            f"{key}: claimed {data[key]}, expected {expected}"
+            for key, expected in quantum_numbers.items()
+            if key in data and Fraction(str(data[key])) != expected
+        ]
         return {
-            "valid": True,
-            "message": "Quantum numbers validation (MCP integration pending)"
+            "valid": not mismatches,
+            "message": "; ".join(mismatches) or "Quantum numbers consistent",
+            "particle": particle.name,
+            "antiparticle": particle.antiparticle,
+            "charge": str(particle.charge),
+            "baryon_number": str(particle.baryon_number),
+            "lepton_numbers": dict(zip(("L_e", "L_mu", "L_tau"), particle.lepton_numbers)),
+            "spin": str(particle.spin),
+            "color": particle.color,
         }
     except Exception as e:
         logger.error(f"Error validating quantum numbers: {e}")
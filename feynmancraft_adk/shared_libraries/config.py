@@ -21,6 +21,7 @@ class ModelConfig:
     # Embedding Model
     embedding_model: str = field(default_factory=lambda: os.getenv("EMBEDDING_MODEL", "text-embedding-004"))
     embedding_dim: int = 768
+    embedding_batch_size: int = field(default_factory=lambda: int(os.getenv("EMBEDDING_BATCH_SIZE", "100")))
     
     # Model-specific configurations for different agents
     # Complex agents use gemini-2.5-pro for better reasoning
@@ -48,6 +49,34 @@ class KnowledgeBaseConfig:
     local_index_path: Path = field(default_factory=lambda: Path(__file__).parent.parent / "data" / "feynman_kb.ann")
     local_id_map_path: Path = field(default_factory=lambda: Path(__file__).parent.parent / "data" / "feynman_kb_id_map.json")
     
+    # Annoy index build
+    index_trees: int = field(default_factory=lambda: int(os.getenv("ANNOY_N_TREES", "10")))
+    index_build_jobs: int = field(default_factory=lambda: int(os.getenv("ANNOY_N_JOBS", "-1")))
+    index_build_workers: int = field(default_factory=lambda: int(os.getenv("INDEX_BUILD_WORKERS", "4")))
+    
+    # Sharded KB (JSONL shards with one Annoy index each) for large knowledge bases
+    shard_dir: Path = field(default_factory=lambda: Path(os.getenv("KB_SHARD_DIR", str(Path(__file__).parent.parent / "data" / "kb_shards"))))
+    shard_size: int = field(default_factory=lambda: int(os.getenv("KB_SHARD_SIZE", "50000")))
+    shard_search_workers: int = field(default_factory=lambda: int(os.getenv("KB_SHARD_WORKERS", "8")))
+    
+    # Hot reload (opt-in): poll the KB files and swap in a rebuilt snapshot when they change
+    hot_reload: bool = field(default_factory=lambda: os.getenv("KB_HOT_RELOAD", "false").lower() == "true")
+    reload_poll_seconds: float = field(default_factory=lambda: float(os.getenv("KB_RELOAD_POLL_SECONDS", "2.0")))
+    
+    # Near-duplicate detection (TikZ MinHash similarity, embedding cosine similarity)
+    dedup_tikz_threshold: float = field(default_factory=lambda: float(os.getenv("KB_DEDUP_TIKZ_THRESHOLD", "0.9")))
+    dedup_embedding_threshold: float = field(default_factory=lambda: float(os.getenv("KB_DEDUP_EMBEDDING_THRESHOLD", "0.97")))
+    
+    # Persistent embedding cache shared by all worker processes
+    embedding_cache_enabled: bool = field(default_factory=lambda: os.getenv("EMBEDDING_CACHE_ENABLED", "true").lower() == "true")
+    embedding_cache_path: Path = field(default_factory=lambda: Path(os.getenv("EMBEDDING_CACHE_PATH", str(Path(__file__).parent.parent / "data" / "embeddings" / "embedding_cache.sqlite3"))))
+    embedding_cache_max_entries: int = field(default_factory=lambda: int(os.getenv("EMBEDDING_CACHE_MAX_ENTRIES", "50000")))
+    
+    # In-process cache of search results, keyed by normalized query and k
+    result_cache_enabled: bool = field(default_factory=lambda: os.getenv("RESULT_CACHE_ENABLED", "true").lower() == "true")
+    result_cache_ttl_seconds: float = field(default_factory=lambda: float(os.getenv("RESULT_CACHE_TTL", "600")))
+    result_cache_max_entries: int = field(default_factory=lambda: int(os.getenv("RESULT_CACHE_MAX_ENTRIES", "512")))
+    
     @property
     def use_bigquery(self) -> bool:
         return False  # BigQuery functionality removed
@@ -72,6 +101,21 @@ class SearchConfig:
     # Search weights for hybrid search
     vector_weight: float = field(default_factory=lambda: float(os.getenv("VECTOR_WEIGHT", "0.6")))
     keyword_weight: float = field(default_factory=lambda: float(os.getenv("KEYWORD_WEIGHT", "0.4")))
+    
+    # Hybrid search falls back to keyword results if the query embedding is slow
+    hybrid_vector_timeout_seconds: float = field(default_factory=lambda: float(os.getenv("HYBRID_VECTOR_TIMEOUT", "2.0")))
+    vector_retry_cooldown_seconds: float = field(default_factory=lambda: float(os.getenv("VECTOR_RETRY_COOLDOWN", "30")))
+    
+    # Embedding search (KB and physics rules) over int8 codes, with exact float re-ranking of the
+    # top candidates; approximate, so opt-in (see test/bench_quantized_search.py for recall)
+    quantized_search: bool = field(default_factory=lambda: os.getenv("QUANTIZED_SEARCH", "false").lower() == "true")
+    quantized_rerank_factor: int = field(default_factory=lambda: int(os.getenv("QUANTIZED_RERANK_FACTOR", "4")))
+    
+    # Maximal-marginal-relevance diversification of KB results after rank_results
+    mmr_enabled: bool = field(default_factory=lambda: os.getenv("MMR_ENABLED", "false").lower() == "true")
+    mmr_lambda: float = field(default_factory=lambda: float(os.getenv("MMR_LAMBDA", "0.7")))
+    mmr_candidates_factor: int = field(default_factory=lambda: int(os.getenv("MMR_CANDIDATES_FACTOR", "3")))
+    mmr_top_k: int = field(default_factory=lambda: int(os.getenv("MMR_TOP_K", "0")))
 
 
 @dataclass
@@ -85,6 +129,15 @@ class ValidationConfig:
     physics_rules_path: Path = field(default_factory=lambda: Path(__file__).parent.parent / "data" / "pprules.json")
     enable_physics_validation: bool = field(default_factory=lambda: os.getenv("ENABLE_PHYSICS_VALIDATION", "true").lower() == "true")
     strict_physics_mode: bool = field(default_factory=lambda: os.getenv("STRICT_PHYSICS_MODE", "false").lower() == "true")
+    
+    # Physics rules index: after a failed build, rule searches fail at once until the
+    # retry interval has passed (start.sh checks the index before serving)
+    rules_index_retry_seconds: float = field(default_factory=lambda: float(os.getenv("RULES_INDEX_RETRY_SECONDS", "300")))
+    
+    # Offline PDG snapshot read in-process before falling back to the ParticlePhysics MCP server
+    particle_store_enabled: bool = field(default_factory=lambda: os.getenv("PARTICLE_STORE_ENABLED", "true").lower() == "true")
+    particle_store_path: Path = field(default_factory=lambda: Path(os.getenv("PARTICLE_STORE_PATH", str(Path(__file__).parent.parent / "data" / "particles.sqlite3"))))
+    particle_store_top_decays: int = field(default_factory=lambda: int(os.getenv("PARTICLE_STORE_TOP_DECAYS", "10")))
 
 
 @dataclass
@@ -127,11 +180,13 @@ class FeynmanCraftConfig:
                 "local_kb_path": str(self.knowledge_base.local_kb_path),
                 "local_index_path": str(self.knowledge_base.local_index_path),
                 "local_id_map_path": str(self.knowledge_base.local_id_map_path),
+                "embedding_cache_path": str(self.knowledge_base.embedding_cache_path),
             },
             "search": self.search.__dict__,
             "validation": {
                 **self.validation.__dict__,
                 "physics_rules_path": str(self.validation.physics_rules_path),
+                "particle_store_path": str(self.validation.particle_store_path),
             },
             "api": self.api.__dict__,
             "logging": self.logging.__dict__,
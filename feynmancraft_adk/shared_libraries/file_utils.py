@@ -0,0 +1,63 @@
+"""
+Atomic file writes for data files that are read while they are replaced.
+
+A file is written to a temporary sibling and renamed over the target with
+``os.replace``, so readers (and hot-reload watchers) see either the old or
+the new file, never a partial one. The temporary file is removed if
+writing fails.
+"""
+
+import os
+import tempfile
+from contextlib import contextmanager
+from pathlib import Path
+from typing import IO, Iterator, Optional, Union
+
+# mkstemp creates owner-only files; KB and index files are shared read-only data
+ATOMIC_FILE_MODE = 0o644
+
+
+@contextmanager
+def atomic_path(path: Union[str, Path]) -> Iterator[str]:
+    """
+    Yield a temporary path next to ``path`` and move it into place on success.
+
+    Use this for writers that take a file name (Annoy, SQLite); the
+    temporary file exists and is empty when the block starts.
+
+    Args:
+        path: Target file
+
+    Yields:
+        Temporary file path to write
+    """
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=str(path.parent), prefix=f".{path.name}.", suffix=".tmp")
+    os.close(fd)
+    try:
+        yield tmp_path
+        os.chmod(tmp_path, ATOMIC_FILE_MODE)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+        raise
+
+
+@contextmanager
+def atomic_write(path: Union[str, Path], mode: str = "w", encoding: Optional[str] = "utf-8") -> Iterator[IO]:
+    """
+    Open a temporary file next to ``path`` and move it into place on success.
+
+    Args:
+        path: Target file
+        mode: "w" for text or "wb" for binary
+        encoding: Text encoding (ignored in binary mode)
+
+    Yields:
+        The open temporary file
+    """
+    with atomic_path(path) as tmp_path:
+        with open(tmp_path, mode, encoding=None if "b" in mode else encoding) as f:
+            yield f
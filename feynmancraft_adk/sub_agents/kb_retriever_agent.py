@@ -35,7 +35,8 @@ from .kb_retriever_agent_prompt import PROMPT as KB_RETRIEVER_AGENT_PROMPT
 from ..tools.kb.search import (
     search_local_tikz_examples,
     search_tikz_examples,
-    search_tikz_examples_async
+    search_tikz_examples_async,
+    search_tikz_by_topology,
 )
 
 logger = logging.getLogger(__name__)
@@ -94,6 +95,23 @@ async def search_tikz_examples_async_wrapper(query: str) -> List[Dict[str, Any]]
         return [{"error": f"Async search failed: {str(e)}"}]
 
 
+def search_tikz_by_topology_wrapper(tikz_code: str) -> List[Dict[str, Any]]:
+    """
+    Wrapper for search_tikz_by_topology with default parameters.
+    
+    Args:
+        tikz_code: TikZ code of a diagram, or a topology such as "box" or "s-channel"
+        
+    Returns:
+        KB examples with the same (topology_score 1.0) or the closest topology
+    """
+    try:
+        return search_tikz_by_topology(tikz_code, k=5)
+    except Exception as e:
+        logger.error(f"Error in search_tikz_by_topology_wrapper: {e}")
+        return [{"error": f"Topology search failed: {str(e)}"}]
+
+
 # Removed BigQuery search functionality - using local KB only
 
 
@@ -110,5 +128,6 @@ KBRetrieverAgent = Agent(
         search_tikz_examples_wrapper,
         search_local_tikz_examples_wrapper,
         search_tikz_examples_async_wrapper,
+        search_tikz_by_topology_wrapper,
     ],
 )
\ No newline at end of file
@@ -51,6 +51,12 @@ Use the structured plan to create effective search queries:
    - **Best for**: Development and fallback scenarios
    - **Parameters**: `query: str`
 
+3. **Topology Search (`search_tikz_by_topology_wrapper`)**:
+   - **Structural Method**: Use when you have TikZ code or know the diagram shape
+   - **How it works**: Matches the vertex/propagator graph of the diagram; exact matches have `topology_score` 1.0 and can be reused directly
+   - **Best for**: Finding examples with the same topology (e.g. "s-channel", "t-channel", "box", "penguin")
+   - **Parameters**: `tikz_code: str` (TikZ code or a topology name)
+
 **Your Workflow:**
 
 1. **Analyze the Plan**: Review state.plan to understand the physics process
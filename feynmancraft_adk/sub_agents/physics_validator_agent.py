@@ -39,6 +39,8 @@ from ..models import PHYSICS_VALIDATOR_MODEL
 from .physics_validator_agent_prompt import PROMPT as PHYSICS_VALIDATOR_AGENT_PROMPT
 
 # Import physics search functionality from tools
+from ..tools.physics.conservation import check_conservation
+from ..tools.physics.particle_extractor import extract_particles
 from ..tools.physics.search import (
     search_physics_rules,
     search_rules_by_particles,
@@ -136,6 +138,27 @@ def validate_process_wrapper(process_description: str, particles: str) -> Dict[s
         }
 
 
+def check_conservation_wrapper(process: str) -> Dict[str, Any]:
+    """
+    Check charge, baryon number, lepton flavour numbers, angular momentum and colour conservation.
+    
+    Args:
+        process: Process in the form "initial -> final", e.g. "mu- -> e- nu_e_bar nu_mu"
+        
+    Returns:
+        Conservation report with status "allowed", "forbidden" or "unknown_particles"
+    """
+    try:
+        return check_conservation(process).to_dict()
+    except Exception as e:
+        logger.error(f"Error in check_conservation_wrapper: {e}")
+        return {
+            "process": process,
+            "error": str(e),
+            "status": "failed"
+        }
+
+
 def parse_natural_language_physics_wrapper(query: str) -> Dict[str, Any]:
     """
     Simple wrapper for parsing physics queries - focuses on extracting particles and processes.
@@ -147,32 +170,15 @@ def parse_natural_language_physics_wrapper(query: str) -> Dict[str, Any]:
         Parsed physics information focusing on particles and processes
     """
     try:
-        # Simple extraction of particles and processes from query
-        # This is a simplified version that focuses on what we need for rule validation
-        import re
-        
-        # Extract common particle names
-        particle_patterns = [
-            r'\b(electron|positron|muon|tau|neutrino)\b',
-            r'\b(photon|gamma|gluon)\b',
-            r'\b(proton|neutron|pion|kaon)\b',
-            r'\b(quark|up|down|strange|charm|bottom|top)\b',
-            r'\b(W|Z|Higgs)\s*boson\b',
-            r'\b[a-zA-Z]+\+\b|\b[a-zA-Z]+\-\b'  # charged particles
-        ]
-        
-        particles = []
-        for pattern in particle_patterns:
-            matches = re.findall(pattern, query, re.IGNORECASE)
-            particles.extend(matches)
-        
-        # Extract process indicators
-        process_indicators = re.findall(r'\b(decay|scattering|annihilation|production|emission|absorption)\b', query, re.IGNORECASE)
-        
+        extraction = extract_particles(query)
         return {
             'status': 'success',
-            'particles': list(set(particles)),
-            'processes': list(set(process_indicators)),
+            'particles': extraction.names,
+            'processes': list(extraction.process_terms),
+            'process_notation': (
+                {'initial': list(extraction.process[0]), 'final': list(extraction.process[1])}
+                if extraction.process else None
+            ),
             'original_query': query
         }
     except Exception as e:
@@ -218,6 +224,7 @@ PhysicsValidatorAgent = Agent(
         search_rules_by_particles_wrapper,
         search_rules_by_process_wrapper,
         validate_process_wrapper,
+        check_conservation_wrapper,
         
         # MCP tools for particle data retrieval
         search_particle_experimental_wrapper,
@@ -62,6 +62,12 @@ When a user asks questions like:
 8. **Compare with Examples**: Use retrieved examples to validate against known good patterns
 9. **Educational Response**: Provide clear explanations suitable for educational purposes
 
+**Fast Conservation Check:**
+Once the process is written as "initial -> final" (e.g. "mu- -> e- nu_e_bar nu_mu"), call check_conservation_wrapper first. It checks charge, baryon number, L_e, L_mu, L_tau, angular momentum (fermion number parity) and colour from a local particle table:
+- status "forbidden": the process is not allowed; report the listed violations, no further reasoning about these laws is needed
+- status "allowed": these laws hold; continue with the rules check for energy, kinematics and dynamics
+- status "unknown_particles": check the unknown particles with the MCP tools and reason about conservation yourself
+
 **Critical Validation Step - Physics Rules Check:**
 After collecting all particle information, you MUST:
 1. Search for relevant rules using search_physics_rules_wrapper with the process description
@@ -87,6 +93,7 @@ After collecting all particle information, you MUST:
 - convert_units: Convert between physics units
 - check_particle_properties: Comprehensive validation
 - search_physics_rules_wrapper: Find relevant physics rules
+- check_conservation_wrapper: Deterministic conservation check of an "initial -> final" process
 
 **MCP Physics Tools (Enhanced Validation):**
 - search_particle_mcp: Advanced particle search with comprehensive database
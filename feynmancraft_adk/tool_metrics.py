@@ -60,6 +60,18 @@ class ToolMetrics:
         if self.recent_errors is None:
             self.recent_errors = []
 
+@dataclass
+class CacheMetrics:
+    """Hit/miss counters for a cache in front of a tool"""
+    name: str
+    hits: int = 0
+    misses: int = 0
+    evictions: int = 0
+    expirations: int = 0
+    invalidations: int = 0
+    size: int = 0
+    hit_rate: float = 0.0
+
 class ToolMetricsCollector:
     """Collects and aggregates tool usage metrics"""
     
@@ -72,6 +84,7 @@ class ToolMetricsCollector:
         self._active_calls: Dict[str, ToolCall] = {}  # call_id -> ToolCall
         self._completed_calls: deque = deque()  # Historical calls
         self._tool_metrics: Dict[str, ToolMetrics] = {}  # tool_name -> metrics
+        self._cache_metrics: Dict[str, CacheMetrics] = {}  # cache_name -> counters
         
         # Performance counters
         self._call_counter = 0
@@ -291,6 +304,40 @@ class ToolMetricsCollector:
             else:
                 return {name: asdict(metrics) for name, metrics in self._tool_metrics.items()}
     
+    def record_cache_event(self, cache_name: str, event: str, count: int = 1, size: Optional[int] = None):
+        """Count a cache hit, miss, eviction, expiration or invalidation"""
+        with self._lock:
+            metrics = self._cache_metrics.get(cache_name)
+            if metrics is None:
+                metrics = self._cache_metrics[cache_name] = CacheMetrics(name=cache_name)
+            
+            if event == "hit":
+                metrics.hits += count
+            elif event == "miss":
+                metrics.misses += count
+            elif event == "eviction":
+                metrics.evictions += count
+            elif event == "expiration":
+                metrics.expirations += count
+            elif event == "invalidation":
+                metrics.invalidations += count
+            else:
+                logger.warning(f"Unknown cache event: {event}")
+                return
+            
+            if size is not None:
+                metrics.size = size
+            lookups = metrics.hits + metrics.misses
+            metrics.hit_rate = (metrics.hits / lookups * 100) if lookups else 0.0
+    
+    def get_cache_metrics(self, cache_name: Optional[str] = None) -> Dict[str, Any]:
+        """Get counters for a specific cache or all caches"""
+        with self._lock:
+            if cache_name:
+                metrics = self._cache_metrics.get(cache_name)
+                return asdict(metrics) if metrics else {}
+            return {name: asdict(metrics) for name, metrics in self._cache_metrics.items()}
+    
     def get_system_stats(self) -> Dict[str, Any]:
         """Get overall system statistics"""
         with self._lock:
@@ -383,11 +430,16 @@ def get_tool_stats(tool_name: Optional[str] = None) -> Dict[str, Any]:
     """Get tool statistics"""
     return tool_metrics_collector.get_tool_metrics(tool_name)
 
+def get_cache_stats(cache_name: Optional[str] = None) -> Dict[str, Any]:
+    """Get cache hit-rate statistics"""
+    return tool_metrics_collector.get_cache_metrics(cache_name)
+
 def get_dashboard_data() -> Dict[str, Any]:
     """Get complete dashboard data"""
     return {
         "system_stats": tool_metrics_collector.get_system_stats(),
         "tool_metrics": tool_metrics_collector.get_tool_metrics(),
+        "cache_metrics": tool_metrics_collector.get_cache_metrics(),
         "activity_heatmap": tool_metrics_collector.get_activity_heatmap()
     }
 
@@ -53,6 +53,7 @@ from .kb.search import (
     search_local_tikz_examples,
     search_tikz_examples,
     search_tikz_examples_async,
+    search_tikz_by_topology,
     rank_results,
     filter_results_by_confidence,
 )
@@ -138,6 +139,7 @@ __all__ = [
     "search_local_tikz_examples",
     "search_tikz_examples",
     "search_tikz_examples_async",
+    "search_tikz_by_topology",
     "rank_results",
     "filter_results_by_confidence",
     
@@ -9,16 +9,33 @@ from .embeddings import (
     find_similar_texts
 )
 
+from .embedding_backends import (
+    EmbeddingBackend,
+    GeminiEmbeddingBackend,
+    HashedNgramEmbeddingBackend,
+    get_embedding_backend,
+)
+
 from .data_loader import (
     load_kb_examples,
+    iter_kb_examples,
     get_kb_data_path,
     validate_kb_data,
+    deduplicate_kb_examples,
+    write_kb_examples,
     filter_kb_by_topic,
     filter_kb_by_particles,
     get_kb_stats,
 )
 
+from .metadata_index import KBFilter, MetadataIndex
+
+from .topology import FeynmanGraph, TopologyIndex, TopologySignature, parse_tikz, topology_signature
+
+from .hot_reload import KBWatcher, get_kb_watcher
+
 from .embedding_manager import (
+    EmbeddingSnapshot,
     KBEmbeddingManager,
     embed_and_cache_kb,
     get_kb_manager,
@@ -28,15 +45,20 @@ from .search import (
     search_local_tikz_examples,
     search_tikz_examples,
     search_tikz_examples_async,
+    search_tikz_by_topology,
     rank_results,
+    diversify_results,
     filter_results_by_confidence,
 )
 
 # Import KB tool classes
 try:
-    from .local import LocalKBTool
+    from .local import KBSnapshot, LocalKBTool, get_local_kb_tool, reload_local_kb
 except ImportError:
+    KBSnapshot = None
     LocalKBTool = None
+    get_local_kb_tool = None
+    reload_local_kb = None
 
 __all__ = [
     # Embedding utilities
@@ -45,15 +67,40 @@ __all__ = [
     "cosine_similarity",
     "find_similar_texts",
     
+    # Embedding backends
+    "EmbeddingBackend",
+    "GeminiEmbeddingBackend",
+    "HashedNgramEmbeddingBackend",
+    "get_embedding_backend",
+    
     # Data loading
     "load_kb_examples",
+    "iter_kb_examples",
     "get_kb_data_path",
     "validate_kb_data",
+    "deduplicate_kb_examples",
+    "write_kb_examples",
     "filter_kb_by_topic",
     "filter_kb_by_particles",
     "get_kb_stats",
     
+    # Metadata filters
+    "KBFilter",
+    "MetadataIndex",
+    
+    # Diagram topology
+    "FeynmanGraph",
+    "TopologyIndex",
+    "TopologySignature",
+    "parse_tikz",
+    "topology_signature",
+    
+    # Hot reload
+    "KBWatcher",
+    "get_kb_watcher",
+    
     # Embedding management
+    "EmbeddingSnapshot",
     "KBEmbeddingManager",
     "embed_and_cache_kb",
     "get_kb_manager",
@@ -62,9 +109,14 @@ __all__ = [
     "search_local_tikz_examples",
     "search_tikz_examples",
     "search_tikz_examples_async",
+    "search_tikz_by_topology",
     "rank_results",
+    "diversify_results",
     "filter_results_by_confidence",
     
     # Tool classes
+    "KBSnapshot",
     "LocalKBTool",
+    "get_local_kb_tool",
+    "reload_local_kb",
 ]
\ No newline at end of file
@@ -4,9 +4,16 @@ Data loading utilities for Knowledge Base.
 
 import json
 import os
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Iterator, Optional, Tuple
 import logging
 
+import numpy as np
+
+from .dedup import DedupReport, compact_records, find_duplicates
+from .metadata_index import get_metadata_index
+from ...shared_libraries.config import config
+from ...shared_libraries.file_utils import atomic_write
+
 logger = logging.getLogger(__name__)
 
 
@@ -23,10 +30,41 @@ def get_kb_data_path() -> str:
     return os.path.normpath(data_path)
 
 
+def iter_kb_examples(path: Optional[str] = None) -> Iterator[Dict[str, Any]]:
+    """
+    Stream KB examples from a JSON file, a JSONL file or a sharded KB directory.
+    
+    JSONL files and sharded KBs are read one line at a time, so large
+    knowledge bases never have to fit in memory at once.
+    
+    Args:
+        path: Optional custom path. If None, uses the default JSON KB.
+        
+    Yields:
+        KB examples in order
+    """
+    if path is None:
+        path = get_kb_data_path()
+    
+    if os.path.isdir(path):
+        from .sharded_store import ShardedKB
+        yield from ShardedKB(path).iter_records()
+    elif str(path).endswith(".jsonl"):
+        with open(path, "r", encoding="utf-8") as f:
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+    else:
+        yield from load_kb_examples(path)
+
+
 def load_kb_examples(path: Optional[str] = None) -> List[Dict[str, Any]]:
     """
     Load KB examples from JSON file.
     
+    JSONL files are also accepted. Sharded KBs are not loaded whole; search
+    them with ShardedKB or stream them with iter_kb_examples.
+    
     Args:
         path: Optional custom path to KB file. If None, uses default path.
         
@@ -36,9 +74,17 @@ def load_kb_examples(path: Optional[str] = None) -> List[Dict[str, Any]]:
     Raises:
         FileNotFoundError: If the KB file doesn't exist
         json.JSONDecodeError: If the file is not valid JSON
+        ValueError: If the path is a sharded KB directory
     """
     if path is None:
         path = get_kb_data_path()
+    
+    if os.path.isdir(path):
+        raise ValueError(f"{path} is a sharded KB; use ShardedKB or iter_kb_examples instead of loading it whole")
+    if str(path).endswith(".jsonl"):
+        data = list(iter_kb_examples(path))
+        logger.info(f"Loaded {len(data)} KB examples from {path}")
+        return data
         
     try:
         with open(path, "r", encoding="utf-8") as f:
@@ -53,6 +99,68 @@ def load_kb_examples(path: Optional[str] = None) -> List[Dict[str, Any]]:
         raise
 
 
+def record_key(record: Dict[str, Any]) -> Tuple[str, str]:
+    """
+    Identity of a KB example.
+    
+    KB examples have no id field; topic and reaction together are unique.
+    """
+    return record.get("topic", ""), record.get("reaction", "")
+
+
+def deduplicate_kb_examples(
+    examples: List[Dict[str, Any]],
+    vectors: Optional[np.ndarray] = None,
+    tikz_threshold: Optional[float] = None,
+    embedding_threshold: Optional[float] = None,
+) -> Tuple[List[Dict[str, Any]], DedupReport]:
+    """
+    Drop near-duplicate KB examples, keeping one canonical example per cluster.
+    
+    Duplicates are found with MinHash/LSH over the normalized TikZ source and,
+    if ``vectors`` are given, embedding-space clustering (see dedup).
+    
+    Args:
+        examples: List of KB examples
+        vectors: Optional embedding matrix aligned with ``examples``
+        tikz_threshold: Minimum TikZ shingle similarity (defaults to
+            KnowledgeBaseConfig.dedup_tikz_threshold)
+        embedding_threshold: Minimum embedding cosine similarity (defaults to
+            KnowledgeBaseConfig.dedup_embedding_threshold)
+        
+    Returns:
+        Tuple of (compacted examples in KB order, DedupReport)
+    """
+    kb_config = config.knowledge_base
+    report = find_duplicates(
+        examples,
+        vectors=vectors,
+        tikz_threshold=kb_config.dedup_tikz_threshold if tikz_threshold is None else tikz_threshold,
+        embedding_threshold=kb_config.dedup_embedding_threshold if embedding_threshold is None else embedding_threshold,
+    )
+    return compact_records(examples, report), report
+
+
+def write_kb_examples(examples: List[Dict[str, Any]], path: str):
+    """
+    Write KB examples to a JSON file, or a JSONL file if the path ends in ``.jsonl``.
+    
+    The file is written next to the target and renamed into place, so a
+    KB that is being served (and hot-reloaded) is never read half-written.
+    
+    Args:
+        examples: List of KB examples
+        path: Output file path
+    """
+    with atomic_write(path) as f:
+        if str(path).endswith(".jsonl"):
+            for example in examples:
+                f.write(json.dumps(example, ensure_ascii=False) + "\n")
+        else:
+            json.dump(examples, f, indent=2, ensure_ascii=False)
+    logger.info(f"Wrote {len(examples)} KB examples to {path}")
+
+
 def validate_kb_data(examples: List[Dict[str, Any]]) -> List[str]:
     """
     Validate KB data format and content.
@@ -99,6 +207,9 @@ def filter_kb_by_topic(examples: List[Dict[str, Any]], topic: str) -> List[Dict[
     """
     Filter KB examples by topic.
     
+    Matches come from the topic posting lists of the example list (see
+    metadata_index), which are reused while the same list is filtered again.
+    
     Args:
         examples: List of KB examples
         topic: Topic to filter by (case-insensitive)
@@ -106,11 +217,8 @@ def filter_kb_by_topic(examples: List[Dict[str, Any]], topic: str) -> List[Dict[
     Returns:
         Filtered list of examples
     """
-    topic_lower = topic.lower()
-    return [
-        example for example in examples
-        if topic_lower in example.get("topic", "").lower()
-    ]
+    positions = get_metadata_index(examples).with_topic(topic)
+    return [examples[i] for i in sorted(positions)]
 
 
 def filter_kb_by_particles(examples: List[Dict[str, Any]], particles: List[str]) -> List[Dict[str, Any]]:
@@ -124,17 +232,8 @@ def filter_kb_by_particles(examples: List[Dict[str, Any]], particles: List[str])
     Returns:
         Filtered list of examples containing any of the specified particles
     """
-    particles_lower = [p.lower() for p in particles]
-    filtered = []
-    
-    for example in examples:
-        example_particles = example.get("particles", [])
-        if isinstance(example_particles, list):
-            example_particles_lower = [p.lower() for p in example_particles]
-            if any(p in example_particles_lower for p in particles_lower):
-                filtered.append(example)
-                
-    return filtered
+    positions = get_metadata_index(examples).with_any_particle(particles)
+    return [examples[i] for i in sorted(positions)]
 
 
 def get_kb_stats(examples: List[Dict[str, Any]]) -> Dict[str, Any]:
@@ -0,0 +1,409 @@
+"""
+Near-duplicate detection and compaction of KB records.
+
+Two signals find duplicates in roughly linear time:
+
+- MinHash/LSH over the normalized TikZ source. Comments, whitespace and
+  number formatting are normalized, the source is split into token
+  shingles and every record gets a MinHash signature. Records that share an
+  LSH band bucket are candidates, and a candidate is a duplicate if its
+  estimated Jaccard similarity reaches ``tikz_threshold``.
+- Embedding-space clustering. Unit embeddings are bucketed by random
+  hyperplane (SimHash) bands, and candidates whose cosine similarity
+  reaches ``embedding_threshold`` are duplicates.
+
+A candidate is only compared with the first record of its bucket, so the
+work grows with records x bands instead of with the number of pairs.
+Buckets are also keyed by the record's particles, so diagrams of different
+processes that share a layout are never merged. Duplicates are grouped
+with union-find and each cluster keeps one canonical record: the most
+complete one, then the earliest.
+
+Write a compacted KB with::
+
+    python -m feynmancraft_adk.tools.kb.dedup --output compacted.json [--report report.json]
+"""
+
+import logging
+import math
+import re
+import zlib
+from dataclasses import dataclass, field
+from typing import Any, Dict, Hashable, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from .metadata_index import particle_term
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_NUM_PERM = 128
+DEFAULT_SHINGLE_SIZE = 3
+
+# Universal hashing modulo a Mersenne prime; products stay below 2**62
+_PRIME = (1 << 31) - 1
+
+# Literal "\n" sequences (as stored in the KB) but not \nu, \nabla, ...
+_ESCAPED_NEWLINE_RE = re.compile(r"\\n(?![A-Za-z])")
+_COMMENT_RE = re.compile(r"(?<!\\)%[^\n]*")
+_NUMBER_RE = re.compile(r"(?<![A-Za-z])-?(?:\d+\.?\d*|\.\d+)")
+_TOKEN_RE = re.compile(r"\\[A-Za-z]+|[A-Za-z]+|-?(?:\d+\.?\d*|\.\d+)|\S")
+_LABEL_RE = re.compile(r"\$([^$]*)\$")
+
+
+def strip_tikz_comments(source: str) -> str:
+    """TikZ source with literal ``\\n`` sequences turned into line breaks and comments removed."""
+    source = _ESCAPED_NEWLINE_RE.sub("\n", source or "")
+    return _COMMENT_RE.sub("", source)
+
+
+def normalize_tikz(source: str) -> str:
+    """
+    Normalize TikZ source so trivially different copies compare equal.
+
+    Comments are removed, numbers are written canonically (``1.50`` and
+    ``1.5``, ``.5`` and ``0.5``) and the source is re-joined from its tokens
+    with single spaces, so spacing and line breaks do not matter.
+    """
+    source = strip_tikz_comments(source)
+    source = _NUMBER_RE.sub(lambda m: format(float(m.group()), "g"), source)
+    return " ".join(_TOKEN_RE.findall(source))
+
+
+def tikz_shingles(source: str, size: int = DEFAULT_SHINGLE_SIZE) -> List[str]:
+    """Overlapping ``size``-token shingles of normalized TikZ source."""
+    tokens = normalize_tikz(source).split(" ") if source else []
+    tokens = [token for token in tokens if token]
+    if len(tokens) <= size:
+        return [" ".join(tokens)] if tokens else []
+    return [" ".join(tokens[i:i + size]) for i in range(len(tokens) - size + 1)]
+
+
+def physics_key(record: Dict[str, Any]) -> Hashable:
+    """
+    Particles of a record in canonical notation.
+
+    Only records with the same key can be duplicates. Records without a
+    particle list fall back to the math labels of their TikZ source.
+    """
+    particles = record.get("particles")
+    if isinstance(particles, list) and particles:
+        return frozenset(particle_term(str(p)) for p in particles)
+    labels = _LABEL_RE.findall(normalize_tikz(record.get("tikz", "")))
+    return frozenset(label.strip() for label in labels)
+
+
+def lsh_params(threshold: float, num_hashes: int, recall: float = 0.99) -> Tuple[int, int]:
+    """
+    LSH bands and rows per band for a similarity threshold.
+
+    Picks the most rows per band (fewest false candidates) for which a pair
+    at ``threshold`` still shares a bucket with probability ``recall``.
+
+    Returns:
+        Tuple of (bands, rows)
+    """
+    for rows in range(num_hashes, 0, -1):
+        bands = num_hashes // rows
+        if 1.0 - (1.0 - threshold ** rows) ** bands >= recall:
+            return bands, rows
+    return num_hashes, 1
+
+
+class MinHasher:
+    """
+    MinHash signatures of shingle sets.
+
+    Args:
+        num_perm: Number of hash functions (signature length)
+        seed: Seed of the hash functions; signatures are only comparable
+            between hashers with the same seed and num_perm
+    """
+
+    def __init__(self, num_perm: int = DEFAULT_NUM_PERM, seed: int = 1):
+        rng = np.random.RandomState(seed)
+        self.num_perm = num_perm
+        self.a = rng.randint(1, _PRIME, size=num_perm).astype(np.uint64)
+        self.b = rng.randint(0, _PRIME, size=num_perm).astype(np.uint64)
+
+    def signature(self, shingles: Sequence[str]) -> Optional[np.ndarray]:
+        """MinHash signature of a shingle set, or None if it is empty."""
+        hashes = np.fromiter(
+            (zlib.crc32(s.encode("utf-8")) % _PRIME for s in set(shingles)), dtype=np.uint64
+        )
+        if hashes.size == 0:
+            return None
+        return ((hashes[:, None] * self.a + self.b) % _PRIME).min(axis=0)
+
+    @staticmethod
+    def jaccard(a: np.ndarray, b: np.ndarray) -> float:
+        """Estimated Jaccard similarity of two signatures."""
+        return float(np.mean(a == b))
+
+
+class _UnionFind:
+    def __init__(self, n: int):
+        self.parent = list(range(n))
+
+    def find(self, i: int) -> int:
+        while self.parent[i] != i:
+            self.parent[i] = self.parent[self.parent[i]]
+            i = self.parent[i]
+        return i
+
+    def union(self, i: int, j: int):
+        ri, rj = self.find(i), self.find(j)
+        if ri != rj:
+            self.parent[max(ri, rj)] = min(ri, rj)
+
+
+def _band_candidates(
+    codes: np.ndarray,
+    positions: Sequence[int],
+    keys: Sequence[Hashable],
+    bands: int,
+    rows: int,
+) -> Iterator[Tuple[int, int]]:
+    """
+    Pairs of (first record in bucket, record) sharing an LSH band bucket.
+
+    Args:
+        codes: One row of hash values or bits per record
+        positions: Record position of each row
+        keys: Bucket prefix of each row (records with different keys never pair)
+        bands: Number of bands
+        rows: Values per band
+    """
+    for band in range(bands):
+        block = np.ascontiguousarray(codes[:, band * rows:(band + 1) * rows])
+        first_by_bucket: Dict[Tuple[Hashable, bytes], int] = {}
+        for row in range(len(block)):
+            bucket = (keys[row], block[row].tobytes())
+            first = first_by_bucket.setdefault(bucket, row)
+            if first != row:
+                yield positions[first], positions[row]
+
+
+@dataclass
+class DuplicateCluster:
+    """
+    Records found to be near-duplicates of each other.
+
+    Attributes:
+        canonical: Position of the record that is kept
+        members: Positions of all records in the cluster, sorted
+        signals: Signals that linked the cluster ("tikz", "embedding")
+    """
+    canonical: int
+    members: List[int]
+    signals: List[str] = field(default_factory=list)
+
+    @property
+    def duplicates(self) -> List[int]:
+        """Positions of the records that compaction drops."""
+        return [m for m in self.members if m != self.canonical]
+
+
+@dataclass
+class DedupReport:
+    """
+    Outcome of near-duplicate detection.
+
+    Attributes:
+        num_records: Number of records checked
+        clusters: Duplicate clusters, ordered by canonical position
+        candidates: Candidate pairs that were verified
+    """
+    num_records: int
+    clusters: List[DuplicateCluster]
+    candidates: int = 0
+
+    @property
+    def removed(self) -> List[int]:
+        """Positions of all records that compaction drops, sorted."""
+        return sorted(d for cluster in self.clusters for d in cluster.duplicates)
+
+    def keep_positions(self) -> List[int]:
+        """Positions of the records kept by compaction, in KB order."""
+        removed = set(self.removed)
+        return [i for i in range(self.num_records) if i not in removed]
+
+    def to_dict(self, records: Optional[List[Dict[str, Any]]] = None) -> Dict[str, Any]:
+        """JSON-serializable report; with ``records``, members are described by topic and reaction."""
+        def describe(position: int) -> Any:
+            if records is None:
+                return position
+            record = records[position]
+            return {"position": position, "topic": record.get("topic"), "reaction": record.get("reaction")}
+
+        return {
+            "num_records": self.num_records,
+            "num_clusters": len(self.clusters),
+            "num_removed": len(self.removed),
+            "candidates": self.candidates,
+            "clusters": [
+                {
+                    "canonical": describe(cluster.canonical),
+                    "duplicates": [describe(d) for d in cluster.duplicates],
+                    "signals": cluster.signals,
+                }
+                for cluster in self.clusters
+            ],
+        }
+
+
+def _completeness(record: Dict[str, Any]) -> Tuple[int, int, int]:
+    """Sort key preferring records with more fields filled in, then longer text."""
+    filled = sum(1 for value in record.values() if value not in (None, "", [], {}))
+    return filled, len(str(record.get("description", ""))), len(str(record.get("tikz", "")))
+
+
+def find_duplicates(
+    records: List[Dict[str, Any]],
+    vectors: Optional[np.ndarray] = None,
+    tikz_threshold: float = 0.9,
+    embedding_threshold: float = 0.97,
+    num_perm: int = DEFAULT_NUM_PERM,
+    shingle_size: int = DEFAULT_SHINGLE_SIZE,
+    seed: int = 1,
+) -> DedupReport:
+    """
+    Find clusters of near-duplicate records.
+
+    Args:
+        records: KB records
+        vectors: Optional embedding matrix aligned with ``records`` (zero rows
+            are skipped); without it only the TikZ signal is used
+        tikz_threshold: Minimum estimated Jaccard similarity of TikZ shingles
+        embedding_threshold: Minimum cosine similarity of embeddings
+        num_perm: MinHash signature length (and SimHash bits)
+        shingle_size: Tokens per TikZ shingle
+        seed: Seed of the hash functions and hyperplanes
+
+    Returns:
+        DedupReport with one cluster per group of duplicates
+    """
+    n = len(records)
+    union_find = _UnionFind(n)
+    signals: Dict[Tuple[int, int], str] = {}
+    keys = [physics_key(record) for record in records]
+    candidates = 0
+
+    # TikZ source: MinHash/LSH, verified by estimated Jaccard similarity
+    hasher = MinHasher(num_perm, seed)
+    positions, signatures = [], []
+    for position, record in enumerate(records):
+        signature = hasher.signature(tikz_shingles(record.get("tikz", ""), shingle_size))
+        if signature is not None:
+            positions.append(position)
+            signatures.append(signature)
+    if signatures:
+        codes = np.vstack(signatures)
+        row_of = {position: row for row, position in enumerate(positions)}
+        bands, rows = lsh_params(tikz_threshold, num_perm)
+        for first, other in _band_candidates(codes, positions, [keys[p] for p in positions], bands, rows):
+            if union_find.find(first) == union_find.find(other):
+                continue
+            candidates += 1
+            if hasher.jaccard(codes[row_of[first]], codes[row_of[other]]) >= tikz_threshold:
+                union_find.union(first, other)
+                signals[(first, other)] = "tikz"
+
+    # Embeddings: random-hyperplane LSH, verified by cosine similarity
+    if vectors is not None and len(vectors):
+        matrix = np.asarray(vectors, dtype=np.float32)
+        norms = np.linalg.norm(matrix, axis=1)
+        positions = [int(i) for i in np.flatnonzero(norms > 0)]
+        if positions:
+            unit = matrix[positions] / norms[positions, None]
+            rng = np.random.RandomState(seed)
+            planes = rng.standard_normal((unit.shape[1], num_perm)).astype(np.float32)
+            bits = (unit @ planes) > 0
+            bit_agreement = 1.0 - math.acos(max(-1.0, min(1.0, embedding_threshold))) / math.pi
+            bands, rows = lsh_params(bit_agreement, num_perm)
+            row_of = {position: row for row, position in enumerate(positions)}
+            for first, other in _band_candidates(bits, positions, [keys[p] for p in positions], bands, rows):
+                if union_find.find(first) == union_find.find(other):
+                    continue
+                candidates += 1
+                if float(unit[row_of[first]] @ unit[row_of[other]]) >= embedding_threshold:
+                    union_find.union(first, other)
+                    signals[(first, other)] = "embedding"
+
+    members: Dict[int, List[int]] = {}
+    for position in range(n):
+        members.setdefault(union_find.find(position), []).append(position)
+    signals_by_root: Dict[int, set] = {}
+    for (first, _), signal in signals.items():
+        signals_by_root.setdefault(union_find.find(first), set()).add(signal)
+
+    clusters = []
+    for root, group in members.items():
+        if len(group) < 2:
+            continue
+        canonical = max(group, key=lambda i: (_completeness(records[i]), -i))
+        clusters.append(DuplicateCluster(canonical, group, sorted(signals_by_root.get(root, ()))))
+    clusters.sort(key=lambda cluster: cluster.canonical)
+
+    report = DedupReport(num_records=n, clusters=clusters, candidates=candidates)
+    logger.info(
+        f"Found {len(clusters)} duplicate clusters in {n} records "
+        f"({len(report.removed)} duplicates, {candidates} candidates verified)"
+    )
+    return report
+
+
+def compact_records(records: List[Dict[str, Any]], report: DedupReport) -> List[Dict[str, Any]]:
+    """Records without the duplicates of a report, canonical records in KB order."""
+    return [records[i] for i in report.keep_positions()]
+
+
+if __name__ == "__main__":
+    import argparse
+    import json
+
+    from .data_loader import deduplicate_kb_examples, iter_kb_examples, write_kb_examples
+    from .embedding_backends import get_embedding_backend
+    from .embeddings import normalize_rows
+    from .index_builder import record_index_text
+    from ...shared_libraries.config import config
+
+    kb_config = config.knowledge_base
+    parser = argparse.ArgumentParser(description="Report near-duplicate KB records and write a compacted KB")
+    parser.add_argument("--source", default=None, help="KB .json/.jsonl file or sharded KB (default: bundled KB)")
+    parser.add_argument("--output", default=None, help="Compacted KB file (.json or .jsonl); omit to only report")
+    parser.add_argument("--report", default=None, help="Write the duplicate clusters as JSON")
+    parser.add_argument("--tikz-threshold", type=float, default=kb_config.dedup_tikz_threshold)
+    parser.add_argument("--embedding-threshold", type=float, default=kb_config.dedup_embedding_threshold)
+    parser.add_argument("--no-embeddings", action="store_true", help="Use the TikZ signal only")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    # Duplicates are found across the whole KB, so it is held in memory
+    examples = list(iter_kb_examples(args.source))
+
+    vectors = None
+    if not args.no_embeddings:
+        backend = get_embedding_backend()
+        embeddings = backend.embed_documents([record_index_text(e) for e in examples])
+        vectors = normalize_rows([e if e else [0.0] * backend.dim for e in embeddings])
+
+    compacted, report = deduplicate_kb_examples(
+        examples,
+        vectors=vectors,
+        tikz_threshold=args.tikz_threshold,
+        embedding_threshold=args.embedding_threshold,
+    )
+    for cluster in report.clusters:
+        kept = examples[cluster.canonical]
+        print(f"[{', '.join(cluster.signals)}] keep #{cluster.canonical} {kept.get('topic')}: {kept.get('reaction')}")
+        for position in cluster.duplicates:
+            print(f"    drop #{position} {examples[position].get('topic')}: {examples[position].get('reaction')}")
+    print(f"{len(report.clusters)} clusters, {len(report.removed)} duplicates, {len(compacted)}/{len(examples)} records kept")
+
+    if args.report:
+        with open(args.report, "w", encoding="utf-8") as f:
+            json.dump(report.to_dict(examples), f, indent=2, ensure_ascii=False)
+    if args.output:
+        write_kb_examples(compacted, args.output)
+        print(f"Wrote compacted KB to {args.output}")
@@ -0,0 +1,220 @@
+"""
+Pluggable embedding backends for KB and physics rules search.
+
+The backend is selected by ``ModelConfig.embedding_model`` (``EMBEDDING_MODEL``):
+
+- any Gemini embedding model (default ``text-embedding-004``) uses the
+  ``embed_content`` API
+- ``local-ngram`` uses hashed character n-gram vectors computed with NumPy on
+  the CPU. It needs no network or API key, so queries are embedded in
+  microseconds and results are reproducible offline.
+
+Each backend writes its vectors to its own index files (see ``store_suffix``),
+so switching backends never mixes vectors from different models.
+"""
+
+import re
+import threading
+import unicodedata
+import zlib
+from functools import lru_cache
+from typing import Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from .embeddings import embed_batch, get_embedding
+from ...shared_libraries.config import config
+
+# Model names that select the local hashed n-gram backend
+LOCAL_NGRAM_MODEL = "local-ngram"
+LOCAL_NGRAM_DIM = 1024
+
+_WORD_RE = re.compile(r"[^\W_]+|[+\-^\\]", re.UNICODE)
+
+
+class EmbeddingBackend:
+    """
+    Interface of an embedding backend.
+
+    Attributes:
+        model_name: Name stored in index manifests to detect stale vectors
+        dim: Vector dimension
+        remote: True if embedding requires a network call
+    """
+
+    model_name: str = ""
+    dim: int = 0
+    remote: bool = False
+
+    @property
+    def store_suffix(self) -> str:
+        """Suffix appended to index file names written with this backend."""
+        return "_" + re.sub(r"[^a-z0-9]+", "_", self.model_name.lower()).strip("_")
+
+    def embed_documents(
+        self,
+        texts: List[str],
+        batch_size: Optional[int] = None,
+        progress_callback: Optional[Callable[[int, int], None]] = None,
+        max_retries: Optional[int] = None,
+    ) -> List[Optional[List[float]]]:
+        """
+        Embed texts that are indexed for search.
+
+        Args:
+            texts: Texts to embed
+            batch_size: Texts per API request (ignored by local backends)
+            progress_callback: Called with (completed, total)
+            max_retries: Retries per failed API request (ignored by local backends)
+
+        Returns:
+            List of embeddings aligned with ``texts``; None where embedding failed
+        """
+        raise NotImplementedError
+
+    def embed_query(self, text: str) -> List[float]:
+        """
+        Embed a search query.
+
+        Returns:
+            Embedding vector, or an empty list on failure
+        """
+        raise NotImplementedError
+
+
+class GeminiEmbeddingBackend(EmbeddingBackend):
+    """Embeddings from the Gemini ``embed_content`` API."""
+
+    remote = True
+
+    def __init__(self, model_name: str = "text-embedding-004", dim: int = 768):
+        if not model_name.startswith("models/"):
+            model_name = f"models/{model_name}"
+        self.model_name = model_name
+        self.dim = dim
+
+    @property
+    def store_suffix(self) -> str:
+        # Gemini vectors keep the original index file names
+        return ""
+
+    def embed_documents(
+        self,
+        texts: List[str],
+        batch_size: Optional[int] = None,
+        progress_callback: Optional[Callable[[int, int], None]] = None,
+        max_retries: Optional[int] = None,
+    ) -> List[Optional[List[float]]]:
+        return embed_batch(
+            texts,
+            self.model_name,
+            batch_size=batch_size,
+            max_retries=max_retries,
+            progress_callback=progress_callback,
+        )
+
+    def embed_query(self, text: str) -> List[float]:
+        return get_embedding(text, self.model_name)
+
+
+@lru_cache(maxsize=50000)
+def _word_features(word: str, min_n: int, max_n: int, dim: int) -> Tuple[np.ndarray, np.ndarray]:
+    """Hashed bucket indices and signs of a word and its character n-grams."""
+    padded = f" {word} "
+    grams = [f"w:{word}"]
+    for n in range(min_n, max_n + 1):
+        grams.extend(padded[i:i + n] for i in range(max(1, len(padded) - n + 1)))
+
+    # crc32 is stable across processes, unlike hash()
+    hashes = np.fromiter(
+        (zlib.crc32(gram.encode("utf-8")) for gram in grams), dtype=np.uint32, count=len(grams)
+    )
+    indices = (hashes % dim).astype(np.intp)
+    # The top bit picks the sign so colliding features tend to cancel out
+    signs = np.where(hashes & 0x80000000, -1.0, 1.0).astype(np.float32)
+    return indices, signs
+
+
+class HashedNgramEmbeddingBackend(EmbeddingBackend):
+    """
+    Local CPU embeddings from hashed character n-grams.
+
+    Every word contributes itself plus its character n-grams (word-boundary
+    padded), hashed into ``dim`` signed buckets. Bucket counts are damped
+    with ``log1p`` (sublinear term frequency) and the vector is L2-normalized,
+    so cosine similarity behaves like TF-weighted n-gram overlap.
+    """
+
+    remote = False
+
+    def __init__(self, dim: int = LOCAL_NGRAM_DIM, ngram_range: Tuple[int, int] = (3, 5)):
+        self.dim = dim
+        self.ngram_range = ngram_range
+        self.model_name = f"{LOCAL_NGRAM_MODEL}-{ngram_range[0]}-{ngram_range[1]}-{dim}"
+
+    def _embed(self, text: str) -> np.ndarray:
+        """Embed one text as a unit-length float32 vector."""
+        vector = np.zeros(self.dim, dtype=np.float32)
+        text = unicodedata.normalize("NFKC", text or "").lower()
+        min_n, max_n = self.ngram_range
+        for word in _WORD_RE.findall(text):
+            indices, signs = _word_features(word, min_n, max_n, self.dim)
+            np.add.at(vector, indices, signs)
+
+        vector = np.sign(vector) * np.log1p(np.abs(vector))
+        norm = float(np.linalg.norm(vector))
+        if norm > 0:
+            vector /= norm
+        return vector
+
+    def embed_documents(
+        self,
+        texts: List[str],
+        batch_size: Optional[int] = None,
+        progress_callback: Optional[Callable[[int, int], None]] = None,
+        max_retries: Optional[int] = None,
+    ) -> List[Optional[List[float]]]:
+        embeddings = [self._embed(text).tolist() for text in texts]
+        if progress_callback:
+            progress_callback(len(texts), len(texts))
+        return embeddings
+
+    def embed_query(self, text: str) -> List[float]:
+        return self._embed(text).tolist()
+
+
+def is_local_embedding_model(model_name: str) -> bool:
+    """Check whether an embedding model name selects the local backend."""
+    return model_name.lower().startswith(LOCAL_NGRAM_MODEL)
+
+
+_backends: Dict[str, EmbeddingBackend] = {}
+_backends_lock = threading.Lock()
+
+
+def get_embedding_backend(model_name: Optional[str] = None) -> EmbeddingBackend:
+    """
+    Get the embedding backend for a model name.
+
+    Args:
+        model_name: Embedding model (defaults to ``config.models.embedding_model``).
+            ``local-ngram`` selects the local backend; ``local-ngram-<dim>``
+            also sets its dimension. Anything else is a Gemini model.
+
+    Returns:
+        Shared backend instance
+    """
+    if model_name is None:
+        model_name = config.models.embedding_model
+
+    with _backends_lock:
+        backend = _backends.get(model_name)
+        if backend is None:
+            if is_local_embedding_model(model_name):
+                suffix = model_name[len(LOCAL_NGRAM_MODEL):].lstrip("-")
+                dim = int(suffix) if suffix.isdigit() else LOCAL_NGRAM_DIM
+                backend = HashedNgramEmbeddingBackend(dim=dim)
+            else:
+                backend = GeminiEmbeddingBackend(model_name, dim=config.models.embedding_dim)
+            _backends[model_name] = backend
+    return backend
@@ -0,0 +1,215 @@
+"""
+Disk-backed embedding cache shared across processes.
+
+Embeddings are stored in a SQLite database (WAL mode, so several workers can
+read and write concurrently) keyed by model name, task type and a hash of the
+normalized text. When the number of entries exceeds the configured limit the
+least recently used entries are evicted.
+
+Access times are only rewritten when they are older than a few minutes, so
+cache hits stay read-only and readers do not queue on the SQLite write lock.
+"""
+
+import hashlib
+import logging
+import sqlite3
+import threading
+import time
+import unicodedata
+from array import array
+from pathlib import Path
+from typing import List, Optional
+
+from ...shared_libraries.config import config
+
+logger = logging.getLogger(__name__)
+
+# A hit rewrites last_access only if it is older than this; eviction order is
+# approximate within the interval
+ACCESS_UPDATE_INTERVAL_SECONDS = 300.0
+
+
+def normalize_text(text: str) -> str:
+    """Normalize text for cache keys: Unicode NFC and collapsed whitespace."""
+    return " ".join(unicodedata.normalize("NFC", text).split())
+
+
+def make_cache_key(text: str, model_name: str, task_type: str) -> str:
+    """
+    Build the cache key for an embedding request.
+
+    Args:
+        text: Text that is embedded
+        model_name: Embedding model name
+        task_type: Embedding task type (case-insensitive)
+
+    Returns:
+        Hex digest identifying the request
+    """
+    payload = "\x1f".join([model_name, task_type.lower(), normalize_text(text)])
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class EmbeddingCache:
+    """
+    Persistent LRU cache of embedding vectors backed by SQLite.
+
+    Vectors are stored as packed float32 blobs. Access times are tracked so
+    that eviction removes the least recently used entries first; a hit only
+    updates an access time older than ``access_update_interval`` seconds.
+    """
+
+    def __init__(
+        self,
+        path: Path,
+        max_entries: int = 50000,
+        access_update_interval: float = ACCESS_UPDATE_INTERVAL_SECONDS,
+    ):
+        self.path = Path(path)
+        self.max_entries = max_entries
+        self.access_update_interval = access_update_interval
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+        self._writes_since_evict = 0
+
+    def _connect(self) -> sqlite3.Connection:
+        """Open the database lazily and create the schema if needed."""
+        if self._conn is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(str(self.path), timeout=5.0, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS embeddings (
+                    key TEXT PRIMARY KEY,
+                    model TEXT NOT NULL,
+                    task_type TEXT NOT NULL,
+                    vector BLOB NOT NULL,
+                    last_access REAL NOT NULL
+                )
+                """
+            )
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_embeddings_last_access ON embeddings(last_access)"
+            )
+            conn.commit()
+            self._conn = conn
+        return self._conn
+
+    def get(self, text: str, model_name: str, task_type: str) -> Optional[List[float]]:
+        """
+        Look up a cached embedding.
+
+        Returns:
+            The embedding vector, or None on a miss or cache error
+        """
+        key = make_cache_key(text, model_name, task_type)
+        try:
+            with self._lock:
+                conn = self._connect()
+                row = conn.execute(
+                    "SELECT vector, last_access FROM embeddings WHERE key = ?", (key,)
+                ).fetchone()
+                if row is None:
+                    return None
+                now = time.time()
+                if now - row[1] >= self.access_update_interval:
+                    conn.execute(
+                        "UPDATE embeddings SET last_access = ? WHERE key = ?", (now, key)
+                    )
+                    conn.commit()
+        except sqlite3.Error as e:
+            logger.warning(f"Embedding cache read failed: {e}")
+            return None
+
+        vector = array("f")
+        vector.frombytes(row[0])
+        return vector.tolist()
+
+    def put(self, text: str, model_name: str, task_type: str, embedding: List[float]):
+        """Store an embedding, evicting old entries if the cache is full."""
+        if not embedding:
+            return
+
+        key = make_cache_key(text, model_name, task_type)
+        blob = array("f", embedding).tobytes()
+        try:
+            with self._lock:
+                conn = self._connect()
+                conn.execute(
+                    "INSERT OR REPLACE INTO embeddings (key, model, task_type, vector, last_access) "
+                    "VALUES (?, ?, ?, ?, ?)",
+                    (key, model_name, task_type.lower(), blob, time.time()),
+                )
+                conn.commit()
+                self._writes_since_evict += 1
+                # Checking the size on every write would add a COUNT(*) per miss
+                if self._writes_since_evict >= max(1, self.max_entries // 100):
+                    self._evict(conn)
+        except sqlite3.Error as e:
+            logger.warning(f"Embedding cache write failed: {e}")
+
+    def _evict(self, conn: sqlite3.Connection):
+        """Drop least recently used entries above ``max_entries``."""
+        self._writes_since_evict = 0
+        (count,) = conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()
+        excess = count - self.max_entries
+        if excess <= 0:
+            return
+        conn.execute(
+            "DELETE FROM embeddings WHERE key IN "
+            "(SELECT key FROM embeddings ORDER BY last_access ASC LIMIT ?)",
+            (excess,),
+        )
+        conn.commit()
+        logger.info(f"Evicted {excess} entries from embedding cache")
+
+    def __len__(self) -> int:
+        try:
+            with self._lock:
+                (count,) = self._connect().execute("SELECT COUNT(*) FROM embeddings").fetchone()
+            return count
+        except sqlite3.Error:
+            return 0
+
+    def clear(self):
+        """Remove all cached embeddings."""
+        with self._lock:
+            conn = self._connect()
+            conn.execute("DELETE FROM embeddings")
+            conn.commit()
+
+    def close(self):
+        """Close the underlying database connection."""
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+
+_cache: Optional[EmbeddingCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_embedding_cache() -> Optional[EmbeddingCache]:
+    """
+    Get the process-wide embedding cache.
+
+    Returns:
+        The shared EmbeddingCache, or None if disabled via configuration
+    """
+    global _cache
+
+    kb_config = config.knowledge_base
+    if not kb_config.embedding_cache_enabled:
+        return None
+
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = EmbeddingCache(
+                    kb_config.embedding_cache_path,
+                    max_entries=kb_config.embedding_cache_max_entries,
+                )
+    return _cache
@@ -2,19 +2,103 @@
 KB Embedding Manager with singleton pattern for managing embeddings cache.
 """
 
-import os
-import json
 import pickle
 import asyncio
-from typing import List, Dict, Any, Optional
+import threading
+from dataclasses import dataclass, field
+from typing import List, Dict, Any, Hashable, Optional, Tuple
 import logging
 from pathlib import Path
 
-from .data_loader import load_kb_examples
-from .embeddings import get_embedding
+import numpy as np
+
+from .data_loader import get_kb_data_path, load_kb_examples, record_key
+from .embeddings import content_hash, normalize_rows, top_k_cosine
+from .embedding_backends import get_embedding_backend
+from .hot_reload import watch_kb_files
+from .quantized_store import QuantizedIndex
+from .result_cache import files_version
+from .vector_store import save_vector_store, load_vector_store, delete_vector_store, store_paths
+from ...shared_libraries.config import config
 
 logger = logging.getLogger(__name__)
 
+# Version 2 pickle caches key embeddings by content hash instead of list position
+LEGACY_CACHE_FORMAT_VERSION = 2
+
+
+@dataclass
+class EmbeddingSnapshot:
+    """
+    KB examples and the search structures built from their embeddings.
+    
+    ``KBEmbeddingManager`` replaces its snapshot as a whole, so a search that
+    holds one keeps consistent examples, matrix rows and row indices while
+    a reload builds the next.
+    
+    Attributes:
+        version: Increases with every snapshot swapped in
+        source: Version token of the KB file the examples were read from
+        kb_examples: KB examples
+        embedding_matrix: Pre-normalized float32 matrix, one row per embedded example
+        matrix_indices: KB example index of each matrix row
+        quantized_index: int8 index over ``embedding_matrix``, if enabled
+    """
+    version: int
+    source: Hashable
+    kb_examples: List[Dict[str, Any]]
+    embedding_matrix: Optional[np.ndarray] = None
+    matrix_indices: List[int] = field(default_factory=list)
+    quantized_index: Optional[QuantizedIndex] = None
+    _row_by_key: Optional[Dict[Tuple[str, str], int]] = field(default=None, repr=False)
+    
+    def search(self, query_embedding: List[float], top_k: int = 5) -> List[Tuple[int, float]]:
+        """Find the examples most similar to a query embedding as (example_index, cosine)."""
+        if self.embedding_matrix is None:
+            return []
+        if self.quantized_index is not None:
+            hits = self.quantized_index.search(query_embedding, top_k)
+        else:
+            hits = top_k_cosine(self.embedding_matrix, query_embedding, top_k)
+        return [(self.matrix_indices[row], score) for row, score in hits]
+    
+    def record_vectors(self, records: List[Dict[str, Any]]) -> Optional[np.ndarray]:
+        """Embedding matrix rows of KB records, zero for records not in the matrix."""
+        if self.embedding_matrix is None:
+            return None
+        if self._row_by_key is None:
+            self._row_by_key = {
+                record_key(self.kb_examples[i]): row for row, i in enumerate(self.matrix_indices)
+            }
+        
+        vectors = np.zeros((len(records), self.embedding_matrix.shape[1]), dtype=np.float32)
+        for n, record in enumerate(records):
+            row = self._row_by_key.get(record_key(record))
+            if row is not None:
+                vectors[n] = self.embedding_matrix[row]
+        return vectors
+
+
+@dataclass
+class _EmbeddingBuild:
+    """
+    KB examples and embeddings that a load works on before they are swapped in.
+    
+    Attributes:
+        kb_examples: KB examples
+        content_hashes: Content hash of each example's embedding text
+        embeddings_cache: Example index -> embedding
+        store_matrix: Memory-mapped matrix of the vector store, if opened
+        store_rows: Example index -> row of ``store_matrix``
+        loaded_from_legacy: Embeddings came from the legacy pickle cache
+    """
+    kb_examples: List[Dict[str, Any]]
+    content_hashes: List[str]
+    embeddings_cache: Dict[int, Any] = field(default_factory=dict)
+    store_matrix: Optional[np.ndarray] = None
+    store_rows: Dict[int, int] = field(default_factory=dict)
+    loaded_from_legacy: bool = False
+
 
 class KBEmbeddingManager:
     """
@@ -32,11 +116,39 @@ class KBEmbeddingManager:
             # Initialize instance variables
             cls._instance.kb_examples = []
             cls._instance.embeddings_cache = {}
-            cls._instance.model_name = "models/text-embedding-004"
+            cls._instance.content_hashes = []
+            cls._instance.snapshot = None
+            cls._instance._snapshot_version = 0
+            cls._instance._source = None
+            cls._instance._store_matrix = None
+            cls._instance._store_rows = {}
+            cls._instance._loaded_from_legacy = False
+            cls._instance.backend = get_embedding_backend()
+            cls._instance.batch_size = config.models.embedding_batch_size
             cls._instance.is_initialized = False
             cls._instance._lock = asyncio.Lock()
+            cls._instance._reload_lock = threading.Lock()
+            # Guards swapping in examples, embeddings and snapshot together
+            cls._instance._state_lock = threading.Lock()
+            cls._instance._loads_started = 0
+            cls._instance._loads_applied = 0
         return cls._instance
     
+    @property
+    def embedding_matrix(self) -> Optional[np.ndarray]:
+        """Embedding matrix of the current snapshot."""
+        return self.snapshot.embedding_matrix if self.snapshot is not None else None
+    
+    @property
+    def matrix_indices(self) -> List[int]:
+        """KB example index of each row of ``embedding_matrix``."""
+        return self.snapshot.matrix_indices if self.snapshot is not None else []
+    
+    @property
+    def quantized_index(self) -> Optional[QuantizedIndex]:
+        """int8 index of the current snapshot, if enabled."""
+        return self.snapshot.quantized_index if self.snapshot is not None else None
+    
     @property
     def cache_dir(self) -> Path:
         """Get the cache directory for storing embeddings."""
@@ -46,15 +158,36 @@ class KBEmbeddingManager:
         cache_dir.mkdir(parents=True, exist_ok=True)
         return cache_dir
     
+    @property
+    def model_name(self) -> str:
+        """Name of the embedding model used by the active backend."""
+        return self.backend.model_name
+    
+    @property
+    def store_path(self) -> Path:
+        """Get the vector store path (without extension) of the active backend."""
+        return self.cache_dir / f"kb_embeddings{self.backend.store_suffix}"
+    
     @property
     def cache_file(self) -> Path:
-        """Get the cache file path."""
+        """Get the cache file path (the memory-mapped embedding matrix)."""
+        return store_paths(self.store_path)[0]
+    
+    @property
+    def legacy_cache_file(self) -> Path:
+        """Get the path of the legacy pickle cache, read only for migration."""
         return self.cache_dir / "kb_embeddings.pkl"
     
     def reset(self):
         """Reset the manager state. Useful for testing."""
         self.kb_examples = []
         self.embeddings_cache = {}
+        self.content_hashes = []
+        self.snapshot = None
+        self._source = None
+        self._store_matrix = None
+        self._store_rows = {}
+        self._loaded_from_legacy = False
         self.is_initialized = False
     
     async def initialize(self, force_regenerate: bool = False):
@@ -69,67 +202,157 @@ class KBEmbeddingManager:
                 return
                 
             logger.info("Initializing KB Embedding Manager...")
-            
-            # Load KB examples
-            self.kb_examples = load_kb_examples()
-            logger.info(f"Loaded {len(self.kb_examples)} KB examples")
-            
-            # Try to load cached embeddings
-            if not force_regenerate and self.load_embeddings():
-                self.is_initialized = True
-                return
-                
-            # Generate embeddings
-            await self.generate_embeddings()
-            
-            # Save to cache
-            self.save_embeddings()
-            
+            await self._load(force_regenerate)
             self.is_initialized = True
             logger.info("KB Embedding Manager initialized successfully")
+        
+        watch_kb_files("KB embeddings", lambda: [Path(get_kb_data_path())], self.reload)
     
-    async def generate_embeddings(self):
-        """Generate embeddings for all KB examples."""
-        logger.info("Generating embeddings for KB examples...")
-        self.embeddings_cache = {}
+    async def _load(self, force_regenerate: bool = False):
+        """
+        Load the KB, embed new or changed examples and swap in a new snapshot.
         
-        # Create tasks for parallel embedding generation
-        tasks = []
-        for i, example in enumerate(self.kb_examples):
-            text_to_embed = self._get_text_for_embedding(example)
-            tasks.append(self._generate_single_embedding(i, text_to_embed))
+        The load works on a local _EmbeddingBuild; its examples, embeddings
+        and snapshot replace the manager's together under ``_state_lock``,
+        so a reload on the watcher thread and ``initialize`` never mix their
+        state. A load that finishes after a later-started one is discarded.
+        """
+        with self._state_lock:
+            self._loads_started += 1
+            ticket = self._loads_started
         
-        # Execute tasks with concurrency limit
-        semaphore = asyncio.Semaphore(10)  # Limit concurrent API calls
+        # Version the file before reading it, so a write during the load triggers another reload
+        source = self._source_version()
         
-        async def limited_task(task):
-            async with semaphore:
-                return await task
-                
-        limited_tasks = [limited_task(task) for task in tasks]
-        results = await asyncio.gather(*limited_tasks, return_exceptions=True)
-        
-        # Process results
-        success_count = 0
-        for result in results:
-            if isinstance(result, tuple) and not isinstance(result, Exception):
-                idx, embedding = result
-                if embedding:
-                    self.embeddings_cache[idx] = embedding
-                    success_count += 1
-            elif isinstance(result, Exception):
-                logger.error(f"Error generating embedding: {result}")
+        # Load KB examples
+        kb_examples = load_kb_examples()
+        logger.info(f"Loaded {len(kb_examples)} KB examples")
+        build = _EmbeddingBuild(kb_examples, self._compute_content_hashes(kb_examples))
+        
+        # Reuse cached embeddings whose content hash still matches
+        if not force_regenerate:
+            self._read_embeddings(build)
+        
+        # Embed only new or changed examples
+        missing = [i for i in range(len(kb_examples)) if i not in build.embeddings_cache]
+        if missing:
+            await self._embed(build, missing)
+        if ticket < self._loads_applied:
+            # Do not overwrite the store of a newer KB version
+            logger.info("Discarding a KB embedding load superseded by a newer one")
+            return
+        if missing or build.loaded_from_legacy:
+            self._write_embeddings(build)
+        
+        snapshot = self._build_snapshot(build, source)
+        with self._state_lock:
+            if ticket < self._loads_applied:
+                logger.info("Discarding a KB embedding load superseded by a newer one")
+                return
+            self._loads_applied = ticket
+            self._apply(build, snapshot)
+    
+    def _current_build(self) -> _EmbeddingBuild:
+        """A copy of the manager's examples and embeddings to work on."""
+        return _EmbeddingBuild(
+            kb_examples=self.kb_examples,
+            content_hashes=self.content_hashes,
+            embeddings_cache=dict(self.embeddings_cache),
+            store_matrix=self._store_matrix,
+            store_rows=dict(self._store_rows),
+            loaded_from_legacy=self._loaded_from_legacy,
+        )
+    
+    def _apply(self, build: _EmbeddingBuild, snapshot: Optional[EmbeddingSnapshot] = None):
+        """Make a build (and its snapshot) current. Call with ``_state_lock`` held."""
+        self.kb_examples = build.kb_examples
+        self.content_hashes = build.content_hashes
+        self.embeddings_cache = build.embeddings_cache
+        self._store_matrix = build.store_matrix
+        self._store_rows = build.store_rows
+        self._loaded_from_legacy = build.loaded_from_legacy
+        if snapshot is not None:
+            # Searches pick up the complete snapshot with a single reference swap
+            self._snapshot_version += 1
+            snapshot.version = self._snapshot_version
+            self._source = snapshot.source
+            self.snapshot = snapshot
+    
+    @staticmethod
+    def _source_version() -> Hashable:
+        """Version token of the KB data file."""
+        return files_version([Path(get_kb_data_path())])
+    
+    def reload(self, force: bool = False) -> bool:
+        """
+        Reload the KB and its embeddings if the KB file changed.
+        
+        Only new or changed examples are embedded. The new snapshot is swapped
+        in once it is complete; searches holding the old one finish on it.
+        A manager that was never initialized is left alone, since its first
+        ``initialize`` reads the current file anyway.
+        
+        This blocks while the KB is embedded, on an event loop of its own, so
+        it is run on the hot-reload watcher thread; calling it from a running
+        event loop raises RuntimeError. Reloads are serialized by a thread
+        lock and are safe alongside ``initialize`` (see ``_load``).
+        
+        Args:
+            force: Reload even if the KB file is unchanged
+            
+        Returns:
+            True if a new snapshot was swapped in
+        """
+        if not self.is_initialized:
+            return False
+        with self._reload_lock:
+            current = self.snapshot
+            if not force and current is not None and current.source == self._source_version():
+                return False
+            asyncio.run(self._load())
+        logger.info(f"Swapped in KB embedding snapshot v{self.snapshot.version}")
+        return True
+    
+    async def generate_embeddings(self, indices: Optional[List[int]] = None):
+        """
+        Generate embeddings for KB examples with the configured backend.
+        
+        Args:
+            indices: Example indices to embed. If None, all examples are
+                re-embedded and previously cached vectors are discarded.
+        """
+        build = self._current_build()
+        if indices is None:
+            indices = list(range(len(build.kb_examples)))
+            build.embeddings_cache = {}
+        await self._embed(build, indices)
+        with self._state_lock:
+            self._apply(build)
+    
+    async def _embed(self, build: _EmbeddingBuild, indices: List[int]):
+        """Embed the given examples of a build into its ``embeddings_cache``."""
+        logger.info(f"Generating embeddings for {len(indices)} KB examples...")
+        
+        texts = [self._get_text_for_embedding(build.kb_examples[i]) for i in indices]
+        embeddings = await asyncio.to_thread(
+            self.backend.embed_documents,
+            texts,
+            batch_size=self.batch_size,
+            progress_callback=self._log_progress,
+        )
+        
+        generated = 0
+        for i, embedding in zip(indices, embeddings):
+            if embedding:
+                build.embeddings_cache[i] = embedding
+                generated += 1
                 
-        logger.info(f"Generated {success_count}/{len(self.kb_examples)} embeddings successfully")
+        logger.info(f"Generated {generated}/{len(indices)} embeddings successfully")
     
-    async def _generate_single_embedding(self, index: int, text: str) -> tuple:
-        """Generate embedding for a single text."""
-        try:
-            embedding = await asyncio.to_thread(get_embedding, text, self.model_name)
-            return (index, embedding)
-        except Exception as e:
-            logger.error(f"Failed to generate embedding for index {index}: {e}")
-            return (index, None)
+    @staticmethod
+    def _log_progress(completed: int, total: int):
+        """Report embedding generation progress."""
+        logger.info(f"Embedded {completed}/{total} KB examples")
     
     def _get_text_for_embedding(self, example: Dict[str, Any]) -> str:
         """Get the text representation of an example for embedding."""
@@ -151,6 +374,13 @@ class KBEmbeddingManager:
             
         return " | ".join(text_parts)
     
+    def _compute_content_hashes(self, kb_examples: List[Dict[str, Any]]) -> List[str]:
+        """Hash the embedding text of every KB example."""
+        return [
+            content_hash(self._get_text_for_embedding(example))
+            for example in kb_examples
+        ]
+    
     def get_embedding(self, index: int) -> Optional[List[float]]:
         """
         Get embedding for a specific KB example by index.
@@ -167,69 +397,214 @@ class KBEmbeddingManager:
         """Get all cached embeddings."""
         return self.embeddings_cache.copy()
     
+    def build_embedding_matrix(self):
+        """
+        Stack cached embeddings into one pre-normalized float32 matrix.
+        
+        Row ``r`` of ``embedding_matrix`` holds the embedding of KB example
+        ``matrix_indices[r]``. Examples without an embedding are skipped.
+        With ``QUANTIZED_SEARCH`` enabled an int8 copy is built for the
+        first search pass.
+        
+        The matrix is the memory-mapped store; if the store holds other
+        rows it is rewritten first. Only when it cannot be written is the
+        matrix built in memory.
+        """
+        build = self._current_build()
+        snapshot = self._build_snapshot(build, self._source)
+        with self._state_lock:
+            self._apply(build, snapshot)
+    
+    def _build_snapshot(self, build: _EmbeddingBuild, source: Hashable) -> EmbeddingSnapshot:
+        """Build the search snapshot of a build (see build_embedding_matrix)."""
+        indices = sorted(
+            i for i, embedding in build.embeddings_cache.items()
+            if embedding is not None and len(embedding) > 0
+        )
+        snapshot = EmbeddingSnapshot(version=0, source=source, kb_examples=build.kb_examples)
+        if indices:
+            if not self._store_holds(build, indices):
+                self._write_embeddings(build)
+            if self._store_holds(build, indices):
+                snapshot.embedding_matrix = build.store_matrix
+                logger.info(f"Using memory-mapped KB embedding matrix with shape {snapshot.embedding_matrix.shape}")
+            else:
+                snapshot.embedding_matrix = normalize_rows([build.embeddings_cache[i] for i in indices])
+                logger.info(f"Built KB embedding matrix with shape {snapshot.embedding_matrix.shape}")
+            snapshot.matrix_indices = indices
+            
+            search_config = config.search
+            if search_config.quantized_search:
+                snapshot.quantized_index = QuantizedIndex(
+                    snapshot.embedding_matrix, rerank_factor=search_config.quantized_rerank_factor
+                )
+                logger.info(f"Built int8 KB index ({snapshot.quantized_index.nbytes} bytes)")
+        return snapshot
+    
+    @staticmethod
+    def _store_holds(build: _EmbeddingBuild, indices: List[int]) -> bool:
+        """True if the build's memory-mapped store holds exactly these examples in order."""
+        return (
+            build.store_matrix is not None
+            and len(indices) == len(build.store_matrix)
+            and all(build.store_rows.get(i) == row for row, i in enumerate(indices))
+        )
+    
+    def search(self, query_embedding: List[float], top_k: int = 5) -> List[Tuple[int, float]]:
+        """
+        Find the KB examples most similar to a query embedding.
+        
+        Args:
+            query_embedding: Embedding vector of the query
+            top_k: Number of results to return
+            
+        Returns:
+            List of (example_index, cosine_similarity) sorted by similarity
+        """
+        snapshot = self.snapshot
+        return snapshot.search(query_embedding, top_k) if snapshot is not None else []
+    
+    def record_vectors(self, records: List[Dict[str, Any]]) -> Optional[np.ndarray]:
+        """
+        Embedding matrix rows of KB records (e.g. search results).
+        
+        Args:
+            records: KB records, possibly annotated copies
+            
+        Returns:
+            float32 matrix aligned with ``records``, with zero rows for records
+            that are not in the matrix, or None if no matrix is loaded
+        """
+        snapshot = self.snapshot
+        return snapshot.record_vectors(records) if snapshot is not None else None
+    
     def save_embeddings(self) -> bool:
         """
-        Save embeddings to disk.
+        Save embeddings to disk as a memory-mappable vector store.
+        
+        The cached embeddings are then served from the written store, so
+        they are not held in memory a second time.
         
         Returns:
             True if successful, False otherwise
         """
-        try:
-            cache_data = {
-                'embeddings': self.embeddings_cache,
-                'model_name': self.model_name,
-                'num_examples': len(self.kb_examples)
-            }
-            
-            with open(self.cache_file, 'wb') as f:
-                pickle.dump(cache_data, f)
-                
-            logger.info(f"Saved embeddings to {self.cache_file}")
-            return True
-        except Exception as e:
-            logger.error(f"Failed to save embeddings: {e}")
-            return False
+        build = self._current_build()
+        saved = self._write_embeddings(build)
+        with self._state_lock:
+            self._apply(build)
+        return saved
+    
+    def _write_embeddings(self, build: _EmbeddingBuild) -> bool:
+        """Write a build's embeddings to the vector store and reopen it (see save_embeddings)."""
+        indices = sorted(i for i in build.embeddings_cache if i < len(build.content_hashes))
+        saved = save_vector_store(
+            self.store_path,
+            ids=[build.kb_examples[i].get('id', i) for i in indices],
+            vectors=[build.embeddings_cache[i] for i in indices],
+            model_name=self.model_name,
+            content_hashes=[build.content_hashes[i] for i in indices],
+            metadata={'num_examples': len(build.kb_examples)},
+        )
+        if saved:
+            build.loaded_from_legacy = False
+            store = load_vector_store(self.store_path)
+            if store is not None:
+                build.store_matrix = store[0]
+                build.store_rows = {i: row for row, i in enumerate(indices)}
+                for i, row in build.store_rows.items():
+                    build.embeddings_cache[i] = build.store_matrix[row]
+        return saved
     
     def load_embeddings(self) -> bool:
         """
-        Load embeddings from disk.
+        Load embeddings from disk for every example whose content is unchanged.
+        
+        Cached vectors are matched to the current KB examples by content hash,
+        so inserting, removing or reordering records keeps the remaining
+        vectors aligned. Examples without a match are left out of
+        ``embeddings_cache`` for the caller to embed.
         
         Returns:
-            True if successful, False otherwise
+            True if every KB example has a cached embedding, False otherwise
         """
-        if not self.cache_file.exists():
+        build = _EmbeddingBuild(self.kb_examples, self._compute_content_hashes(self.kb_examples))
+        complete = self._read_embeddings(build)
+        with self._state_lock:
+            self._apply(build)
+        return complete
+    
+    def _read_embeddings(self, build: _EmbeddingBuild) -> bool:
+        """Fill a build with the stored embeddings of its examples (see load_embeddings)."""
+        store = load_vector_store(self.store_path)
+        if store is not None:
+            matrix, manifest = store
+            if manifest.get('model_name') != self.model_name:
+                logger.warning("Model name mismatch, regenerating embeddings")
+                return False
+            
+            row_by_hash = {digest: row for row, digest in enumerate(manifest['content_hashes'])}
+            for i, digest in enumerate(build.content_hashes):
+                row = row_by_hash.get(digest)
+                if row is not None:
+                    build.embeddings_cache[i] = matrix[row]
+                    build.store_rows[i] = row
+            build.store_matrix = matrix
+        else:
+            self._read_legacy_embeddings(build)
+        
+        logger.info(
+            f"Reused {len(build.embeddings_cache)}/{len(build.kb_examples)} "
+            f"embeddings from cache"
+        )
+        return len(build.embeddings_cache) == len(build.kb_examples)
+    
+    def _read_legacy_embeddings(self, build: _EmbeddingBuild):
+        """Load embeddings from a pickle cache written by older versions."""
+        if not self.legacy_cache_file.exists():
             logger.info("No embeddings cache file found")
-            return False
+            return
             
         try:
-            with open(self.cache_file, 'rb') as f:
+            with open(self.legacy_cache_file, 'rb') as f:
                 cache_data = pickle.load(f)
                 
-            # Validate cache
-            if cache_data.get('num_examples') != len(self.kb_examples):
-                logger.warning("Cache size mismatch, regenerating embeddings")
-                return False
-                
             if cache_data.get('model_name') != self.model_name:
                 logger.warning("Model name mismatch, regenerating embeddings")
-                return False
-                
-            self.embeddings_cache = cache_data['embeddings']
-            logger.info(f"Loaded {len(self.embeddings_cache)} embeddings from cache")
-            return True
+                return
+            
+            embeddings_by_hash = cache_data.get('embeddings', {})
+            if cache_data.get('format_version', 1) < LEGACY_CACHE_FORMAT_VERSION:
+                # Version 1 caches are keyed by list position; they can only be
+                # trusted when the KB still has the same number of examples.
+                if cache_data.get('num_examples') != len(build.kb_examples):
+                    logger.warning("Legacy cache size mismatch, regenerating embeddings")
+                    return
+                embeddings_by_hash = {
+                    build.content_hashes[i]: embedding
+                    for i, embedding in embeddings_by_hash.items()
+                    if isinstance(i, int) and i < len(build.content_hashes)
+                }
+            
+            for i, digest in enumerate(build.content_hashes):
+                embedding = embeddings_by_hash.get(digest)
+                if embedding:
+                    build.embeddings_cache[i] = embedding
+            build.loaded_from_legacy = bool(build.embeddings_cache)
             
         except Exception as e:
-            logger.error(f"Failed to load embeddings: {e}")
-            return False
+            logger.error(f"Failed to load legacy embeddings: {e}")
     
     def clear_cache(self):
         """Clear the embeddings cache from memory and disk."""
         self.embeddings_cache = {}
+        self.snapshot = None
+        self._store_matrix = None
+        self._store_rows = {}
         self.is_initialized = False
         
         if self.cache_file.exists():
             try:
-                self.cache_file.unlink()
+                delete_vector_store(self.store_path)
                 logger.info("Deleted embeddings cache file")
             except Exception as e:
                 logger.error(f"Failed to delete cache file: {e}")
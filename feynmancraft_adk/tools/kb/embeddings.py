@@ -3,10 +3,48 @@ Embedding utilities for KB search and similarity operations.
 """
 
 import google.generativeai as genai
-from typing import List, Optional, Dict, Any
+from google.api_core import exceptions as api_exceptions
+from google.auth import exceptions as auth_exceptions
+from typing import List, Optional, Dict, Any, Tuple, Callable
 import numpy as np
-from functools import lru_cache
 import hashlib
+import logging
+import os
+import time
+
+from .embedding_cache import get_embedding_cache
+from ...shared_libraries.config import config
+
+logger = logging.getLogger(__name__)
+
+# Maximum number of texts the embedding API accepts per request
+MAX_BATCH_SIZE = 100
+
+# Errors worth retrying: rate limits, server errors, timeouts and dropped connections.
+# Anything else (bad request, invalid key, missing credentials) fails the same way again.
+TRANSIENT_ERRORS = (
+    api_exceptions.TooManyRequests,
+    api_exceptions.ServerError,
+    api_exceptions.DeadlineExceeded,
+    ConnectionError,
+    TimeoutError,
+)
+
+# Errors after which no further request can succeed
+CREDENTIAL_ERRORS = (
+    api_exceptions.Unauthenticated,
+    api_exceptions.PermissionDenied,
+    auth_exceptions.DefaultCredentialsError,
+)
+
+
+def embedding_credentials_available() -> bool:
+    """True if an API key or application credentials are configured for the embedding API."""
+    return bool(
+        os.getenv("GOOGLE_API_KEY")
+        or config.api.google_api_key
+        or os.getenv("GOOGLE_APPLICATION_CREDENTIALS")
+    )
 
 
 def _hash_text(text: str) -> str:
@@ -14,11 +52,24 @@ def _hash_text(text: str) -> str:
     return hashlib.md5(text.encode()).hexdigest()
 
 
-@lru_cache(maxsize=1000)
+def content_hash(text: str) -> str:
+    """
+    Stable hash of the text a record is embedded from.
+    
+    Used to match stored embeddings to records regardless of their position.
+    """
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
 def get_embedding(text: str, model_name: str = "models/text-embedding-004") -> List[float]:
     """
     Get embedding for text using Gemini embedding model.
     
+    Successful results are kept in the persistent embedding cache, so a
+    query embedded by any worker is not sent to the API again. Failures
+    (no credentials, API errors) are not cached and are retried on the
+    next call.
+    
     Args:
         text: Text to embed
         model_name: Name of the embedding model to use
@@ -26,13 +77,26 @@ def get_embedding(text: str, model_name: str = "models/text-embedding-004") -> L
     Returns:
         List of float values representing the embedding
     """
+    cache = get_embedding_cache()
+    if cache is not None:
+        cached = cache.get(text, model_name, "retrieval_query")
+        if cached:
+            return cached
+    
+    if not embedding_credentials_available():
+        logger.warning("No API key available for embeddings")
+        return []
+    
     try:
         result = genai.embed_content(
             model=model_name,
             content=text,
             task_type="retrieval_query",
         )
-        return result['embedding']
+        embedding = result['embedding']
+        if cache is not None:
+            cache.put(text, model_name, "retrieval_query", embedding)
+        return embedding
     except Exception as e:
         print(f"Error getting embedding: {str(e)}")
         return []
@@ -57,6 +121,129 @@ def embed_and_cache(texts: List[str], model_name: str = "models/text-embedding-0
     return embeddings
 
 
+def _embed_request_with_retry(
+    texts: List[str],
+    model_name: str,
+    task_type: str,
+    max_retries: int,
+    backoff_seconds: float,
+) -> List[List[float]]:
+    """
+    Send one batched embedding request.
+    
+    Transient errors are retried with exponential backoff; any other error
+    is raised at once.
+    """
+    for attempt in range(max_retries + 1):
+        try:
+            result = genai.embed_content(
+                model=model_name,
+                content=texts,
+                task_type=task_type,
+            )
+            embeddings = result['embedding']
+            if len(embeddings) != len(texts):
+                raise ValueError(f"Expected {len(texts)} embeddings, got {len(embeddings)}")
+            return embeddings
+        except TRANSIENT_ERRORS as e:
+            if attempt == max_retries:
+                raise
+            delay = backoff_seconds * (2 ** attempt)
+            logger.warning(
+                f"Batch embedding failed (attempt {attempt + 1}/{max_retries + 1}): {e}. "
+                f"Retrying in {delay:.1f}s"
+            )
+            time.sleep(delay)
+    return []
+
+
+def embed_batch(
+    texts: List[str],
+    model_name: str = "models/text-embedding-004",
+    task_type: str = "retrieval_query",
+    batch_size: Optional[int] = None,
+    max_retries: Optional[int] = None,
+    backoff_seconds: float = 1.0,
+    progress_callback: Optional[Callable[[int, int], None]] = None,
+) -> List[Optional[List[float]]]:
+    """
+    Get embeddings for many texts using batched API requests.
+    
+    Texts already in the persistent embedding cache are not sent to the API.
+    The remaining texts are sent in chunks of ``batch_size`` per request.
+    Only transient errors (rate limits, server errors, timeouts) are retried.
+    Without credentials no request is sent, and after a credential error
+    the remaining batches are skipped; their texts come back as None.
+    
+    Args:
+        texts: Texts to embed
+        model_name: Name of the embedding model to use
+        task_type: Embedding task type
+        batch_size: Texts per request (defaults to ModelConfig.embedding_batch_size)
+        max_retries: Retries per transiently failed request (defaults to APIConfig.retry_attempts)
+        backoff_seconds: Initial retry delay, doubled after every failure
+        progress_callback: Called with (completed, total) after every batch
+        
+    Returns:
+        List of embeddings aligned with ``texts``; None where embedding failed
+    """
+    if batch_size is None:
+        batch_size = config.models.embedding_batch_size
+    batch_size = max(1, min(batch_size, MAX_BATCH_SIZE))
+    if max_retries is None:
+        max_retries = config.api.retry_attempts
+    
+    embeddings: List[Optional[List[float]]] = [None] * len(texts)
+    cache = get_embedding_cache()
+    
+    pending = []
+    for i, text in enumerate(texts):
+        cached = cache.get(text, model_name, task_type) if cache is not None else None
+        if cached:
+            embeddings[i] = cached
+        else:
+            pending.append(i)
+    
+    total = len(texts)
+    completed = total - len(pending)
+    if progress_callback:
+        progress_callback(completed, total)
+    
+    if pending and not embedding_credentials_available():
+        logger.warning(f"No API key available for embeddings; {len(pending)} texts not embedded")
+        if progress_callback:
+            progress_callback(total, total)
+        return embeddings
+    
+    for start in range(0, len(pending), batch_size):
+        chunk = pending[start:start + batch_size]
+        chunk_texts = [texts[i] for i in chunk]
+        try:
+            results = _embed_request_with_retry(
+                chunk_texts, model_name, task_type, max_retries, backoff_seconds
+            )
+        except CREDENTIAL_ERRORS as e:
+            logger.error(f"Embedding API rejected the credentials, {len(pending) - start} texts not embedded: {e}")
+            if progress_callback:
+                progress_callback(total, total)
+            return embeddings
+        except Exception as e:
+            logger.error(f"Giving up on embedding batch of {len(chunk)} texts: {e}")
+            results = [None] * len(chunk)
+        
+        for i, text, embedding in zip(chunk, chunk_texts, results):
+            if embedding:
+                embeddings[i] = embedding
+                if cache is not None:
+                    cache.put(text, model_name, task_type, embedding)
+        
+        completed += len(chunk)
+        if progress_callback:
+            progress_callback(completed, total)
+    
+    return embeddings
+
+
 def cosine_similarity(vec1: List[float], vec2: List[float]) -> float:
     """
     Calculate cosine similarity between two vectors.
@@ -84,6 +271,118 @@ def cosine_similarity(vec1: List[float], vec2: List[float]) -> float:
     return dot_product / (norm1 * norm2)
 
 
+def normalize_rows(vectors: Any) -> np.ndarray:
+    """
+    Convert vectors to a contiguous float32 matrix with unit-length rows.
+    
+    Rows with zero norm are left as zeros so they never score above 0.
+    
+    Args:
+        vectors: Sequence of equal-length vectors (or a 2-D array)
+        
+    Returns:
+        float32 matrix of shape (n, dim)
+    """
+    matrix = np.asarray(vectors, dtype=np.float32)
+    if matrix.ndim == 1:
+        matrix = matrix.reshape(1, -1)
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return np.ascontiguousarray(matrix / norms, dtype=np.float32)
+
+
+def angular_to_cosine(distance: float) -> float:
+    """
+    Convert an Annoy angular distance to cosine similarity.
+    
+    Annoy's angular distance is sqrt(2 - 2 cos), so all vector searches
+    (Annoy, sharded and exact matrix search) report scores on one scale.
+    """
+    return 1.0 - distance * distance / 2.0
+
+
+def top_k_cosine(matrix: np.ndarray, query: Any, k: int) -> List[Tuple[int, float]]:
+    """
+    Score a query against a pre-normalized matrix and return the top-k rows.
+    
+    Uses a single matrix-vector product and ``argpartition`` so the cost of
+    selecting the best rows does not grow with a full sort of the matrix.
+    
+    Args:
+        matrix: float32 matrix whose rows are unit-length (see normalize_rows)
+        query: Query vector (does not need to be normalized)
+        k: Number of rows to return
+        
+    Returns:
+        List of (row, cosine_similarity) tuples sorted by descending similarity
+    """
+    if matrix is None or len(matrix) == 0 or k <= 0:
+        return []
+        
+    query_np = np.asarray(query, dtype=np.float32)
+    norm = np.linalg.norm(query_np)
+    if norm == 0 or query_np.shape[0] != matrix.shape[1]:
+        return []
+        
+    scores = matrix @ (query_np / norm)
+    
+    k = min(k, len(scores))
+    if k < len(scores):
+        top = np.argpartition(-scores, k - 1)[:k]
+    else:
+        top = np.arange(len(scores))
+    top = top[np.argsort(-scores[top], kind="stable")]
+    
+    return [(int(row), float(scores[row])) for row in top]
+
+
+def mmr_select(
+    relevance: Any,
+    matrix: np.ndarray,
+    k: int,
+    lambda_mult: float = 0.7,
+) -> List[int]:
+    """
+    Pick rows by maximal marginal relevance.
+    
+    Each step picks the row maximizing
+    ``lambda_mult * relevance - (1 - lambda_mult) * max_similarity_to_picked``.
+    Pairwise similarities come from one matrix product; every step is a
+    vectorized update of the running maxima.
+    
+    Args:
+        relevance: Relevance of each row, on a 0-1 scale
+        matrix: float32 matrix whose rows are unit-length (zero rows count
+            as dissimilar to everything)
+        k: Number of rows to pick
+        lambda_mult: 1.0 ranks by relevance only, 0.0 by diversity only
+        
+    Returns:
+        Picked row indices in pick order
+    """
+    relevance_np = np.asarray(relevance, dtype=np.float32)
+    n = len(relevance_np)
+    k = min(k, n)
+    if k <= 0:
+        return []
+    
+    similarity = matrix @ matrix.T
+    max_similarity = np.full(n, -np.inf, dtype=np.float32)
+    available = np.ones(n, dtype=bool)
+    picked: List[int] = []
+    for step in range(k):
+        if step == 0:
+            scores = relevance_np.copy()
+        else:
+            scores = lambda_mult * relevance_np - (1 - lambda_mult) * max_similarity
+        scores[~available] = -np.inf
+        row = int(np.argmax(scores))
+        picked.append(row)
+        available[row] = False
+        np.maximum(max_similarity, similarity[row], out=max_similarity)
+    return picked
+
+
 def find_similar_texts(
     query: str,
     candidates: List[Dict[str, Any]],
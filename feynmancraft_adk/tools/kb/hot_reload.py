@@ -0,0 +1,162 @@
+"""
+Hot reload of the knowledge base.
+
+A background thread polls the KB files (modification time and size, see
+``files_version``) and calls a reload function when they change. Each
+reload function builds the new KB version completely (records, keyword and
+metadata indexes, embeddings and vector index) and then swaps a single
+snapshot reference, so searches already running finish on the version they
+started with and new searches see the new one.
+
+A change is acted on once the files have stopped changing for one poll
+interval, so a KB file that is still being written is not loaded half-way.
+A reload that fails is retried on the following polls until it succeeds.
+
+Hot reload is off by default; enable it with ``KB_HOT_RELOAD=true`` and
+tune it with ``KB_RELOAD_POLL_SECONDS``.
+"""
+
+import logging
+import threading
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Callable, Dict, Hashable, List, Optional
+
+from .result_cache import files_version
+from ...shared_libraries.config import config
+
+logger = logging.getLogger(__name__)
+
+# Returns True if a new snapshot was swapped in
+ReloadFn = Callable[[], bool]
+
+
+@dataclass
+class _Watch:
+    """Files to watch and the function that reloads from them."""
+    paths_fn: Callable[[], List[Path]]
+    reload_fn: ReloadFn
+    seen: Optional[Hashable] = None
+    pending: Optional[Hashable] = None
+    reloads: int = 0
+    errors: List[str] = field(default_factory=list)
+
+
+class KBWatcher:
+    """
+    Polls registered KB files and reloads them on change.
+
+    Args:
+        interval: Seconds between polls
+    """
+
+    def __init__(self, interval: float = 2.0):
+        self.interval = max(0.05, interval)
+        self._watches: Dict[str, _Watch] = {}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def register(self, name: str, paths_fn: Callable[[], List[Path]], reload_fn: ReloadFn):
+        """
+        Watch files and call ``reload_fn`` after they change.
+
+        Registering a name again replaces its watch.
+
+        Args:
+            name: Name of the watched component (used in logs)
+            paths_fn: Returns the files to watch (re-evaluated on every poll)
+            reload_fn: Rebuilds and swaps the component's snapshot
+        """
+        with self._lock:
+            self._watches[name] = _Watch(paths_fn, reload_fn)
+
+    def poll(self) -> int:
+        """
+        Check every watch once.
+
+        Returns:
+            Number of reloads that swapped in a new snapshot
+        """
+        with self._lock:
+            watches = list(self._watches.items())
+
+        swapped = 0
+        for name, watch in watches:
+            token = files_version(watch.paths_fn())
+            if token == watch.seen:
+                watch.pending = None
+                continue
+            if token != watch.pending:
+                # Wait one more poll in case the files are still being written
+                watch.pending = token
+                continue
+
+            watch.pending = None
+            try:
+                reloaded = watch.reload_fn()
+            except Exception as e:
+                # Keep serving the current snapshot; the change stays unseen, so it is retried
+                watch.errors.append(str(e))
+                logger.error(f"Reloading {name} failed: {e}")
+                continue
+            watch.seen = token
+            if reloaded:
+                watch.reloads += 1
+                swapped += 1
+                logger.info(f"Reloaded {name} after its files changed")
+        return swapped
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.poll()
+
+    def start(self):
+        """Start the polling thread (a daemon) if it is not running."""
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="kb-watcher", daemon=True)
+            self._thread.start()
+
+    def stop(self, timeout: Optional[float] = None):
+        """Stop the polling thread."""
+        self._stop.set()
+        thread = self._thread
+        if thread is not None:
+            thread.join(timeout)
+        self._thread = None
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+
+_watcher: Optional[KBWatcher] = None
+_watcher_lock = threading.Lock()
+
+
+def get_kb_watcher() -> KBWatcher:
+    """Get the process-wide KB watcher (not started)."""
+    global _watcher
+
+    if _watcher is None:
+        with _watcher_lock:
+            if _watcher is None:
+                _watcher = KBWatcher(config.knowledge_base.reload_poll_seconds)
+    return _watcher
+
+
+def watch_kb_files(name: str, paths_fn: Callable[[], List[Path]], reload_fn: ReloadFn):
+    """
+    Register KB files with the process-wide watcher.
+
+    The watcher thread is started when ``KB_HOT_RELOAD`` is enabled;
+    otherwise the watch is only registered and reloads run on
+    ``get_kb_watcher().poll()``.
+    """
+    watcher = get_kb_watcher()
+    watcher.register(name, paths_fn, reload_fn)
+    if config.knowledge_base.hot_reload:
+        watcher.start()
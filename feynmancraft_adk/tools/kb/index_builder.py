@@ -0,0 +1,241 @@
+"""
+Parallel, resumable Annoy index builder.
+
+Records are embedded in batches on a thread pool. Every finished batch is
+checkpointed to disk as a small vector store keyed by content hash, so an
+interrupted build resumes with only the missing records. Once all vectors
+are available the Annoy forest is built with a configurable number of trees
+and threads, written next to the live files and swapped into place with
+``os.replace``.
+
+Records that could not be embedded are listed by content hash in the
+checkpoint directory, so callers can tell them from records that are not
+indexed yet and do not rebuild the whole index for them.
+"""
+
+import json
+import logging
+import shutil
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from contextlib import ExitStack
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Sequence, Set
+
+from annoy import AnnoyIndex
+
+from .embeddings import content_hash
+from .vector_store import load_vector_store, save_vector_store
+from ...shared_libraries.file_utils import atomic_path, atomic_write
+
+logger = logging.getLogger(__name__)
+
+# Embeds a batch of texts; None marks texts that could not be embedded
+EmbedBatchFn = Callable[[List[str]], List[Optional[List[float]]]]
+
+
+# Content hashes of the records the last build could not embed
+UNEMBEDDED_FILE = "unembedded.json"
+
+
+def record_index_text(record: Dict[str, Any]) -> str:
+    """Text of a KB record that is embedded into the Annoy index."""
+    return f"{record.get('topic', '')}: {record.get('description', '')} {record.get('reaction', '')}"
+
+
+def checkpoint_dir_for(ann_path: Path) -> Path:
+    """Default checkpoint directory of the index at ``ann_path``."""
+    ann_path = Path(ann_path)
+    return ann_path.with_name(f".{ann_path.name}.build")
+
+
+def load_unembedded_hashes(ann_path: Path) -> Set[str]:
+    """Content hashes of the records the last build of ``ann_path`` could not embed."""
+    path = checkpoint_dir_for(ann_path) / UNEMBEDDED_FILE
+    try:
+        with open(path, "r") as f:
+            return set(json.load(f))
+    except FileNotFoundError:
+        return set()
+    except Exception as e:
+        logger.warning(f"Failed to read {path}: {e}")
+        return set()
+
+
+@dataclass
+class IndexBuildResult:
+    """Outcome of an index build."""
+    index: AnnoyIndex
+    id_map: List[Optional[str]]
+    item_index: List[Optional[int]]
+    embedded: int
+    resumed: int
+    failed: int
+    seconds: float
+
+
+class AnnoyIndexBuilder:
+    """
+    Builds the KB Annoy index and its id maps.
+
+    The Annoy item id of a record is its position in the KB, so ``id_map``
+    and ``item_index`` are both indexed by item id (``None`` for records
+    that could not be embedded).
+    """
+
+    def __init__(
+        self,
+        records: Sequence[Dict[str, Any]],
+        embed_batch_fn: EmbedBatchFn,
+        dim: int,
+        model_name: str,
+        ann_path: Path,
+        id_map_path: Path,
+        item_index_path: Path,
+        batch_size: int = 100,
+        max_workers: int = 4,
+        n_trees: int = 10,
+        n_jobs: int = -1,
+        checkpoint_dir: Optional[Path] = None,
+        known_vectors: Optional[Dict[str, List[float]]] = None,
+    ):
+        self.records = records
+        self.embed_batch_fn = embed_batch_fn
+        self.dim = dim
+        self.model_name = model_name
+        self.ann_path = Path(ann_path)
+        self.id_map_path = Path(id_map_path)
+        self.item_index_path = Path(item_index_path)
+        self.batch_size = max(1, batch_size)
+        self.max_workers = max(1, max_workers)
+        self.n_trees = n_trees
+        self.n_jobs = n_jobs
+        self.checkpoint_dir = Path(checkpoint_dir) if checkpoint_dir else checkpoint_dir_for(self.ann_path)
+        # Vectors of records the live index already holds, keyed by content hash
+        self.known_vectors = known_vectors or {}
+
+    def _load_checkpoints(self) -> Dict[str, List[float]]:
+        """Vectors from earlier, interrupted builds keyed by content hash."""
+        vectors: Dict[str, List[float]] = {}
+        if not self.checkpoint_dir.exists():
+            return vectors
+
+        for manifest_path in sorted(self.checkpoint_dir.glob("batch_*.json")):
+            store = load_vector_store(manifest_path.with_suffix(""), mmap=False)
+            if store is None:
+                continue
+            matrix, manifest = store
+            if manifest.get("model_name") != self.model_name or manifest.get("dim") != self.dim:
+                continue
+            for row, digest in enumerate(manifest["content_hashes"]):
+                vectors[digest] = matrix[row].tolist()
+        return vectors
+
+    def _embed_batch(self, positions: List[int], hashes: List[str]) -> Dict[int, List[float]]:
+        """Embed one batch and checkpoint the vectors that succeeded."""
+        texts = [record_index_text(self.records[i]) for i in positions]
+        embeddings = self.embed_batch_fn(texts)
+
+        done: Dict[int, List[float]] = {}
+        done_hashes = []
+        for i, digest, embedding in zip(positions, hashes, embeddings):
+            if embedding is not None and len(embedding) == self.dim:
+                done[i] = embedding
+                done_hashes.append(digest)
+        if done:
+            save_vector_store(
+                self.checkpoint_dir / f"batch_{positions[0]:08d}_{len(positions)}",
+                ids=list(done),
+                vectors=list(done.values()),
+                model_name=self.model_name,
+                content_hashes=done_hashes,
+            )
+        return done
+
+    def build(self) -> Optional[IndexBuildResult]:
+        """
+        Embed missing records, build the forest and swap the files into place.
+
+        Returns:
+            IndexBuildResult, or None if no record could be embedded
+        """
+        start = time.monotonic()
+        self.checkpoint_dir.mkdir(parents=True, exist_ok=True)
+
+        hashes = [content_hash(record_index_text(record)) for record in self.records]
+        vectors: Dict[int, List[float]] = {}
+        checkpointed = {**self.known_vectors, **self._load_checkpoints()}
+        for i, digest in enumerate(hashes):
+            if digest in checkpointed:
+                vectors[i] = checkpointed[digest]
+        resumed = len(vectors)
+        if resumed:
+            logger.info(f"Reusing {resumed}/{len(self.records)} vectors from the live index and checkpoints")
+
+        pending = [i for i in range(len(self.records)) if i not in vectors]
+        batches = [pending[s:s + self.batch_size] for s in range(0, len(pending), self.batch_size)]
+        with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="kb-index") as executor:
+            futures = [
+                executor.submit(self._embed_batch, batch, [hashes[i] for i in batch])
+                for batch in batches
+            ]
+            for future in as_completed(futures):
+                try:
+                    vectors.update(future.result())
+                except Exception as e:
+                    logger.error(f"Embedding batch failed: {e}")
+                logger.info(f"Embedded {len(vectors)}/{len(self.records)} records")
+
+        if not vectors:
+            logger.error("No records could be embedded; keeping the existing index")
+            return None
+
+        index = AnnoyIndex(self.dim, "angular")
+        id_map: List[Optional[str]] = [None] * len(self.records)
+        item_index: List[Optional[int]] = [None] * len(self.records)
+        for i in sorted(vectors):
+            index.add_item(i, vectors[i])
+            id_map[i] = self.records[i].get("reaction", f"item_{i}")
+            item_index[i] = i
+
+        logger.info(f"Building {self.n_trees} trees with n_jobs={self.n_jobs}...")
+        index.build(self.n_trees, n_jobs=self.n_jobs)
+        self._swap_in(index, id_map, item_index)
+
+        # Keep checkpoints while records are missing so a rerun only embeds those
+        failed = len(self.records) - len(vectors)
+        if failed:
+            with atomic_write(self.checkpoint_dir / UNEMBEDDED_FILE) as f:
+                json.dump(sorted({hashes[i] for i in range(len(self.records)) if i not in vectors}), f)
+        else:
+            shutil.rmtree(self.checkpoint_dir, ignore_errors=True)
+
+        return IndexBuildResult(
+            index=index,
+            id_map=id_map,
+            item_index=item_index,
+            embedded=len(vectors) - resumed,
+            resumed=resumed,
+            failed=failed,
+            seconds=time.monotonic() - start,
+        )
+
+    def _swap_in(self, index: AnnoyIndex, id_map: List[Optional[str]], item_index: List[Optional[int]]):
+        """
+        Write the new files next to the live ones, then rename them into place.
+
+        Each file is replaced atomically, and only once all three are
+        written; if any write fails no file is replaced. Readers validate id
+        map entries against the KB, so a reader that sees a mix of old and
+        new files drops mismatched entries rather than returning wrong records.
+        """
+        with ExitStack() as staged:
+            for path, write in (
+                (self.item_index_path, lambda tmp: Path(tmp).write_text(json.dumps(item_index))),
+                (self.id_map_path, lambda tmp: Path(tmp).write_text(json.dumps(id_map))),
+                (self.ann_path, lambda tmp: index.save(tmp)),
+            ):
+                # Staged files are moved into place in reverse order, index first
+                write(staged.enter_context(atomic_path(path)))
+
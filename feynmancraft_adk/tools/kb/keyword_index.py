@@ -0,0 +1,349 @@
+"""
+BM25 keyword index over KB records.
+
+Records are tokenized once when the KB is loaded. Particle symbols written
+in LaTeX (``e^+``, ``\\bar{\\nu}_e``), Unicode (``e⁺``, ``ν̄``) or plain
+words (``positron``) are normalized to the same canonical tokens, so a query
+in any notation matches records in any other notation.
+"""
+
+import heapq
+import math
+import re
+import unicodedata
+from collections import Counter, defaultdict
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+# Field weights: a term in the reaction counts three times, etc.
+FIELD_WEIGHTS = {
+    "reaction": 3,
+    "topic": 2,
+    "particles": 2,
+    "description": 1,
+}
+
+STOPWORDS = {
+    "a", "an", "and", "are", "as", "at", "by", "e.g", "eg", "for", "from", "in",
+    "into", "is", "it", "of", "on", "or", "the", "to", "via", "with", "text",
+    "show", "me", "diagram", "diagrams", "feynman", "draw", "process",
+}
+
+# Unicode particle notation rewritten to LaTeX-like ASCII before tokenizing
+_UNICODE_REPLACEMENTS = {
+    "⁺": "^+", "⁻": "^-", "⁰": "^0",
+    "μ": "\\mu", "ν": "\\nu", "τ": "\\tau", "γ": "\\gamma", "π": "\\pi",
+    "ₑ": "_e", "→": " \\to ", "↔": " \\to ",
+}
+
+# Canonical tokens emitted for each normalized particle spelling
+PARTICLE_ALIASES: Dict[str, List[str]] = {
+    # Charged leptons
+    "e": ["electron"], "e-": ["electron"], "electron": ["electron"],
+    "e+": ["positron", "electron"], "positron": ["positron", "electron"],
+    "mu": ["muon"], "mu-": ["muon"], "muon": ["muon"],
+    "mu+": ["antimuon", "muon"], "antimuon": ["antimuon", "muon"],
+    "tau": ["tau"], "tau-": ["tau"], "tau+": ["tau"],
+    "l": ["lepton"], "l-": ["lepton"], "l+": ["lepton"], "lepton": ["lepton"],
+    # Neutrinos
+    "nu": ["neutrino"], "neutrino": ["neutrino"], "antineutrino": ["antineutrino", "neutrino"],
+    "neutrino_e": ["neutrino", "electron_neutrino"],
+    "neutrino_mu": ["neutrino", "muon_neutrino"],
+    "neutrino_tau": ["neutrino", "tau_neutrino"],
+    "antineutrino_e": ["antineutrino", "neutrino", "electron_neutrino"],
+    "antineutrino_mu": ["antineutrino", "neutrino", "muon_neutrino"],
+    "antineutrino_tau": ["antineutrino", "neutrino", "tau_neutrino"],
+    # Gauge and scalar bosons
+    "gamma": ["photon"], "photon": ["photon"], "gamma*": ["photon", "virtual_photon"],
+    "z": ["z_boson"], "z0": ["z_boson"],
+    "w": ["w_boson"], "w+": ["w_boson"], "w-": ["w_boson"],
+    "g": ["gluon"], "gluon": ["gluon"],
+    "h": ["higgs"], "higgs": ["higgs"],
+    # Quarks
+    "q": ["quark"], "quark": ["quark"], "antiquark": ["antiquark", "quark"],
+    "u": ["up_quark", "quark"], "d": ["down_quark", "quark"],
+    "s": ["strange_quark", "quark"], "c": ["charm_quark", "quark"],
+    "b": ["bottom_quark", "quark"], "t": ["top_quark", "quark"],
+    "up": ["up_quark"], "down": ["down_quark"], "strange": ["strange_quark"],
+    "charm": ["charm_quark"], "bottom": ["bottom_quark"], "beauty": ["bottom_quark"],
+    "top": ["top_quark"],
+    # Hadrons
+    "p": ["proton"], "proton": ["proton"], "n": ["neutron"], "neutron": ["neutron"],
+    "pi": ["pion"], "pi-": ["pion"], "pi+": ["pion"], "pi0": ["pion"], "pion": ["pion"],
+    "k": ["kaon"], "k+": ["kaon"], "k-": ["kaon"], "k0": ["kaon"], "kaon": ["kaon"],
+}
+
+# Antiparticles written as \bar{x}
+_ANTI_ALIASES = {
+    "u": ["up_quark", "antiquark", "quark"], "d": ["down_quark", "antiquark", "quark"],
+    "s": ["strange_quark", "antiquark", "quark"], "c": ["charm_quark", "antiquark", "quark"],
+    "b": ["bottom_quark", "antiquark", "quark"], "t": ["top_quark", "antiquark", "quark"],
+    "q": ["antiquark", "quark"], "f": ["fermion"], "k": ["kaon"],
+}
+
+# Words that keep a hyphen-joined letter a particle ("W-boson", "b-quark", "d-bar")
+PARTICLE_NOUNS = {"boson", "quark", "antiquark", "meson", "lepton", "jet", "bar"}
+
+# Quark flavour names that are also ordinary English words ("bottom up
+# approach", "scroll down"); the physics particle extractor treats them the
+# same way (PROSE_AMBIGUOUS). They only become quarks next to a quark noun
+# ("top quark", "up and down quarks", "charm meson", "anti-up"), in text with particle
+# notation ("t \\to W^+ b", "top -> W b") or on their own (a particle field).
+FLAVOUR_WORDS = {"up", "down", "strange", "charm", "bottom", "beauty", "top"}
+
+# Nouns that make a preceding flavour word a quark ("charm meson"), and the
+# words allowed in between ("up and down quarks", "up-type quark")
+_QUARK_NOUNS = {"quark", "antiquark", "meson", "baryon", "hadron"}
+_FLAVOUR_LINKS = {"and", "or", "type"}
+_QUARK_WINDOW = 3
+
+_NEUTRINO_RE = re.compile(r"(\\bar\{\s*)?\\?nu\s*\}?\s*_\s*\{?\s*\\?(e|mu|tau)\b\s*\}?")
+_BAR_NEUTRINO_RE = re.compile(r"\\bar\{\s*\\?nu\s*\}")
+_COMBINING_BAR_RE = re.compile(r"(\\?[a-z]+)\u0304")
+_BAR_RE = re.compile(r"\\bar\{\s*\\?([a-z])\s*\}")
+_WORD_AFTER_HYPHEN_RE = re.compile(r"-\\?([a-z][a-z0-9]*)")
+_WORD_BEFORE_HYPHEN_RE = re.compile(r"([a-z0-9]+)-$")
+_NOTATION_RE = re.compile(r"\\|\^|->|antiparticle_|neutrino_|antineutrino")
+_APOSTROPHES = "'\u2019"
+_TOKEN_RE = re.compile(
+    r"\\?[a-z][a-z0-9_.]*"                   # word or LaTeX command
+    r"(?:\^\{?\s*([+\-0*])\s*\}?"            # ^+ ^{-} ^0 ^*
+    r"|([+\-])(?![a-z0-9]))?"                # bare e+ / mu- (not a hyphen)
+)
+
+
+def _prepare(text: str) -> str:
+    """Lowercase and rewrite Unicode and LaTeX particle notation."""
+    # NFD splits precomposed bars (ū) into letter + combining macron
+    text = unicodedata.normalize("NFD", text).lower()
+    for symbol, replacement in _UNICODE_REPLACEMENTS.items():
+        text = text.replace(symbol, replacement)
+    text = _COMBINING_BAR_RE.sub(lambda m: f"\\bar{{{m.group(1)}}}", text)
+    text = "".join(ch for ch in text if not unicodedata.combining(ch))
+    text = _NEUTRINO_RE.sub(
+        lambda m: f" {'antineutrino' if m.group(1) else 'neutrino'}_{m.group(2)} ", text
+    )
+    text = _BAR_NEUTRINO_RE.sub(" antineutrino ", text)
+    text = _BAR_RE.sub(lambda m: f" antiparticle_{m.group(1)} ", text)
+    return text
+
+
+def _stem(word: str) -> str:
+    """Very light plural stemming (bosons -> boson, decays -> decay)."""
+    if len(word) > 3 and word.endswith("s") and not word.endswith("ss"):
+        return word[:-1]
+    return word
+
+
+def _is_particle_word(word: str) -> bool:
+    return word in PARTICLE_ALIASES or _stem(word) in PARTICLE_NOUNS
+
+
+def _hyphenated_letter(text: str, start: int, end: int) -> bool:
+    """
+    Whether the letter at ``text[start:end]`` is part of a hyphenated word.
+
+    "s-channel", "t-channel", "p-wave" and "e-mail" are words, not
+    particles; "W-boson", "b-quark" and "e-p" (scattering) keep the letter
+    a particle because the word it is joined to is one.
+    """
+    after = _WORD_AFTER_HYPHEN_RE.match(text, end)
+    before = _WORD_BEFORE_HYPHEN_RE.search(text, max(0, start - 16), start)
+    joined = [m.group(1) for m in (after, before) if m]
+    return bool(joined) and not any(_is_particle_word(word) for word in joined)
+
+
+def _token_base(match: "re.Match") -> str:
+    """Token text without a LaTeX backslash, charge or trailing dots."""
+    base = match.group(0).lstrip("\\")
+    return re.split(r"[\^+\-]", base, maxsplit=1)[0].strip("._")
+
+
+def _flavour_is_quark(bases: List[str], i: int, notation: bool) -> bool:
+    """Whether the flavour word ``bases[i]`` names a quark in its context."""
+    if notation or len(bases) == 1:
+        return True
+    if i > 0 and bases[i - 1] == "anti":
+        return True
+    for base in bases[i + 1:i + 1 + _QUARK_WINDOW]:
+        word = _stem(base)
+        if word in _QUARK_NOUNS:
+            return True
+        if word not in FLAVOUR_WORDS and word not in _FLAVOUR_LINKS:
+            break
+    return False
+
+
+def tokenize(text: str) -> List[str]:
+    """
+    Tokenize text into canonical search terms.
+
+    Args:
+        text: Free text, a LaTeX reaction or a particle symbol
+
+    Returns:
+        List of terms (with repeats)
+    """
+    if not text:
+        return []
+
+    tokens = []
+    prepared = _prepare(text)
+    matches = list(_TOKEN_RE.finditer(prepared))
+    bases = [_token_base(match) for match in matches]
+    notation = _NOTATION_RE.search(prepared) is not None
+    for i, match in enumerate(matches):
+        charge = match.group(1) or match.group(2) or ""
+        base = bases[i]
+
+        if len(base) == 1 and not charge:
+            # "s-channel", and the "s" of "electron's" or the "t" of "don't"
+            if _hyphenated_letter(prepared, match.start(), match.end()):
+                continue
+            if match.start() > 0 and prepared[match.start() - 1] in _APOSTROPHES:
+                continue
+
+        if _stem(base) in FLAVOUR_WORDS and not charge and not _flavour_is_quark(bases, i, notation):
+            tokens.append(_stem(base))
+            continue
+
+        if base.startswith("antiparticle_"):
+            anti = base[len("antiparticle_"):]
+            tokens.extend(_ANTI_ALIASES.get(anti, ["antiparticle"]))
+            continue
+
+        key = base + charge
+        if key in PARTICLE_ALIASES:
+            tokens.extend(PARTICLE_ALIASES[key])
+            continue
+
+        # Subscripted symbols such as q_r or u_b: match on the symbol itself
+        symbol = base.split("_", 1)[0]
+        if symbol != base and symbol + charge in PARTICLE_ALIASES and not base.startswith(("neutrino", "antineutrino")):
+            tokens.extend(PARTICLE_ALIASES[symbol + charge])
+            continue
+
+        if base in STOPWORDS or len(base) < 2:
+            continue
+        stemmed = _stem(base)
+        tokens.extend(PARTICLE_ALIASES.get(stemmed, [stemmed]))
+    return tokens
+
+
+def record_terms(record: Dict[str, Any]) -> Counter:
+    """Field-weighted term frequencies of a KB record."""
+    terms: Counter = Counter()
+    for field, weight in FIELD_WEIGHTS.items():
+        value = record.get(field, "")
+        if isinstance(value, list):
+            value = " ".join(str(v) for v in value)
+        for term in tokenize(str(value)):
+            terms[term] += weight
+    return terms
+
+
+class BM25Index:
+    """
+    Inverted index with Okapi BM25 scoring.
+
+    Documents are identified by their position in the list passed to the
+    constructor.
+    """
+
+    def __init__(self, records: Iterable[Dict[str, Any]], k1: float = 1.2, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        self.postings: Dict[str, List[Tuple[int, int]]] = defaultdict(list)
+        self.doc_lengths: List[int] = []
+
+        for doc_id, record in enumerate(records):
+            terms = record_terms(record)
+            self.doc_lengths.append(sum(terms.values()))
+            for term, tf in terms.items():
+                self.postings[term].append((doc_id, tf))
+
+        self._set_statistics(len(self.doc_lengths), sum(self.doc_lengths), self.document_frequencies())
+
+    def _set_statistics(self, num_docs: int, total_length: int, document_frequencies: Dict[str, int]):
+        """Set the collection statistics that IDF and length normalization use."""
+        self.num_docs = num_docs
+        self.avg_doc_length = (total_length / num_docs) if num_docs else 0.0
+        self.idf = {
+            term: math.log(1 + (num_docs - df + 0.5) / (df + 0.5))
+            for term, df in document_frequencies.items()
+        }
+
+    def document_frequencies(self) -> Dict[str, int]:
+        """Number of documents containing each term."""
+        return {term: len(postings) for term, postings in self.postings.items()}
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Postings and document lengths as JSON-serializable data (see ``from_dict``)."""
+        return {"postings": dict(self.postings), "doc_lengths": self.doc_lengths}
+
+    @classmethod
+    def from_dict(
+        cls,
+        data: Dict[str, Any],
+        collection: Optional[Dict[str, Any]] = None,
+        k1: float = 1.2,
+        b: float = 0.75,
+    ) -> "BM25Index":
+        """
+        Load an index saved with ``to_dict``.
+
+        Args:
+            data: Saved postings and document lengths
+            collection: Statistics of the whole collection when the index
+                covers part of it (a KB shard): ``num_docs``, ``total_length``
+                and ``document_frequencies``. Scores are then comparable
+                across the parts.
+            k1: BM25 term frequency saturation
+            b: BM25 length normalization
+
+        Returns:
+            The loaded index
+        """
+        index = cls((), k1, b)
+        for term, postings in data["postings"].items():
+            index.postings[term] = [(doc_id, tf) for doc_id, tf in postings]
+        index.doc_lengths = list(data["doc_lengths"])
+        if collection is None:
+            index._set_statistics(len(index.doc_lengths), sum(index.doc_lengths), index.document_frequencies())
+        else:
+            index._set_statistics(
+                collection["num_docs"], collection["total_length"], collection["document_frequencies"]
+            )
+        return index
+
+    def search(
+        self,
+        query: str,
+        k: int = 5,
+        candidates: Optional[set] = None,
+    ) -> List[Tuple[int, float]]:
+        """
+        Score documents against a query.
+
+        Args:
+            query: Free-text query
+            k: Number of results to return
+            candidates: Optional set of document ids to restrict scoring to
+
+        Returns:
+            List of (doc_id, bm25_score) sorted by descending score
+        """
+        if not self.doc_lengths or k <= 0:
+            return []
+
+        scores: Dict[int, float] = defaultdict(float)
+        for term in set(tokenize(query)):
+            idf = self.idf.get(term)
+            if idf is None:
+                continue
+            for doc_id, tf in self.postings.get(term, ()):
+                if candidates is not None and doc_id not in candidates:
+                    continue
+                norm = self.k1 * (1 - self.b + self.b * self.doc_lengths[doc_id] / self.avg_doc_length)
+                scores[doc_id] += idf * tf * (self.k1 + 1) / (tf + norm)
+
+        return heapq.nlargest(k, scores.items(), key=lambda item: (item[1], -item[0]))
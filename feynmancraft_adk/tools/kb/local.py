@@ -2,14 +2,31 @@
 
 import json
 import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from dataclasses import dataclass
 from pathlib import Path
-from typing import List, Dict, Any, Optional, Tuple
+from typing import List, Dict, Any, Hashable, Optional, Set, Tuple
 import numpy as np
 from annoy import AnnoyIndex
 import google.generativeai as genai
 from dotenv import load_dotenv
 import logging
 
+from ...shared_libraries.config import config
+from .embedding_cache import get_embedding_cache
+from .embedding_backends import get_embedding_backend
+from .data_loader import record_key
+from .embeddings import angular_to_cosine, content_hash, embed_batch, normalize_rows
+from .hot_reload import watch_kb_files
+from .index_builder import AnnoyIndexBuilder, load_unembedded_hashes, record_index_text
+from .keyword_index import BM25Index
+from .metadata_index import KBFilter, MetadataIndex
+from .result_cache import files_version
+from .sharded_store import ShardedKB, get_sharded_kb, sharded_kb_manifest_path
+from .topology import TopologyIndex, TopologyQuery
+
 logger = logging.getLogger(__name__)
 
 # Configuration
@@ -18,48 +35,376 @@ DEFAULT_EMBEDDING_MODEL = "text-embedding-004"
 KB_JSON_PATH = Path(__file__).parent.parent / "data" / "feynman_kb.json"
 ANN_INDEX_PATH = Path(__file__).parent.parent / "data" / "feynman_kb.ann"
 ID_MAPPING_PATH = Path(__file__).parent.parent / "data" / "feynman_kb_id_map.json"
+# Annoy item id -> position of the record in feynman_kb.json
+ITEM_INDEX_PATH = Path(__file__).parent.parent / "data" / "feynman_kb_item_index.json"
+
+
+@dataclass
+class KBSnapshot:
+    """
+    One version of the KB records and the indexes built from them.
+    
+    A search reads the current snapshot once and uses it throughout, so a
+    reload that swaps in a new snapshot never mixes positions, records and
+    index entries of two KB versions. The Annoy index is attached on first
+    vector search, or by the reload that built the snapshot.
+    
+    A snapshot of a sharded KB (``KB_SHARD_DIR``) holds no records or
+    indexes of its own: every search goes to the shards, which read only
+    the records and indexes it touches.
+    
+    Attributes:
+        version: Increases with every snapshot swapped in
+        source: Version token of the files the snapshot was built from
+        records: KB records; positions index every structure below
+        keyword_index: BM25 index of the records
+        metadata_index: Metadata posting lists of the records
+        topology_index: Topology signatures of the records' TikZ diagrams
+        position_by_key: record_key -> position
+        annoy_index: Vector index, or None until loaded
+        index_model: Embedding model of ``annoy_index``
+        id_map: Reaction of each Annoy item id
+        positions_by_item: Annoy item id -> position (None if stale)
+        item_by_position: Position -> Annoy item id
+        index_version: Increases with every index attached
+        sharded_kb: Sharded KB (``KB_SHARD_DIR``) searched instead of
+            ``records``, or None
+    """
+    version: int
+    source: Hashable
+    records: List[Dict[str, Any]]
+    keyword_index: BM25Index
+    metadata_index: MetadataIndex
+    topology_index: TopologyIndex
+    position_by_key: Dict[Tuple[str, str], int]
+    annoy_index: Optional[AnnoyIndex] = None
+    index_model: Optional[str] = None
+    id_map: Optional[List[str]] = None
+    positions_by_item: Optional[List[Optional[int]]] = None
+    item_by_position: Optional[Dict[int, int]] = None
+    index_version: int = 0
+    sharded_kb: Optional[ShardedKB] = None
+    
+    @classmethod
+    def from_records(cls, records: List[Dict[str, Any]], source: Hashable = None) -> "KBSnapshot":
+        """Build the keyword, metadata and topology indexes of a record list."""
+        return cls(
+            version=0,
+            source=source,
+            records=records,
+            keyword_index=BM25Index(records),
+            metadata_index=MetadataIndex(records),
+            topology_index=TopologyIndex(records),
+            position_by_key={record_key(record): i for i, record in enumerate(records)},
+        )
+    
+    @classmethod
+    def from_sharded(cls, sharded_kb: ShardedKB, source: Hashable = None) -> "KBSnapshot":
+        """Snapshot of a sharded KB; its records stay on disk."""
+        return cls(
+            version=0,
+            source=source,
+            records=[],
+            keyword_index=BM25Index(()),
+            metadata_index=MetadataIndex(()),
+            topology_index=TopologyIndex(()),
+            position_by_key={},
+            sharded_kb=sharded_kb,
+        )
+    
+    @property
+    def num_records(self) -> int:
+        """Number of KB records, also of a sharded KB."""
+        return self.sharded_kb.num_records if self.sharded_kb is not None else len(self.records)
+    
+    def record(self, position: int) -> Dict[str, Any]:
+        """A copy of the record at a position, read from disk for a sharded KB."""
+        if self.sharded_kb is not None:
+            return self.sharded_kb.get_record(position)
+        return self.records[position].copy()
+    
+    def has_index(self, model_name: str) -> bool:
+        """True if a vector index of ``model_name`` is attached."""
+        return self.annoy_index is not None and self.id_map is not None and self.index_model == model_name
+    
+    def attach_index(
+        self,
+        index: AnnoyIndex,
+        model_name: str,
+        id_map: List[Optional[str]],
+        positions_by_item: List[Optional[int]],
+    ):
+        """Attach a vector index; the index itself is set last so readers see complete maps."""
+        self.item_by_position = {
+            position: item_id for item_id, position in enumerate(positions_by_item) if position is not None
+        }
+        self.positions_by_item = positions_by_item
+        self.id_map = id_map
+        self.index_model = model_name
+        self.annoy_index = index
+        self.index_version += 1
+
+
+# Current snapshot; replaced as a whole by LocalKBTool.reload()
+_snapshot: Optional[KBSnapshot] = None
+_last_snapshot_version = 0
+
+# Serializes snapshot builds (first load and reloads)
+_reload_lock = threading.Lock()
+
+def current_snapshot() -> Optional[KBSnapshot]:
+    """The KB snapshot new searches use, or None before the KB is loaded."""
+    return _snapshot
+
+
+def snapshot_version() -> int:
+    """Version of the current KB snapshot (0 before the KB is loaded)."""
+    return _snapshot.version if _snapshot is not None else 0
+
+
+def _swap_snapshot(snapshot: KBSnapshot):
+    """Make a fully built snapshot current. Call with ``_reload_lock`` held."""
+    global _snapshot, _last_snapshot_version
+    _last_snapshot_version += 1
+    snapshot.version = _last_snapshot_version
+    _snapshot = snapshot
 
-# Global cache
-_kb_data_cache: Optional[List[Dict[str, Any]]] = None
-_annoy_index_cache: Optional[AnnoyIndex] = None
-_id_map_cache: Optional[List[str]] = None
-_embeddings_cache: Optional[Dict[str, List[float]]] = None
+# Filtered vector search scores candidate vectors directly up to this many
+# candidates; larger candidate sets over-fetch from the Annoy index instead
+FILTER_EXACT_MAX_CANDIDATES = 2048
+
+# Hybrid search runs vector retrieval here so a slow embedding call can be abandoned
+_retrieval_executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix="kb-vector")
+_vector_unavailable_until: float = 0.0
+
+# Guards lazy loading (and building) of the Annoy index
+_index_lock = threading.RLock()
+
+
+def index_paths(backend) -> Tuple[Path, Path, Path]:
+    """
+    Annoy index, id map and item index paths for an embedding backend.
+    
+    Gemini backends use the original file names; other backends add their
+    store suffix so their vectors are kept in separate files.
+    """
+    suffix = backend.store_suffix
+    if not suffix:
+        return ANN_INDEX_PATH, ID_MAPPING_PATH, ITEM_INDEX_PATH
+    return (
+        ANN_INDEX_PATH.with_name(f"feynman_kb{suffix}.ann"),
+        ID_MAPPING_PATH.with_name(f"feynman_kb{suffix}_id_map.json"),
+        ITEM_INDEX_PATH.with_name(f"feynman_kb{suffix}_item_index.json"),
+    )
+
+
+def vector_search_available() -> bool:
+    """False while hybrid search is skipping vector retrieval after a timeout."""
+    return time.monotonic() >= _vector_unavailable_until
+
+
+def _fuse_scores(
+    hit_lists: List[Tuple[List[Tuple[int, float]], float]],
+) -> List[Tuple[int, float]]:
+    """
+    Weighted score fusion of several ranked hit lists.
+    
+    Each list's scores are divided by its best score so retrievers with
+    different scales are comparable, then summed with the list's weight.
+    
+    Args:
+        hit_lists: (hits, weight) pairs, where hits are (doc_id, score)
+        
+    Returns:
+        List of (doc_id, fused_score) sorted by descending score
+    """
+    fused: Dict[int, float] = {}
+    for hits, weight in hit_lists:
+        if not hits or weight <= 0:
+            continue
+        best = max(score for _, score in hits)
+        for doc_id, score in hits:
+            normalized = max(score, 0.0) / best if best > 0 else 0.0
+            fused[doc_id] = fused.get(doc_id, 0.0) + weight * normalized
+    
+    return sorted(fused.items(), key=lambda item: (-item[1], item[0]))
 
 
 class LocalKBTool:
-    """Local knowledge base tool with vector search capabilities."""
+    """
+    Local knowledge base tool with vector search capabilities.
+    
+    The tool is a process-wide singleton: ``LocalKBTool()`` and
+    ``get_local_kb_tool()`` return the same instance, and environment loading,
+    API configuration and KB loading run only on first use.
+    """
+    
+    _instance = None
+    _instance_lock = threading.Lock()
     
-    def __init__(self):
-        """Initialize the local KB tool."""
+    def __new__(cls):
+        if cls._instance is None:
+            with cls._instance_lock:
+                if cls._instance is None:
+                    instance = super().__new__(cls)
+                    instance._configure()
+                    cls._instance = instance
+        return cls._instance
+    
+    def _configure(self):
+        """Load environment and API configuration and the KB data (runs once)."""
         load_dotenv()
         self.api_key = os.getenv("GOOGLE_API_KEY")
         if self.api_key:
             genai.configure(api_key=self.api_key)
+        self.backend = get_embedding_backend()
         self._load_kb_data()
+        watch_kb_files("local KB", self._watched_paths, self.reload)
+    
+    @property
+    def snapshot(self) -> KBSnapshot:
+        """The current KB snapshot; read it once per search."""
+        return _snapshot
+    
+    def _watched_paths(self) -> List[Path]:
+        """KB, index and shard manifest files whose changes trigger a reload."""
+        return [KB_JSON_PATH, *self._index_paths(), sharded_kb_manifest_path()]
+    
+    def _source_version(self, kb_version: Optional[Hashable] = None) -> Hashable:
+        """Version token of the KB file, the index files, the shard manifest and the embedding model."""
+        if kb_version is None:
+            kb_version = files_version([KB_JSON_PATH])
+        return (
+            kb_version,
+            files_version(self._index_paths()),
+            files_version([sharded_kb_manifest_path()]),
+            self.backend.model_name,
+        )
     
     def _load_kb_data(self):
-        """Load knowledge base data from JSON file."""
-        global _kb_data_cache
-        
-        if _kb_data_cache is not None:
+        """Load knowledge base data from JSON file and build the keyword and metadata indexes."""
+        if _snapshot is not None:
             return
         
-        try:
-            with open(KB_JSON_PATH, 'r', encoding='utf-8') as f:
-                _kb_data_cache = json.load(f)
-            logger.info(f"Loaded {len(_kb_data_cache)} records from {KB_JSON_PATH}")
-        except Exception as e:
-            logger.error(f"Failed to load KB data: {e}")
-            _kb_data_cache = []
+        with _reload_lock:
+            if _snapshot is not None:
+                return
+            source = self._source_version()
+            sharded_kb = get_sharded_kb()
+            if sharded_kb is not None:
+                logger.info(f"Searching the sharded KB at {sharded_kb.root} ({sharded_kb.num_records} records)")
+                _swap_snapshot(KBSnapshot.from_sharded(sharded_kb, source))
+                return
+            try:
+                records = self._read_records()
+            except Exception as e:
+                logger.error(f"Failed to load KB data: {e}")
+                records = []
+            _swap_snapshot(KBSnapshot.from_records(records, source))
+    
+    @staticmethod
+    def _read_records() -> List[Dict[str, Any]]:
+        """Read the KB records from ``KB_JSON_PATH``."""
+        with open(KB_JSON_PATH, 'r', encoding='utf-8') as f:
+            records = json.load(f)
+        if not isinstance(records, list):
+            raise ValueError(f"{KB_JSON_PATH} does not hold a list of records")
+        logger.info(f"Loaded {len(records)} records from {KB_JSON_PATH}")
+        return records
+    
+    def reload(self, force: bool = False) -> bool:
+        """
+        Rebuild the KB snapshot from disk and swap it in if the files changed.
+        
+        The new records, keyword and metadata indexes and the vector index
+        (rebuilt when records are not indexed yet) are all prepared before
+        the swap. Searches running meanwhile keep using the old snapshot.
+        If the KB file cannot be read the current snapshot stays in place.
+        With a sharded KB only the shard manifest is read.
+        
+        Args:
+            force: Rebuild even if the files are unchanged
+            
+        Returns:
+            True if a new snapshot was swapped in
+        """
+        with _reload_lock:
+            kb_version = files_version([KB_JSON_PATH])
+            current = _snapshot
+            if not force and current is not None and current.source == self._source_version(kb_version):
+                return False
+            
+            sharded_kb = get_sharded_kb()
+            if sharded_kb is not None:
+                snapshot = KBSnapshot.from_sharded(sharded_kb)
+            else:
+                snapshot = KBSnapshot.from_records(self._read_records())
+                with _index_lock:
+                    self._prepare_index(snapshot)
+            # Index files written by the rebuild belong to this snapshot
+            snapshot.source = self._source_version(kb_version)
+            _swap_snapshot(snapshot)
+            if current is not None and current.sharded_kb not in (None, snapshot.sharded_kb):
+                # In-flight searches of the old snapshot finish before its shards close
+                current.sharded_kb.close()
+        
+        logger.info(f"Swapped in KB snapshot v{snapshot.version} with {snapshot.num_records} records")
+        return True
+    
+    def _prepare_index(self, snapshot: KBSnapshot):
+        """
+        Attach the on-disk index to a new snapshot, rebuilding it if records are missing.
+        
+        Records the last build could not embed count as indexed, so they do
+        not trigger a rebuild on every reload. A rebuild reuses the vectors
+        the index already holds and embeds only the missing records.
+        """
+        if self._open_index(snapshot) and not self._missing_positions(snapshot):
+            return
+        if snapshot.records:
+            self._build_index_locked(
+                snapshot, True, None, None, None, known_vectors=self._indexed_vectors(snapshot)
+            )
+    
+    def _missing_positions(self, snapshot: KBSnapshot) -> List[int]:
+        """KB positions of records that are neither in the index nor known to be unembeddable."""
+        unembedded = load_unembedded_hashes(self._index_paths()[0])
+        return [
+            position for position, record in enumerate(snapshot.records)
+            if position not in snapshot.item_by_position
+            and content_hash(record_index_text(record)) not in unembedded
+        ]
+    
+    def _indexed_vectors(self, snapshot: KBSnapshot) -> Dict[str, List[float]]:
+        """Vectors of a snapshot's indexed records keyed by the content hash of their current text."""
+        if not snapshot.has_index(self.backend.model_name):
+            return {}
+        return {
+            content_hash(record_index_text(snapshot.records[position])): snapshot.annoy_index.get_item_vector(item_id)
+            for position, item_id in snapshot.item_by_position.items()
+        }
+    
+    def _index_paths(self) -> Tuple[Path, Path, Path]:
+        """Annoy index, id map and item index paths for the active embedding backend."""
+        return index_paths(self.backend)
     
     def get_embedding(self, text: str) -> Optional[List[float]]:
-        """Generate embedding for text using Gemini API."""
+        """Generate embedding for text using the configured backend (Gemini API by default)."""
+        if not self.backend.remote:
+            return self.backend.embed_query(text)
+        
+        model_name = self.backend.model_name
+        cache = get_embedding_cache()
+        if cache is not None:
+            cached = cache.get(text, model_name, "RETRIEVAL_DOCUMENT")
+            if cached and len(cached) == self.backend.dim:
+                return cached
+        
         if not self.api_key:
             logger.warning("No API key available for embeddings")
             return None
         
         try:
-            model_name = f"models/{DEFAULT_EMBEDDING_MODEL}"
             response = genai.embed_content(
                 model=model_name,
                 content=text,
@@ -67,7 +412,9 @@ class LocalKBTool:
             )
             
             embedding = response.get("embedding")
-            if embedding and len(embedding) == EMB_DIM:
+            if embedding and len(embedding) == self.backend.dim:
+                if cache is not None:
+                    cache.put(text, model_name, "RETRIEVAL_DOCUMENT", embedding)
                 return embedding
             else:
                 logger.warning(f"Unexpected embedding dimension: {len(embedding) if embedding else 0}")
@@ -77,88 +424,225 @@ class LocalKBTool:
             logger.error(f"Failed to generate embedding: {e}")
             return None
     
-    def build_index(self, force_rebuild: bool = False):
-        """Build Annoy index for vector search."""
-        global _annoy_index_cache, _id_map_cache, _embeddings_cache
+    def _embed_documents(self, texts: List[str]) -> List[Optional[List[float]]]:
+        """Embed a batch of KB texts for the index with the configured backend."""
+        if not self.backend.remote:
+            return self.backend.embed_documents(texts)
         
-        if not force_rebuild and ANN_INDEX_PATH.exists() and ID_MAPPING_PATH.exists():
+        max_retries = None
+        if not self.api_key:
+            # Only cached embeddings can be used; don't retry requests that must fail
+            logger.warning("No API key available for embeddings")
+            max_retries = 0
+        return embed_batch(
+            texts,
+            self.backend.model_name,
+            task_type="RETRIEVAL_DOCUMENT",
+            batch_size=len(texts),
+            max_retries=max_retries,
+        )
+    
+    def build_index(
+        self,
+        force_rebuild: bool = False,
+        n_trees: Optional[int] = None,
+        n_jobs: Optional[int] = None,
+        max_workers: Optional[int] = None,
+    ):
+        """
+        Build Annoy index for vector search.
+        
+        Records are embedded in concurrent batches with checkpoints, so an
+        interrupted build resumes where it stopped. The new index files are
+        swapped in atomically.
+        
+        Args:
+            force_rebuild: Rebuild even if an index exists
+            n_trees: Number of Annoy trees (defaults to KnowledgeBaseConfig.index_trees)
+            n_jobs: Threads used to build the trees, -1 for all cores
+            max_workers: Concurrent embedding batches
+        """
+        with _index_lock:
+            self._build_index_locked(self.snapshot, force_rebuild, n_trees, n_jobs, max_workers)
+    
+    def _build_index_locked(
+        self,
+        snapshot: KBSnapshot,
+        force_rebuild: bool,
+        n_trees: Optional[int],
+        n_jobs: Optional[int],
+        max_workers: Optional[int],
+        known_vectors: Optional[Dict[str, List[float]]] = None,
+    ):
+        """
+        Build the index of a snapshot's records while holding ``_index_lock``.
+        
+        ``known_vectors`` (keyed by content hash) are reused instead of
+        embedding those records again.
+        """
+        ann_index_path, id_mapping_path, item_index_path = self._index_paths()
+        if not force_rebuild and ann_index_path.exists() and id_mapping_path.exists():
             logger.info("Index already exists. Use force_rebuild=True to rebuild.")
             return
         
-        if not _kb_data_cache:
+        if not snapshot.records:
             logger.error("No KB data loaded")
             return
         
         logger.info("Building Annoy index...")
+        kb_config = config.knowledge_base
+        builder = AnnoyIndexBuilder(
+            snapshot.records,
+            self._embed_documents,
+            dim=self.backend.dim,
+            model_name=self.backend.model_name,
+            ann_path=ann_index_path,
+            id_map_path=id_mapping_path,
+            item_index_path=item_index_path,
+            batch_size=config.models.embedding_batch_size,
+            max_workers=max_workers or kb_config.index_build_workers,
+            n_trees=n_trees or kb_config.index_trees,
+            n_jobs=n_jobs if n_jobs is not None else kb_config.index_build_jobs,
+            known_vectors=known_vectors,
+        )
+        result = builder.build()
+        if result is None:
+            return
         
-        # Create index
-        index = AnnoyIndex(EMB_DIM, 'angular')
-        id_map = []
-        embeddings = {}
-        
-        for i, record in enumerate(_kb_data_cache):
-            # Generate text for embedding
-            text = f"{record.get('topic', '')}: {record.get('description', '')} {record.get('reaction', '')}"
-            
-            # Get embedding
-            embedding = self.get_embedding(text)
-            if embedding:
-                index.add_item(i, embedding)
-                reaction_id = record.get('reaction', f'item_{i}')
-                id_map.append(reaction_id)
-                embeddings[reaction_id] = embedding
-                
-                if (i + 1) % 10 == 0:
-                    logger.info(f"Processed {i + 1}/{len(_kb_data_cache)} records")
-        
-        # Build and save index
-        logger.info("Building index tree...")
-        index.build(10)  # 10 trees
+        snapshot.attach_index(
+            result.index,
+            self.backend.model_name,
+            result.id_map,
+            self._resolve_item_positions(result.item_index, result.id_map, snapshot.records),
+        )
         
-        # Save index and mappings
-        index.save(str(ANN_INDEX_PATH))
+        logger.info(
+            f"Index built and saved in {result.seconds:.1f}s. Indexed "
+            f"{result.embedded + result.resumed} items ({result.resumed} reused, "
+            f"{result.failed} failed)."
+        )
+    
+    def _resolve_item_positions(
+        self,
+        item_index: List[Optional[int]],
+        id_map: List[Optional[str]],
+        records: List[Dict[str, Any]],
+    ) -> List[Optional[int]]:
+        """
+        Build the Annoy item id -> KB position array used to resolve search hits.
         
-        with open(ID_MAPPING_PATH, 'w') as f:
-            json.dump(id_map, f)
+        Entries whose record no longer matches the indexed reaction (the KB
+        changed since the index was built) are dropped with a warning.
+        """
+        positions_by_item: List[Optional[int]] = []
+        stale = 0
+        for item_id, position in enumerate(item_index):
+            if position is not None and not 0 <= position < len(records):
+                position = None
+            if position is not None and item_id < len(id_map) and id_map[item_id] is not None \
+                    and records[position].get('reaction') != id_map[item_id]:
+                position = None
+                stale += 1
+            positions_by_item.append(position)
         
-        # Cache results
-        _annoy_index_cache = index
-        _id_map_cache = id_map
-        _embeddings_cache = embeddings
+        if stale:
+            logger.warning(f"{stale} index entries do not match the KB; rebuild the index")
+        return positions_by_item
+    
+    def _load_item_index(self, id_map: List[Optional[str]], records: List[Dict[str, Any]]) -> List[Optional[int]]:
+        """Load the item id -> KB position map, deriving it for older indexes."""
+        item_index_path = self._index_paths()[2]
+        if item_index_path.exists():
+            with open(item_index_path, 'r') as f:
+                return json.load(f)
         
-        logger.info(f"Index built and saved. Indexed {len(id_map)} items.")
+        # Indexes built before the item map existed: resolve reactions once
+        logger.warning(f"{item_index_path.name} not found, deriving it from the id map")
+        position_by_reaction = {}
+        for position, record in enumerate(records):
+            position_by_reaction.setdefault(record.get('reaction'), position)
+        return [position_by_reaction.get(reaction) for reaction in id_map]
     
-    def _load_index(self) -> Tuple[Optional[AnnoyIndex], Optional[List[str]]]:
-        """Load Annoy index and ID mapping."""
-        global _annoy_index_cache, _id_map_cache
+    def _load_index(self, snapshot: Optional[KBSnapshot] = None) -> Tuple[Optional[AnnoyIndex], Optional[List[str]]]:
+        """Load Annoy index and ID mapping of a snapshot (default: current) for the active embedding backend."""
+        snapshot = snapshot or self.snapshot
+        if snapshot.has_index(self.backend.model_name):
+            return snapshot.annoy_index, snapshot.id_map
         
-        if _annoy_index_cache is not None and _id_map_cache is not None:
-            return _annoy_index_cache, _id_map_cache
+        with _index_lock:
+            return self._load_index_locked(snapshot)
+    
+    def _load_index_locked(self, snapshot: KBSnapshot) -> Tuple[Optional[AnnoyIndex], Optional[List[str]]]:
+        """Load the index while holding ``_index_lock``."""
+        # Another thread may have loaded it while we waited
+        if snapshot.has_index(self.backend.model_name):
+            return snapshot.annoy_index, snapshot.id_map
         
-        if not ANN_INDEX_PATH.exists() or not ID_MAPPING_PATH.exists():
+        ann_index_path, id_mapping_path, _ = self._index_paths()
+        if not ann_index_path.exists() or not id_mapping_path.exists():
             logger.warning("Index not found. Building it now...")
-            self.build_index()
-            return _annoy_index_cache, _id_map_cache
+            self._build_index_locked(snapshot, False, None, None, None)
+        else:
+            self._open_index(snapshot)
+        
+        if not snapshot.has_index(self.backend.model_name):
+            return None, None
+        return snapshot.annoy_index, snapshot.id_map
+    
+    def _open_index(self, snapshot: KBSnapshot) -> bool:
+        """Load the index files and attach them to a snapshot. Returns True on success."""
+        ann_index_path, id_mapping_path, _ = self._index_paths()
+        if not ann_index_path.exists() or not id_mapping_path.exists():
+            return False
         
         try:
             # Load index
-            index = AnnoyIndex(EMB_DIM, 'angular')
-            index.load(str(ANN_INDEX_PATH))
-            _annoy_index_cache = index
+            index = AnnoyIndex(self.backend.dim, 'angular')
+            index.load(str(ann_index_path))
             
             # Load ID mapping
-            with open(ID_MAPPING_PATH, 'r') as f:
-                _id_map_cache = json.load(f)
+            with open(id_mapping_path, 'r') as f:
+                id_map = json.load(f)
             
-            return _annoy_index_cache, _id_map_cache
+            positions_by_item = self._resolve_item_positions(
+                self._load_item_index(id_map, snapshot.records), id_map, snapshot.records
+            )
+            snapshot.attach_index(index, self.backend.model_name, id_map, positions_by_item)
+            return True
             
         except Exception as e:
             logger.error(f"Failed to load index: {e}")
-            return None, None
+            return False
+    
+    def _candidates(
+        self,
+        filters: Optional[KBFilter],
+        snapshot: Optional[KBSnapshot] = None,
+    ) -> Optional[Set[int]]:
+        """KB positions allowed by a filter, or None when unfiltered."""
+        snapshot = snapshot or self.snapshot
+        if filters is None:
+            return None
+        if snapshot.sharded_kb is not None:
+            return snapshot.sharded_kb.candidates(filters)
+        return snapshot.metadata_index.candidates(filters)
     
-    def vector_search(self, query: str, k: int = 5) -> List[Dict[str, Any]]:
-        """Perform vector similarity search."""
-        index, id_map = self._load_index()
+    def _vector_hits(
+        self,
+        query: str,
+        k: int,
+        candidates: Optional[Set[int]] = None,
+        snapshot: Optional[KBSnapshot] = None,
+    ) -> List[Tuple[int, float]]:
+        """Nearest neighbours of the query as (KB position, similarity) pairs."""
+        if candidates is not None and not candidates:
+            return []
+        
+        snapshot = snapshot or self.snapshot
+        if snapshot.sharded_kb is not None:
+            return self._sharded_vector_hits(query, k, candidates, snapshot.sharded_kb)
+        
+        index, id_map = self._load_index(snapshot)
         if not index or not id_map:
             return []
         
@@ -168,146 +652,359 @@ class LocalKBTool:
             logger.warning("Could not generate query embedding")
             return []
         
+        if candidates is not None and len(candidates) <= FILTER_EXACT_MAX_CANDIDATES:
+            return self._score_candidates(snapshot, query_embedding, candidates, k)
+        
         try:
-            # Search
+            # Search; a filtered search over-fetches by the inverse of the candidate share
+            num_neighbours = k
+            if candidates is not None:
+                share = len(candidates) / max(1, len(snapshot.records))
+                num_neighbours = min(index.get_n_items(), int(k / share) * 2 + k)
             indices, distances = index.get_nns_by_vector(
-                query_embedding, k, include_distances=True
+                query_embedding, num_neighbours, include_distances=True
             )
-            
-            # Get results
-            results = []
-            for idx, dist in zip(indices, distances):
-                reaction_id = id_map[idx]
-                
-                # Find the record
-                for record in _kb_data_cache:
-                    if record.get('reaction') == reaction_id:
-                        result = record.copy()
-                        result['similarity_score'] = 1 - dist  # Convert distance to similarity
-                        results.append(result)
-                        break
-            
-            return results
-            
         except Exception as e:
             logger.error(f"Vector search failed: {e}")
             return []
+        
+        # Resolve each hit by its Annoy item id
+        positions_by_item = snapshot.positions_by_item
+        hits = []
+        for idx, dist in zip(indices, distances):
+            position = positions_by_item[idx] if idx < len(positions_by_item) else None
+            if position is not None and (candidates is None or position in candidates):
+                hits.append((position, angular_to_cosine(dist)))
+        return hits[:k]
     
-    def keyword_search(self, query: str, k: int = 5) -> List[Dict[str, Any]]:
-        """Perform simple keyword search as fallback."""
-        if not _kb_data_cache:
+    def _score_candidates(
+        self,
+        snapshot: KBSnapshot,
+        query_embedding: List[float],
+        candidates: Set[int],
+        k: int,
+    ) -> List[Tuple[int, float]]:
+        """Exact similarity of the query to each candidate's indexed vector."""
+        item_by_position = snapshot.item_by_position
+        positions = sorted(p for p in candidates if p in item_by_position)
+        if not positions:
             return []
         
-        query_lower = query.lower()
-        results = []
+        vectors = np.asarray(
+            [snapshot.annoy_index.get_item_vector(item_by_position[p]) for p in positions], dtype=np.float32
+        )
+        query_np = np.asarray(query_embedding, dtype=np.float32)
+        norms = np.linalg.norm(vectors, axis=1) * np.linalg.norm(query_np)
+        # Same scale as unfiltered hits: cosine similarity
+        similarities = (vectors @ query_np) / np.where(norms > 0, norms, 1.0)
         
-        for record in _kb_data_cache:
-            score = 0
-            
-            # Check different fields
-            if query_lower in record.get('reaction', '').lower():
-                score += 3
-            if query_lower in record.get('topic', '').lower():
-                score += 2
-            if query_lower in record.get('description', '').lower():
-                score += 1
-            
-            # Check particles
-            particles = record.get('particles', [])
-            for particle in particles:
-                if query_lower in particle.lower():
-                    score += 2
-            
-            if score > 0:
-                result = record.copy()
-                result['keyword_score'] = score
-                results.append(result)
-        
-        # Sort by score and return top k
-        results.sort(key=lambda x: x['keyword_score'], reverse=True)
-        return results[:k]
-    
-    def hybrid_search(self, query: str, k: int = 5) -> List[Dict[str, Any]]:
-        """Perform hybrid search combining vector and keyword search."""
-        # Try vector search first
-        vector_results = self.vector_search(query, k)
-        
-        # If vector search fails or returns few results, use keyword search
-        if len(vector_results) < k:
-            keyword_results = self.keyword_search(query, k)
+        order = np.argsort(-similarities, kind="stable")[:k]
+        return [(positions[i], float(similarities[i])) for i in order]
+    
+    def record_vectors(self, records: List[Dict[str, Any]]) -> Optional[np.ndarray]:
+        """
+        Indexed vectors of KB records (e.g. search results), unit-normalized.
+        
+        Args:
+            records: KB records, possibly annotated copies
             
-            # Merge results, avoiding duplicates
-            seen_reactions = {r['reaction'] for r in vector_results}
-            for kr in keyword_results:
-                if kr['reaction'] not in seen_reactions:
-                    vector_results.append(kr)
-                    if len(vector_results) >= k:
-                        break
+        Returns:
+            float32 matrix aligned with ``records``, with zero rows for records
+            that are not indexed, or None if the index is not available (or
+            the records may come from a sharded KB)
+        """
+        snapshot = self.snapshot
+        if snapshot.sharded_kb is not None:
+            return None
+        index, _ = self._load_index(snapshot)
+        if not index:
+            return None
         
-        return vector_results[:k]
+        vectors = np.zeros((len(records), self.backend.dim), dtype=np.float32)
+        for n, record in enumerate(records):
+            position = snapshot.position_by_key.get(record_key(record))
+            item_id = snapshot.item_by_position.get(position) if position is not None else None
+            if item_id is not None:
+                vectors[n] = index.get_item_vector(item_id)
+        return normalize_rows(vectors)
     
-    def search_by_particles(self, particles: List[str], k: int = 5) -> List[Dict[str, Any]]:
-        """Search for diagrams containing specific particles."""
-        if not _kb_data_cache:
+    def _sharded_vector_hits(
+        self,
+        query: str,
+        k: int,
+        candidates: Optional[Set[int]],
+        sharded_kb: ShardedKB,
+    ) -> List[Tuple[int, float]]:
+        """Nearest neighbours of the query in a sharded KB as (KB position, similarity) pairs."""
+        query_embedding = self.get_embedding(query)
+        if not query_embedding:
+            logger.warning("Could not generate query embedding")
+            return []
+        
+        try:
+            return sharded_kb.search(query_embedding, k, candidates=candidates, exact_max_rows=FILTER_EXACT_MAX_CANDIDATES)
+        except Exception as e:
+            logger.error(f"Sharded vector search failed: {e}")
             return []
+    
+    def vector_search(self, query: str, k: int = 5, filters: Optional[KBFilter] = None) -> List[Dict[str, Any]]:
+        """
+        Perform vector similarity search.
         
+        Args:
+            query: Search query
+            k: Number of results
+            filters: Optional metadata constraint applied before scoring
+        """
+        snapshot = self.snapshot
         results = []
-        particles_lower = [p.lower() for p in particles]
+        for position, similarity in self._vector_hits(query, k, self._candidates(filters, snapshot), snapshot):
+            result = snapshot.record(position)
+            result['similarity_score'] = similarity
+            results.append(result)
+        return results
+    
+    def _keyword_hits(
+        self,
+        query: str,
+        k: int,
+        candidates: Optional[Set[int]] = None,
+        snapshot: Optional[KBSnapshot] = None,
+    ) -> List[Tuple[int, float]]:
+        """BM25 matches of the query as (KB position, score) pairs."""
+        snapshot = snapshot or self.snapshot
+        if not snapshot.num_records:
+            return []
+        if candidates is not None and not candidates:
+            return []
+        if snapshot.sharded_kb is not None:
+            return snapshot.sharded_kb.keyword_search(query, k, candidates=candidates)
+        return snapshot.keyword_index.search(query, k, candidates=candidates)
+    
+    def keyword_search(self, query: str, k: int = 5, filters: Optional[KBFilter] = None) -> List[Dict[str, Any]]:
+        """
+        Perform BM25 keyword search over reaction, topic, description and particles.
         
-        for record in _kb_data_cache:
-            record_particles = [p.lower() for p in record.get('particles', [])]
-            
-            # Count matching particles
-            matches = sum(1 for p in particles_lower if any(p in rp for rp in record_particles))
-            
-            if matches > 0:
-                result = record.copy()
-                result['particle_match_score'] = matches / len(particles)
-                results.append(result)
+        Args:
+            query: Search query
+            k: Number of results
+            filters: Optional metadata constraint applied before scoring
+        """
+        snapshot = self.snapshot
+        results = []
+        for position, score in self._keyword_hits(query, k, self._candidates(filters, snapshot), snapshot):
+            result = snapshot.record(position)
+            result['keyword_score'] = score
+            results.append(result)
         
-        # Sort by match score
-        results.sort(key=lambda x: x['particle_match_score'], reverse=True)
-        return results[:k]
+        return results
+    
+    def hybrid_search(self, query: str, k: int = 5, filters: Optional[KBFilter] = None) -> List[Dict[str, Any]]:
+        """
+        Perform hybrid search by weighted fusion of vector and keyword scores.
+        
+        Both retrievers run concurrently and their hits are merged by KB
+        record, weighted by ``config.search.vector_weight`` and
+        ``keyword_weight``. If the query embedding does not arrive within
+        ``hybrid_vector_timeout_seconds``, keyword results are returned alone
+        and vector retrieval is skipped for ``vector_retry_cooldown_seconds``.
+        
+        Args:
+            query: Search query
+            k: Number of results
+            filters: Optional metadata constraint; both retrievers only score
+                records that satisfy it
+        """
+        results, _ = self.hybrid_search_with_status(query, k, filters)
+        return results
+    
+    def hybrid_search_with_status(
+        self,
+        query: str,
+        k: int = 5,
+        filters: Optional[KBFilter] = None,
+    ) -> Tuple[List[Dict[str, Any]], bool]:
+        """
+        Hybrid search that also reports whether vector hits were fused in.
+        
+        Vector retrieval can be skipped (cooldown), time out, fail or return
+        nothing (e.g. no query embedding); the results are then keyword-only.
+        
+        Returns:
+            (results, vectors_used) tuple; see ``hybrid_search``
+        """
+        global _vector_unavailable_until
+        
+        snapshot = self.snapshot
+        if not snapshot.num_records or k <= 0:
+            return [], False
+        
+        search_config = config.search
+        vector_weight = search_config.vector_weight
+        keyword_weight = search_config.keyword_weight
+        if vector_weight <= 0 and keyword_weight <= 0:
+            vector_weight = keyword_weight = 1.0
+        
+        candidates = self._candidates(filters, snapshot)
+        if candidates is not None and not candidates:
+            return [], False
+        
+        # Retrieve a deeper candidate list from each side so fusion can reorder
+        num_candidates = min(snapshot.num_records, k * 2)
+        
+        vector_future = None
+        if vector_weight > 0 and time.monotonic() >= _vector_unavailable_until:
+            vector_future = _retrieval_executor.submit(
+                self._vector_hits, query, num_candidates, candidates, snapshot
+            )
+        
+        keyword_hits = self._keyword_hits(query, num_candidates, candidates, snapshot) if keyword_weight > 0 else []
+        
+        vector_hits: List[Tuple[int, float]] = []
+        if vector_future is not None:
+            try:
+                vector_hits = vector_future.result(timeout=search_config.hybrid_vector_timeout_seconds)
+            except FutureTimeoutError:
+                _vector_unavailable_until = time.monotonic() + search_config.vector_retry_cooldown_seconds
+                logger.warning(
+                    f"Vector search exceeded {search_config.hybrid_vector_timeout_seconds}s, "
+                    f"using keyword results only for {search_config.vector_retry_cooldown_seconds}s"
+                )
+            except Exception as e:
+                logger.error(f"Vector search failed: {e}")
+        
+        vector_scores = dict(vector_hits)
+        keyword_scores = dict(keyword_hits)
+        fused = _fuse_scores([(vector_hits, vector_weight), (keyword_hits, keyword_weight)])
+        
+        results = []
+        for position, score in fused[:k]:
+            result = snapshot.record(position)
+            if position in vector_scores:
+                result['similarity_score'] = vector_scores[position]
+            if position in keyword_scores:
+                result['keyword_score'] = keyword_scores[position]
+            result['hybrid_score'] = score
+            results.append(result)
+        
+        return results, bool(vector_hits)
+    
+    def search_by_particles(self, particles: List[str], k: int = 5) -> List[Dict[str, Any]]:
+        """
+        Search for diagrams containing specific particles.
+        
+        A particle matches a record if it is a case-insensitive substring of
+        one of the record's particles; records are ranked by the share of
+        requested particles they match.
+        """
+        snapshot = self.snapshot
+        if not snapshot.num_records or not particles:
+            return []
+        
+        # Count matching particles per record from the posting lists
+        metadata = snapshot.sharded_kb if snapshot.sharded_kb is not None else snapshot.metadata_index
+        matches: Dict[int, int] = {}
+        for particle in particles:
+            for position in metadata.with_particle_substring(particle):
+                matches[position] = matches.get(position, 0) + 1
+        
+        ranked = sorted(matches.items(), key=lambda item: (-item[1], item[0]))
+        results = []
+        for position, count in ranked[:k]:
+            result = snapshot.record(position)
+            result['particle_match_score'] = count / len(particles)
+            results.append(result)
+        return results
     
     def search_by_process_type(self, process_type: str) -> List[Dict[str, Any]]:
         """Search for diagrams by process type."""
-        if not _kb_data_cache:
+        snapshot = self.snapshot
+        if not snapshot.num_records:
             return []
         
-        process_type_lower = process_type.lower()
-        results = []
+        metadata = snapshot.sharded_kb if snapshot.sharded_kb is not None else snapshot.metadata_index
+        positions = metadata.with_process_type(process_type)
+        return [snapshot.record(position) for position in sorted(positions)]
+    
+    def search_by_topology(
+        self,
+        query: TopologyQuery,
+        k: int = 5,
+        typed: bool = True,
+        exact_only: bool = False,
+    ) -> List[Dict[str, Any]]:
+        """
+        Search for diagrams with the same topology as a TikZ diagram.
         
-        for record in _kb_data_cache:
-            if record.get('process_type', '').lower() == process_type_lower:
-                results.append(record.copy())
+        Args:
+            query: TikZ source, a topology hash or a topology class (e.g. "box")
+            k: Number of results
+            typed: Require the same particle type on every line for an exact match
+            exact_only: Skip the nearest non-identical topologies
+            
+        Returns:
+            Records with ``topology_score`` (1.0 for an exact match),
+            ``topology`` and ``topology_hash``
+        """
+        snapshot = self.snapshot
+        if not snapshot.num_records:
+            return []
+        
+        if snapshot.sharded_kb is not None:
+            hits = snapshot.sharded_kb.topology_search(query, k, typed=typed, exact_only=exact_only)
+        else:
+            index = snapshot.topology_index
+            hits = [
+                (position, score, index.signatures[position])
+                for position, score in index.search(query, k, typed=typed, exact_only=exact_only)
+            ]
         
+        results = []
+        for position, score, signature in hits:
+            result = snapshot.record(position)
+            result['topology_score'] = score
+            result['topology'] = signature.name
+            result['topology_hash'] = signature.hash
+            results.append(result)
         return results
 
 
+def get_local_kb_tool() -> LocalKBTool:
+    """Get the process-wide LocalKBTool instance."""
+    return LocalKBTool()
+
+
 # Convenience functions for agent use
-def search_local_kb(query: str, k: int = 5) -> List[Dict[str, Any]]:
-    """Search local knowledge base using hybrid search."""
-    tool = LocalKBTool()
-    return tool.hybrid_search(query, k)
+def search_local_kb(query: str, k: int = 5, filters: Optional[KBFilter] = None) -> List[Dict[str, Any]]:
+    """Search local knowledge base using hybrid search, optionally restricted by metadata."""
+    return get_local_kb_tool().hybrid_search(query, k, filters)
 
 
 def search_local_kb_by_particles(particles: List[str], k: int = 5) -> List[Dict[str, Any]]:
     """Search local knowledge base by particles."""
-    tool = LocalKBTool()
-    return tool.search_by_particles(particles, k)
+    return get_local_kb_tool().search_by_particles(particles, k)
+
+
+def search_local_kb_by_topology(query: TopologyQuery, k: int = 5, exact_only: bool = False) -> List[Dict[str, Any]]:
+    """Search local knowledge base by diagram topology."""
+    return get_local_kb_tool().search_by_topology(query, k, exact_only=exact_only)
 
 
 def build_local_index():
     """Build the local vector search index."""
-    tool = LocalKBTool()
-    tool.build_index(force_rebuild=True)
+    get_local_kb_tool().build_index(force_rebuild=True)
+
+
+def reload_local_kb(force: bool = False) -> bool:
+    """Reload the local KB from disk; returns True if a new snapshot was swapped in."""
+    return get_local_kb_tool().reload(force)
 
 
 if __name__ == "__main__":
     # Test the local KB tool
     print("Testing Local KB Tool...")
     
-    tool = LocalKBTool()
+    tool = get_local_kb_tool()
     
     # Build index if needed
     print("\nBuilding index...")
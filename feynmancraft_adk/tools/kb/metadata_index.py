@@ -0,0 +1,202 @@
+"""
+Posting-list indexes over KB record metadata.
+
+Particles, process types and topics are indexed once when the KB is loaded,
+so constrained lookups ("decays involving muons") touch only the matching
+records instead of scanning the whole KB. ``KBFilter`` describes such a
+constraint; ``MetadataIndex.candidates`` turns it into the set of record
+positions that vector and keyword search then score.
+"""
+
+import threading
+from collections import defaultdict
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Set
+
+from .keyword_index import tokenize
+
+
+@dataclass
+class KBFilter:
+    """
+    Metadata constraint on KB records.
+
+    All given conditions must hold.
+
+    Attributes:
+        particles: Particles that must all appear in the record, in any
+            notation (``"muon"``, ``"\\mu^-"``, ``"μ⁻"``, ``"Z"``)
+        process_type: Process type, case-insensitive (e.g. ``"decay"``)
+        topic: Case-insensitive substring of the record topic
+        where: Extra predicate applied to the records left by the other conditions
+    """
+    particles: List[str] = field(default_factory=list)
+    process_type: Optional[str] = None
+    topic: Optional[str] = None
+    where: Optional[Callable[[Dict[str, Any]], bool]] = None
+
+    def is_empty(self) -> bool:
+        return not self.particles and not self.process_type and not self.topic and self.where is None
+
+
+def particle_term(particle: str) -> str:
+    """
+    Canonical term of a particle name in any notation.
+
+    The most specific alias is used, so ``"e^+"`` matches positrons only
+    while ``"electron"`` also matches positrons (see keyword_index).
+    """
+    terms = tokenize(particle)
+    return terms[0] if terms else particle.strip().lower()
+
+
+class MetadataIndex:
+    """
+    Posting lists from metadata values to record positions.
+
+    Attributes:
+        particles: Lowercased particle string -> positions
+        particle_terms: Canonical particle term -> positions
+        process_types: Lowercased process type -> positions
+        topics: Lowercased topic -> positions
+    """
+
+    _POSTING_FIELDS = ("particles", "particle_terms", "process_types", "topics")
+
+    def __init__(self, records: Iterable[Dict[str, Any]]):
+        self.particles: Dict[str, Set[int]] = defaultdict(set)
+        self.particle_terms: Dict[str, Set[int]] = defaultdict(set)
+        self.process_types: Dict[str, Set[int]] = defaultdict(set)
+        self.topics: Dict[str, Set[int]] = defaultdict(set)
+        indexed: List[Dict[str, Any]] = []
+
+        for position, record in enumerate(records):
+            indexed.append(record)
+            particles = record.get("particles", [])
+            if isinstance(particles, list):
+                for particle in particles:
+                    particle = str(particle)
+                    self.particles[particle.lower()].add(position)
+                    for term in tokenize(particle) or [particle.strip().lower()]:
+                        self.particle_terms[term].add(position)
+            self.process_types[str(record.get("process_type") or "").lower()].add(position)
+            self.topics[str(record.get("topic") or "").lower()].add(position)
+        self.records: Sequence[Dict[str, Any]] = indexed
+
+    def __len__(self) -> int:
+        return len(self.records)
+
+    def to_dict(self) -> Dict[str, Dict[str, List[int]]]:
+        """Posting lists as JSON-serializable data (see ``from_dict``)."""
+        return {
+            name: {key: sorted(positions) for key, positions in getattr(self, name).items()}
+            for name in self._POSTING_FIELDS
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Dict[str, List[int]]], records: Sequence[Dict[str, Any]]) -> "MetadataIndex":
+        """
+        Load posting lists saved with ``to_dict``.
+
+        Args:
+            data: Saved posting lists
+            records: The indexed records; only read by ``KBFilter.where``, so
+                a sequence that reads records on access keeps them on disk
+        """
+        index = cls(())
+        for name in cls._POSTING_FIELDS:
+            postings = getattr(index, name)
+            for key, positions in data[name].items():
+                postings[key] = set(positions)
+        index.records = records
+        return index
+
+    @staticmethod
+    def _containing(postings: Dict[str, Set[int]], substring: str) -> Set[int]:
+        """Union of the postings of every key that contains a substring."""
+        matched: Set[int] = set()
+        for key, positions in postings.items():
+            if substring in key:
+                matched |= positions
+        return matched
+
+    def with_particle_substring(self, particle: str) -> Set[int]:
+        """Records with a particle string containing ``particle`` (case-insensitive)."""
+        return self._containing(self.particles, particle.lower())
+
+    def with_any_particle(self, particles: List[str]) -> Set[int]:
+        """Records listing any of the particle strings exactly (case-insensitive)."""
+        matched: Set[int] = set()
+        for particle in particles:
+            matched |= self.particles.get(particle.lower(), set())
+        return matched
+
+    def with_particle(self, particle: str) -> Set[int]:
+        """Records involving a particle given in any notation."""
+        return set(self.particle_terms.get(particle_term(particle), set()))
+
+    def with_process_type(self, process_type: str) -> Set[int]:
+        """Records of a process type (case-insensitive)."""
+        return set(self.process_types.get(process_type.lower(), set()))
+
+    def with_topic(self, topic: str) -> Set[int]:
+        """Records whose topic contains ``topic`` (case-insensitive)."""
+        return self._containing(self.topics, topic.lower())
+
+    def candidates(self, kb_filter: Optional[KBFilter]) -> Optional[Set[int]]:
+        """
+        Positions of the records matching a filter.
+
+        Posting lists are intersected smallest first, and ``where`` only
+        runs on the records that are left.
+
+        Args:
+            kb_filter: Constraint, or None
+
+        Returns:
+            Set of matching positions, or None if there is no constraint
+        """
+        if kb_filter is None or kb_filter.is_empty():
+            return None
+
+        sets = [self.with_particle(particle) for particle in kb_filter.particles]
+        if kb_filter.process_type:
+            sets.append(self.with_process_type(kb_filter.process_type))
+        if kb_filter.topic:
+            sets.append(self.with_topic(kb_filter.topic))
+
+        if sets:
+            sets.sort(key=len)
+            matched = set(sets[0])
+            for other in sets[1:]:
+                matched &= other
+                if not matched:
+                    break
+        else:
+            matched = set(range(len(self.records)))
+
+        if kb_filter.where is not None:
+            matched = {position for position in matched if kb_filter.where(self.records[position])}
+        return matched
+
+
+_last_index: Optional[MetadataIndex] = None
+_last_records: Optional[List[Dict[str, Any]]] = None
+_last_lock = threading.Lock()
+
+
+def get_metadata_index(records: List[Dict[str, Any]]) -> MetadataIndex:
+    """
+    Get a metadata index of a record list.
+
+    The index of the most recently used list is kept, so repeated filters
+    over the same list (e.g. the loaded KB) are built once. A list that is
+    resized is re-indexed; records edited in place are not detected.
+    """
+    global _last_index, _last_records
+
+    with _last_lock:
+        if _last_records is not records or _last_index is None or len(_last_index) != len(records):
+            _last_index = MetadataIndex(records)
+            _last_records = records
+        return _last_index
@@ -0,0 +1,113 @@
+"""
+Int8 quantized vector index with exact re-ranking.
+
+Every unit-length float32 row is stored as int8 codes plus one float32 scale
+(``row ≈ codes * scale``), which is about 4x smaller than the float matrix.
+A query is scored against the codes first; only the best ``k * rerank_factor``
+candidates are then re-scored exactly against the float rows. When the float
+matrix is the memory-mapped vector store, only those candidate rows are paged
+in, so the resident footprint is the codes.
+"""
+
+from typing import Any, List, Optional, Tuple
+
+import numpy as np
+
+# Rows converted to float32 at a time while scoring the codes; small enough
+# that the converted block stays in cache for the matrix-vector product
+SCORE_CHUNK_ROWS = 256
+
+
+def quantize_int8(matrix: Any, chunk_rows: int = SCORE_CHUNK_ROWS) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Quantize the rows of a matrix to int8 with one symmetric scale per row.
+
+    Args:
+        matrix: float matrix (may be memory-mapped; it is read in chunks)
+        chunk_rows: Rows processed at a time
+
+    Returns:
+        Tuple of (codes int8 matrix, scales float32 vector)
+    """
+    n, dim = matrix.shape
+    codes = np.empty((n, dim), dtype=np.int8)
+    scales = np.empty(n, dtype=np.float32)
+    for start in range(0, n, chunk_rows):
+        chunk = np.asarray(matrix[start:start + chunk_rows], dtype=np.float32)
+        chunk_scales = np.abs(chunk).max(axis=1) / 127.0
+        chunk_scales[chunk_scales == 0] = 1.0
+        codes[start:start + len(chunk)] = np.rint(chunk / chunk_scales[:, None]).astype(np.int8)
+        scales[start:start + len(chunk)] = chunk_scales
+    return codes, scales
+
+
+class QuantizedIndex:
+    """
+    Two-stage cosine search over a pre-normalized float32 matrix.
+
+    Attributes:
+        codes: int8 matrix, one row per float row
+        scales: float32 scale of each row
+        matrix: The float rows used for exact re-ranking
+        rerank_factor: Candidates re-ranked per requested result
+    """
+
+    def __init__(self, matrix: np.ndarray, rerank_factor: int = 4):
+        self.matrix = matrix
+        self.rerank_factor = max(1, rerank_factor)
+        self.codes, self.scales = quantize_int8(matrix)
+
+    def __len__(self) -> int:
+        return len(self.codes)
+
+    @property
+    def nbytes(self) -> int:
+        """Memory held by the quantized codes and scales."""
+        return self.codes.nbytes + self.scales.nbytes
+
+    def approximate_scores(self, query: np.ndarray) -> np.ndarray:
+        """Approximate cosine similarity of every row to a unit-length query."""
+        scores = np.empty(len(self.codes), dtype=np.float32)
+        block = np.empty((SCORE_CHUNK_ROWS, self.codes.shape[1]), dtype=np.float32)
+        for start in range(0, len(self.codes), SCORE_CHUNK_ROWS):
+            chunk = self.codes[start:start + SCORE_CHUNK_ROWS]
+            np.copyto(block[:len(chunk)], chunk, casting="unsafe")
+            np.matmul(block[:len(chunk)], query, out=scores[start:start + len(chunk)])
+        return scores * self.scales
+
+    def search(self, query: Any, k: int, rerank_factor: Optional[int] = None) -> List[Tuple[int, float]]:
+        """
+        Find the rows most similar to a query.
+
+        Args:
+            query: Query vector (does not need to be normalized)
+            k: Number of rows to return
+            rerank_factor: Override of the candidates re-ranked per result
+
+        Returns:
+            List of (row, cosine_similarity) sorted by descending similarity;
+            similarities are exact
+        """
+        if len(self.codes) == 0 or k <= 0:
+            return []
+
+        query_np = np.asarray(query, dtype=np.float32)
+        norm = np.linalg.norm(query_np)
+        if norm == 0 or query_np.shape[0] != self.codes.shape[1]:
+            return []
+        query_np = query_np / norm
+
+        approximate = self.approximate_scores(query_np)
+        num_candidates = min(len(approximate), k * (rerank_factor or self.rerank_factor))
+        if num_candidates < len(approximate):
+            candidates = np.argpartition(-approximate, num_candidates - 1)[:num_candidates]
+        else:
+            candidates = np.arange(len(approximate))
+
+        # Sorted row order keeps reads from a memory-mapped matrix sequential
+        candidates.sort()
+        exact = np.asarray(self.matrix[candidates], dtype=np.float32) @ query_np
+        k = min(k, len(candidates))
+        top = np.argpartition(-exact, k - 1)[:k]
+        top = top[np.argsort(-exact[top], kind="stable")]
+        return [(int(candidates[i]), float(exact[i])) for i in top]
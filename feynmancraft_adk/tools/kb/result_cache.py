@@ -0,0 +1,169 @@
+"""
+In-process cache of KB search results.
+
+Agents repeat the same queries ("electron positron annihilation") many times,
+and every repeat would otherwise redo the query embedding, the ANN search and
+the record copies. Results are cached per normalized query and k with a TTL
+and LRU eviction. Every lookup passes the current KB/index version; when it
+changes, all cached results are dropped.
+
+Hits, misses, evictions and invalidations are reported to ``tool_metrics``.
+"""
+
+import re
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, Hashable, Iterable, List, Optional, Tuple
+
+from ...shared_libraries.config import config
+from ...tool_metrics import tool_metrics_collector
+
+_PUNCTUATION_EDGES = " \t\n\r.,;:!?\"'"
+
+
+def normalize_query(query: str) -> str:
+    """
+    Normalize a query for use in a cache key.
+
+    Unicode is NFKC-normalized, case and whitespace are folded and trailing
+    punctuation is dropped, so "Electron positron annihilation?" and
+    "electron  positron annihilation" share one entry.
+    """
+    query = unicodedata.normalize("NFKC", query or "").lower()
+    return re.sub(r"\s+", " ", query).strip(_PUNCTUATION_EDGES)
+
+
+def files_version(paths: Iterable[Path], *extra: Hashable) -> Tuple:
+    """
+    Build a version token from file modification times and sizes.
+
+    Args:
+        paths: Files whose changes should invalidate cached results
+        extra: Additional values to include (e.g. the embedding model name)
+
+    Returns:
+        Hashable token that changes when any file is written, created or removed
+    """
+    parts: List[Hashable] = []
+    for path in paths:
+        try:
+            stat = Path(path).stat()
+            parts.append((str(path), stat.st_mtime_ns, stat.st_size))
+        except OSError:
+            parts.append((str(path), None, None))
+    return tuple(parts) + tuple(extra)
+
+
+class QueryResultCache:
+    """
+    Thread-safe TTL + LRU cache of search result lists.
+
+    Stored results are copied on the way in and out so callers can annotate
+    the returned records without corrupting the cache.
+    """
+
+    def __init__(self, name: str, max_entries: int = 512, ttl_seconds: float = 600.0):
+        self.name = name
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[Tuple, Tuple[float, List[Dict[str, Any]]]]" = OrderedDict()
+        self._version: Optional[Hashable] = None
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def make_key(namespace: str, query: str, k: int) -> Tuple[str, str, int]:
+        """Cache key of a search call."""
+        return namespace, normalize_query(query), k
+
+    def _check_version(self, version: Hashable):
+        """Drop every entry if the KB/index version changed. Caller holds the lock."""
+        if version == self._version:
+            return
+        if self._entries:
+            tool_metrics_collector.record_cache_event(self.name, "invalidation", len(self._entries), size=0)
+            self._entries.clear()
+        self._version = version
+
+    def get(self, namespace: str, query: str, k: int, version: Hashable) -> Optional[List[Dict[str, Any]]]:
+        """
+        Look up cached results.
+
+        Args:
+            namespace: Search function the results belong to
+            query: Search query
+            k: Number of results requested
+            version: Current KB/index version
+
+        Returns:
+            Copy of the cached results, or None on a miss
+        """
+        key = self.make_key(namespace, query, k)
+        with self._lock:
+            self._check_version(version)
+            entry = self._entries.get(key)
+            if entry is not None and time.monotonic() - entry[0] > self.ttl_seconds:
+                del self._entries[key]
+                tool_metrics_collector.record_cache_event(self.name, "expiration")
+                entry = None
+            if entry is None:
+                tool_metrics_collector.record_cache_event(self.name, "miss", size=len(self._entries))
+                return None
+            self._entries.move_to_end(key)
+            tool_metrics_collector.record_cache_event(self.name, "hit", size=len(self._entries))
+            return [result.copy() for result in entry[1]]
+
+    def put(self, namespace: str, query: str, k: int, version: Hashable, results: List[Dict[str, Any]]):
+        """Store results, evicting the least recently used entries if full."""
+        if self.max_entries <= 0:
+            return
+        key = self.make_key(namespace, query, k)
+        with self._lock:
+            self._check_version(version)
+            self._entries[key] = (time.monotonic(), [result.copy() for result in results])
+            self._entries.move_to_end(key)
+            evicted = 0
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                evicted += 1
+            if evicted:
+                tool_metrics_collector.record_cache_event(self.name, "eviction", evicted, size=len(self._entries))
+
+    def clear(self):
+        """Remove all cached results."""
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._entries)
+
+
+_cache: Optional[QueryResultCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_result_cache() -> Optional[QueryResultCache]:
+    """
+    Get the process-wide KB search result cache.
+
+    Returns:
+        The shared QueryResultCache, or None if disabled via configuration
+    """
+    global _cache
+
+    kb_config = config.knowledge_base
+    if not kb_config.result_cache_enabled:
+        return None
+
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = QueryResultCache(
+                    "kb_search_result_cache",
+                    max_entries=kb_config.result_cache_max_entries,
+                    ttl_seconds=kb_config.result_cache_ttl_seconds,
+                )
+    return _cache
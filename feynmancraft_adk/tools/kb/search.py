@@ -3,15 +3,67 @@ KB search tools for TikZ examples.
 """
 
 import asyncio
-from typing import List, Dict, Any, Optional
+from typing import Callable, List, Dict, Any, Optional, Hashable
 import logging
 
+import numpy as np
+
+from .embedding_backends import get_embedding_backend
+from .embeddings import mmr_select
 from .embedding_manager import get_kb_manager
-from .embeddings import get_embedding, cosine_similarity
+from .result_cache import get_result_cache
+from ...shared_libraries.config import config
 
 logger = logging.getLogger(__name__)
 
 
+def _kb_version() -> Hashable:
+    """
+    Version of the KB snapshots and embedding model that results depend on.
+    
+    Built from in-memory counters only, so a cache hit touches no files:
+    changed files are served (and change the version) once a reload swaps
+    in their snapshot.
+    """
+    backend = get_embedding_backend()
+    manager_snapshot = get_kb_manager().snapshot
+    snapshots = [manager_snapshot.version if manager_snapshot is not None else 0]
+    try:
+        from .local import current_snapshot
+        local_snapshot = current_snapshot()
+        if local_snapshot is not None:
+            snapshots += [local_snapshot.version, local_snapshot.index_version]
+    except ImportError:
+        pass
+    search_config = config.search
+    mmr = (search_config.mmr_enabled, search_config.mmr_lambda, search_config.mmr_candidates_factor, search_config.mmr_top_k)
+    return (backend.model_name, mmr, tuple(snapshots))
+
+
+def _retrieval_k(k: int) -> int:
+    """Number of hits to retrieve so MMR has candidates to choose from."""
+    search_config = config.search
+    if not search_config.mmr_enabled:
+        return k
+    return k * max(1, search_config.mmr_candidates_factor)
+
+
+def _rank_and_diversify(
+    results: List[Dict[str, Any]],
+    query: str,
+    k: int,
+    record_vectors: Callable[[List[Dict[str, Any]]], Optional[np.ndarray]],
+) -> List[Dict[str, Any]]:
+    """Apply rank_results and MMR when ``MMR_ENABLED`` is set."""
+    search_config = config.search
+    if not search_config.mmr_enabled or not results:
+        return results[:k]
+    if search_config.mmr_top_k > 0:
+        k = min(k, search_config.mmr_top_k)
+    results = rank_results(results, query)
+    return diversify_results(results, record_vectors(results), k=k)
+
+
 async def search_local_tikz_examples(query: str, top_k: int = 5) -> List[Dict[str, Any]]:
     """
     Perform semantic search for TikZ examples in local KB.
@@ -28,38 +80,37 @@ async def search_local_tikz_examples(query: str, top_k: int = 5) -> List[Dict[st
         manager = get_kb_manager()
         await manager.initialize()
         
-        if not manager.kb_examples or not manager.embeddings_cache:
+        # Versioned after initialization, so a cold start caches under the loaded KB
+        cache = get_result_cache()
+        version = _kb_version() if cache is not None else None
+        if cache is not None:
+            cached = cache.get("search_local_tikz_examples", query, top_k, version)
+            if cached is not None:
+                return cached
+        
+        # One snapshot for the whole search, even if a reload swaps in the next
+        snapshot = manager.snapshot
+        if snapshot is None or not snapshot.kb_examples or snapshot.embedding_matrix is None:
             return [{"error": "KB examples or embeddings are not available."}]
         
         # Get query embedding
-        query_embedding = await asyncio.to_thread(
-            get_embedding, 
-            query, 
-            manager.model_name
-        )
+        query_embedding = await asyncio.to_thread(manager.backend.embed_query, query)
         
         if not query_embedding:
             return [{"error": "Failed to get query embedding"}]
         
-        # Calculate similarities
-        similarities = []
-        for i, example in enumerate(manager.kb_examples):
-            if i in manager.embeddings_cache:
-                example_embedding = manager.embeddings_cache[i]
-                similarity = cosine_similarity(query_embedding, example_embedding)
-                similarities.append((similarity, i, example))
-        
-        # Sort by similarity and return top_k
-        similarities.sort(key=lambda x: x[0], reverse=True)
-        
+        # Score all examples with one matrix-vector product
         results = []
-        for similarity, idx, example in similarities[:top_k]:
-            result = example.copy()
+        for idx, similarity in snapshot.search(query_embedding, _retrieval_k(top_k)):
+            result = snapshot.kb_examples[idx].copy()
             result["similarity_score"] = similarity
             result["source_type"] = "local"
             results.append(result)
+        results = _rank_and_diversify(results, query, top_k, snapshot.record_vectors)
             
         logger.info(f"Found {len(results)} local KB results for query: {query[:50]}...")
+        if cache is not None and results:
+            cache.put("search_local_tikz_examples", query, top_k, version, results)
         return results
         
     except Exception as e:
@@ -83,13 +134,14 @@ def search_tikz_examples(query: str, use_bigquery: bool = False, k: int = 5) ->
     
     # Use local search only
     try:
-        from . import LocalKBTool
+        from .local import get_local_kb_tool
         
         logger.info("Using local KB search...")
-        local_tool = LocalKBTool()
+        local_tool = get_local_kb_tool()
         
         # Try hybrid search first
-        results = local_tool.hybrid_search(query, k=k)
+        results = local_tool.hybrid_search(query, k=_retrieval_k(k))
+        results = _rank_and_diversify(results, query, k, local_tool.record_vectors)
         
         if results:
             logger.info(f"Found {len(results)} results from local KB tool")
@@ -125,6 +177,28 @@ def search_tikz_examples(query: str, use_bigquery: bool = False, k: int = 5) ->
     return []
 
 
+def _search_namespace(vectors_used: Optional[bool] = None) -> str:
+    """
+    Cache namespace of search_tikz_examples_async for a search mode.
+    
+    Keyword-only results (vector search timed out, failed or is disabled)
+    are cached apart from hybrid results, so they are not served once
+    vectors are back.
+    
+    Args:
+        vectors_used: Whether the results include vector hits, as reported
+            by hybrid search; None to look up the mode a search would use now
+    """
+    if vectors_used is None:
+        try:
+            from .local import vector_search_available
+            vectors_used = vector_search_available() and config.search.vector_weight > 0
+        except ImportError:
+            vectors_used = False
+    mode = "hybrid" if vectors_used else "keyword"
+    return f"search_tikz_examples_async:{mode}"
+
+
 async def search_tikz_examples_async(query: str, use_bigquery: bool = False, k: int = 5) -> List[Dict[str, Any]]:
     """
     Async search interface for TikZ examples using local KB only.
@@ -141,21 +215,34 @@ async def search_tikz_examples_async(query: str, use_bigquery: bool = False, k:
     
     # Use local search only
     try:
-        from . import LocalKBTool
+        from .local import get_local_kb_tool
+        
+        # First use loads the KB, so keep it off the event loop
+        local_tool = await asyncio.to_thread(get_local_kb_tool)
+        
+        # Versioned after loading, so a cold start caches under the loaded KB
+        cache = get_result_cache()
+        version = _kb_version() if cache is not None else None
+        if cache is not None:
+            cached = cache.get(_search_namespace(), query, k, version)
+            if cached is not None:
+                return cached
         
         logger.info("Using local KB search...")
         
         def local_kb_search():
-            local_tool = LocalKBTool()
-            return local_tool.hybrid_search(query, k=k)
+            hits, vectors_used = local_tool.hybrid_search_with_status(query, k=_retrieval_k(k))
+            return _rank_and_diversify(hits, query, k, local_tool.record_vectors), vectors_used
         
-        results = await asyncio.to_thread(local_kb_search)
+        results, vectors_used = await asyncio.to_thread(local_kb_search)
         
         if results:
             logger.info(f"Found {len(results)} results from local KB tool")
             # Add source type
             for result in results:
                 result["source_type"] = "local"
+            if cache is not None:
+                cache.put(_search_namespace(vectors_used), query, k, version, results)
             return results
         else:
             logger.warning("No results found in local KB tool, trying semantic search...")
@@ -176,10 +263,40 @@ async def search_tikz_examples_async(query: str, use_bigquery: bool = False, k:
     return []
 
 
+def search_tikz_by_topology(tikz_code: str, k: int = 5, exact_only: bool = False) -> List[Dict[str, Any]]:
+    """
+    Search for KB examples whose diagram has the same topology as ``tikz_code``.
+    
+    Exact matches (same graph and particle types) come first with
+    ``topology_score`` 1.0; they can be reused as they are.
+    
+    Args:
+        tikz_code: TikZ source, a topology hash or a topology class (e.g. "box")
+        k: Number of results to return
+        exact_only: Return exact matches only
+        
+    Returns:
+        List of KB examples with topology scores
+    """
+    try:
+        from .local import get_local_kb_tool
+        
+        results = get_local_kb_tool().search_by_topology(tikz_code, k=k, exact_only=exact_only)
+        for result in results:
+            result["source_type"] = "local"
+        return results
+    except Exception as e:
+        logger.error(f"Topology search failed: {e}")
+        return []
+
+
 def rank_results(results: List[Dict[str, Any]], query: str) -> List[Dict[str, Any]]:
     """
     Re-rank search results based on additional criteria.
     
+    The base score is ``hybrid_score`` for hybrid results and
+    ``similarity_score`` otherwise.
+    
     Args:
         results: List of search results
         query: Original query
@@ -190,7 +307,9 @@ def rank_results(results: List[Dict[str, Any]], query: str) -> List[Dict[str, An
     query_lower = query.lower()
     
     for result in results:
-        score = result.get("similarity_score", 0.0)
+        # Hybrid results are ranked by their fused score, which also covers
+        # records found by keyword search alone
+        score = result.get("hybrid_score", result.get("similarity_score", 0.0))
         
         # Boost results with exact topic matches
         topic = result.get("topic", "").lower()
@@ -215,6 +334,45 @@ def rank_results(results: List[Dict[str, Any]], query: str) -> List[Dict[str, An
     return results
 
 
+def diversify_results(
+    results: List[Dict[str, Any]],
+    vectors: Optional[np.ndarray],
+    k: Optional[int] = None,
+    lambda_mult: Optional[float] = None,
+) -> List[Dict[str, Any]]:
+    """
+    Re-rank results by maximal marginal relevance to drop near-duplicates.
+    
+    Relevance is each result's ``final_score`` from rank_results (falling
+    back to ``similarity_score``), scaled to 0-1 across the results.
+    
+    Args:
+        results: Ranked search results
+        vectors: Unit-length embeddings aligned with ``results`` (see
+            ``record_vectors`` of LocalKBTool and KBEmbeddingManager)
+        k: Number of results to keep (default: all)
+        lambda_mult: Relevance/diversity trade-off (defaults to ``config.search.mmr_lambda``)
+        
+    Returns:
+        Up to k results in MMR order; the first k results if vectors are missing
+    """
+    if k is None:
+        k = len(results)
+    if vectors is None or len(vectors) != len(results) or len(results) <= 1:
+        return results[:k]
+    if lambda_mult is None:
+        lambda_mult = config.search.mmr_lambda
+    
+    relevance = np.array(
+        [result.get("final_score", result.get("similarity_score", 0.0)) for result in results],
+        dtype=np.float32,
+    )
+    span = float(relevance.max() - relevance.min())
+    relevance = (relevance - relevance.min()) / span if span > 0 else np.ones_like(relevance)
+    
+    return [results[row] for row in mmr_select(relevance, vectors, k, lambda_mult)]
+
+
 def filter_results_by_confidence(results: List[Dict[str, Any]], min_confidence: float = 0.5) -> List[Dict[str, Any]]:
     """
     Filter results by minimum confidence/similarity score.
@@ -0,0 +1,625 @@
+"""
+Sharded KB storage for knowledge bases too large to load at once.
+
+A sharded KB is a directory with a ``manifest.json``, a
+``keyword_stats.json`` (BM25 statistics of the whole KB) and, per shard:
+
+- ``shard_NNNNN.jsonl``: the shard's records, one JSON object per line
+- ``shard_NNNNN.offsets.npy``: byte offset of every line (plus the end offset)
+- ``shard_NNNNN.ann``: Annoy index of the shard; item id = line number
+- ``shard_NNNNN.index.json``: BM25 postings and metadata posting lists of
+  the shard, by line number
+
+Shards are opened lazily and memory-mapped (Annoy index and offsets), and a
+record is read with a single ``pread`` of its line, so memory and load time
+grow with the shards a query touches rather than with the corpus. A shard's
+keyword and metadata indexes are loaded on its first keyword or filtered
+search, and its topology index (parsed from the records' TikZ) on its first
+topology search. Queries fan out across shards on a thread pool and the
+per-shard top-k are merged; keyword scores use the BM25 statistics of the
+whole KB, so they are comparable across shards.
+
+Build a sharded KB from the JSON KB with::
+
+    python -m feynmancraft_adk.tools.kb.sharded_store [--shard-size N]
+
+Once ``KB_SHARD_DIR`` holds a manifest, LocalKBTool (and so the
+search_tikz_examples tools) searches the shards and does not load the JSON
+KB at all.
+"""
+
+import heapq
+import json
+import logging
+import os
+import threading
+from collections import Counter, OrderedDict
+from collections.abc import Sequence as SequenceABC
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Callable, Dict, Hashable, Iterable, Iterator, List, Optional, Sequence, Set, Tuple, TypeVar
+
+import numpy as np
+from annoy import AnnoyIndex
+
+from .embedding_backends import EmbeddingBackend, get_embedding_backend
+from .embeddings import angular_to_cosine
+from .index_builder import record_index_text
+from .keyword_index import BM25Index
+from .metadata_index import KBFilter, MetadataIndex
+from .result_cache import files_version
+from .topology import TopologyIndex, TopologyQuery, TopologySignature
+from ...shared_libraries.config import config
+from ...shared_libraries.file_utils import atomic_write
+
+logger = logging.getLogger(__name__)
+
+# Bumped when the shard layout or the keyword tokenizer changes
+SHARD_FORMAT_VERSION = 3
+MANIFEST_NAME = "manifest.json"
+KEYWORD_STATS_NAME = "keyword_stats.json"
+
+# Filtered vector search scores at most this many rows of a shard exactly
+FILTER_EXACT_MAX_ROWS = 2048
+
+T = TypeVar("T")
+
+
+def _shard_name(shard_id: int) -> str:
+    return f"shard_{shard_id:05d}"
+
+
+def _write_shard(
+    root: Path,
+    shard_id: int,
+    records: List[Dict[str, Any]],
+    backend: EmbeddingBackend,
+    batch_size: int,
+    n_trees: int,
+    n_jobs: int,
+) -> Tuple[int, BM25Index]:
+    """Write one shard's files. Returns the number of records indexed and the shard's BM25 index."""
+    name = _shard_name(shard_id)
+
+    offsets = [0]
+    with open(root / f"{name}.jsonl", "wb") as f:
+        for record in records:
+            line = json.dumps(record, ensure_ascii=False).encode("utf-8") + b"\n"
+            f.write(line)
+            offsets.append(offsets[-1] + len(line))
+    np.save(root / f"{name}.offsets.npy", np.asarray(offsets, dtype=np.int64), allow_pickle=False)
+
+    index = AnnoyIndex(backend.dim, "angular")
+    indexed = 0
+    for start in range(0, len(records), batch_size):
+        chunk = records[start:start + batch_size]
+        embeddings = backend.embed_documents([record_index_text(r) for r in chunk], batch_size=batch_size)
+        for row, embedding in enumerate(embeddings, start=start):
+            if embedding is not None and len(embedding) == backend.dim:
+                index.add_item(row, embedding)
+                indexed += 1
+    index.build(n_trees, n_jobs=n_jobs)
+    index.save(str(root / f"{name}.ann"))
+    index.unload()
+
+    keyword_index = BM25Index(records)
+    with open(root / f"{name}.index.json", "w", encoding="utf-8") as f:
+        json.dump({"keyword": keyword_index.to_dict(), "metadata": MetadataIndex(records).to_dict()}, f)
+    return indexed, keyword_index
+
+
+def write_sharded_kb(
+    records: Iterable[Dict[str, Any]],
+    root: Path,
+    backend: Optional[EmbeddingBackend] = None,
+    shard_size: Optional[int] = None,
+    batch_size: Optional[int] = None,
+    n_trees: Optional[int] = None,
+    n_jobs: Optional[int] = None,
+) -> Dict[str, Any]:
+    """
+    Write records as a sharded KB with one Annoy index per shard.
+
+    Records are consumed as a stream, so only one shard is held in memory.
+    The manifest is written last, so an interrupted build is never opened.
+    Write to a fresh directory when replacing a KB that is being served.
+
+    Args:
+        records: KB records in order (a list or any iterable)
+        root: Output directory
+        backend: Embedding backend (defaults to the configured one)
+        shard_size: Records per shard (defaults to KnowledgeBaseConfig.shard_size)
+        batch_size: Texts per embedding request
+        n_trees: Annoy trees per shard
+        n_jobs: Threads used to build each shard's trees
+
+    Returns:
+        The written manifest
+    """
+    kb_config = config.knowledge_base
+    backend = backend or get_embedding_backend()
+    shard_size = shard_size or kb_config.shard_size
+    batch_size = batch_size or config.models.embedding_batch_size
+    n_trees = n_trees or kb_config.index_trees
+    n_jobs = kb_config.index_build_jobs if n_jobs is None else n_jobs
+
+    root = Path(root)
+    root.mkdir(parents=True, exist_ok=True)
+
+    shards = []
+    buffer: List[Dict[str, Any]] = []
+    start = 0
+    document_frequencies: Counter = Counter()
+    total_length = 0
+
+    def flush():
+        nonlocal buffer, start, total_length
+        shard_id = len(shards)
+        indexed, keyword_index = _write_shard(root, shard_id, buffer, backend, batch_size, n_trees, n_jobs)
+        document_frequencies.update(keyword_index.document_frequencies())
+        total_length += sum(keyword_index.doc_lengths)
+        shards.append({"name": _shard_name(shard_id), "start": start, "count": len(buffer), "indexed": indexed})
+        logger.info(f"Wrote {_shard_name(shard_id)} with {len(buffer)} records ({indexed} indexed)")
+        start += len(buffer)
+        buffer = []
+
+    for record in records:
+        buffer.append(record)
+        if len(buffer) >= shard_size:
+            flush()
+    if buffer:
+        flush()
+
+    with atomic_write(root / KEYWORD_STATS_NAME) as f:
+        json.dump(
+            {"num_docs": start, "total_length": total_length, "document_frequencies": document_frequencies}, f
+        )
+
+    manifest = {
+        "format_version": SHARD_FORMAT_VERSION,
+        "model_name": backend.model_name,
+        "dim": backend.dim,
+        "num_records": start,
+        "shards": shards,
+    }
+    with atomic_write(root / MANIFEST_NAME) as f:
+        json.dump(manifest, f, indent=2)
+    return manifest
+
+
+class _ShardRecords(SequenceABC):
+    """The records of an open shard as a sequence that reads each record on access."""
+
+    def __init__(self, shard: "_Shard"):
+        self.shard = shard
+
+    def __len__(self) -> int:
+        return self.shard.info["count"]
+
+    def __getitem__(self, row):
+        if isinstance(row, slice):
+            return [self.shard.read_record(r) for r in range(len(self))[row]]
+        if not 0 <= row < len(self):
+            raise IndexError(row)
+        return self.shard.read_record(row)
+
+
+class _Shard:
+    """
+    An opened shard: memory-mapped index and offsets plus a read-only fd.
+
+    ``users`` counts the searches and reads in flight; ShardedKB only closes
+    a released shard once it drops to zero. The keyword, metadata and
+    topology indexes are loaded on first use.
+    """
+
+    def __init__(
+        self,
+        root: Path,
+        shard_id: int,
+        info: Dict[str, Any],
+        dim: int,
+        keyword_stats: Optional[Dict[str, Any]],
+    ):
+        self.root = root
+        self.shard_id = shard_id
+        self.info = info
+        self.start = info["start"]
+        name = info["name"]
+        self.users = 0
+        self.released = False
+        self.index = AnnoyIndex(dim, "angular")
+        self.index.load(str(root / f"{name}.ann"))
+        self.offsets = np.load(root / f"{name}.offsets.npy", mmap_mode="r")
+        self.fd = os.open(root / f"{name}.jsonl", os.O_RDONLY)
+        self.keyword_stats = keyword_stats
+        self._keyword_index: Optional[BM25Index] = None
+        self._metadata_index: Optional[MetadataIndex] = None
+        self._topology_index: Optional[TopologyIndex] = None
+        self._indexes_lock = threading.Lock()
+
+    def read_record(self, row: int) -> Dict[str, Any]:
+        begin, end = int(self.offsets[row]), int(self.offsets[row + 1])
+        return json.loads(os.pread(self.fd, end - begin, begin))
+
+    def _load_indexes(self):
+        """Load the shard's BM25 and metadata indexes, once."""
+        with self._indexes_lock:
+            if self._keyword_index is not None:
+                return
+            with open(self.root / f"{self.info['name']}.index.json", "r", encoding="utf-8") as f:
+                data = json.load(f)
+            self._metadata_index = MetadataIndex.from_dict(data["metadata"], _ShardRecords(self))
+            self._keyword_index = BM25Index.from_dict(data["keyword"], self.keyword_stats)
+
+    @property
+    def keyword_index(self) -> BM25Index:
+        self._load_indexes()
+        return self._keyword_index
+
+    @property
+    def metadata_index(self) -> MetadataIndex:
+        self._load_indexes()
+        return self._metadata_index
+
+    @property
+    def topology_index(self) -> TopologyIndex:
+        """Topology index of the shard's records, parsed on first use."""
+        with self._indexes_lock:
+            if self._topology_index is None:
+                self._topology_index = TopologyIndex(_ShardRecords(self))
+            return self._topology_index
+
+    def search(
+        self,
+        query_vector: Sequence[float],
+        k: int,
+        rows: Optional[Set[int]] = None,
+        exact_max_rows: int = FILTER_EXACT_MAX_ROWS,
+    ) -> List[Tuple[float, int, int]]:
+        """
+        Nearest rows of the shard as (cosine, position, row).
+
+        With ``rows``, only those rows are returned: up to ``exact_max_rows``
+        of them are scored exactly, otherwise the Annoy search over-fetches
+        by the inverse of their share of the shard.
+        """
+        if rows is None:
+            found, distances = self.index.get_nns_by_vector(query_vector, k, include_distances=True)
+            return [(angular_to_cosine(d), self.start + row, row) for row, d in zip(found, distances)]
+
+        n_items = self.index.get_n_items()
+        if len(rows) <= exact_max_rows:
+            ordered = sorted(row for row in rows if row < n_items)
+            if not ordered:
+                return []
+            vectors = np.asarray([self.index.get_item_vector(row) for row in ordered], dtype=np.float32)
+            query_np = np.asarray(query_vector, dtype=np.float32)
+            norms = np.linalg.norm(vectors, axis=1) * np.linalg.norm(query_np)
+            similarities = (vectors @ query_np) / np.where(norms > 0, norms, 1.0)
+            # Rows that could not be embedded have no vector
+            hits = [
+                (float(similarities[i]), self.start + row, row)
+                for i, row in enumerate(ordered) if norms[i] > 0
+            ]
+            return heapq.nlargest(k, hits)
+
+        share = len(rows) / max(1, self.info["count"])
+        num_neighbours = min(n_items, int(k / share) * 2 + k)
+        found, distances = self.index.get_nns_by_vector(query_vector, num_neighbours, include_distances=True)
+        hits = [(angular_to_cosine(d), self.start + row, row) for row, d in zip(found, distances) if row in rows]
+        return hits[:k]
+
+    def close(self):
+        """Close the record file and unload the index."""
+        if self.fd is not None:
+            os.close(self.fd)
+            self.fd = None
+            self.index.unload()
+
+
+class ShardedKB:
+    """
+    Read access to a sharded KB.
+
+    Shards are opened on first use and at most ``max_open_shards`` stay
+    open (least recently used are released and closed once no search uses
+    them). Searches over several shards run in parallel on a thread pool.
+    Call ``close()`` when the KB is no longer used.
+    """
+
+    def __init__(self, root: Path, max_workers: Optional[int] = None, max_open_shards: int = 64):
+        self.root = Path(root)
+        with open(self.root / MANIFEST_NAME, "r", encoding="utf-8") as f:
+            self.manifest = json.load(f)
+        if self.manifest.get("format_version") != SHARD_FORMAT_VERSION:
+            raise ValueError(f"Unsupported sharded KB version in {self.root}")
+
+        with open(self.root / KEYWORD_STATS_NAME, "r", encoding="utf-8") as f:
+            self.keyword_stats: Dict[str, Any] = json.load(f)
+
+        self.shards: List[Dict[str, Any]] = self.manifest["shards"]
+        self.model_name: str = self.manifest["model_name"]
+        self.dim: int = self.manifest["dim"]
+        self.max_open_shards = max(1, max_open_shards)
+        self._open: "OrderedDict[int, _Shard]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers or config.knowledge_base.shard_search_workers,
+            thread_name_prefix="kb-shard",
+        )
+        self._starts = [shard["start"] for shard in self.shards]
+
+    @property
+    def num_records(self) -> int:
+        return self.manifest["num_records"]
+
+    @contextmanager
+    def _shard(self, shard_id: int) -> Iterator[_Shard]:
+        """Use a shard, opening it if needed; it stays open until released."""
+        with self._lock:
+            shard = self._open.get(shard_id)
+            if shard is not None:
+                self._open.move_to_end(shard_id)
+            else:
+                shard = _Shard(self.root, shard_id, self.shards[shard_id], self.dim, self.keyword_stats)
+                self._open[shard_id] = shard
+                while len(self._open) > self.max_open_shards:
+                    self._release(self._open.popitem(last=False)[1])
+            shard.users += 1
+        try:
+            yield shard
+        finally:
+            with self._lock:
+                shard.users -= 1
+                if shard.released and shard.users == 0:
+                    shard.close()
+
+    @staticmethod
+    def _release(shard: _Shard):
+        """Close an evicted shard now, or after its last user. Call with ``_lock`` held."""
+        shard.released = True
+        if shard.users == 0:
+            shard.close()
+
+    def open_shard_count(self) -> int:
+        """Number of shards currently opened."""
+        with self._lock:
+            return len(self._open)
+
+    def get_record(self, position: int) -> Dict[str, Any]:
+        """
+        Read a record by its position in the whole KB.
+
+        Raises:
+            IndexError: If the position is out of range
+        """
+        if not 0 <= position < self.num_records:
+            raise IndexError(position)
+        shard_id = int(np.searchsorted(self._starts, position, side="right")) - 1
+        with self._shard(shard_id) as shard:
+            return shard.read_record(position - self._starts[shard_id])
+
+    def iter_records(self) -> Iterator[Dict[str, Any]]:
+        """Stream every record in KB order, one shard file at a time."""
+        for shard in self.shards:
+            with open(self.root / f"{shard['name']}.jsonl", "r", encoding="utf-8") as f:
+                for line in f:
+                    yield json.loads(line)
+
+    def _map_shards(self, shard_ids: List[int], fn: Callable[[_Shard], T]) -> List[T]:
+        """Run ``fn`` on each shard, in parallel when there are several."""
+        def run(shard_id: int) -> T:
+            with self._shard(shard_id) as shard:
+                return fn(shard)
+
+        if len(shard_ids) == 1:
+            return [run(shard_ids[0])]
+        return list(self._executor.map(run, shard_ids))
+
+    def _rows_by_shard(self, positions: Iterable[int]) -> Dict[int, Set[int]]:
+        """Group KB positions into shard-local rows by shard id."""
+        positions = np.fromiter(positions, dtype=np.int64)
+        positions = positions[(positions >= 0) & (positions < self.num_records)]
+        shard_ids = np.searchsorted(self._starts, positions, side="right") - 1
+        return {
+            int(shard_id): set((positions[shard_ids == shard_id] - self._starts[shard_id]).tolist())
+            for shard_id in np.unique(shard_ids)
+        }
+
+    def _union(self, rows_fn: Callable[[_Shard], Set[int]]) -> Set[int]:
+        """KB positions of the rows ``rows_fn`` selects in every shard."""
+        selected: Set[int] = set()
+        for start, rows in self._map_shards(
+            list(range(len(self.shards))), lambda shard: (shard.start, rows_fn(shard))
+        ):
+            selected.update(start + row for row in rows)
+        return selected
+
+    def candidates(self, kb_filter: Optional[KBFilter]) -> Optional[Set[int]]:
+        """Positions of the records matching a filter, or None if there is no constraint."""
+        if kb_filter is None or kb_filter.is_empty():
+            return None
+        return self._union(lambda shard: shard.metadata_index.candidates(kb_filter))
+
+    def with_particle_substring(self, particle: str) -> Set[int]:
+        """Records with a particle string containing ``particle`` (case-insensitive)."""
+        return self._union(lambda shard: shard.metadata_index.with_particle_substring(particle))
+
+    def with_process_type(self, process_type: str) -> Set[int]:
+        """Records of a process type (case-insensitive)."""
+        return self._union(lambda shard: shard.metadata_index.with_process_type(process_type))
+
+    def search(
+        self,
+        query_vector: Sequence[float],
+        k: int = 5,
+        shard_ids: Optional[Iterable[int]] = None,
+        candidates: Optional[Set[int]] = None,
+        exact_max_rows: int = FILTER_EXACT_MAX_ROWS,
+    ) -> List[Tuple[int, float]]:
+        """
+        Find the nearest records across shards.
+
+        Args:
+            query_vector: Query embedding from the KB's embedding model
+            k: Number of results
+            shard_ids: Shards to search (default: all)
+            candidates: Positions the results are restricted to; shards
+                without candidates are not searched
+            exact_max_rows: A shard with at most this many candidates scores
+                them exactly instead of searching its Annoy index
+
+        Returns:
+            List of (position, cosine_similarity) sorted by similarity
+        """
+        if k <= 0 or len(query_vector) != self.dim:
+            return []
+        shard_ids = list(range(len(self.shards))) if shard_ids is None else list(shard_ids)
+        rows_by_shard: Dict[int, Set[int]] = {}
+        if candidates is not None:
+            rows_by_shard = self._rows_by_shard(candidates)
+            shard_ids = [shard_id for shard_id in shard_ids if shard_id in rows_by_shard]
+        if not shard_ids:
+            return []
+
+        per_shard = self._map_shards(
+            shard_ids,
+            lambda shard: shard.search(query_vector, k, rows_by_shard.get(shard.shard_id), exact_max_rows),
+        )
+        top = heapq.nlargest(k, (hit for hits in per_shard for hit in hits))
+        return [(position, score) for score, position, _ in top]
+
+    def keyword_search(self, query: str, k: int = 5, candidates: Optional[Set[int]] = None) -> List[Tuple[int, float]]:
+        """
+        BM25 search across shards.
+
+        Args:
+            query: Free-text query
+            k: Number of results
+            candidates: Positions the results are restricted to
+
+        Returns:
+            List of (position, bm25_score) sorted by descending score
+        """
+        if k <= 0:
+            return []
+        shard_ids = list(range(len(self.shards)))
+        rows_by_shard: Dict[int, Set[int]] = {}
+        if candidates is not None:
+            rows_by_shard = self._rows_by_shard(candidates)
+            shard_ids = [shard_id for shard_id in shard_ids if shard_id in rows_by_shard]
+        if not shard_ids:
+            return []
+
+        def search_shard(shard: _Shard) -> List[Tuple[int, float]]:
+            rows = rows_by_shard.get(shard.shard_id)
+            return [(shard.start + row, score) for row, score in shard.keyword_index.search(query, k, candidates=rows)]
+
+        hits = (hit for shard_hits in self._map_shards(shard_ids, search_shard) for hit in shard_hits)
+        return heapq.nlargest(k, hits, key=lambda item: (item[1], -item[0]))
+
+    def topology_search(
+        self,
+        query: TopologyQuery,
+        k: int = 5,
+        typed: bool = True,
+        exact_only: bool = False,
+    ) -> List[Tuple[int, float, TopologySignature]]:
+        """
+        Topology search across shards (see ``TopologyIndex.search``).
+
+        Returns:
+            List of (position, topology_score, signature), exact matches first
+        """
+        if k <= 0:
+            return []
+
+        def search_shard(shard: _Shard):
+            index = shard.topology_index
+            return [
+                (shard.start + row, score, index.signatures[row])
+                for row, score in index.search(query, k, typed=typed, exact_only=exact_only)
+            ]
+
+        hits = [hit for shard_hits in self._map_shards(list(range(len(self.shards))), search_shard) for hit in shard_hits]
+        hits.sort(key=lambda hit: (-hit[1], hit[0]))
+        return hits[:k]
+
+    def close(self):
+        """Close all open shards (in-flight searches finish first) and the search thread pool."""
+        with self._lock:
+            for shard in self._open.values():
+                self._release(shard)
+            self._open.clear()
+        self._executor.shutdown(wait=False)
+
+
+_sharded_kb: Optional[ShardedKB] = None
+_sharded_kb_source: Hashable = None
+_sharded_kb_lock = threading.Lock()
+
+
+def sharded_kb_manifest_path() -> Path:
+    """Manifest of the sharded KB configured by ``KB_SHARD_DIR``."""
+    return Path(config.knowledge_base.shard_dir) / MANIFEST_NAME
+
+
+def get_sharded_kb() -> Optional[ShardedKB]:
+    """
+    Get the sharded KB configured by ``KB_SHARD_DIR``.
+
+    The manifest is checked on every call, so call this when the KB is
+    (re)loaded rather than per query. A rebuilt KB is opened afresh; the
+    previous instance stays open until its owner closes it.
+
+    Returns:
+        The shared ShardedKB, or None if no sharded KB has been built there
+        or it was built with a different embedding model
+    """
+    global _sharded_kb, _sharded_kb_source
+
+    manifest_path = sharded_kb_manifest_path()
+    model_name = get_embedding_backend().model_name
+    source = files_version([manifest_path], model_name)
+    with _sharded_kb_lock:
+        if source != _sharded_kb_source:
+            _sharded_kb, _sharded_kb_source = None, source
+            if manifest_path.exists():
+                try:
+                    kb = ShardedKB(manifest_path.parent)
+                except (OSError, ValueError, KeyError) as e:
+                    logger.warning(f"Cannot open the sharded KB at {manifest_path.parent}: {e}; rebuild it")
+                    return None
+                if kb.model_name == model_name:
+                    _sharded_kb = kb
+                else:
+                    logger.warning(
+                        f"Sharded KB at {kb.root} was built with {kb.model_name}; "
+                        f"rebuild it for the current embedding model"
+                    )
+                    kb.close()
+        return _sharded_kb
+
+
+if __name__ == "__main__":
+    import argparse
+
+    from .data_loader import iter_kb_examples
+
+    parser = argparse.ArgumentParser(description="Build a sharded KB from the JSON knowledge base")
+    parser.add_argument("--source", default=None, help="KB .json/.jsonl file (default: bundled KB)")
+    parser.add_argument("--output", default=str(config.knowledge_base.shard_dir), help="Output directory")
+    parser.add_argument("--shard-size", type=int, default=config.knowledge_base.shard_size)
+    parser.add_argument("--trees", type=int, default=config.knowledge_base.index_trees)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    written = write_sharded_kb(
+        iter_kb_examples(args.source),
+        Path(args.output),
+        shard_size=args.shard_size,
+        n_trees=args.trees,
+    )
+    print(f"Wrote {written['num_records']} records in {len(written['shards'])} shards to {args.output}")
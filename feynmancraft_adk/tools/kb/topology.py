@@ -0,0 +1,731 @@
+"""
+Topology of Feynman diagrams drawn in TikZ.
+
+``parse_tikz`` turns the ``tikz`` field of a KB record into a graph of
+vertices and propagators with particle types. Both TikZ-Feynman
+(``\\feynmandiagram``, ``\\diagram*`` with ``\\vertex``) and plain TikZ
+paths (``\\draw[fermion] (a) -- (b);``) are understood.
+
+From the graph, ``topology_signature`` computes:
+
+- ``hash``: canonical hash of the graph with particle types. It is equal
+  for isomorphic graphs, whatever the vertex names, drawing order and
+  labels (Weisfeiler-Lehman colour refinement).
+- ``shape_hash``: the same hash without particle types.
+- ``name``: a coarse class such as ``s-channel``, ``t-channel``, ``box``
+  or ``penguin``.
+- ``features``: a small count vector (legs, propagators, loops, particle
+  types, ...) used to rank similar topologies.
+
+``TopologyIndex`` keeps the signatures of all KB records. An exact
+topology match is a posting-list lookup followed by an isomorphism check.
+"""
+
+import hashlib
+import re
+from collections import Counter
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple, Union
+
+import numpy as np
+
+from .dedup import strip_tikz_comments
+
+# TikZ-Feynman edge styles (and the plain TikZ styles used in the KB) -> particle type
+_EDGE_STYLES = {
+    "fermion": "fermion",
+    "anti fermion": "fermion",
+    "fermionbar": "fermion",
+    "majorana": "fermion",
+    "anti majorana": "fermion",
+    "photon": "photon",
+    "gluon": "gluon",
+    "boson": "boson",
+    "charged boson": "boson",
+    "anti charged boson": "boson",
+    "scalar": "scalar",
+    "charged scalar": "scalar",
+    "anti charged scalar": "scalar",
+    "ghost": "ghost",
+    "charged ghost": "ghost",
+    "anti charged ghost": "ghost",
+    "graviton": "graviton",
+    "gluino": "gluino",
+    "squark": "scalar",
+    "slepton": "scalar",
+    "plain": "plain",
+}
+
+PARTICLE_TYPES = ["fermion", "photon", "gluon", "boson", "scalar", "ghost", "graviton", "gluino", "plain"]
+
+FEATURE_NAMES = [
+    "vertices",
+    "external_legs",
+    "internal_vertices",
+    "propagators",
+    "loops",
+    "fermion",
+    "photon",
+    "gluon",
+    "boson",
+    "scalar",
+    "other",
+    "max_degree",
+    "trivalent_vertices",
+    "quartic_vertices",
+]
+
+TOPOLOGY_NAMES = [
+    "vertex",
+    "s-channel",
+    "t-channel",
+    "2-to-2",
+    "tree",
+    "self-energy",
+    "triangle",
+    "box",
+    "penguin",
+    "one-loop",
+    "multi-loop",
+]
+
+_DIAGRAM_RE = re.compile(r"\\(?:feynmandiagram|diagram\*?)")
+_VERTEX_RE = re.compile(
+    r"\\vertex\s*(?:\[(?P<options>[^\]]*)\])?\s*\((?P<name>[^()]+)\)"
+    r"(?:\s*at\s*\((?P<at>[^()]*)\))?(?:\s*\{(?P<label>[^{}]*)\})?"
+)
+_NAMED_POINT_RE = re.compile(r"\\(?:coordinate|node)\s*(?:\[[^\]]*\])?\s*\((?P<name>[^()]+)\)\s*at\s*\((?P<at>[^()]*)\)")
+_NAME_RE = re.compile(r"\(?\s*([A-Za-z0-9_.']+)\s*\)?")
+_NUMBER_RE = re.compile(r"^\s*(-?(?:\d+\.?\d*|\.\d+))")
+_HASH_RE = re.compile(r"[0-9a-f]{16}")
+_CLOSING = {"(": ")", "[": "]", "{": "}"}
+
+
+@dataclass
+class FeynmanGraph:
+    """
+    Vertices and propagators of a Feynman diagram.
+
+    Attributes:
+        vertices: Vertex name -> particle label (None if unlabelled)
+        edges: (vertex, vertex, particle type) of every line; lines are undirected
+        positions: Known vertex coordinates
+    """
+    vertices: Dict[str, Optional[str]] = field(default_factory=dict)
+    edges: List[Tuple[str, str, str]] = field(default_factory=list)
+    positions: Dict[str, Tuple[float, float]] = field(default_factory=dict)
+
+    def add_vertex(self, name: str, label: Optional[str] = None):
+        if label or name not in self.vertices:
+            self.vertices[name] = label or self.vertices.get(name)
+
+    def add_edge(self, u: str, v: str, particle: str):
+        self.add_vertex(u)
+        self.add_vertex(v)
+        self.edges.append((u, v, particle))
+
+    def degrees(self) -> Dict[str, int]:
+        """Number of line ends at every vertex that has a line."""
+        degrees: Counter = Counter()
+        for u, v, _ in self.edges:
+            degrees[u] += 1
+            degrees[v] += 1
+        return dict(degrees)
+
+    def external_vertices(self) -> List[str]:
+        """Endpoints of external legs (vertices with one line)."""
+        return sorted(v for v, d in self.degrees().items() if d == 1)
+
+    def internal_vertices(self) -> List[str]:
+        """Interaction vertices (vertices with two or more lines)."""
+        return sorted(v for v, d in self.degrees().items() if d > 1)
+
+    def is_empty(self) -> bool:
+        return not self.edges
+
+
+@dataclass
+class TopologySignature:
+    """
+    Topology of a Feynman graph.
+
+    Attributes:
+        hash: Canonical hash with particle types
+        shape_hash: Canonical hash without particle types
+        name: Topology class (one of TOPOLOGY_NAMES)
+        features: Count features in the order of FEATURE_NAMES
+    """
+    hash: str
+    shape_hash: str
+    name: str
+    features: Tuple[float, ...]
+
+
+# --- Parsing ----------------------------------------------------------------
+
+def _matching(text: str, start: int) -> int:
+    """Index of the bracket closing the one at ``start`` (len(text) if unbalanced)."""
+    opening = text[start]
+    closing = _CLOSING[opening]
+    depth = 0
+    for i in range(start, len(text)):
+        if text[i] == opening:
+            depth += 1
+        elif text[i] == closing:
+            depth -= 1
+            if depth == 0:
+                return i
+    return len(text)
+
+
+def _split_top_level(text: str, separator: str) -> List[str]:
+    """Split on a separator outside (), [] and {}."""
+    parts, depth, start, i = [], 0, 0, 0
+    while i < len(text):
+        char = text[i]
+        if char in "([{":
+            depth += 1
+        elif char in ")]}":
+            depth = max(0, depth - 1)
+        elif depth == 0 and text.startswith(separator, i):
+            parts.append(text[start:i])
+            i += len(separator)
+            start = i
+            continue
+        i += 1
+    parts.append(text[start:])
+    return parts
+
+
+def _edge_style(options: str) -> Optional[str]:
+    """Particle type named in an edge option list, or None."""
+    for option in _split_top_level(options, ","):
+        option = option.strip().lower()
+        if option.startswith("edges="):
+            option = option[len("edges="):].strip(" {}")
+        particle = _EDGE_STYLES.get(option)
+        if particle:
+            return particle
+    return None
+
+
+def _option_label(options: str) -> Optional[str]:
+    """Value of a ``particle=`` option."""
+    for option in _split_top_level(options, ","):
+        key, _, value = option.partition("=")
+        if key.strip() == "particle" and value.strip():
+            return value.strip().strip("{}")
+    return None
+
+
+def _parse_feynman_vertex(piece: str) -> Tuple[Optional[str], Optional[str]]:
+    """(name, label) of a vertex in an edge chain: ``a``, ``(a)`` or ``a [particle=...]``."""
+    match = _NAME_RE.match(piece)
+    if not match:
+        return None, None
+    label = None
+    rest = piece[match.end():].strip()
+    if rest.startswith("["):
+        label = _option_label(rest[1:_matching(rest, 0)])
+    return match.group(1), label
+
+
+def _parse_feynman_body(body: str, graph: FeynmanGraph, default_style: str):
+    """Add the edge chains of a ``\\feynmandiagram``/``\\diagram`` body to a graph."""
+    for part in _split_top_level(body, ","):
+        part = part.strip()
+        if not part:
+            continue
+        if part.startswith("{"):
+            # Group with shared options: {[edges=fermion] a -- b -- c}
+            inner = part[1:_matching(part, 0)].strip()
+            style = default_style
+            if inner.startswith("["):
+                end = _matching(inner, 0)
+                style = _edge_style(inner[1:end]) or default_style
+                inner = inner[end + 1:]
+            _parse_feynman_body(inner, graph, style)
+            continue
+
+        previous = None
+        for i, piece in enumerate(_split_top_level(part, "--")):
+            piece = piece.strip()
+            style = default_style
+            if i > 0 and piece.startswith("["):
+                end = _matching(piece, 0)
+                style = _edge_style(piece[1:end]) or default_style
+                piece = piece[end + 1:].strip()
+            name, label = _parse_feynman_vertex(piece)
+            if name is None:
+                previous = None
+                continue
+            graph.add_vertex(name, label)
+            if previous is not None:
+                graph.add_edge(previous, name, style)
+            previous = name
+
+
+def _coordinate(text: str) -> Optional[Tuple[float, float]]:
+    """Cartesian coordinate ``x,y`` (units ignored), or None."""
+    parts = text.split(",")
+    if len(parts) != 2:
+        return None
+    values = []
+    for part in parts:
+        match = _NUMBER_RE.match(part)
+        if not match:
+            return None
+        values.append(float(match.group(1)))
+    return values[0], values[1]
+
+
+def _coordinate_key(point: Tuple[float, float]) -> str:
+    return f"({point[0]:g},{point[1]:g})"
+
+
+def _parse_paths(source: str, graph: FeynmanGraph):
+    """Add the lines of plain TikZ ``\\draw`` paths to a graph."""
+    # Named coordinates: numeric points at the same place are the same vertex
+    alias: Dict[str, str] = {}
+    for match in _NAMED_POINT_RE.finditer(source):
+        point = _coordinate(match.group("at"))
+        if point is not None:
+            name = match.group("name").strip()
+            alias[_coordinate_key(point)] = name
+            graph.positions[name] = point
+
+    for match in re.finditer(r"\\draw\b", source):
+        i = match.end()
+        while i < len(source) and source[i].isspace():
+            i += 1
+        options = ""
+        if i < len(source) and source[i] == "[":
+            end = _matching(source, i)
+            options = source[i + 1:end]
+            i = end + 1
+        style = _edge_style(options)
+        if style is None:
+            if "->" in options or "<-" in options:
+                continue  # Annotation arrow (e.g. momentum), not a line of the diagram
+            style = "plain"
+
+        end = source.find(";", i)
+        _parse_path(source[i:end if end >= 0 else len(source)], graph, style, alias)
+
+
+def _parse_path(path: str, graph: FeynmanGraph, style: str, alias: Dict[str, str]):
+    """Add the segments of one path to a graph; node labels go to the preceding point."""
+    last: Optional[str] = None
+    connect = False
+    i = 0
+    while i < len(path):
+        char = path[i]
+        if char.isspace() or char == "+":
+            i += 1
+        elif char == "(":
+            end = _matching(path, i)
+            text = path[i + 1:end].strip()
+            point = _coordinate(text)
+            if point is not None:
+                name = alias.get(_coordinate_key(point), _coordinate_key(point))
+                graph.positions.setdefault(name, point)
+            else:
+                name = text
+            graph.add_vertex(name)
+            if connect and last is not None:
+                graph.add_edge(last, name, style)
+            last, connect = name, False
+            i = end + 1
+        elif path.startswith("--", i) or path.startswith("|-", i) or path.startswith("-|", i):
+            connect = True
+            i += 2
+        elif re.match(r"to\b", path[i:]):
+            connect = True
+            i += 2
+        elif re.match(r"node\b", path[i:]):
+            # node [options] (name) {label}
+            i += 4
+            while i < len(path) and path[i] in " \t\n[(":
+                if path[i] in "[(":
+                    i = _matching(path, i)
+                i += 1
+            if i < len(path) and path[i] == "{":
+                end = _matching(path, i)
+                if last is not None:
+                    graph.add_vertex(last, path[i + 1:end].strip())
+                i = end + 1
+        elif re.match(r"(?:circle|ellipse|arc|rectangle|grid)\b", path[i:]):
+            # Shapes are not lines between vertices; skip their size argument
+            connect = False
+            i = path.find("(", i)
+            i = len(path) if i < 0 else _matching(path, i) + 1
+        elif char in "[{":
+            i = _matching(path, i) + 1
+        else:
+            i += 1
+
+
+def parse_tikz(source: str) -> FeynmanGraph:
+    """
+    Extract the vertex/edge graph of a Feynman diagram from TikZ source.
+
+    Args:
+        source: TikZ or TikZ-Feynman code (a KB ``tikz`` field)
+
+    Returns:
+        FeynmanGraph; empty if the source has no diagram lines
+    """
+    source = strip_tikz_comments(source)
+    graph = FeynmanGraph()
+
+    for match in _DIAGRAM_RE.finditer(source):
+        i = match.end()
+        while i < len(source) and source[i].isspace():
+            i += 1
+        if i < len(source) and source[i] == "[":
+            i = _matching(source, i) + 1
+            while i < len(source) and source[i].isspace():
+                i += 1
+        if i < len(source) and source[i] == "{":
+            _parse_feynman_body(source[i + 1:_matching(source, i)], graph, "plain")
+
+    for match in _VERTEX_RE.finditer(source):
+        name = match.group("name").strip()
+        label = match.group("label") or _option_label(match.group("options") or "")
+        if name in graph.vertices or label:
+            graph.add_vertex(name, label.strip() if label else None)
+        point = _coordinate(match.group("at") or "")
+        if point is not None:
+            graph.positions[name] = point
+
+    if graph.is_empty():
+        _parse_paths(source, graph)
+
+    # Declared but unconnected vertices are not part of the topology
+    connected = graph.degrees()
+    graph.vertices = {v: label for v, label in graph.vertices.items() if v in connected}
+    return graph
+
+
+# --- Canonical form ---------------------------------------------------------
+
+def _digest(text: str) -> str:
+    return hashlib.sha1(text.encode("utf-8")).hexdigest()[:16]
+
+
+def _adjacency(graph: FeynmanGraph, typed: bool) -> Dict[str, List[Tuple[str, str]]]:
+    adjacency: Dict[str, List[Tuple[str, str]]] = {v: [] for v in graph.degrees()}
+    for u, v, particle in graph.edges:
+        particle = particle if typed else "-"
+        adjacency[u].append((v, particle))
+        adjacency[v].append((u, particle))
+    return adjacency
+
+
+def _colors(graph: FeynmanGraph, typed: bool) -> Dict[str, str]:
+    """Weisfeiler-Lehman vertex colours; equal for corresponding vertices of isomorphic graphs."""
+    adjacency = _adjacency(graph, typed)
+    colors = {v: f"{'x' if len(adjacent) == 1 else 'i'}{len(adjacent)}" for v, adjacent in adjacency.items()}
+    for _ in range(len(adjacency)):
+        refined = {
+            v: _digest(colors[v] + "|" + ",".join(sorted(f"{p}:{colors[u]}" for u, p in adjacent)))
+            for v, adjacent in adjacency.items()
+        }
+        stable = len(set(refined.values())) == len(set(colors.values()))
+        colors = refined
+        if stable:
+            break
+    return colors
+
+
+def graph_hash(graph: FeynmanGraph, typed: bool = True) -> str:
+    """
+    Canonical hash of a Feynman graph.
+
+    Vertex names, drawing order, direction and labels do not matter;
+    with ``typed`` the particle type of every line does.
+    """
+    colors = _colors(graph, typed)
+    edges = sorted(
+        "-".join(sorted((colors[u], colors[v]))) + ":" + (particle if typed else "-")
+        for u, v, particle in graph.edges
+    )
+    return _digest("|".join(sorted(colors.values())) + "#" + "|".join(edges))
+
+
+def is_isomorphic(a: FeynmanGraph, b: FeynmanGraph, typed: bool = True) -> bool:
+    """Exact isomorphism test (backtracking over vertices of equal colour)."""
+    if len(a.edges) != len(b.edges):
+        return False
+    colors_a, colors_b = _colors(a, typed), _colors(b, typed)
+    if sorted(colors_a.values()) != sorted(colors_b.values()):
+        return False
+
+    def lines(graph: FeynmanGraph) -> Dict[Tuple[str, str], Counter]:
+        counts: Dict[Tuple[str, str], Counter] = {}
+        for u, v, particle in graph.edges:
+            particle = particle if typed else "-"
+            counts.setdefault((u, v), Counter())[particle] += 1
+            if u != v:
+                counts.setdefault((v, u), Counter())[particle] += 1
+        return counts
+
+    lines_a, lines_b = lines(a), lines(b)
+    by_color: Dict[str, List[str]] = {}
+    for v, color in colors_b.items():
+        by_color.setdefault(color, []).append(v)
+    # Vertices with the rarest colours first keep the search narrow
+    order = sorted(colors_a, key=lambda v: (len(by_color[colors_a[v]]), v))
+    mapping: Dict[str, str] = {}
+    used: Set[str] = set()
+
+    def consistent(v: str, w: str) -> bool:
+        if lines_a.get((v, v)) != lines_b.get((w, w)):
+            return False
+        return all(lines_a.get((v, u)) == lines_b.get((w, mapping[u])) for u in mapping)
+
+    def extend(i: int) -> bool:
+        if i == len(order):
+            return True
+        v = order[i]
+        for w in by_color[colors_a[v]]:
+            if w not in used and consistent(v, w):
+                mapping[v] = w
+                used.add(w)
+                if extend(i + 1):
+                    return True
+                del mapping[v]
+                used.discard(w)
+        return False
+
+    return extend(0)
+
+
+# --- Features and classification --------------------------------------------
+
+def _loop_core(graph: FeynmanGraph) -> Set[str]:
+    """Vertices left after repeatedly removing external legs (the loops and the paths between them)."""
+    adjacency = {v: Counter() for v in graph.degrees()}
+    for u, v, _ in graph.edges:
+        adjacency[u][v] += 1
+        adjacency[v][u] += 1
+    leaves = [v for v, adjacent in adjacency.items() if sum(adjacent.values()) == 1]
+    while leaves:
+        leaf = leaves.pop()
+        for neighbour in list(adjacency[leaf]):
+            adjacency[neighbour][leaf] -= 1
+            if adjacency[neighbour][leaf] == 0:
+                del adjacency[neighbour][leaf]
+            if sum(adjacency[neighbour].values()) == 1:
+                leaves.append(neighbour)
+        del adjacency[leaf]
+    return {v for v, adjacent in adjacency.items() if adjacent}
+
+
+def _components(graph: FeynmanGraph) -> int:
+    parent = {v: v for v in graph.degrees()}
+
+    def find(v):
+        while parent[v] != v:
+            parent[v] = parent[parent[v]]
+            v = parent[v]
+        return v
+
+    for u, v, _ in graph.edges:
+        parent[find(u)] = find(v)
+    return len({find(v) for v in parent})
+
+
+def _is_incoming(graph: FeynmanGraph, vertex: str, mean_x: Optional[float]) -> Optional[bool]:
+    """Whether an external leg is incoming, from its position or a TikZ-Feynman name (i1/f1)."""
+    if mean_x is not None and vertex in graph.positions:
+        return graph.positions[vertex][0] < mean_x
+    if re.fullmatch(r"(?:i|in)\d*", vertex):
+        return True
+    if re.fullmatch(r"(?:f|o|out)\d*", vertex):
+        return False
+    return None
+
+
+def classify_topology(graph: FeynmanGraph) -> str:
+    """Coarse topology class of a graph (one of TOPOLOGY_NAMES)."""
+    degrees = graph.degrees()
+    external = [v for v, d in degrees.items() if d == 1]
+    internal = [v for v, d in degrees.items() if d > 1]
+    loops = len(graph.edges) - len(degrees) + _components(graph)
+
+    if loops == 0:
+        if len(internal) == 1:
+            return "vertex"
+        if len(external) == 4 and len(internal) == 2:
+            legs = {v: [u for u, w, _ in graph.edges if w == v] + [w for u, w, _ in graph.edges if u == v] for v in internal}
+            first_legs = [u for u in legs[internal[0]] if u in external]
+            positions = [graph.positions[v][0] for v in external if v in graph.positions]
+            mean_x = sum(positions) / len(positions) if len(positions) == len(external) else None
+            incoming = [_is_incoming(graph, v, mean_x) for v in first_legs]
+            if len(first_legs) == 2 and None not in incoming:
+                return "s-channel" if incoming[0] == incoming[1] else "t-channel"
+            return "2-to-2"
+        return "tree"
+
+    if loops > 1:
+        return "multi-loop"
+    core = _loop_core(graph)
+    core_degrees = Counter()
+    for u, v, _ in graph.edges:
+        if u in core and v in core:
+            core_degrees[u] += 1
+            core_degrees[v] += 1
+    cycle = [v for v in core if core_degrees[v] >= 2]
+    if len(cycle) == 2:
+        return "self-energy"
+    # A propagator from the loop to another interaction vertex carries the penguin's emitted boson
+    emits = any(
+        (u in cycle) != (v in cycle) and degrees[u] > 1 and degrees[v] > 1
+        for u, v, _ in graph.edges
+    )
+    if emits and len(cycle) >= 3:
+        return "penguin"
+    if len(cycle) == 3:
+        return "triangle"
+    if len(cycle) == 4:
+        return "box"
+    return "one-loop"
+
+
+def topology_features(graph: FeynmanGraph) -> Tuple[float, ...]:
+    """Count features of a graph in the order of FEATURE_NAMES."""
+    degrees = graph.degrees()
+    external = sum(1 for d in degrees.values() if d == 1)
+    particles = Counter(particle for _, _, particle in graph.edges)
+    main = ("fermion", "photon", "gluon", "boson", "scalar")
+    values = [
+        len(degrees),
+        external,
+        len(degrees) - external,
+        len(graph.edges) - external,
+        len(graph.edges) - len(degrees) + _components(graph) if degrees else 0,
+        *(particles[p] for p in main),
+        sum(n for p, n in particles.items() if p not in main),
+        max(degrees.values(), default=0),
+        sum(1 for d in degrees.values() if d == 3),
+        sum(1 for d in degrees.values() if d == 4),
+    ]
+    return tuple(float(v) for v in values)
+
+
+def topology_signature(graph: FeynmanGraph) -> Optional[TopologySignature]:
+    """Signature of a graph, or None if it has no lines."""
+    if graph.is_empty():
+        return None
+    return TopologySignature(
+        hash=graph_hash(graph, typed=True),
+        shape_hash=graph_hash(graph, typed=False),
+        name=classify_topology(graph),
+        features=topology_features(graph),
+    )
+
+
+# --- Index ------------------------------------------------------------------
+
+TopologyQuery = Union[str, FeynmanGraph]
+
+
+class TopologyIndex:
+    """
+    Topology signatures of KB records with posting lists for exact lookup.
+
+    Attributes:
+        graphs: Parsed graph of each record (None if it has no diagram)
+        signatures: Signature of each record (None if it has no diagram)
+        by_hash: Typed hash -> positions
+        by_shape: Untyped hash -> positions
+        by_name: Topology class -> positions
+        features: Feature matrix, one row per record with a diagram
+        feature_positions: Record position of each feature row
+    """
+
+    def __init__(self, records: Iterable[Dict[str, Any]]):
+        self.graphs: List[Optional[FeynmanGraph]] = []
+        self.signatures: List[Optional[TopologySignature]] = []
+        self.by_hash: Dict[str, Set[int]] = {}
+        self.by_shape: Dict[str, Set[int]] = {}
+        self.by_name: Dict[str, Set[int]] = {}
+        rows, positions = [], []
+
+        for position, record in enumerate(records):
+            graph = parse_tikz(str(record.get("tikz") or ""))
+            signature = topology_signature(graph)
+            self.graphs.append(graph if signature is not None else None)
+            self.signatures.append(signature)
+            if signature is None:
+                continue
+            self.by_hash.setdefault(signature.hash, set()).add(position)
+            self.by_shape.setdefault(signature.shape_hash, set()).add(position)
+            self.by_name.setdefault(signature.name, set()).add(position)
+            rows.append(signature.features)
+            positions.append(position)
+
+        self.features = np.asarray(rows, dtype=np.float32).reshape(len(rows), len(FEATURE_NAMES))
+        self.feature_positions = positions
+
+    def __len__(self) -> int:
+        return len(self.signatures)
+
+    def search(
+        self,
+        query: TopologyQuery,
+        k: int = 5,
+        typed: bool = True,
+        exact_only: bool = False,
+    ) -> List[Tuple[int, float]]:
+        """
+        Find records by topology.
+
+        Exact matches (score 1.0) come first. For a diagram query, the
+        remaining places are filled with the nearest topologies by feature
+        distance (score ``1 / (1 + distance)``) unless ``exact_only`` is set.
+
+        Args:
+            query: TikZ source, a FeynmanGraph, a signature hash or a
+                topology class from TOPOLOGY_NAMES
+            k: Number of results
+            typed: Require equal particle types for an exact match
+            exact_only: Return exact matches only
+
+        Returns:
+            List of (position, score) sorted by descending score
+        """
+        if k <= 0:
+            return []
+
+        if isinstance(query, str):
+            text = query.strip()
+            if text.lower() in TOPOLOGY_NAMES:
+                return [(p, 1.0) for p in sorted(self.by_name.get(text.lower(), ()))][:k]
+            if _HASH_RE.fullmatch(text):
+                positions = self.by_hash.get(text) or self.by_shape.get(text) or set()
+                return [(p, 1.0) for p in sorted(positions)][:k]
+            graph = parse_tikz(text)
+        else:
+            graph = query
+
+        signature = topology_signature(graph)
+        if signature is None:
+            return []
+
+        postings = self.by_hash if typed else self.by_shape
+        candidates = postings.get(signature.hash if typed else signature.shape_hash, ())
+        hits = [(p, 1.0) for p in sorted(candidates) if is_isomorphic(graph, self.graphs[p], typed)][:k]
+        if exact_only or len(hits) >= k or not len(self.features):
+            return hits
+
+        exact = {p for p, _ in hits}
+        distances = np.linalg.norm(self.features - np.asarray(signature.features, dtype=np.float32), axis=1)
+        for row in np.argsort(distances, kind="stable"):
+            position = self.feature_positions[row]
+            if position not in exact:
+                hits.append((position, float(1.0 / (1.0 + distances[row]))))
+                if len(hits) >= k:
+                    break
+        return hits
@@ -0,0 +1,147 @@
+"""
+Memory-mapped embedding storage.
+
+An embedding set is persisted as two files next to each other:
+
+- ``<name>.npy``: a contiguous float32 matrix with one unit-length row per record
+- ``<name>.json``: a small manifest with the record ids, content hashes and
+  the embedding model name
+
+The matrix is loaded with ``np.load(mmap_mode='r')``, so opening a store is
+near-instant and every worker process shares the same page-cache pages.
+"""
+
+import json
+import logging
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from .embeddings import normalize_rows
+from ...shared_libraries.file_utils import atomic_write
+
+logger = logging.getLogger(__name__)
+
+STORE_FORMAT_VERSION = 1
+
+
+def store_paths(base_path: Path) -> Tuple[Path, Path]:
+    """
+    Get the matrix and manifest paths of a vector store.
+
+    Args:
+        base_path: Store path without extension (e.g. data/embeddings/kb_embeddings)
+
+    Returns:
+        Tuple of (matrix_path, manifest_path)
+    """
+    base_path = Path(base_path)
+    return base_path.with_suffix(".npy"), base_path.with_suffix(".json")
+
+
+def save_vector_store(
+    base_path: Path,
+    ids: List[Any],
+    vectors: Any,
+    model_name: str,
+    content_hashes: List[str],
+    metadata: Optional[Dict[str, Any]] = None,
+) -> bool:
+    """
+    Write an embedding set as a float32 .npy matrix plus a JSON manifest.
+
+    Rows are normalized to unit length before writing, so the stored matrix
+    can be used directly for cosine similarity search.
+
+    Args:
+        base_path: Store path without extension
+        ids: Record id of each row
+        vectors: Embedding vectors, one per id
+        model_name: Embedding model that produced the vectors
+        content_hashes: Content hash of each row's source text
+        metadata: Extra manifest fields
+
+    Returns:
+        True if successful, False otherwise
+    """
+    if len(ids) != len(content_hashes) or len(ids) != len(vectors):
+        logger.error("Vector store ids, hashes and vectors must have the same length")
+        return False
+
+    matrix_path, manifest_path = store_paths(base_path)
+    try:
+        matrix_path.parent.mkdir(parents=True, exist_ok=True)
+        if len(ids):
+            matrix = normalize_rows(vectors)
+        else:
+            matrix = np.zeros((0, 0), dtype=np.float32)
+        manifest = {
+            "format_version": STORE_FORMAT_VERSION,
+            "model_name": model_name,
+            "count": int(matrix.shape[0]),
+            "dim": int(matrix.shape[1]) if matrix.ndim == 2 else 0,
+            "dtype": "float32",
+            "normalized": True,
+            "ids": list(ids),
+            "content_hashes": list(content_hashes),
+            **(metadata or {}),
+        }
+
+        # The manifest is written last so readers never see it ahead of its matrix
+        with atomic_write(matrix_path, "wb") as f:
+            np.save(f, matrix, allow_pickle=False)
+        with atomic_write(manifest_path) as f:
+            json.dump(manifest, f, ensure_ascii=False)
+        logger.info(f"Saved {manifest['count']} vectors to {matrix_path}")
+        return True
+    except Exception as e:
+        logger.error(f"Failed to save vector store {matrix_path}: {e}")
+        return False
+
+
+def load_vector_store(
+    base_path: Path,
+    mmap: bool = True,
+) -> Optional[Tuple[np.ndarray, Dict[str, Any]]]:
+    """
+    Open an embedding set written by save_vector_store.
+
+    Args:
+        base_path: Store path without extension
+        mmap: If True, memory-map the matrix read-only instead of reading it
+
+    Returns:
+        Tuple of (matrix, manifest), or None if the store is missing or invalid
+    """
+    matrix_path, manifest_path = store_paths(base_path)
+    if not matrix_path.exists() or not manifest_path.exists():
+        return None
+
+    try:
+        with open(manifest_path, "r", encoding="utf-8") as f:
+            manifest = json.load(f)
+        matrix = np.load(matrix_path, mmap_mode="r" if mmap else None, allow_pickle=False)
+    except Exception as e:
+        logger.error(f"Failed to load vector store {matrix_path}: {e}")
+        return None
+
+    count = manifest.get("count", 0)
+    if manifest.get("format_version") != STORE_FORMAT_VERSION:
+        logger.warning(f"Unsupported vector store version in {manifest_path}")
+        return None
+    if matrix.dtype != np.float32 or (count and matrix.shape != (count, manifest.get("dim"))):
+        logger.warning(f"Vector store {matrix_path} does not match its manifest")
+        return None
+    if len(manifest.get("ids", [])) != count or len(manifest.get("content_hashes", [])) != count:
+        logger.warning(f"Vector store manifest {manifest_path} is inconsistent")
+        return None
+
+    return matrix, manifest
+
+
+def delete_vector_store(base_path: Path):
+    """Remove both files of a vector store if they exist."""
+    for path in store_paths(base_path):
+        if path.exists():
+            path.unlink()
@@ -35,8 +35,33 @@ from .data_loader import (
     get_rules_stats,
     create_rule_index
 )
+from .posting_index import RulePostingIndex
+from .conservation import (
+    PARTICLE_TABLE,
+    ConservationReport,
+    ParticleProperties,
+    check_conservation,
+    find_particles,
+    parse_process,
+    resolve_particle
+)
+from .particle_extractor import (
+    ParticleExtraction,
+    ParticleMention,
+    extract_particles
+)
+from .particle_store import (
+    ParticleRecord,
+    ParticleStore,
+    build_particle_store,
+    get_particle_store,
+    write_particle_store
+)
 from .embedding_manager import (
     RulesEmbeddingManager,
+    RulesIndex,
+    RulesIndexError,
+    check_rules_index,
     get_rules_manager
 )
 
@@ -60,6 +85,27 @@ __all__ = [
     'get_conservation_rules',
     'validate_process_against_rules',
     
+    # Conservation checks
+    'PARTICLE_TABLE',
+    'ConservationReport',
+    'ParticleProperties',
+    'check_conservation',
+    'find_particles',
+    'parse_process',
+    'resolve_particle',
+    
+    # Particle extraction
+    'ParticleExtraction',
+    'ParticleMention',
+    'extract_particles',
+    
+    # Local PDG snapshot
+    'ParticleRecord',
+    'ParticleStore',
+    'build_particle_store',
+    'get_particle_store',
+    'write_particle_store',
+    
     # Data loading
     'load_physics_rules',
     'get_rules_data_path',
@@ -73,5 +119,9 @@ __all__ = [
     
     # Embedding management
     'RulesEmbeddingManager',
+    'RulesIndex',
+    'RulesIndexError',
+    'RulePostingIndex',
+    'check_rules_index',
     'get_rules_manager'
 ]
\ No newline at end of file
@@ -0,0 +1,411 @@
+"""
+Deterministic quantum-number conservation checks for particle processes.
+
+A compact particle table (charge, baryon number, lepton flavour numbers,
+spin and colour) is enough to decide whether a process such as
+``mu- -> e- nu_e_bar nu_mu`` conserves the additive quantum numbers, without
+an MCP call or LLM reasoning. ``check_conservation`` checks:
+
+- electric charge
+- baryon number B
+- lepton flavour numbers L_e, L_mu and L_tau
+- angular momentum, via fermion number parity (half-integer spins must
+  pair up)
+- colour triality (a colour triplet cannot appear out of colour singlets)
+
+Kinematics (masses, phase space) and dynamics (couplings, rates) are not
+checked.
+
+Particle names resolve in LaTeX (``\\bar{\\nu}_e``), Unicode (``ν̄ₑ``) or
+words (``electron antineutrino``) to the canonical names used by the
+ParticlePhysics MCP server (``nu_e_bar``).
+"""
+
+import re
+import unicodedata
+from dataclasses import dataclass, field
+from fractions import Fraction
+from functools import lru_cache
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple, Union
+
+LEPTON_FLAVORS = ("L_e", "L_mu", "L_tau")
+
+
+@dataclass(frozen=True)
+class ParticleProperties:
+    """
+    Quantum numbers of a particle.
+
+    Attributes:
+        name: Canonical name (e.g. ``"mu-"``, ``"nu_e_bar"``)
+        charge: Electric charge in units of e
+        baryon_number: Baryon number B
+        lepton_numbers: (L_e, L_mu, L_tau)
+        spin: Spin in units of hbar
+        color: SU(3) representation: ``"1"``, ``"3"``, ``"3bar"`` or ``"8"``
+        antiparticle: Canonical name of the antiparticle (itself if self-conjugate)
+    """
+    name: str
+    charge: Fraction
+    baryon_number: Fraction
+    lepton_numbers: Tuple[int, int, int]
+    spin: Fraction
+    color: str
+    antiparticle: str
+
+    @property
+    def lepton_number(self) -> int:
+        return sum(self.lepton_numbers)
+
+    @property
+    def is_fermion(self) -> bool:
+        return self.spin.denominator == 2
+
+    @property
+    def triality(self) -> int:
+        return {"3": 1, "3bar": 2}.get(self.color, 0)
+
+
+_HALF = Fraction(1, 2)
+_THIRD = Fraction(1, 3)
+
+# name, charge, B, (L_e, L_mu, L_tau), spin, colour, antiparticle, aliases, antiparticle aliases.
+# The antiparticle of each entry is derived; self-conjugate particles name themselves.
+_PARTICLES = [
+    # Leptons
+    ("e-", -1, 0, (1, 0, 0), _HALF, "1", "e+", ["e", "e-", "electron"], ["e+", "positron"]),
+    ("mu-", -1, 0, (0, 1, 0), _HALF, "1", "mu+", ["mu", "mu-", "muon"], ["mu+"]),
+    ("tau-", -1, 0, (0, 0, 1), _HALF, "1", "tau+", ["tau", "tau-", "tauon", "tau lepton"], ["tau+"]),
+    ("nu_e", 0, 0, (1, 0, 0), _HALF, "1", "nu_e_bar", ["nu_e", "nu(e)", "electron neutrino"], ["electron antineutrino"]),
+    ("nu_mu", 0, 0, (0, 1, 0), _HALF, "1", "nu_mu_bar", ["nu_mu", "nu(mu)", "muon neutrino"], ["muon antineutrino"]),
+    ("nu_tau", 0, 0, (0, 0, 1), _HALF, "1", "nu_tau_bar", ["nu_tau", "nu(tau)", "tau neutrino"], ["tau antineutrino"]),
+    # Quarks
+    ("u", Fraction(2, 3), _THIRD, (0, 0, 0), _HALF, "3", "u_bar", ["u", "up"], []),
+    ("d", Fraction(-1, 3), _THIRD, (0, 0, 0), _HALF, "3", "d_bar", ["d", "down"], []),
+    ("s", Fraction(-1, 3), _THIRD, (0, 0, 0), _HALF, "3", "s_bar", ["s", "strange"], []),
+    ("c", Fraction(2, 3), _THIRD, (0, 0, 0), _HALF, "3", "c_bar", ["c", "charm"], []),
+    ("b", Fraction(-1, 3), _THIRD, (0, 0, 0), _HALF, "3", "b_bar", ["b", "bottom", "beauty"], []),
+    ("t", Fraction(2, 3), _THIRD, (0, 0, 0), _HALF, "3", "t_bar", ["t", "top"], []),
+    # Gauge and Higgs bosons
+    ("gamma", 0, 0, (0, 0, 0), 1, "1", "gamma", ["gamma", "photon", "gamma*", "virtual photon"], []),
+    ("g", 0, 0, (0, 0, 0), 1, "8", "g", ["g", "gluon"], []),
+    ("Z0", 0, 0, (0, 0, 0), 1, "1", "Z0", ["z", "z0", "z boson", "z0 boson"], []),
+    ("W+", 1, 0, (0, 0, 0), 1, "1", "W-", ["w+", "w+ boson"], ["w-", "w- boson"]),
+    ("H", 0, 0, (0, 0, 0), 0, "1", "H", ["h", "h0", "higgs", "higgs boson"], []),
+    # Light mesons
+    ("pi+", 1, 0, (0, 0, 0), 0, "1", "pi-", ["pi+", "pion+", "charged pion"], ["pi-", "pion-"]),
+    ("pi0", 0, 0, (0, 0, 0), 0, "1", "pi0", ["pi0", "pion0", "neutral pion"], []),
+    ("eta", 0, 0, (0, 0, 0), 0, "1", "eta", ["eta", "eta0"], []),
+    ("rho+", 1, 0, (0, 0, 0), 1, "1", "rho-", ["rho+"], ["rho-"]),
+    ("rho0", 0, 0, (0, 0, 0), 1, "1", "rho0", ["rho0"], []),
+    ("omega(782)", 0, 0, (0, 0, 0), 1, "1", "omega(782)", ["omega0", "omega(782)"], []),
+    ("phi", 0, 0, (0, 0, 0), 1, "1", "phi", ["phi", "phi(1020)"], []),
+    ("K+", 1, 0, (0, 0, 0), 0, "1", "K-", ["k+", "kaon+", "charged kaon"], ["k-", "kaon-"]),
+    ("K0", 0, 0, (0, 0, 0), 0, "1", "K0_bar", ["k0", "kaon0", "neutral kaon"], []),
+    ("K0S", 0, 0, (0, 0, 0), 0, "1", "K0S", ["k0s", "k(s)", "k_s", "k-short"], []),
+    ("K0L", 0, 0, (0, 0, 0), 0, "1", "K0L", ["k0l", "k(l)", "k_l", "k-long"], []),
+    # Heavy mesons
+    ("D0", 0, 0, (0, 0, 0), 0, "1", "D0_bar", ["d0"], []),
+    ("D+", 1, 0, (0, 0, 0), 0, "1", "D-", ["d+"], ["d-"]),
+    ("D_s+", 1, 0, (0, 0, 0), 0, "1", "D_s-", ["d_s+", "ds+"], ["d_s-", "ds-"]),
+    ("J/psi", 0, 0, (0, 0, 0), 1, "1", "J/psi", ["j/psi", "jpsi", "psi"], []),
+    ("B0", 0, 0, (0, 0, 0), 0, "1", "B0_bar", ["b0"], []),
+    ("B+", 1, 0, (0, 0, 0), 0, "1", "B-", ["b+"], ["b-"]),
+    ("B_s0", 0, 0, (0, 0, 0), 0, "1", "B_s0_bar", ["b_s0", "bs0", "b_s"], []),
+    ("Upsilon", 0, 0, (0, 0, 0), 1, "1", "Upsilon", ["upsilon", "upsilon(1s)"], []),
+    # Baryons
+    ("p", 1, 1, (0, 0, 0), _HALF, "1", "p_bar", ["p", "p+", "proton"], []),
+    ("n", 0, 1, (0, 0, 0), _HALF, "1", "n_bar", ["n", "n0", "neutron"], []),
+    ("Lambda", 0, 1, (0, 0, 0), _HALF, "1", "Lambda_bar", ["lambda", "lambda0"], []),
+    ("Sigma+", 1, 1, (0, 0, 0), _HALF, "1", "Sigma+_bar", ["sigma+"], []),
+    ("Sigma0", 0, 1, (0, 0, 0), _HALF, "1", "Sigma0_bar", ["sigma0"], []),
+    ("Sigma-", -1, 1, (0, 0, 0), _HALF, "1", "Sigma-_bar", ["sigma-"], []),
+    ("Xi0", 0, 1, (0, 0, 0), _HALF, "1", "Xi0_bar", ["xi0"], []),
+    ("Xi-", -1, 1, (0, 0, 0), _HALF, "1", "Xi-_bar", ["xi-"], []),
+    ("Omega-", -1, 1, (0, 0, 0), Fraction(3, 2), "1", "Omega-_bar", ["omega-"], []),
+    ("Delta++", 2, 1, (0, 0, 0), Fraction(3, 2), "1", "Delta++_bar", ["delta++"], []),
+    ("Lambda_c+", 1, 1, (0, 0, 0), _HALF, "1", "Lambda_c+_bar", ["lambda_c+", "lambdac+"], []),
+]
+
+ARROW_RE = re.compile(r"\s*(?:<?-+>|→|⟶|=>|\\(?:to|rightarrow|longrightarrow)\b)\s*")
+_MATH_DELIMITER_RE = re.compile(r"\\[()\[\]]")
+_MACRON_RE = re.compile(r"([^\W\d_])[\u0304\u0305]")
+_LATEX_BAR_RE = re.compile(r"\\(?:bar|overline)\s*")
+_ANTI_RE = re.compile(r"\banti[\s-]*")
+_BAR_SUFFIX_RE = re.compile(r"^([^\s~]+?)(?:[_\s-]?bar|~)$")
+_FILLER_RE = re.compile(r"\b(?:quarks?|particles?)\b")
+_STRIP_RE = re.compile(r"[\s\\{}$^_\[\].,:;*]")
+_UNICODE = {
+    "⁺": "+", "⁻": "-", "⁰": "0", "₊": "+", "₋": "-", "₀": "0", "ₑ": "e", "−": "-",
+    "μ": "mu", "ν": "nu", "τ": "tau", "γ": "gamma", "π": "pi", "η": "eta", "ρ": "rho",
+    "ω": "omega", "Ω": "omega", "φ": "phi", "ϕ": "phi", "ψ": "psi", "Υ": "upsilon", "ϒ": "upsilon",
+    "λ": "lambda", "Λ": "lambda", "σ": "sigma", "Σ": "sigma", "ξ": "xi", "Ξ": "xi",
+    "δ": "delta", "Δ": "delta",
+}
+
+
+def normalize_particle_name(name: str) -> str:
+    """
+    Normalize a particle spelling to a lookup key.
+
+    Antiparticle markers (``\\bar{}``, a combining bar, ``anti``, a ``bar``
+    or ``~`` suffix) become a leading ``~``; notation noise (LaTeX
+    commands, braces, ``^``, ``_``, spaces, the word "quark") is dropped.
+    """
+    text = unicodedata.normalize("NFD", _MATH_DELIMITER_RE.sub("", name.strip()))
+    text = _MACRON_RE.sub(r"~\1", text)
+    text = "".join(ch for ch in text if not unicodedata.combining(ch))
+    for symbol, replacement in _UNICODE.items():
+        text = text.replace(symbol, replacement)
+    text = text.lower()
+    text = _LATEX_BAR_RE.sub("~", text)
+    text = _ANTI_RE.sub("~", text)
+    text = _BAR_SUFFIX_RE.sub(r"~\1", text)
+    text = _FILLER_RE.sub("", text)
+    text = _STRIP_RE.sub("", text)
+    # A marker inside a multi-word name ("electron ~neutrino") belongs to the whole name
+    if text.count("~") == 1 and not text.startswith("~"):
+        text = "~" + text.replace("~", "")
+    return text
+
+
+def _build_table() -> Tuple[Dict[str, ParticleProperties], Dict[str, str]]:
+    table: Dict[str, ParticleProperties] = {}
+    aliases: Dict[str, str] = {}
+    for name, charge, baryon, leptons, spin, color, anti, names, anti_names in _PARTICLES:
+        particle = ParticleProperties(
+            name=name,
+            charge=Fraction(charge),
+            baryon_number=Fraction(baryon),
+            lepton_numbers=leptons,
+            spin=Fraction(spin),
+            color=color,
+            antiparticle=anti,
+        )
+        table[name] = particle
+        for alias in [name] + names:
+            aliases.setdefault(normalize_particle_name(alias), name)
+        if anti == name:
+            continue
+        table[anti] = ParticleProperties(
+            name=anti,
+            charge=-particle.charge,
+            baryon_number=-particle.baryon_number,
+            lepton_numbers=tuple(-n for n in leptons),
+            spin=particle.spin,
+            color={"3": "3bar", "3bar": "3"}.get(color, color),
+            antiparticle=name,
+        )
+        for alias in [anti] + anti_names:
+            aliases.setdefault(normalize_particle_name(alias), anti)
+        # \bar{x}, x~, anti-x for every spelling of the particle
+        for alias in [name] + names:
+            aliases.setdefault("~" + normalize_particle_name(alias).lstrip("~"), anti)
+    return table, aliases
+
+
+PARTICLE_TABLE, _ALIASES = _build_table()
+
+# Names of the tabulated particles; their antiparticles are derived
+PARTICLE_NAMES: Tuple[str, ...] = tuple(entry[0] for entry in _PARTICLES)
+
+
+@lru_cache(maxsize=4096)
+def resolve_particle(name: str) -> Optional[ParticleProperties]:
+    """
+    Look up a particle by name in any notation.
+
+    Args:
+        name: Particle name, e.g. ``"mu-"``, ``"\\mu^-"``, ``"μ⁻"``, ``"muon"``
+
+    Returns:
+        ParticleProperties, or None for unknown or ambiguous names
+        (``"W"``, ``"neutrino"``, ``"pion"``)
+    """
+    canonical = _ALIASES.get(normalize_particle_name(name))
+    return PARTICLE_TABLE[canonical] if canonical else None
+
+
+def find_particles(fragment: str) -> List[str]:
+    """
+    Canonical names of the particles with a name containing a fragment.
+
+    Args:
+        fragment: Part of a particle name in any notation, e.g. ``"pion"``
+
+    Returns:
+        Canonical names in table order (``["pi+", "pi-", "pi0"]``)
+    """
+    key = normalize_particle_name(fragment)
+    if not key:
+        return []
+    return list(dict.fromkeys(name for alias, name in _ALIASES.items() if key in alias))
+
+
+def _split_particles(side: str) -> List[str]:
+    """
+    Split one side of a process into particle names.
+
+    Words are grouped greedily into the longest known name
+    ("electron antineutrino"); a word that is not a name is split into the
+    longest known prefixes ("e^+e^-", "γγ").
+    """
+    # "+" between particles separates them; "e^+" keeps its charge
+    words = [w for w in re.split(r"\s+|(?<=[\s}])\+(?=\s)", side.strip()) if w and w != "+"]
+    names: List[str] = []
+    i = 0
+    while i < len(words):
+        for size in (3, 2, 1):
+            candidate = " ".join(words[i:i + size])
+            if len(words) - i >= size and resolve_particle(candidate):
+                names.append(candidate)
+                i += size
+                break
+        else:
+            names.extend(split_symbols(words[i]))
+            i += 1
+    return names
+
+
+def split_symbols(word: str) -> List[str]:
+    """Split a word of concatenated symbols by longest known prefixes; unknown words stay whole."""
+    parts: List[str] = []
+    rest = word
+    while rest:
+        for end in range(len(rest), 0, -1):
+            # Keep a charge or bar that belongs to the prefix
+            if resolve_particle(rest[:end]) and rest[end:end + 1] not in ("^", "_", "}", "\u0304"):
+                parts.append(rest[:end])
+                rest = rest[end:]
+                break
+        else:
+            return [word]
+    return parts
+
+
+@lru_cache(maxsize=1024)
+def _parse(process: str) -> Tuple[Tuple[str, ...], Tuple[str, ...]]:
+    sides = ARROW_RE.split(process.strip())
+    if len(sides) != 2 or not sides[0].strip() or not sides[1].strip():
+        raise ValueError(f"Not a process of the form 'initial -> final': {process!r}")
+    return tuple(_split_particles(sides[0])), tuple(_split_particles(sides[1]))
+
+
+def parse_process(process: str) -> Tuple[List[str], List[str]]:
+    """
+    Split a process such as ``"e^+ e^- \\to \\mu^+ \\mu^-"`` into its initial and final particles.
+
+    Args:
+        process: Process with one arrow (``->``, ``→``, ``\\to``, ``\\rightarrow``)
+
+    Returns:
+        (initial particle names, final particle names) as written
+
+    Raises:
+        ValueError: If the process does not have exactly one arrow with particles on both sides
+    """
+    initial, final = _parse(process)
+    return list(initial), list(final)
+
+
+@dataclass
+class ConservationReport:
+    """
+    Result of the conservation checks of one process.
+
+    Attributes:
+        initial: Canonical names of the initial particles
+        final: Canonical names of the final particles
+        unknown: Names that could not be resolved; nothing is checked if any
+        violations: One entry per violated conservation law
+        checked: Conservation laws that were evaluated
+    """
+    initial: List[str]
+    final: List[str]
+    unknown: List[str] = field(default_factory=list)
+    violations: List[Dict[str, Any]] = field(default_factory=list)
+    checked: List[str] = field(default_factory=list)
+
+    @property
+    def allowed(self) -> Optional[bool]:
+        """True if every law holds, False if one is violated, None if particles are unknown."""
+        if self.unknown:
+            return None
+        return not self.violations
+
+    @property
+    def status(self) -> str:
+        return {True: "allowed", False: "forbidden", None: "unknown_particles"}[self.allowed]
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "status": self.status,
+            "allowed": self.allowed,
+            "initial": self.initial,
+            "final": self.final,
+            "unknown_particles": self.unknown,
+            "violations": self.violations,
+            "checked": self.checked,
+        }
+
+
+def _totals(particles: Sequence[ParticleProperties]) -> Dict[str, Any]:
+    lepton_numbers = [sum(p.lepton_numbers[i] for p in particles) for i in range(3)]
+    return {
+        "charge": sum((p.charge for p in particles), Fraction(0)),
+        "baryon_number": sum((p.baryon_number for p in particles), Fraction(0)),
+        **dict(zip(LEPTON_FLAVORS, (Fraction(n) for n in lepton_numbers))),
+        "fermion_parity": Fraction(sum(p.is_fermion for p in particles) % 2),
+        "color_triality": Fraction(sum(p.triality for p in particles) % 3),
+    }
+
+
+_LAWS = {
+    "charge": "Electric charge",
+    "baryon_number": "Baryon number",
+    "L_e": "Electron lepton number",
+    "L_mu": "Muon lepton number",
+    "L_tau": "Tau lepton number",
+    "fermion_parity": "Angular momentum (fermion number parity)",
+    "color_triality": "Colour (triality)",
+}
+
+
+def check_conservation(
+    process: Union[str, Tuple[Iterable[str], Iterable[str]]],
+) -> ConservationReport:
+    """
+    Check the conservation laws of a process.
+
+    Args:
+        process: ``"initial -> final"`` string, or (initial names, final names)
+
+    Returns:
+        ConservationReport; ``allowed`` is None if a particle is unknown
+
+    Raises:
+        ValueError: If a process string cannot be split into initial and final state
+    """
+    initial_names, final_names = parse_process(process) if isinstance(process, str) else process
+    initial = [resolve_particle(name) for name in initial_names]
+    final = [resolve_particle(name) for name in final_names]
+
+    report = ConservationReport(
+        initial=[p.name if p else name for p, name in zip(initial, initial_names)],
+        final=[p.name if p else name for p, name in zip(final, final_names)],
+        unknown=[name for p, name in zip(initial + final, list(initial_names) + list(final_names)) if p is None],
+    )
+    if report.unknown or not initial or not final:
+        return report
+
+    before, after = _totals(initial), _totals(final)
+    report.checked = list(_LAWS)
+    for law, label in _LAWS.items():
+        if before[law] != after[law]:
+            report.violations.append({
+                "law": law,
+                "message": f"{label} is not conserved: {before[law]} -> {after[law]}",
+                "initial": str(before[law]),
+                "final": str(after[law]),
+            })
+    return report
@@ -2,20 +2,63 @@
 Physics Rules Embedding Manager with singleton pattern.
 """
 
-import os
-import json
-import pickle
 import asyncio
-from typing import List, Dict, Any, Optional
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import List, Dict, Any, Optional, Tuple
 import logging
 from pathlib import Path
 
+import numpy as np
+
 from .data_loader import load_physics_rules
-from ..kb.embeddings import get_embedding
+from .posting_index import RulePostingIndex
+from ..kb.embeddings import content_hash, embedding_credentials_available, normalize_rows, top_k_cosine
+from ..kb.embedding_backends import LOCAL_NGRAM_MODEL, get_embedding_backend
+from ..kb.quantized_store import QuantizedIndex
+from ..kb.vector_store import save_vector_store, load_vector_store, delete_vector_store, store_paths
+from ...shared_libraries.config import config
 
 logger = logging.getLogger(__name__)
 
 
+class RulesIndexError(RuntimeError):
+    """Raised when the physics rules index has no embedded rules."""
+
+
+@dataclass
+class RulesIndex:
+    """
+    Pre-normalized embedding matrix of the physics rules.
+    
+    A query is scored against every rule with one matrix-vector product, or
+    against the int8 codes first when ``QUANTIZED_SEARCH`` is enabled.
+    
+    Attributes:
+        rules: Physics rules
+        matrix: float32 matrix with unit-length rows, one per embedded rule
+        positions: Rule position of each matrix row
+        quantized_index: int8 index over ``matrix``, if enabled
+    """
+    rules: List[Dict[str, Any]]
+    matrix: np.ndarray
+    positions: List[int]
+    quantized_index: Optional[QuantizedIndex] = None
+    
+    def __len__(self) -> int:
+        return len(self.positions)
+    
+    def search(self, query_embedding: List[float], top_k: int = 5) -> List[Tuple[int, float]]:
+        """Find the rules most similar to a query embedding as (rule_position, cosine)."""
+        if self.quantized_index is not None:
+            hits = self.quantized_index.search(query_embedding, top_k)
+        else:
+            hits = top_k_cosine(self.matrix, query_embedding, top_k)
+        return [(self.positions[row], score) for row, score in hits]
+
+
 class RulesEmbeddingManager:
     """
     Singleton manager for physics rules embeddings.
@@ -32,8 +75,14 @@ class RulesEmbeddingManager:
             # Initialize instance variables
             cls._instance.physics_rules = []
             cls._instance.embeddings_cache = {}
-            cls._instance.model_name = "models/text-embedding-004"
+            cls._instance.index = None
+            cls._instance.posting_index = None
+            cls._instance._rules_lock = threading.Lock()
+            cls._instance.backend = get_embedding_backend()
+            cls._instance.batch_size = config.models.embedding_batch_size
             cls._instance.is_initialized = False
+            cls._instance.failure = None
+            cls._instance._failed_until = 0.0
             cls._instance._lock = asyncio.Lock()
         return cls._instance
     
@@ -46,92 +95,188 @@ class RulesEmbeddingManager:
         cache_dir.mkdir(parents=True, exist_ok=True)
         return cache_dir
     
+    @property
+    def model_name(self) -> str:
+        """Name of the embedding model used by the active backend."""
+        return self.backend.model_name
+    
+    @property
+    def store_path(self) -> Path:
+        """Get the vector store path (without extension) of the active backend."""
+        return self.cache_dir / f"rules_embeddings{self.backend.store_suffix}"
+    
     @property
     def cache_file(self) -> Path:
-        """Get the cache file path."""
-        return self.cache_dir / "rules_embeddings.pkl"
+        """Get the cache file path (the memory-mapped embedding matrix)."""
+        return store_paths(self.store_path)[0]
     
     def reset(self):
         """Reset the manager state. Useful for testing."""
         self.physics_rules = []
         self.embeddings_cache = {}
+        self.index = None
+        self.posting_index = None
         self.is_initialized = False
+        self.failure = None
+        self._failed_until = 0.0
+        self.backend = get_embedding_backend()
+    
+    def load_rules(self, force: bool = False) -> RulePostingIndex:
+        """
+        Load the physics rules and build their posting lists, once.
+        
+        Rule lookups that need no embeddings use this, so they work before
+        (or without) ``initialize``.
+        
+        Args:
+            force: Reload the rules file even if it was loaded before
+            
+        Returns:
+            The posting index of the loaded rules
+        """
+        with self._rules_lock:
+            if self.posting_index is None or force:
+                rules = load_physics_rules()
+                posting_index = RulePostingIndex(rules)
+                self.physics_rules = rules
+                self.posting_index = posting_index
+                logger.info(f"Loaded {len(rules)} physics rules")
+            return self.posting_index
     
     async def initialize(self, force_regenerate: bool = False):
         """
         Initialize the embedding manager.
         
+        A failed build is remembered: until ``rules_index_retry_seconds`` have
+        passed, further calls raise the same error at once instead of
+        embedding the rules again.
+        
         Args:
             force_regenerate: If True, regenerate embeddings even if cache exists
+            
+        Raises:
+            RulesIndexError: If no rule could be embedded
         """
         async with self._lock:
             if self.is_initialized and not force_regenerate:
                 return
+            if self.failure is not None and not force_regenerate and time.monotonic() < self._failed_until:
+                raise self.failure
                 
             logger.info("Initializing Physics Rules Embedding Manager...")
+            try:
+                await self._build(force_regenerate)
+            except RulesIndexError as e:
+                self.failure = e
+                self._failed_until = time.monotonic() + config.validation.rules_index_retry_seconds
+                raise
             
-            # Load physics rules
-            self.physics_rules = load_physics_rules()
-            logger.info(f"Loaded {len(self.physics_rules)} physics rules")
-            
-            # Try to load cached embeddings
-            if not force_regenerate and self.load_embeddings():
-                self.is_initialized = True
-                return
-                
-            # Generate embeddings
-            await self.generate_embeddings()
-            
-            # Save to cache
-            self.save_embeddings()
-            
+            self.failure = None
             self.is_initialized = True
-            logger.info("Physics Rules Embedding Manager initialized successfully")
+            logger.info(f"Physics Rules Embedding Manager initialized with {len(self.index)} indexed rules")
+    
+    async def _build(self, force_regenerate: bool = False):
+        """Load or generate the rule embeddings and build the index; called with ``_lock`` held."""
+        # Load physics rules and their posting lists
+        self.load_rules(force=True)
+        await self._load_or_generate(force_regenerate)
+        
+        if not self.embeddings_cache and self.backend.remote and not embedding_credentials_available():
+            # Nothing can be embedded remotely; index the rules offline instead
+            logger.warning(
+                f"No API key for {self.model_name} and no stored rule embeddings; "
+                f"indexing physics rules with {LOCAL_NGRAM_MODEL}"
+            )
+            self.backend = get_embedding_backend(LOCAL_NGRAM_MODEL)
+            await self._load_or_generate(force_regenerate)
+        
+        self.build_index()
+        if not self.index:
+            raise RulesIndexError(
+                f"Physics rules index is empty: none of {len(self.physics_rules)} rules "
+                f"could be embedded with {self.model_name}"
+            )
+    
+    async def _load_or_generate(self, force_regenerate: bool):
+        """Load the stored embeddings of the active backend, or generate and store them."""
+        if not force_regenerate and self.load_embeddings():
+            return
+        await self.generate_embeddings()
+        
+        # Save to cache (an empty store would only hide the failure next time)
+        if self.embeddings_cache:
+            self.save_embeddings()
     
     async def generate_embeddings(self):
-        """Generate embeddings for all physics rules."""
+        """Generate embeddings for all physics rules with the configured backend."""
         logger.info("Generating embeddings for physics rules...")
         self.embeddings_cache = {}
         
-        # Create tasks for parallel embedding generation
-        tasks = []
+        rule_numbers = []
+        texts = []
         for rule in self.physics_rules:
             rule_number = rule.get("rule_number")
-            content = rule.get("content", "")
-            if rule_number and content:
-                tasks.append(self._generate_single_embedding(rule_number, content))
-        
-        # Execute tasks with concurrency limit
-        semaphore = asyncio.Semaphore(10)  # Limit concurrent API calls
+            if rule_number and rule.get("content"):
+                rule_numbers.append(rule_number)
+                texts.append(self._get_text_for_embedding(rule))
         
-        async def limited_task(task):
-            async with semaphore:
-                return await task
-                
-        limited_tasks = [limited_task(task) for task in tasks]
-        results = await asyncio.gather(*limited_tasks, return_exceptions=True)
+        # Without an API key only cached embeddings can be used; don't retry requests that must fail
+        max_retries = 0 if self.backend.remote and not embedding_credentials_available() else None
+        embeddings = await asyncio.to_thread(
+            self.backend.embed_documents,
+            texts,
+            batch_size=self.batch_size,
+            progress_callback=self._log_progress,
+            max_retries=max_retries,
+        )
         
-        # Process results
-        success_count = 0
-        for result in results:
-            if isinstance(result, tuple) and not isinstance(result, Exception):
-                rule_number, embedding = result
-                if embedding:
-                    self.embeddings_cache[rule_number] = embedding
-                    success_count += 1
-            elif isinstance(result, Exception):
-                logger.error(f"Error generating embedding: {result}")
+        for rule_number, embedding in zip(rule_numbers, embeddings):
+            if embedding:
+                self.embeddings_cache[rule_number] = embedding
                 
-        logger.info(f"Generated {success_count}/{len(tasks)} rule embeddings successfully")
+        logger.info(f"Generated {len(self.embeddings_cache)}/{len(texts)} rule embeddings successfully")
     
-    async def _generate_single_embedding(self, rule_number: Any, content: str) -> tuple:
-        """Generate embedding for a single rule."""
-        try:
-            embedding = await asyncio.to_thread(get_embedding, content, self.model_name)
-            return (rule_number, embedding)
-        except Exception as e:
-            logger.error(f"Failed to generate embedding for rule {rule_number}: {e}")
-            return (rule_number, None)
+    @staticmethod
+    def _log_progress(completed: int, total: int):
+        """Report embedding generation progress."""
+        logger.info(f"Embedded {completed}/{total} physics rules")
+    
+    @staticmethod
+    def _get_text_for_embedding(rule: Dict[str, Any]) -> str:
+        """Get the text representation of a rule for embedding."""
+        text_parts = []
+        if rule.get("title"):
+            text_parts.append(f"Title: {rule['title']}")
+        if rule.get("category"):
+            text_parts.append(f"Category: {rule['category']}")
+        if rule.get("content"):
+            text_parts.append(f"Content: {rule['content']}")
+        return " | ".join(text_parts)
+    
+    def build_index(self):
+        """
+        Stack the cached rule embeddings into a pre-normalized matrix.
+        
+        The index is built completely before it replaces the previous one,
+        so a concurrent search sees either index whole. With
+        ``QUANTIZED_SEARCH`` enabled an int8 copy is built for the first
+        search pass.
+        """
+        positions = []
+        vectors = []
+        for position, rule in enumerate(self.physics_rules):
+            embedding = self.embeddings_cache.get(rule.get("rule_number"))
+            if embedding is not None and len(embedding) > 0:
+                positions.append(position)
+                vectors.append(embedding)
+        
+        matrix = normalize_rows(vectors) if vectors else np.zeros((0, 0), dtype=np.float32)
+        index = RulesIndex(rules=list(self.physics_rules), matrix=matrix, positions=positions)
+        search_config = config.search
+        if vectors and search_config.quantized_search:
+            index.quantized_index = QuantizedIndex(matrix, rerank_factor=search_config.quantized_rerank_factor)
+        self.index = index
+        logger.info(f"Built physics rules index with {len(positions)} rows")
     
     def get_embedding(self, rule_number: Any) -> Optional[List[float]]:
         """
@@ -159,74 +304,83 @@ class RulesEmbeddingManager:
         Returns:
             Rule dictionary or None if not found
         """
-        for rule in self.physics_rules:
-            if rule.get("rule_number") == rule_number:
-                return rule
-        return None
+        return self.load_rules().get(rule_number)
     
     def save_embeddings(self) -> bool:
         """
-        Save embeddings to disk.
+        Save embeddings to disk as a memory-mappable vector store.
         
         Returns:
             True if successful, False otherwise
         """
-        try:
-            cache_data = {
-                'embeddings': self.embeddings_cache,
-                'model_name': self.model_name,
-                'num_rules': len(self.physics_rules)
-            }
-            
-            with open(self.cache_file, 'wb') as f:
-                pickle.dump(cache_data, f)
-                
-            logger.info(f"Saved rule embeddings to {self.cache_file}")
-            return True
-        except Exception as e:
-            logger.error(f"Failed to save rule embeddings: {e}")
-            return False
+        rule_numbers = []
+        vectors = []
+        hashes = []
+        for rule in self.physics_rules:
+            rule_number = rule.get("rule_number")
+            if rule_number in self.embeddings_cache:
+                rule_numbers.append(rule_number)
+                vectors.append(self.embeddings_cache[rule_number])
+                hashes.append(content_hash(self._get_text_for_embedding(rule)))
+        
+        return save_vector_store(
+            self.store_path,
+            ids=rule_numbers,
+            vectors=vectors,
+            model_name=self.model_name,
+            content_hashes=hashes,
+            metadata={'num_rules': len(self.physics_rules)},
+        )
     
     def load_embeddings(self) -> bool:
         """
         Load embeddings from disk.
         
+        Stored vectors are matched to rules by rule number and the hash of
+        the embedded text (title, category and content), so an edited rule
+        is never paired with its old embedding.
+        
         Returns:
-            True if successful, False otherwise
+            True if every rule has a cached embedding, False otherwise
         """
-        if not self.cache_file.exists():
+        self.embeddings_cache = {}
+        
+        store = load_vector_store(self.store_path)
+        if store is None:
             logger.info("No rule embeddings cache file found")
             return False
-            
-        try:
-            with open(self.cache_file, 'rb') as f:
-                cache_data = pickle.load(f)
-                
-            # Validate cache
-            if cache_data.get('num_rules') != len(self.physics_rules):
-                logger.warning("Rules cache size mismatch, regenerating embeddings")
-                return False
-                
-            if cache_data.get('model_name') != self.model_name:
-                logger.warning("Model name mismatch, regenerating embeddings")
-                return False
-                
-            self.embeddings_cache = cache_data['embeddings']
-            logger.info(f"Loaded {len(self.embeddings_cache)} rule embeddings from cache")
-            return True
-            
-        except Exception as e:
-            logger.error(f"Failed to load rule embeddings: {e}")
+        
+        matrix, manifest = store
+        if manifest.get('model_name') != self.model_name:
+            logger.warning("Model name mismatch, regenerating embeddings")
             return False
+        
+        row_by_key = {
+            (rule_number, digest): row
+            for row, (rule_number, digest) in enumerate(zip(manifest['ids'], manifest['content_hashes']))
+        }
+        expected = 0
+        for rule in self.physics_rules:
+            rule_number = rule.get("rule_number")
+            if not (rule_number and rule.get("content")):
+                continue
+            expected += 1
+            row = row_by_key.get((rule_number, content_hash(self._get_text_for_embedding(rule))))
+            if row is not None:
+                self.embeddings_cache[rule_number] = matrix[row]
+        
+        logger.info(f"Loaded {len(self.embeddings_cache)}/{expected} rule embeddings from cache")
+        return expected > 0 and len(self.embeddings_cache) == expected
     
     def clear_cache(self):
         """Clear the embeddings cache from memory and disk."""
         self.embeddings_cache = {}
+        self.index = None
         self.is_initialized = False
         
         if self.cache_file.exists():
             try:
-                self.cache_file.unlink()
+                delete_vector_store(self.store_path)
                 logger.info("Deleted rule embeddings cache file")
             except Exception as e:
                 logger.error(f"Failed to delete cache file: {e}")
@@ -241,11 +395,8 @@ class RulesEmbeddingManager:
         Returns:
             List of rules in the category
         """
-        category_lower = category.lower()
-        return [
-            rule for rule in self.physics_rules
-            if category_lower in rule.get("category", "").lower()
-        ]
+        posting_index = self.load_rules()
+        return [posting_index.rules[p] for p in sorted(posting_index.with_category(category))]
     
     def search_rules_by_content(self, query: str) -> List[Dict[str, Any]]:
         """
@@ -257,17 +408,9 @@ class RulesEmbeddingManager:
         Returns:
             List of matching rules
         """
-        query_lower = query.lower()
-        matching_rules = []
-        
-        for rule in self.physics_rules:
-            content = rule.get("content", "").lower()
-            description = rule.get("description", "").lower()
-            
-            if query_lower in content or query_lower in description:
-                matching_rules.append(rule)
-                
-        return matching_rules
+        posting_index = self.load_rules()
+        positions = posting_index.with_any_phrase([query], ("content", "description"))
+        return [posting_index.rules[p] for p in sorted(positions)]
 
 
 # Convenience functions for backward compatibility
@@ -286,4 +429,41 @@ async def embed_and_cache_rules(force_regenerate: bool = False):
 
 def get_rules_manager() -> RulesEmbeddingManager:
     """Get the singleton rules embedding manager instance."""
-    return _manager
\ No newline at end of file
+    return _manager
+
+
+def check_rules_index() -> bool:
+    """
+    Build or load the physics rules index once at startup.
+    
+    A failure is logged as an error here, where it is seen, rather than
+    surfacing later as failed searches. It is also remembered by the
+    manager, so searches fail fast until the retry interval has passed.
+    
+    Returns:
+        True if the index is ready
+    """
+    try:
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            asyncio.run(_manager.initialize())
+        else:
+            # Called from a running event loop: initialize on a separate one
+            with ThreadPoolExecutor(max_workers=1) as executor:
+                executor.submit(asyncio.run, _manager.initialize()).result()
+    except RulesIndexError as e:
+        logger.error(
+            f"{e}. Physics rules search is unavailable; build the index with "
+            f"`python -m feynmancraft_adk.tools.physics.embedding_manager`"
+        )
+        return False
+    logger.info(f"Physics rules index ready: {len(_manager.index)} rules embedded with {_manager.model_name}")
+    return True
+
+if __name__ == "__main__":
+    # Build or verify the rules index ahead of serving; exits non-zero if it is empty
+    import sys
+    
+    logging.basicConfig(level=logging.INFO)
+    sys.exit(0 if check_rules_index() else 1)
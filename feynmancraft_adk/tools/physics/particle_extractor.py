@@ -0,0 +1,208 @@
+"""
+Particle and process extraction from free text.
+
+One extractor serves every parser that needs the particles of a query:
+the physics tools, the physics validator agent and the agent search
+integration. The text is split by one compiled token pattern, and runs of
+up to three tokens are looked up in the alias table of the conservation
+module (longest run first), so names in LaTeX (``\\bar{\\nu}_e``), Unicode
+(``e⁺``, ``ν̄``), symbols (``e+e-``, ``γγ``) and words ("electron
+antineutrino", "up quarks") all give canonical names.
+
+Single letters and flavour words (``"e"``, ``"top"``, ``"up"``) are only read
+as particles with some notation around them (``e^-``, ``\\bar{t}``, "up
+quark", "anti-up") or inside an ``initial -> final`` process, so "top of
+the list" or "e.g." yield nothing. Family words ("neutrino", "pion", "W
+boson") are kept as mentions with several candidates.
+
+Results are cached by normalized query, and lookups by spelling, so a new
+query made of words seen before costs only the tokenization.
+"""
+
+import re
+import unicodedata
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Dict, List, Optional, Tuple
+
+from .conservation import ARROW_RE, normalize_particle_name, parse_process, resolve_particle, split_symbols
+
+# Family words and the particles they can stand for (keys are normalized names)
+FAMILIES: Dict[str, Tuple[str, ...]] = {
+    "neutrino": ("nu_e", "nu_mu", "nu_tau"),
+    "~neutrino": ("nu_e_bar", "nu_mu_bar", "nu_tau_bar"),
+    "w": ("W+", "W-"),
+    "wboson": ("W+", "W-"),
+    "pion": ("pi+", "pi-", "pi0"),
+    "kaon": ("K+", "K-", "K0"),
+    "rho": ("rho+", "rho-", "rho0"),
+    "sigma": ("Sigma+", "Sigma0", "Sigma-"),
+    "xi": ("Xi0", "Xi-"),
+}
+
+# Normalized names that are ordinary words or letters in prose
+PROSE_AMBIGUOUS = frozenset("bcdeghnpstuwz") | {"up", "down", "strange", "charm", "bottom", "beauty", "top", "truth", "eta", "phi", "psi", "lambda", "xi", "rho"}
+
+# Single capitals that name a boson even in prose ("Z decay", "W exchange")
+PROSE_SAFE_SYMBOLS = frozenset({"Z", "W", "H"})
+
+PROCESS_TERMS = (
+    "decay", "scattering", "annihilation", "production", "emission", "absorption",
+    "collision", "fusion", "exchange", "oscillation",
+)
+
+MAX_WORDS = 3
+
+_TOKEN_RE = re.compile(r"[^\s,;:!?]+")
+_NOTATION_RE = re.compile(r"[\\^_~{}+\-±⁺⁻⁰₊₋̄̅−\d]|anti|bar|quark|boson|meson", re.IGNORECASE)
+_PROCESS_TERM_RE = re.compile(r"\b(" + "|".join(PROCESS_TERMS) + r")(?:e?s)?\b", re.IGNORECASE)
+
+
+@dataclass(frozen=True)
+class ParticleMention:
+    """
+    A particle named in a query.
+
+    Attributes:
+        text: The words or symbols as written
+        start: Offset of the mention in the normalized query
+        end: End offset of the mention in the normalized query
+        names: Canonical names; several for a family word ("neutrino")
+    """
+    text: str
+    start: int
+    end: int
+    names: Tuple[str, ...]
+
+    @property
+    def ambiguous(self) -> bool:
+        return len(self.names) > 1
+
+
+@dataclass(frozen=True)
+class ParticleExtraction:
+    """
+    Particles and process words of a query.
+
+    Attributes:
+        query: Normalized query (NFC, single spaces)
+        mentions: Particle mentions in order of appearance
+        process_terms: Process words ("decay", "scattering", ...) in order, without repeats
+        process: (initial, final) canonical names if the query is an ``initial -> final``
+            process whose particles all resolve, else None
+    """
+    query: str
+    mentions: Tuple[ParticleMention, ...]
+    process_terms: Tuple[str, ...]
+    process: Optional[Tuple[Tuple[str, ...], Tuple[str, ...]]]
+
+    @property
+    def particles(self) -> Tuple[str, ...]:
+        """Canonical names of the unambiguous mentions, in order and with repeats (``γγ`` gives two)."""
+        return tuple(m.names[0] for m in self.mentions if not m.ambiguous)
+
+    @property
+    def names(self) -> List[str]:
+        """Every canonical name mentioned, family candidates included, without repeats."""
+        return list(dict.fromkeys(name for m in self.mentions for name in m.names))
+
+
+def normalize_query(query: str) -> str:
+    """Cache key of a query: Unicode NFC with collapsed whitespace."""
+    return " ".join(unicodedata.normalize("NFC", query).split())
+
+
+@lru_cache(maxsize=8192)
+def _lookup(text: str) -> Tuple[str, ...]:
+    """Canonical names for a spelling: a particle, a plural, a family or a ``±`` pair."""
+    for candidate in (text, text[:-1] if len(text) > 3 and text.endswith("s") else None):
+        if not candidate:
+            continue
+        particle = resolve_particle(candidate)
+        if particle is not None:
+            return (particle.name,)
+        key = normalize_particle_name(candidate)
+        if key in FAMILIES:
+            return FAMILIES[key]
+        if "±" in key:
+            pair = [resolve_particle(key.replace("±", sign)) for sign in "+-"]
+            if all(pair):
+                return tuple(p.name for p in pair)
+    return ()
+
+
+@lru_cache(maxsize=8192)
+def _readable_in_prose(text: str, names: Tuple[str, ...]) -> bool:
+    """Whether a match is a particle outside a process (not the letter "e" or the word "top")."""
+    if len(names) > 1 or text in PROSE_SAFE_SYMBOLS or _NOTATION_RE.search(text):
+        return True
+    return normalize_particle_name(text).lstrip("~") not in PROSE_AMBIGUOUS
+
+
+def _tokens(query: str) -> List[Tuple[str, int, int]]:
+    """Tokens of a query with their offsets, without surrounding quotes, unmatched brackets or sentence dots."""
+    tokens = []
+    for match in _TOKEN_RE.finditer(query):
+        text, start = match.group(), match.start()
+        while text and (text[0] in "\"'[" or (text[0] == "(" and (text[-1] == ")" or text.count("(") > text.count(")")))):
+            text, start = text[1:], start + 1
+        while text and (text[-1] in "\"'.]" or (text[-1] == ")" and text.count(")") > text.count("("))):
+            text = text[:-1]
+        if text and text != "+" and not ARROW_RE.fullmatch(text):
+            tokens.append((text, start, start + len(text)))
+    return tokens
+
+
+@lru_cache(maxsize=2048)
+def _extract(query: str) -> ParticleExtraction:
+    in_process = ARROW_RE.search(query) is not None
+    tokens = _tokens(query)
+    mentions: List[ParticleMention] = []
+    i = 0
+    while i < len(tokens):
+        for size in range(min(MAX_WORDS, len(tokens) - i), 0, -1):
+            start, end = tokens[i][1], tokens[i + size - 1][2]
+            text = query[start:end]
+            names = _lookup(text)
+            if names and (in_process or _readable_in_prose(text, names)):
+                mentions.append(ParticleMention(text, start, end, names))
+                i += size
+                break
+        else:
+            text, start, end = tokens[i]
+            # Concatenated symbols: "e^+e^-", "γγ", "e+e-"
+            if _NOTATION_RE.search(text) or not text.isascii():
+                parts = split_symbols(text)
+                if len(parts) > 1:
+                    offset = start
+                    for part in parts:
+                        mentions.append(ParticleMention(part, offset, offset + len(part), (resolve_particle(part).name,)))
+                        offset += len(part)
+            i += 1
+
+    process = None
+    if in_process:
+        try:
+            sides = parse_process(query)
+        except ValueError:
+            sides = None
+        if sides:
+            resolved = [[resolve_particle(name) for name in side] for side in sides]
+            if all(p is not None for side in resolved for p in side):
+                process = tuple(tuple(p.name for p in side) for side in resolved)
+
+    terms = tuple(dict.fromkeys(m.group(1).lower() for m in _PROCESS_TERM_RE.finditer(query)))
+    return ParticleExtraction(query, tuple(mentions), terms, process)
+
+
+def extract_particles(query: str) -> ParticleExtraction:
+    """
+    Extract the particles and process words of a query.
+
+    Args:
+        query: Free text, LaTeX or process notation
+
+    Returns:
+        ParticleExtraction with canonical particle names
+    """
+    return _extract(normalize_query(query))
@@ -0,0 +1,523 @@
+"""
+Offline snapshot of PDG particle data, read in-process.
+
+Every particle lookup through the ParticlePhysics MCP server starts work in
+a subprocess, connects to the PDG database and returns formatted text. The
+particles the agents use are few and their PDG values change once a year,
+so they are snapshotted into a small SQLite file by an offline build step:
+
+    python -m feynmancraft_adk.tools.physics.particle_store --output particles.sqlite3
+
+The build needs the optional ``pdg`` package. Reading does not: the store
+is loaded into memory once, and lookups are dictionary accesses. Particle
+names resolve through the aliases of the conservation table, so ``"muon"``,
+``"\\mu^-"`` and ``"μ⁻"`` find the same record.
+"""
+
+import logging
+import sqlite3
+import threading
+import time
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from .conservation import PARTICLE_NAMES, PARTICLE_TABLE, find_particles, resolve_particle
+from ...shared_libraries.file_utils import atomic_path
+
+logger = logging.getLogger(__name__)
+
+SCHEMA_VERSION = "1"
+
+# Monte Carlo particle numbers of the tabulated particles; antiparticles have the negated number
+MC_IDS: Dict[str, int] = {
+    "e-": 11, "nu_e": 12, "mu-": 13, "nu_mu": 14, "tau-": 15, "nu_tau": 16,
+    "d": 1, "u": 2, "s": 3, "c": 4, "b": 5, "t": 6,
+    "g": 21, "gamma": 22, "Z0": 23, "W+": 24, "H": 25,
+    "pi0": 111, "pi+": 211, "eta": 221, "rho0": 113, "rho+": 213, "omega(782)": 223, "phi": 333,
+    "K0L": 130, "K0S": 310, "K0": 311, "K+": 321,
+    "D+": 411, "D0": 421, "D_s+": 431, "J/psi": 443,
+    "B0": 511, "B+": 521, "B_s0": 531, "Upsilon": 553,
+    "n": 2112, "p": 2212, "Delta++": 2224, "Lambda": 3122, "Sigma-": 3112, "Sigma0": 3212,
+    "Sigma+": 3222, "Xi-": 3312, "Xi0": 3322, "Omega-": 3334, "Lambda_c+": 4122,
+}
+
+QUANTUM_NUMBER_FIELDS = ("J", "P", "C", "I", "G")
+
+_SCHEMA = """
+CREATE TABLE meta (key TEXT PRIMARY KEY, value TEXT NOT NULL);
+CREATE TABLE particles (
+    name TEXT PRIMARY KEY,
+    pdgid TEXT,
+    mcid INTEGER,
+    description TEXT NOT NULL,
+    mass REAL,
+    mass_error REAL,
+    width REAL,
+    lifetime REAL,
+    charge REAL,
+    spin TEXT,
+    quantum_J TEXT,
+    quantum_P TEXT,
+    quantum_C TEXT,
+    quantum_I TEXT,
+    quantum_G TEXT,
+    antiparticle TEXT
+);
+CREATE TABLE aliases (alias TEXT PRIMARY KEY, name TEXT NOT NULL);
+CREATE TABLE decays (
+    name TEXT NOT NULL,
+    rank INTEGER NOT NULL,
+    description TEXT NOT NULL,
+    branching_fraction REAL,
+    display TEXT,
+    PRIMARY KEY (name, rank)
+);
+"""
+
+
+@dataclass
+class ParticleRecord:
+    """
+    PDG data of one particle.
+
+    Attributes:
+        name: Canonical name (conservation table naming, e.g. ``"nu_e_bar"``)
+        pdgid: PDG identifier of the particle's summary table entry
+        mcid: Monte Carlo particle number
+        description: PDG name of the particle
+        mass: Mass in GeV
+        mass_error: Symmetric mass uncertainty in GeV
+        width: Total width in GeV
+        lifetime: Mean lifetime in seconds
+        charge: Electric charge in units of e
+        spin: Spin J
+        quantum_numbers: PDG quantum numbers present among J, P, C, I and G
+        antiparticle: Canonical name of the antiparticle
+        aliases: Other names the particle is found by
+        decays: Top decay modes: description, branching_fraction, display
+    """
+    name: str
+    description: str
+    pdgid: Optional[str] = None
+    mcid: Optional[int] = None
+    mass: Optional[float] = None
+    mass_error: Optional[float] = None
+    width: Optional[float] = None
+    lifetime: Optional[float] = None
+    charge: Optional[float] = None
+    spin: Optional[str] = None
+    quantum_numbers: Dict[str, str] = field(default_factory=dict)
+    antiparticle: Optional[str] = None
+    aliases: List[str] = field(default_factory=list)
+    decays: List[Dict[str, Any]] = field(default_factory=list)
+
+    def to_dict(self, units: str = "GeV") -> Dict[str, Any]:
+        """Record as a dictionary; mass and width in ``units`` ("GeV" or "MeV")."""
+        data = asdict(self)
+        scale = 1000.0 if units.lower() == "mev" else 1.0
+        for key in ("mass", "mass_error", "width"):
+            if data[key] is not None:
+                data[key] *= scale
+        data["units"] = "MeV" if scale != 1.0 else "GeV"
+        return data
+
+
+def _alias_key(alias: str) -> str:
+    return " ".join(str(alias).lower().split())
+
+
+class ParticleStore:
+    """
+    Read-only particle store loaded from a snapshot file.
+
+    Attributes:
+        path: Snapshot file
+        metadata: Build metadata (schema version, PDG edition, build time)
+        records: Canonical name -> ParticleRecord
+    """
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        conn = sqlite3.connect(f"{self.path.resolve().as_uri()}?mode=ro", uri=True)
+        try:
+            conn.row_factory = sqlite3.Row
+            self.metadata: Dict[str, str] = dict(conn.execute("SELECT key, value FROM meta").fetchall())
+            if self.metadata.get("schema_version") != SCHEMA_VERSION:
+                raise ValueError(
+                    f"Particle store {self.path} has schema {self.metadata.get('schema_version')}, "
+                    f"expected {SCHEMA_VERSION}; rebuild it"
+                )
+            self.records: Dict[str, ParticleRecord] = {}
+            for row in conn.execute("SELECT * FROM particles"):
+                self.records[row["name"]] = ParticleRecord(
+                    name=row["name"],
+                    description=row["description"],
+                    pdgid=row["pdgid"],
+                    mcid=row["mcid"],
+                    mass=row["mass"],
+                    mass_error=row["mass_error"],
+                    width=row["width"],
+                    lifetime=row["lifetime"],
+                    charge=row["charge"],
+                    spin=row["spin"],
+                    quantum_numbers={
+                        key: row[f"quantum_{key}"] for key in QUANTUM_NUMBER_FIELDS if row[f"quantum_{key}"] is not None
+                    },
+                    antiparticle=row["antiparticle"],
+                )
+            self._aliases: Dict[str, str] = {}
+            for alias, name in conn.execute("SELECT alias, name FROM aliases"):
+                if name in self.records:
+                    self._aliases[alias] = name
+                    self.records[name].aliases.append(alias)
+            for row in conn.execute("SELECT * FROM decays ORDER BY name, rank"):
+                if row["name"] in self.records:
+                    self.records[row["name"]].decays.append({
+                        "description": row["description"],
+                        "branching_fraction": row["branching_fraction"],
+                        "display": row["display"],
+                    })
+        finally:
+            conn.close()
+
+    def __len__(self) -> int:
+        return len(self.records)
+
+    def __contains__(self, name: str) -> bool:
+        return self.get(name) is not None
+
+    def get(self, name: str) -> Optional[ParticleRecord]:
+        """
+        Look up a particle by any name.
+
+        Args:
+            name: Canonical name, any notation the conservation table resolves,
+                PDG name or Monte Carlo number
+
+        Returns:
+            ParticleRecord, or None if the particle is not in the store
+        """
+        name = str(name).strip()
+        record = self.records.get(name)
+        if record is not None:
+            return record
+        particle = resolve_particle(name)
+        if particle is not None and particle.name in self.records:
+            return self.records[particle.name]
+        canonical = self._aliases.get(_alias_key(name))
+        return self.records.get(canonical) if canonical else None
+
+    def decays(self, name: str, limit: Optional[int] = None) -> Tuple[Optional[ParticleRecord], List[Dict[str, Any]], bool]:
+        """
+        Top decay modes of a particle.
+
+        An antiparticle without its own decays takes those of its particle,
+        with charges to be conjugated.
+
+        Args:
+            name: Particle name (see get)
+            limit: Maximum number of modes
+
+        Returns:
+            (record or None, decay modes, whether the modes are the charge-conjugated ones of the antiparticle)
+        """
+        record = self.get(name)
+        if record is None:
+            return None, [], False
+        decays, conjugated = record.decays, False
+        if not decays and record.antiparticle and record.antiparticle != record.name:
+            partner = self.records.get(record.antiparticle)
+            if partner is not None and partner.decays:
+                decays, conjugated = partner.decays, True
+        return record, decays[:limit] if limit else list(decays), conjugated
+
+    def search(self, query: str, limit: int = 5) -> List[ParticleRecord]:
+        """
+        Particles matching a query: an exact lookup first, then name, description and alias substrings.
+
+        Args:
+            query: Particle name or part of one
+            limit: Maximum number of records
+
+        Returns:
+            Matching records, best first
+        """
+        exact = self.get(query)
+        results = [exact] if exact else []
+        key = _alias_key(query)
+        if not key:
+            return results
+        matches = [self.records[name] for name in find_particles(query) if name in self.records]
+        matches += [
+            record for record in self.records.values()
+            if any(key in candidate for candidate in [record.name.lower()] + record.aliases)
+        ]
+        for record in matches:
+            if len(results) >= limit:
+                break
+            if record not in results:
+                results.append(record)
+        return results
+
+
+_store_lock = threading.Lock()
+_store_cache: Dict[str, Tuple[float, ParticleStore]] = {}
+
+
+def get_particle_store(path: Optional[Path] = None) -> Optional[ParticleStore]:
+    """
+    Shared particle store, reloaded when the snapshot file changes.
+
+    Args:
+        path: Snapshot file (default: configured particle_store_path)
+
+    Returns:
+        ParticleStore, or None if the store is disabled, missing or unreadable
+    """
+    from ...shared_libraries.config import config
+
+    validation_config = config.validation
+    if path is None:
+        if not validation_config.particle_store_enabled:
+            return None
+        path = validation_config.particle_store_path
+    path = Path(path)
+    try:
+        mtime = path.stat().st_mtime
+    except OSError:
+        return None
+
+    key = str(path.resolve())
+    with _store_lock:
+        cached = _store_cache.get(key)
+        if cached is not None and cached[0] == mtime:
+            return cached[1]
+        try:
+            store = ParticleStore(path)
+        except (sqlite3.Error, ValueError) as e:
+            logger.warning(f"Could not read particle store {path}: {e}")
+            return None
+        _store_cache[key] = (mtime, store)
+        logger.info(f"Loaded {len(store)} particles from {path}")
+        return store
+
+
+def write_particle_store(records: Iterable[ParticleRecord], path: Path, metadata: Optional[Dict[str, str]] = None) -> int:
+    """
+    Write particle records to a snapshot file.
+
+    The file is written next to ``path`` and moved into place, so readers
+    never see a partial store.
+
+    Args:
+        records: Particle records
+        path: Snapshot file
+        metadata: Extra build metadata (e.g. PDG edition)
+
+    Returns:
+        Number of particles written
+    """
+    count = 0
+    with atomic_path(path) as tmp_name:
+        conn = sqlite3.connect(tmp_name)
+        try:
+            conn.executescript(_SCHEMA)
+            meta = {"schema_version": SCHEMA_VERSION, "built_at": time.strftime("%Y-%m-%dT%H:%M:%S%z")}
+            meta.update(metadata or {})
+            conn.executemany("INSERT INTO meta VALUES (?, ?)", meta.items())
+            for record in records:
+                conn.execute(
+                    "INSERT INTO particles VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    (
+                        record.name, record.pdgid, record.mcid, record.description,
+                        record.mass, record.mass_error, record.width, record.lifetime, record.charge, record.spin,
+                        *(record.quantum_numbers.get(key) for key in QUANTUM_NUMBER_FIELDS),
+                        record.antiparticle,
+                    ),
+                )
+                aliases = {_alias_key(a) for a in record.aliases + [record.description]}
+                if record.mcid is not None:
+                    aliases.add(str(record.mcid))
+                conn.executemany(
+                    "INSERT OR IGNORE INTO aliases VALUES (?, ?)",
+                    [(alias, record.name) for alias in sorted(aliases) if alias],
+                )
+                conn.executemany(
+                    "INSERT INTO decays VALUES (?, ?, ?, ?, ?)",
+                    [
+                        (record.name, rank, d["description"], d.get("branching_fraction"), d.get("display"))
+                        for rank, d in enumerate(record.decays)
+                    ],
+                )
+                count += 1
+            conn.commit()
+        finally:
+            conn.close()
+    return count
+
+
+def _pdg_value(obj: Any, name: str) -> Any:
+    """Attribute of a PDG API object; None when the API has no value for it."""
+    try:
+        return getattr(obj, name, None)
+    except Exception:
+        return None
+
+
+def _as_float(value: Any) -> Optional[float]:
+    try:
+        return float(value) if value is not None else None
+    except (TypeError, ValueError):
+        return None
+
+
+def _pdg_decays(particle: Any, top_decays: int) -> List[Dict[str, Any]]:
+    """Top exclusive decay modes of a PDG particle, largest branching fraction first."""
+    try:
+        modes = list(particle.exclusive_branching_fractions())
+    except Exception:
+        return []
+    decays = [
+        {
+            "description": _pdg_value(mode, "description"),
+            "branching_fraction": _as_float(_pdg_value(mode, "value")),
+            "display": _pdg_value(mode, "display_value_text"),
+        }
+        for mode in modes
+        if _pdg_value(mode, "description") and not _pdg_value(mode, "is_limit")
+    ]
+    decays.sort(key=lambda d: -(d["branching_fraction"] or 0.0))
+    return decays[:top_decays]
+
+
+def _record_from_pdg(name: str, particle: Any, top_decays: int) -> ParticleRecord:
+    quantum_numbers = {}
+    for key in QUANTUM_NUMBER_FIELDS:
+        value = _pdg_value(particle, f"quantum_{key}")
+        if value not in (None, ""):
+            quantum_numbers[key] = str(value)
+    table = PARTICLE_TABLE[name]
+    return ParticleRecord(
+        name=name,
+        description=str(_pdg_value(particle, "name") or _pdg_value(particle, "description") or name),
+        pdgid=_pdg_value(particle, "pdgid"),
+        mcid=_pdg_value(particle, "mcid"),
+        mass=_as_float(_pdg_value(particle, "mass")),
+        mass_error=_as_float(_pdg_value(particle, "mass_error")),
+        width=_as_float(_pdg_value(particle, "width")),
+        lifetime=_as_float(_pdg_value(particle, "lifetime")),
+        charge=_as_float(_pdg_value(particle, "charge")),
+        spin=quantum_numbers.get("J", str(table.spin)),
+        quantum_numbers=quantum_numbers,
+        antiparticle=table.antiparticle,
+        aliases=[name],
+        decays=_pdg_decays(particle, top_decays),
+    )
+
+
+def _conjugate(record: ParticleRecord, name: str) -> ParticleRecord:
+    """Antiparticle record derived from its particle; decays are left to the particle."""
+    return ParticleRecord(
+        name=name,
+        description=name,
+        pdgid=record.pdgid,
+        mcid=-record.mcid if record.mcid is not None else None,
+        mass=record.mass,
+        mass_error=record.mass_error,
+        width=record.width,
+        lifetime=record.lifetime,
+        charge=-record.charge if record.charge is not None else None,
+        spin=record.spin,
+        quantum_numbers=dict(record.quantum_numbers),
+        antiparticle=record.name,
+        aliases=[name],
+    )
+
+
+def fetch_pdg_records(names: Optional[Iterable[str]] = None, top_decays: int = 10) -> List[ParticleRecord]:
+    """
+    Read particles and their antiparticles from the PDG database.
+
+    Args:
+        names: Canonical particle names (default: every particle of the conservation table)
+        top_decays: Decay modes kept per particle
+
+    Returns:
+        Particle records, antiparticles included
+
+    Raises:
+        ImportError: If the ``pdg`` package is not installed
+    """
+    try:
+        import pdg
+    except ImportError as e:
+        raise ImportError("Building the particle store needs the pdg package: pip install pdg") from e
+
+    api = pdg.connect()
+    records: Dict[str, ParticleRecord] = {}
+    for name in names or PARTICLE_NAMES:
+        mcid = MC_IDS.get(name)
+        if mcid is None:
+            logger.warning(f"No Monte Carlo number for '{name}', skipped")
+            continue
+        anti = PARTICLE_TABLE[name].antiparticle
+        for canonical, number in ((name, mcid), (anti, -mcid)):
+            if canonical in records:
+                continue
+            try:
+                particle = api.get_particle_by_mcid(number)
+            except Exception:
+                particle = None
+            if particle is not None:
+                records[canonical] = _record_from_pdg(canonical, particle, top_decays)
+            elif canonical == anti and name in records:
+                records[canonical] = _conjugate(records[name], canonical)
+            else:
+                logger.warning(f"PDG has no particle with Monte Carlo number {number} ('{canonical}')")
+    return list(records.values())
+
+
+def build_particle_store(path: Optional[Path] = None, names: Optional[Iterable[str]] = None, top_decays: Optional[int] = None) -> int:
+    """
+    Snapshot PDG particle data into a store file.
+
+    Args:
+        path: Snapshot file (default: configured particle_store_path)
+        names: Canonical particle names (default: every particle of the conservation table)
+        top_decays: Decay modes kept per particle (default: configured particle_store_top_decays)
+
+    Returns:
+        Number of particles written
+    """
+    from ...shared_libraries.config import config
+
+    validation_config = config.validation
+    path = Path(path or validation_config.particle_store_path)
+    top_decays = validation_config.particle_store_top_decays if top_decays is None else top_decays
+    records = fetch_pdg_records(names, top_decays)
+
+    metadata = {}
+    try:
+        import pdg
+        metadata["pdg_package_version"] = str(getattr(pdg, "__version__", "unknown"))
+        metadata["pdg_edition"] = str(pdg.connect().edition)
+    except Exception:
+        pass
+    return write_particle_store(records, path, metadata)
+
+
+if __name__ == "__main__":
+    import argparse
+
+    from ...shared_libraries.config import config
+
+    parser = argparse.ArgumentParser(description="Snapshot PDG particle data into the local particle store")
+    parser.add_argument("--output", default=str(config.validation.particle_store_path), help="Store file")
+    parser.add_argument("--top-decays", type=int, default=None, help="Decay modes kept per particle")
+    parser.add_argument("particles", nargs="*", help="Canonical particle names (default: all tabulated particles)")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    count = build_particle_store(Path(args.output), args.particles or None, args.top_decays)
+    print(f"Wrote {count} particles to {args.output}")
@@ -1,11 +1,13 @@
 """
 Physics Tools for FeynmanCraft ADK.
 
-This module provides physics calculations and validation functions using the ParticlePhysics MCP Server.
-All particle data comes from the external MCP server.
+This module provides physics calculations and validation functions. Particle
+data is read from the local PDG snapshot (see particle_store) when the
+particle is in it, and from the ParticlePhysics MCP Server otherwise.
 """
 
 import asyncio
+import re
 from typing import Dict, Any, List, Optional
 from ...integrations.mcp import (
     search_particle_mcp,
@@ -16,34 +18,82 @@ from ...integrations.mcp import (
     convert_units_mcp,
     check_particle_properties_mcp
 )
+from .conservation import resolve_particle
+from .particle_extractor import extract_particles
+from .particle_store import get_particle_store
+
+LOCAL_SOURCE = "local_pdg_snapshot"
 
 
 async def search_particle(query: str, max_results: int = 5) -> Dict[str, Any]:
-    """Search for particles using MCP server."""
-    return await search_particle_mcp(query, max_results=max_results)
+    """Search for particles in the local PDG snapshot, falling back to the MCP server."""
+    store = get_particle_store()
+    records = store.search(query, limit=max_results) if store else []
+    if records:
+        return {
+            "source": LOCAL_SOURCE,
+            "query": query,
+            "count": len(records),
+            "particles": [record.to_dict() for record in records]
+        }
+    return await search_particle_mcp(query)
 
 
 async def get_particle_properties(particle_name: str, units_preference: str = "GeV") -> Dict[str, Any]:
-    """Get comprehensive particle properties from MCP server."""
-    return await get_particle_properties_mcp(particle_name, units_preference=units_preference)
+    """Get comprehensive particle properties from the local PDG snapshot, falling back to the MCP server."""
+    store = get_particle_store()
+    record = store.get(particle_name) if store else None
+    if record is not None:
+        return {"source": LOCAL_SOURCE, **record.to_dict(units_preference)}
+    return await get_particle_properties_mcp(particle_name)
 
 
 async def validate_quantum_numbers(particle_name: str) -> Dict[str, Any]:
-    """Validate quantum number consistency using MCP server."""
+    """Validate quantum number consistency against the local particle table."""
     return await validate_quantum_numbers_mcp(particle_name)
 
 
 async def get_branching_fractions(particle_name: str, limit: int = 10) -> Dict[str, Any]:
-    """Get decay modes and branching fractions from MCP server."""
-    return await get_branching_fractions_mcp(particle_name, limit=limit)
+    """Get decay modes and branching fractions from the local PDG snapshot, falling back to the MCP server."""
+    store = get_particle_store()
+    if store is not None:
+        record, decays, conjugated = store.decays(particle_name, limit=limit)
+        if decays:
+            result = {
+                "source": LOCAL_SOURCE,
+                "particle": record.name,
+                "description": record.description,
+                "decays": decays
+            }
+            if conjugated:
+                result["note"] = (
+                    f"Decay modes of {record.antiparticle}; {record.name} decays through the "
+                    "same modes with all particles replaced by their antiparticles"
+                )
+            return result
+    return await get_branching_fractions_mcp(particle_name)
 
 
 async def compare_particles(particle_names: str, properties: str = "mass,charge,spin") -> Dict[str, Any]:
-    """Compare properties of multiple particles using MCP server."""
+    """Compare properties of particles from the local PDG snapshot, falling back to the MCP server."""
     # Convert comma-separated string to list
     particle_list = [p.strip() for p in particle_names.split(',')]
     properties_list = [p.strip() for p in properties.split(',')]
-    return await compare_particles_mcp(particle_list, properties=properties_list)
+    
+    store = get_particle_store()
+    records = [store.get(name) for name in particle_list] if store else []
+    if records and all(records):
+        return {
+            "source": LOCAL_SOURCE,
+            "properties": properties_list,
+            "particles": {
+                name: {prop: record.to_dict().get(prop, record.quantum_numbers.get(prop)) for prop in properties_list}
+                for name, record in zip(particle_list, records)
+            }
+        }
+    if len(particle_list) < 2:
+        return {"error": "compare_particles needs at least two particles"}
+    return await compare_particles_mcp(particle_list[0], particle_list[1])
 
 
 async def convert_units(value: float, from_units: str, to_units: str) -> Dict[str, Any]:
@@ -52,97 +102,112 @@ async def convert_units(value: float, from_units: str, to_units: str) -> Dict[st
 
 
 async def check_particle_properties(particle_name: str) -> Dict[str, Any]:
-    """Comprehensive particle property checking using MCP server."""
-    return await check_particle_properties_mcp(particle_name)
+    """
+    Comprehensive particle property check.
+    
+    PDG snapshot values are cross-checked against the conservation table;
+    particles missing from the snapshot are checked through the MCP server.
+    """
+    store = get_particle_store()
+    record = store.get(particle_name) if store else None
+    if record is None:
+        return await check_particle_properties_mcp(particle_name, "all")
+    
+    issues = []
+    table = resolve_particle(record.name)
+    if table is not None and record.charge is not None and abs(record.charge - float(table.charge)) > 1e-6:
+        issues.append(f"PDG charge {record.charge} differs from the conservation table ({table.charge})")
+    if record.mass is None:
+        issues.append("No PDG mass value")
+    return {
+        "source": LOCAL_SOURCE,
+        "particle": record.name,
+        "valid": not issues,
+        "issues": issues,
+        "properties": record.to_dict()
+    }
+
+
+# Natural language patterns and their physics interpretations, compiled once
+_INTERPRETATIONS = {
+    # Quark combinations - handle both "upquark" and "up quark" variations
+    r'two\s+(?:up\s*quarks?|upquarks?)\s+and\s+one\s+(?:down\s*quarks?|downquarks?)': {
+        'particles': ['up', 'up', 'down'],
+        'quark_composition': 'uud',
+        'result': 'proton',
+        'physics_process': 'quark binding via strong force',
+        'description': 'Two up quarks and one down quark form a proton (uud composition)',
+        'educational_note': 'This is the quark structure of a proton, bound by the strong nuclear force'
+    },
+    r'two\s+(?:down\s*quarks?|downquarks?)\s+and\s+one\s+(?:up\s*quarks?|upquarks?)': {
+        'particles': ['down', 'down', 'up'],
+        'quark_composition': 'ddu',
+        'result': 'neutron',
+        'physics_process': 'quark binding via strong force',
+        'description': 'Two down quarks and one up quark form a neutron (ddu composition)',
+        'educational_note': 'This is the quark structure of a neutron, bound by the strong nuclear force'
+    },
+    r'electron\s+and\s+positron\s+collide|electron.*positron.*annihilation': {
+        'particles': ['electron', 'positron'],
+        'physics_process': 'electron-positron annihilation',
+        'result': 'photons',
+        'description': 'Electron-positron annihilation produces photons',
+        'notation': 'e⁻ + e⁺ → γγ'
+    },
+    r'muon\s+decay': {
+        'particles': ['muon'],
+        'physics_process': 'muon decay',
+        'result': ['electron', 'electron antineutrino', 'muon neutrino'],
+        'description': 'Muon decay via weak interaction',
+        'notation': 'μ⁻ → e⁻ + ν̄ₑ + νμ'
+    },
+    r'what\s+happens?\s+(?:if|when).*three\s+quarks?': {
+        'particles': ['quark', 'quark', 'quark'],
+        'physics_process': 'baryon formation',
+        'result': 'baryon',
+        'description': 'Three quarks form a baryon (proton, neutron, etc.)',
+        'educational_note': 'Baryons are hadrons composed of three quarks'
+    },
+    r'what\s+happens?\s+(?:if|when).*(?:quark.*antiquark|antiquark.*quark)': {
+        'particles': ['quark', 'antiquark'],
+        'physics_process': 'meson formation',
+        'result': 'meson',
+        'description': 'A quark and antiquark form a meson',
+        'educational_note': 'Mesons are hadrons composed of a quark-antiquark pair'
+    },
+    # More flexible patterns for common issues
+    r'(?:two|2)\s*(?:down\s*quarks?|downquarks?)\s+and\s+(?:one|1)\s*(?:electron|elctron)': {
+        'particles': ['down', 'down', 'electron'],
+        'physics_process': 'unphysical combination',
+        'result': 'impossible bound state',
+        'description': 'Two down quarks and an electron cannot form a stable bound state',
+        'educational_note': 'Quarks form bound states with other quarks (baryons, mesons), not with electrons. Electrons interact electromagnetically, not via the strong force.'
+    }
+}
+_INTERPRETATION_PATTERNS = [(re.compile(pattern), interpretation) for pattern, interpretation in _INTERPRETATIONS.items()]
 
 
 def parse_natural_language_physics(query: str) -> Dict[str, Any]:
     """Parse natural language physics queries and convert to standard notation."""
-    import re
-    
     query_lower = query.lower().strip()
-    
-    # Dictionary of common patterns and their physics interpretations
-    patterns = {
-        # Quark combinations - handle both "upquark" and "up quark" variations
-        r'two\s+(?:up\s*quarks?|upquarks?)\s+and\s+one\s+(?:down\s*quarks?|downquarks?)': {
-            'particles': ['up', 'up', 'down'],
-            'quark_composition': 'uud',
-            'result': 'proton',
-            'physics_process': 'quark binding via strong force',
-            'description': 'Two up quarks and one down quark form a proton (uud composition)',
-            'educational_note': 'This is the quark structure of a proton, bound by the strong nuclear force'
-        },
-        r'two\s+(?:down\s*quarks?|downquarks?)\s+and\s+one\s+(?:up\s*quarks?|upquarks?)': {
-            'particles': ['down', 'down', 'up'],
-            'quark_composition': 'ddu',
-            'result': 'neutron',
-            'physics_process': 'quark binding via strong force',
-            'description': 'Two down quarks and one up quark form a neutron (ddu composition)',
-            'educational_note': 'This is the quark structure of a neutron, bound by the strong nuclear force'
-        },
-        r'electron\s+and\s+positron\s+collide|electron.*positron.*annihilation': {
-            'particles': ['electron', 'positron'],
-            'physics_process': 'electron-positron annihilation',
-            'result': 'photons',
-            'description': 'Electron-positron annihilation produces photons',
-            'notation': 'e⁻ + e⁺ → γγ'
-        },
-        r'muon\s+decay': {
-            'particles': ['muon'],
-            'physics_process': 'muon decay',
-            'result': ['electron', 'electron antineutrino', 'muon neutrino'],
-            'description': 'Muon decay via weak interaction',
-            'notation': 'μ⁻ → e⁻ + ν̄ₑ + νμ'
-        },
-        r'what\s+happens?\s+(?:if|when).*three\s+quarks?': {
-            'particles': ['quark', 'quark', 'quark'],
-            'physics_process': 'baryon formation',
-            'result': 'baryon',
-            'description': 'Three quarks form a baryon (proton, neutron, etc.)',
-            'educational_note': 'Baryons are hadrons composed of three quarks'
-        },
-        r'what\s+happens?\s+(?:if|when).*(?:quark.*antiquark|antiquark.*quark)': {
-            'particles': ['quark', 'antiquark'],
-            'physics_process': 'meson formation',
-            'result': 'meson',
-            'description': 'A quark and antiquark form a meson',
-            'educational_note': 'Mesons are hadrons composed of a quark-antiquark pair'
-        },
-        # More flexible patterns for common issues
-        r'(?:two|2)\s*(?:down\s*quarks?|downquarks?)\s+and\s+(?:one|1)\s*(?:electron|elctron)': {
-            'particles': ['down', 'down', 'electron'],
-            'physics_process': 'unphysical combination',
-            'result': 'impossible bound state',
-            'description': 'Two down quarks and an electron cannot form a stable bound state',
-            'educational_note': 'Quarks form bound states with other quarks (baryons, mesons), not with electrons. Electrons interact electromagnetically, not via the strong force.'
-        }
-    }
+    extraction = extract_particles(query)
     
     # Check each pattern
-    for pattern, interpretation in patterns.items():
-        if re.search(pattern, query_lower):
+    for pattern, interpretation in _INTERPRETATION_PATTERNS:
+        if pattern.search(query_lower):
             return {
                 'status': 'success',
                 'original_query': query,
                 'physics_interpretation': interpretation,
+                'identified_particles': extraction.names,
                 'suggested_process': interpretation.get('physics_process', 'unknown'),
                 'educational_context': interpretation.get('educational_note', ''),
                 'standard_notation': interpretation.get('notation', ''),
                 'can_generate_diagram': interpretation.get('physics_process') not in ['unphysical combination']
             }
     
-    # If no specific pattern matches, try to extract particle names
-    particle_names = []
-    common_particles = [
-        'electron', 'positron', 'muon', 'photon', 'proton', 'neutron',
-        'up quark', 'upquark', 'down quark', 'downquark', 'strange quark', 'charm quark', 'bottom quark', 'top quark',
-        'neutrino', 'antineutrino', 'w boson', 'z boson', 'higgs', 'gluon'
-    ]
-    
-    for particle in common_particles:
-        if particle in query_lower:
-            particle_names.append(particle)
+    # If no specific pattern matches, report the particles named in the query
+    particle_names = extraction.names
     
     if particle_names:
         return {
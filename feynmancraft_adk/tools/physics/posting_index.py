@@ -0,0 +1,214 @@
+"""
+Posting-list indexes over the physics rules.
+
+Rules are indexed once when they are loaded, so the rule lookups used by
+physics validation (by particle, process keyword, rule type, category or
+rule number) are set unions and intersections instead of scans over every
+rule's text. Particles are matched in any notation through the aliases of
+the KB keyword index (``"e^+"``, ``"e⁺"`` and ``"positron"`` are the same
+particle).
+"""
+
+import threading
+from collections import Counter, OrderedDict, defaultdict
+from typing import Any, Dict, Iterable, List, Optional, Set
+
+from ..kb.keyword_index import tokenize
+from ..kb.metadata_index import particle_term
+
+# Keywords that identify a rule type in the content or category of a rule
+RULE_TYPE_KEYWORDS: Dict[str, List[str]] = {
+    'conservation': ['conservation', 'conserved', 'preserve'],
+    'decay': ['decay', 'decays', 'lifetime'],
+    'interaction': ['interaction', 'force', 'coupling'],
+    'symmetry': ['symmetry', 'symmetric', 'invariant'],
+    'quantum_numbers': ['quantum number', 'charge', 'spin', 'isospin'],
+    'kinematics': ['momentum', 'energy', 'mass', 'velocity'],
+    'selection_rules': ['forbidden', 'allowed', 'selection rule'],
+}
+
+# Keywords searched for when a process description mentions a process kind
+PROCESS_KEY_TERMS: Dict[str, List[str]] = {
+    'decay': ['decay', 'lifetime', 'branching'],
+    'scattering': ['scattering', 'cross section', 'interaction'],
+    'annihilation': ['annihilation', 'antiparticle'],
+    'production': ['production', 'creation'],
+    'collision': ['collision', 'scattering'],
+}
+
+CONSERVATION_TERMS = ['conservation', 'conserved']
+
+# Phrases indexed up front; other phrases are indexed on first use
+_FIXED_PHRASES = sorted(
+    {keyword for keywords in RULE_TYPE_KEYWORDS.values() for keyword in keywords}
+    | {term for terms in PROCESS_KEY_TERMS.values() for term in terms}
+    | set(CONSERVATION_TERMS)
+)
+
+# Text fields whose lowercased content is searched for phrases
+PHRASE_FIELDS = ("content", "category", "description", "title")
+
+
+class RulePostingIndex:
+    """
+    Posting lists from rule numbers, particles, keywords and categories to rule positions.
+
+    A phrase posting maps a rule position to the number of times the
+    lowercased phrase occurs in a field, so substring matching (``"charge"``
+    also matches ``"charged"``) works as it did on the raw text.
+
+    Attributes:
+        rules: Physics rules; positions index every structure below
+        by_number: str(rule_number) -> position
+        term_counts: Canonical term (particle aliases resolved) -> {position: count in title and content}
+        listed_particles: Lowercased entry of a rule's ``particles`` list -> positions
+        categories: Lowercased category -> positions
+        rule_types: Rule type (see RULE_TYPE_KEYWORDS) -> positions
+    """
+
+    def __init__(self, rules: Iterable[Dict[str, Any]], phrase_cache_size: int = 4096):
+        self.rules: List[Dict[str, Any]] = list(rules)
+        self.by_number: Dict[str, int] = {}
+        self.term_counts: Dict[str, Dict[int, int]] = defaultdict(dict)
+        self.listed_particles: Dict[str, Set[int]] = defaultdict(set)
+        self.categories: Dict[str, Set[int]] = defaultdict(set)
+        self._texts = {name: [] for name in PHRASE_FIELDS}
+        self._phrases: "OrderedDict[tuple, Dict[int, int]]" = OrderedDict()
+        self._phrase_cache_size = phrase_cache_size
+        self._lock = threading.Lock()
+
+        for position, rule in enumerate(self.rules):
+            rule_number = rule.get("rule_number")
+            if rule_number is not None and str(rule_number) not in self.by_number:
+                self.by_number[str(rule_number)] = position
+            for name in PHRASE_FIELDS:
+                value = rule.get(name, "")
+                self._texts[name].append(value.lower() if isinstance(value, str) else "")
+
+            terms = Counter(tokenize(f"{rule.get('title', '')} {rule.get('content', '')}"))
+            for term, count in terms.items():
+                self.term_counts[term][position] = count
+            particles = rule.get("particles", [])
+            if isinstance(particles, list):
+                for particle in particles:
+                    self.listed_particles[str(particle).lower()].add(position)
+            self.categories[self._texts["category"][position]].add(position)
+
+        for phrase in _FIXED_PHRASES:
+            for name in ("content", "category"):
+                self._phrases[(name, phrase)] = self._scan(name, phrase)
+        self._fixed_keys = set(self._phrases)
+
+        self.rule_types: Dict[str, Set[int]] = {
+            rule_type: self.with_any_phrase(keywords, ("content", "category"))
+            for rule_type, keywords in RULE_TYPE_KEYWORDS.items()
+        }
+
+    def __len__(self) -> int:
+        return len(self.rules)
+
+    def _scan(self, name: str, phrase: str) -> Dict[int, int]:
+        return {
+            position: text.count(phrase)
+            for position, text in enumerate(self._texts[name]) if phrase in text
+        }
+
+    def phrase_counts(self, phrase: str, name: str = "content") -> Dict[int, int]:
+        """
+        Occurrences of a phrase in one field of every rule that contains it.
+
+        Postings of phrases outside the fixed vocabulary are built on first
+        use and kept in a bounded LRU.
+
+        Args:
+            phrase: Phrase, matched case-insensitively as a substring
+            name: Field to search (one of PHRASE_FIELDS)
+
+        Returns:
+            {position: occurrences}; do not modify
+        """
+        key = (name, phrase.lower())
+        with self._lock:
+            postings = self._phrases.get(key)
+            if postings is not None:
+                self._phrases.move_to_end(key)
+                return postings
+
+        postings = self._scan(name, key[1])
+        with self._lock:
+            self._phrases[key] = postings
+            # Evict the least recently used query phrases, never the fixed vocabulary
+            if len(self._phrases) > len(self._fixed_keys) + self._phrase_cache_size:
+                evict = next(k for k in self._phrases if k not in self._fixed_keys)
+                del self._phrases[evict]
+        return postings
+
+    def with_phrase(self, phrase: str, name: str = "content") -> Set[int]:
+        """Rules whose field contains a phrase (case-insensitive)."""
+        return set(self.phrase_counts(phrase, name))
+
+    def with_any_phrase(self, phrases: Iterable[str], names: Iterable[str] = ("content",)) -> Set[int]:
+        """Rules where any of the fields contains any of the phrases."""
+        names = tuple(names)
+        matched: Set[int] = set()
+        for phrase in phrases:
+            for name in names:
+                matched.update(self.phrase_counts(phrase, name))
+        return matched
+
+    def with_rule_type(self, rule_type: str) -> Set[int]:
+        """Rules of a rule type; unknown types are matched as a phrase in content or category."""
+        rule_type = rule_type.lower()
+        if rule_type in self.rule_types:
+            return set(self.rule_types[rule_type])
+        return self.with_any_phrase([rule_type], ("content", "category"))
+
+    def with_category(self, category: str) -> Set[int]:
+        """Rules whose category contains ``category`` (case-insensitive)."""
+        category = category.lower()
+        matched: Set[int] = set()
+        for key, positions in self.categories.items():
+            if category in key:
+                matched |= positions
+        return matched
+
+    def particle_mentions(self, particle: str) -> Dict[int, int]:
+        """Mentions of a particle, in any notation, in the title and content of each rule."""
+        return self.term_counts.get(particle_term(particle), {})
+
+    def with_listed_particle(self, particle: str) -> Set[int]:
+        """Rules whose ``particles`` list names the particle (case-insensitive)."""
+        return set(self.listed_particles.get(particle.lower(), set()))
+
+    def get(self, rule_number: Any) -> Optional[Dict[str, Any]]:
+        """Rule with a rule number (compared as strings), or None."""
+        position = self.by_number.get(str(rule_number))
+        return self.rules[position] if position is not None else None
+
+    def position_of(self, rule: Dict[str, Any]) -> Optional[int]:
+        """Position of an indexed rule, or None for rules that are not (or no longer) indexed."""
+        position = self.by_number.get(str(rule.get("rule_number")))
+        if position is None:
+            return None
+        indexed = self.rules[position]
+        if indexed is not rule and (
+            indexed.get("content") != rule.get("content") or indexed.get("category") != rule.get("category")
+        ):
+            return None
+        return position
+
+    def rule_has_phrase(self, rule: Dict[str, Any], phrase: str, name: str = "content") -> bool:
+        """Whether a rule's field contains a phrase; scans only rules that are not indexed."""
+        position = self.position_of(rule)
+        if position is None:
+            value = rule.get(name, "")
+            return isinstance(value, str) and phrase.lower() in value.lower()
+        return position in self.phrase_counts(phrase, name)
+
+    def rule_phrase_count(self, rule: Dict[str, Any], phrase: str, name: str = "content") -> int:
+        """Occurrences of a phrase in a rule's field; scans only rules that are not indexed."""
+        position = self.position_of(rule)
+        if position is None:
+            value = rule.get(name, "")
+            return value.lower().count(phrase.lower()) if isinstance(value, str) else 0
+        return self.phrase_counts(phrase, name).get(position, 0)
@@ -6,8 +6,9 @@ import asyncio
 from typing import List, Dict, Any, Optional
 import logging
 
-from .embedding_manager import get_rules_manager
-from ..kb.embeddings import get_embedding, cosine_similarity
+from .conservation import check_conservation
+from .embedding_manager import RulesIndexError, get_rules_manager
+from .posting_index import CONSERVATION_TERMS, PROCESS_KEY_TERMS, RULE_TYPE_KEYWORDS
 
 logger = logging.getLogger(__name__)
 
@@ -16,52 +17,42 @@ async def search_physics_rules(query: str, top_k: int = 5) -> List[Dict[str, Any
     """
     Perform semantic search for physics rules.
     
+    The query is scored against the precomputed rules index with a single
+    matrix-vector product.
+    
     Args:
         query: Natural language query about physics rules
         top_k: Number of top results to return
         
     Returns:
-        List of relevant physics rules sorted by similarity
+        List of relevant physics rules sorted by similarity, or a single
+        error entry if the search failed (also when the rules index is empty)
     """
     try:
         # Get rules manager and ensure it's initialized
         manager = get_rules_manager()
         await manager.initialize()
-        
-        if not manager.physics_rules or not manager.embeddings_cache:
-            return [{"error": "Physics rules or embeddings are not available."}]
+        index = manager.index
         
         # Get query embedding
-        query_embedding = await asyncio.to_thread(
-            get_embedding, 
-            query, 
-            manager.model_name
-        )
+        query_embedding = await asyncio.to_thread(manager.backend.embed_query, query)
         
         if not query_embedding:
             return [{"error": "Failed to get query embedding"}]
         
-        # Calculate similarities
-        similarities = []
-        for rule in manager.physics_rules:
-            rule_number = rule.get("rule_number")
-            if rule_number in manager.embeddings_cache:
-                rule_embedding = manager.embeddings_cache[rule_number]
-                similarity = cosine_similarity(query_embedding, rule_embedding)
-                similarities.append((similarity, rule))
-        
-        # Sort by similarity and return top_k
-        similarities.sort(key=lambda x: x[0], reverse=True)
-        
         results = []
-        for similarity, rule in similarities[:top_k]:
-            result = rule.copy()
+        for position, similarity in index.search(query_embedding, top_k):
+            result = index.rules[position].copy()
             result["similarity_score"] = similarity
             results.append(result)
             
         logger.info(f"Found {len(results)} physics rules for query: {query[:50]}...")
         return results
         
+    except RulesIndexError as e:
+        # Rule lookups by particle or process work without the index
+        logger.error(f"Physics rules index unavailable: {e}")
+        return [{"error": f"Physics rules index unavailable: {e}. Search rules by particles or process instead."}]
     except Exception as e:
         logger.error(f"Error in physics rules search: {e}")
         return [{"error": f"Search failed: {str(e)}"}]
@@ -78,25 +69,21 @@ def filter_rules_by_type(rules: List[Dict[str, Any]], rule_type: str) -> List[Di
     Returns:
         Filtered rules
     """
-    rule_type_lower = rule_type.lower()
-    type_keywords = {
-        'conservation': ['conservation', 'conserved', 'preserve'],
-        'decay': ['decay', 'decays', 'lifetime'],
-        'interaction': ['interaction', 'force', 'coupling'],
-        'symmetry': ['symmetry', 'symmetric', 'invariant'],
-        'quantum_numbers': ['quantum number', 'charge', 'spin', 'isospin'],
-        'kinematics': ['momentum', 'energy', 'mass', 'velocity'],
-        'selection_rules': ['forbidden', 'allowed', 'selection rule']
-    }
-    
-    keywords = type_keywords.get(rule_type_lower, [rule_type_lower])
+    posting_index = get_rules_manager().load_rules()
+    matched = posting_index.with_rule_type(rule_type)
+    keywords = RULE_TYPE_KEYWORDS.get(rule_type.lower(), [rule_type.lower()])
     
     filtered_rules = []
     for rule in rules:
-        content = rule.get("content", "").lower()
-        category = rule.get("category", "").lower()
-        
-        if any(keyword in content or keyword in category for keyword in keywords):
+        position = posting_index.position_of(rule)
+        if position is not None:
+            if position in matched:
+                filtered_rules.append(rule)
+        elif any(
+            posting_index.rule_has_phrase(rule, keyword, "content")
+            or posting_index.rule_has_phrase(rule, keyword, "category")
+            for keyword in keywords
+        ):
             filtered_rules.append(rule)
             
     return filtered_rules
@@ -113,33 +100,28 @@ def rank_rules(rules: List[Dict[str, Any]], query: str) -> List[Dict[str, Any]]:
     Returns:
         Re-ranked rules
     """
+    posting_index = get_rules_manager().load_rules()
     query_lower = query.lower()
     query_words = query_lower.split()
     
+    # Query terms whose presence in a rule's content earns a boost
+    topic_boosts = [term for term in ("conservation", "decay", "interaction") if term in query_lower]
+    
     for rule in rules:
         score = rule.get("similarity_score", 0.0)
-        content = rule.get("content", "").lower()
-        category = rule.get("category", "").lower()
         
         # Boost rules with exact query word matches in content
-        word_matches = sum(1 for word in query_words if word in content)
+        word_matches = sum(1 for word in query_words if posting_index.rule_has_phrase(rule, word))
         score += word_matches * 0.1
         
         # Boost rules with category matches
-        if any(word in category for word in query_words):
+        if any(posting_index.rule_has_phrase(rule, word, "category") for word in query_words):
             score += 0.15
             
-        # Boost conservation rules for conservation queries
-        if "conservation" in query_lower and "conservation" in content:
-            score += 0.2
-            
-        # Boost decay rules for decay queries
-        if "decay" in query_lower and "decay" in content:
-            score += 0.2
-            
-        # Boost interaction rules for interaction queries
-        if "interaction" in query_lower and "interaction" in content:
-            score += 0.2
+        # Boost conservation, decay and interaction rules for such queries
+        for term in topic_boosts:
+            if posting_index.rule_has_phrase(rule, term):
+                score += 0.2
             
         rule["final_score"] = score
     
@@ -152,6 +134,9 @@ def search_rules_by_particles(particles: List[str], top_k: int = 10) -> List[Dic
     """
     Search for physics rules involving specific particles.
     
+    Particles are matched in any notation (``"e^+"``, ``"e⁺"``,
+    ``"positron"``) through the rules' particle postings.
+    
     Args:
         particles: List of particle names to search for
         top_k: Maximum number of results to return
@@ -160,43 +145,27 @@ def search_rules_by_particles(particles: List[str], top_k: int = 10) -> List[Dic
         List of relevant physics rules
     """
     try:
-        manager = get_rules_manager()
+        posting_index = get_rules_manager().load_rules()
         
-        # Simple text-based search for particles in rule content
-        particles_lower = [p.lower() for p in particles]
-        matching_rules = []
+        # Accumulate relevance over the postings of each particle
+        scores: Dict[int, float] = {}
+        for particle in particles:
+            for position, count in posting_index.particle_mentions(particle).items():
+                scores[position] = scores.get(position, 0.0) + count * 0.3
+            for position in posting_index.with_listed_particle(particle):
+                scores[position] = scores.get(position, 0.0) + 0.5
         
-        for rule in manager.physics_rules:
-            content = rule.get("content", "").lower()
-            rule_particles = rule.get("particles", [])
-            
-            # Check if any particle is mentioned in content
-            content_match = any(particle in content for particle in particles_lower)
-            
-            # Check if any particle is in the particles list
-            particles_match = False
-            if isinstance(rule_particles, list):
-                rule_particles_lower = [p.lower() for p in rule_particles]
-                particles_match = any(p in rule_particles_lower for p in particles_lower)
-            
-            if content_match or particles_match:
-                # Calculate relevance score
-                score = 0.0
-                for particle in particles_lower:
-                    if particle in content:
-                        score += content.count(particle) * 0.3
-                    if isinstance(rule_particles, list) and particle in [p.lower() for p in rule_particles]:
-                        score += 0.5
-                
-                rule_copy = rule.copy()
-                rule_copy["relevance_score"] = score
-                matching_rules.append(rule_copy)
+        # Sort by relevance score, ties in rule order
+        ranked = sorted(scores.items(), key=lambda item: (-item[1], item[0]))
         
-        # Sort by relevance score
-        matching_rules.sort(key=lambda x: x.get("relevance_score", 0), reverse=True)
+        matching_rules = []
+        for position, score in ranked[:top_k]:
+            rule_copy = posting_index.rules[position].copy()
+            rule_copy["relevance_score"] = score
+            matching_rules.append(rule_copy)
         
-        logger.info(f"Found {len(matching_rules)} rules for particles: {particles}")
-        return matching_rules[:top_k]
+        logger.info(f"Found {len(scores)} rules for particles: {particles}")
+        return matching_rules
         
     except Exception as e:
         logger.error(f"Error searching rules by particles: {e}")
@@ -219,53 +188,44 @@ def search_rules_by_process(process_description: str, top_k: int = 5) -> List[Di
     key_terms = []
     
     # Physics process types
-    if "decay" in process_lower:
-        key_terms.extend(["decay", "lifetime", "branching"])
-    if "scattering" in process_lower:
-        key_terms.extend(["scattering", "cross section", "interaction"])
-    if "annihilation" in process_lower:
-        key_terms.extend(["annihilation", "antiparticle"])
-    if "production" in process_lower:
-        key_terms.extend(["production", "creation"])
-    if "collision" in process_lower:
-        key_terms.extend(["collision", "scattering"])
+    for process_kind, terms in PROCESS_KEY_TERMS.items():
+        if process_kind in process_lower:
+            key_terms.extend(terms)
         
     # Conservation laws
     if any(word in process_lower for word in ["energy", "momentum", "charge", "conservation"]):
-        key_terms.extend(["conservation", "conserved"])
+        key_terms.extend(CONSERVATION_TERMS)
         
     try:
-        manager = get_rules_manager()
-        matching_rules = []
-        
-        for rule in manager.physics_rules:
-            content = rule.get("content", "").lower()
-            category = rule.get("category", "").lower()
-            
-            # Calculate relevance score
-            score = 0.0
-            
-            # Check for key terms
-            for term in key_terms:
-                if term in content:
-                    score += 0.4
-                if term in category:
-                    score += 0.3
-                    
-            # Check for exact phrase matches
-            if any(phrase in content for phrase in process_lower.split() if len(phrase) > 3):
-                score += 0.5
+        posting_index = get_rules_manager().load_rules()
+        scores: Dict[int, float] = {}
+        
+        # Check for key terms
+        for term in key_terms:
+            for position in posting_index.phrase_counts(term, "content"):
+                scores[position] = scores.get(position, 0.0) + 0.4
+            for position in posting_index.phrase_counts(term, "category"):
+                scores[position] = scores.get(position, 0.0) + 0.3
                 
-            if score > 0:
-                rule_copy = rule.copy()
-                rule_copy["process_relevance_score"] = score
-                matching_rules.append(rule_copy)
+        # Check for exact phrase matches
+        phrases = [phrase for phrase in process_lower.split() if len(phrase) > 3]
+        for position in posting_index.with_any_phrase(phrases):
+            scores[position] = scores.get(position, 0.0) + 0.5
+        
+        # Sort by relevance score, ties in rule order
+        ranked = sorted(
+            ((position, score) for position, score in scores.items() if score > 0),
+            key=lambda item: (-item[1], item[0]),
+        )
         
-        # Sort by relevance score
-        matching_rules.sort(key=lambda x: x.get("process_relevance_score", 0), reverse=True)
+        matching_rules = []
+        for position, score in ranked[:top_k]:
+            rule_copy = posting_index.rules[position].copy()
+            rule_copy["process_relevance_score"] = score
+            matching_rules.append(rule_copy)
         
-        logger.info(f"Found {len(matching_rules)} rules for process: {process_description[:50]}...")
-        return matching_rules[:top_k]
+        logger.info(f"Found {len(ranked)} rules for process: {process_description[:50]}...")
+        return matching_rules
         
     except Exception as e:
         logger.error(f"Error searching rules by process: {e}")
@@ -280,16 +240,10 @@ def get_conservation_rules() -> List[Dict[str, Any]]:
         List of conservation rules
     """
     try:
-        manager = get_rules_manager()
-        conservation_rules = []
-        
-        for rule in manager.physics_rules:
-            content = rule.get("content", "").lower()
-            category = rule.get("category", "").lower()
-            
-            if ("conservation" in content or "conserved" in content or 
-                "conservation" in category):
-                conservation_rules.append(rule)
+        posting_index = get_rules_manager().load_rules()
+        positions = posting_index.with_any_phrase(CONSERVATION_TERMS, ("content",))
+        positions |= posting_index.with_phrase("conservation", "category")
+        conservation_rules = [posting_index.rules[position] for position in sorted(positions)]
                 
         logger.info(f"Found {len(conservation_rules)} conservation rules")
         return conservation_rules
@@ -328,16 +282,40 @@ def validate_process_against_rules(
         
         applicable_rules = list(all_rules.values())
         
-        # Basic validation logic would go here
-        # For now, return the applicable rules
+        # Deterministic conservation checks when the description is an "initial -> final" process
+        validation_status = "rules_identified"
+        violations: List[Dict[str, Any]] = []
+        recommendations: List[str] = []
+        conservation = None
+        try:
+            report = check_conservation(process_description)
+        except ValueError:
+            report = None
+        if report is not None:
+            conservation = report.to_dict()
+            if report.allowed is True:
+                validation_status = "conservation_satisfied"
+            elif report.allowed is False:
+                validation_status = "violations_found"
+                violations = report.violations
+                recommendations.append(
+                    "The process violates " + ", ".join(v["law"] for v in violations)
+                    + "; check the final state for missing or mislabelled particles"
+                )
+            else:
+                recommendations.append(
+                    "Conservation not checked; unknown particles: " + ", ".join(report.unknown)
+                )
+        
         validation_result = {
             "process": process_description,
             "particles": particles_involved,
             "applicable_rules": applicable_rules,
             "total_rules_checked": len(applicable_rules),
-            "validation_status": "rules_identified",
-            "violations": [],  # Would be populated by actual validation logic
-            "recommendations": []
+            "validation_status": validation_status,
+            "violations": violations,
+            "conservation": conservation,
+            "recommendations": recommendations
         }
         
         return validation_result
@@ -262,6 +262,32 @@ except Exception as e:
     fi
 }
 
+# 检查物理规则索引（构建或加载；索引为空时中止启动）
+check_rules_index() {
+    if [ "${RULES_INDEX_STARTUP_CHECK:-true}" != "true" ]; then
+        print_warning "已跳过物理规则索引检查 (RULES_INDEX_STARTUP_CHECK=${RULES_INDEX_STARTUP_CHECK})"
+        return
+    fi
+    
+    print_info "检查物理规则索引..."
+    
+    local python_path=$(which python3)
+    if [ -z "$python_path" ]; then
+        python_path=$(which python)
+        if [ -z "$python_path" ]; then
+            python_path="python"
+        fi
+    fi
+    
+    if $python_path -m feynmancraft_adk.tools.physics.embedding_manager >> logs/backend.log 2>&1; then
+        print_success "物理规则索引已就绪"
+    else
+        print_error "物理规则索引为空，请检查 logs/backend.log 和 GOOGLE_API_KEY"
+        tail -20 logs/backend.log
+        exit 1
+    fi
+}
+
 # 启动服务
 start_services() {
     print_info "启动主要服务..."
@@ -455,6 +481,7 @@ main() {
     cleanup_processes
     start_mcp_servers
     check_mcp_health
+    check_rules_index
     start_services
     wait_for_services
     show_info
@@ -0,0 +1,314 @@
+#!/usr/bin/env python3
+"""
+Retrieval benchmark for the KB stack.
+
+Runs the golden queries in kb_golden_queries.json through each retriever
+(LocalKBTool.vector_search, keyword_search, hybrid_search and
+search_local_tikz_examples) and through the Annoy index rebuilt with several
+(n_trees, search_k) settings, and reports recall@k, MRR and p50/p95/p99
+latency. The result cache is disabled so every call does the full search.
+
+Runs offline with the default ``local-ngram`` embedding model. With a Gemini
+model the stored KB embeddings are used and query embeddings come from the
+persistent embedding cache (or the API on the first run).
+
+Results are printed and can be written as JSON; ``--baseline`` compares
+against an earlier JSON file and exits with status 1 on a regression.
+
+Usage:
+    python test/bench_kb_retrieval.py [--k 5] [--repeat 5] [--embedding-model local-ngram]
+        [--trees 5,10,50] [--search-k -1,50,500] [--output results.json] [--baseline old.json]
+"""
+
+import os
+import sys
+import json
+import time
+import asyncio
+import argparse
+import logging
+import subprocess
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+import numpy as np
+
+# Add the project root to Python path
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+GOLDEN_PATH = Path(__file__).parent / "kb_golden_queries.json"
+
+# Regressions flagged by --baseline
+MAX_QUALITY_DROP = 0.01
+MAX_P95_SLOWDOWN = 1.5
+
+
+def load_golden(path: Path = GOLDEN_PATH) -> List[Dict[str, Any]]:
+    """Golden queries as dicts with ``query`` and ``expected_reactions``."""
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)["queries"]
+
+
+def recall_at_k(retrieved: List[str], expected: List[str], k: int) -> float:
+    """Share of the expected reactions found in the first k results."""
+    if not expected:
+        return 0.0
+    return len(set(retrieved[:k]) & set(expected)) / len(expected)
+
+
+def reciprocal_rank(retrieved: List[str], expected: List[str]) -> float:
+    """1 / rank of the first expected reaction, 0 if none was retrieved."""
+    for rank, reaction in enumerate(retrieved, start=1):
+        if reaction in expected:
+            return 1.0 / rank
+    return 0.0
+
+
+def percentile(samples: List[float], q: float) -> float:
+    """Nearest-rank percentile."""
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    rank = max(1, int(np.ceil(q / 100.0 * len(ordered))))
+    return ordered[rank - 1]
+
+
+def evaluate(
+    retrieve: Callable[[str, int], List[str]],
+    golden: List[Dict[str, Any]],
+    k: int,
+    repeat: int,
+) -> Dict[str, Any]:
+    """
+    Run every golden query through a retriever.
+
+    Args:
+        retrieve: Returns the reactions of the top-k results of a query
+        golden: Golden queries
+        k: Results per query
+        repeat: Timed calls per query (quality is taken from the first)
+
+    Returns:
+        Metrics dict
+    """
+    recalls, reciprocal_ranks, latencies_ms = [], [], []
+    for item in golden:
+        for run in range(max(1, repeat)):
+            start = time.perf_counter()
+            retrieved = retrieve(item["query"], k)
+            latencies_ms.append((time.perf_counter() - start) * 1000)
+            if run == 0:
+                recalls.append(recall_at_k(retrieved, item["expected_reactions"], k))
+                reciprocal_ranks.append(reciprocal_rank(retrieved[:k], item["expected_reactions"]))
+
+    return {
+        f"recall@{k}": round(float(np.mean(recalls)), 4),
+        "mrr": round(float(np.mean(reciprocal_ranks)), 4),
+        "p50_ms": round(percentile(latencies_ms, 50), 4),
+        "p95_ms": round(percentile(latencies_ms, 95), 4),
+        "p99_ms": round(percentile(latencies_ms, 99), 4),
+        "queries": len(golden),
+    }
+
+
+def reactions(results: List[Dict[str, Any]]) -> List[str]:
+    return [r["reaction"] for r in results if "reaction" in r]
+
+
+def benchmark_retrievers(golden, k: int, repeat: int) -> Dict[str, Dict[str, Any]]:
+    """Metrics of each KB retriever."""
+    from feynmancraft_adk.tools.kb.local import get_local_kb_tool
+    from feynmancraft_adk.tools.kb.search import search_local_tikz_examples
+
+    tool = get_local_kb_tool()
+    loop = asyncio.new_event_loop()
+    # Warm up: loads the KB, indexes and embeddings outside the timed calls
+    tool.hybrid_search(golden[0]["query"], k)
+    loop.run_until_complete(search_local_tikz_examples(golden[0]["query"], k))
+
+    retrievers = {
+        "vector_search": lambda q, n: reactions(tool.vector_search(q, n)),
+        "keyword_search": lambda q, n: reactions(tool.keyword_search(q, n)),
+        "hybrid_search": lambda q, n: reactions(tool.hybrid_search(q, n)),
+        "search_local_tikz_examples": lambda q, n: reactions(
+            loop.run_until_complete(search_local_tikz_examples(q, n))
+        ),
+    }
+    try:
+        return {name: evaluate(retrieve, golden, k, repeat) for name, retrieve in retrievers.items()}
+    finally:
+        loop.close()
+
+
+def benchmark_annoy(golden, k: int, repeat: int, trees: List[int], search_ks: List[int]) -> List[Dict[str, Any]]:
+    """
+    Metrics of the Annoy index rebuilt with each (n_trees, search_k) setting.
+
+    The vectors are read from the stored index and query embeddings are
+    computed once up front, so latencies cover the index lookup only.
+    ``ann_recall`` is the overlap with the exact top-k over the same vectors.
+    """
+    from annoy import AnnoyIndex
+    from feynmancraft_adk.tools.kb import local
+    from feynmancraft_adk.tools.kb.embeddings import normalize_rows, top_k_cosine
+
+    tool = local.get_local_kb_tool()
+    stored, _ = tool._load_index()
+    if stored is None:
+        return []
+
+    snapshot = local.current_snapshot()
+    items = [(item, position) for item, position in enumerate(snapshot.positions_by_item) if position is not None]
+    vectors = [stored.get_item_vector(item) for item, _ in items]
+    matrix = normalize_rows(vectors)
+    kb = snapshot.records
+
+    query_vectors = {}
+    for entry in golden:
+        embedding = tool.get_embedding(entry["query"])
+        if embedding:
+            query_vectors[entry["query"]] = embedding
+    answerable = [entry for entry in golden if entry["query"] in query_vectors]
+    exact = {q: {row for row, _ in top_k_cosine(matrix, v, k)} for q, v in query_vectors.items()}
+
+    settings = []
+    for n_trees in trees:
+        index = AnnoyIndex(stored.f, "angular")
+        index.set_seed(42)
+        for row, vector in enumerate(vectors):
+            index.add_item(row, vector)
+        build_start = time.perf_counter()
+        index.build(n_trees)
+        build_ms = (time.perf_counter() - build_start) * 1000
+
+        for search_k in search_ks:
+            overlaps: Dict[str, float] = {}
+
+            def retrieve(query: str, n: int) -> List[str]:
+                rows = index.get_nns_by_vector(query_vectors[query], n, search_k=search_k)
+                overlaps[query] = len(set(rows) & exact[query]) / max(1, len(exact[query]))
+                return [kb[items[row][1]]["reaction"] for row in rows]
+
+            metrics = evaluate(retrieve, answerable, k, repeat) if answerable else {}
+            settings.append({
+                "n_trees": n_trees,
+                "search_k": search_k,
+                "build_ms": round(build_ms, 2),
+                "ann_recall": round(float(np.mean(list(overlaps.values()))), 4) if overlaps else 0.0,
+                **metrics,
+                "queries_without_embedding": len(golden) - len(answerable),
+            })
+        index.unload()
+    return settings
+
+
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=project_root,
+            capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except Exception:
+        return None
+
+
+def compare(report: Dict[str, Any], baseline: Dict[str, Any], k: int) -> List[str]:
+    """Regressions of a report against a baseline report."""
+    regressions = []
+
+    def check(label: str, new: Dict[str, Any], old: Dict[str, Any]):
+        for metric in (f"recall@{k}", "mrr"):
+            if metric in new and metric in old and new[metric] < old[metric] - MAX_QUALITY_DROP:
+                regressions.append(f"{label}: {metric} {old[metric]:.3f} -> {new[metric]:.3f}")
+        if old.get("p95_ms") and new.get("p95_ms", 0) > old["p95_ms"] * MAX_P95_SLOWDOWN:
+            regressions.append(f"{label}: p95 {old['p95_ms']:.3f} ms -> {new['p95_ms']:.3f} ms")
+
+    for name, metrics in report["retrievers"].items():
+        if name in baseline.get("retrievers", {}):
+            check(name, metrics, baseline["retrievers"][name])
+    old_annoy = {(s["n_trees"], s["search_k"]): s for s in baseline.get("annoy", [])}
+    for setting in report["annoy"]:
+        old = old_annoy.get((setting["n_trees"], setting["search_k"]))
+        if old:
+            check(f"annoy trees={setting['n_trees']} search_k={setting['search_k']}", setting, old)
+    return regressions
+
+
+def print_report(report: Dict[str, Any], k: int):
+    recall = f"recall@{k}"
+    print(f"\n{'retriever':<28} {recall:>9} {'MRR':>7} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}")
+    print("-" * 76)
+    for name, m in report["retrievers"].items():
+        print(f"{name:<28} {m[recall]:9.3f} {m['mrr']:7.3f} {m['p50_ms']:9.3f} {m['p95_ms']:9.3f} {m['p99_ms']:9.3f}")
+
+    if report["annoy"]:
+        print(f"\n{'trees':>6} {'search_k':>9} {'ann_recall':>11} {recall:>9} {'MRR':>7} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}")
+        print("-" * 76)
+        for s in report["annoy"]:
+            if recall not in s:
+                continue
+            print(f"{s['n_trees']:>6} {s['search_k']:>9} {s['ann_recall']:11.3f} {s[recall]:9.3f} "
+                  f"{s['mrr']:7.3f} {s['p50_ms']:9.4f} {s['p95_ms']:9.4f} {s['p99_ms']:9.4f}")
+
+
+def int_list(value: str) -> List[int]:
+    return [int(v) for v in value.split(",") if v.strip()]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="KB retrieval benchmark")
+    parser.add_argument("--k", type=int, default=5)
+    parser.add_argument("--repeat", type=int, default=5, help="Timed calls per query")
+    parser.add_argument("--embedding-model", default="local-ngram")
+    parser.add_argument("--trees", type=int_list, default=[5, 10, 50])
+    parser.add_argument("--search-k", type=int_list, default=[-1, 50, 500])
+    parser.add_argument("--golden", type=Path, default=GOLDEN_PATH)
+    parser.add_argument("--output", type=Path, help="Write the JSON report here")
+    parser.add_argument("--baseline", type=Path, help="Earlier JSON report to compare against")
+    args = parser.parse_args()
+
+    # Configuration is read when the KB modules are imported
+    os.environ["EMBEDDING_MODEL"] = args.embedding_model
+    os.environ["RESULT_CACHE_ENABLED"] = "false"
+    logging.basicConfig(level=logging.WARNING)
+    import feynmancraft_adk.tools.kb  # noqa: F401  (configures package logging)
+    logging.getLogger("feynmancraft_adk").setLevel(logging.WARNING)
+
+    golden = load_golden(args.golden)
+    print(f"🏁 KB retrieval benchmark: {len(golden)} golden queries, k={args.k}, "
+          f"{args.repeat} runs per query, embedding model {args.embedding_model}")
+    print("=" * 76)
+
+    report = {
+        "meta": {
+            "commit": git_commit(),
+            "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "embedding_model": args.embedding_model,
+            "k": args.k,
+            "repeat": args.repeat,
+            "golden_queries": len(golden),
+        },
+        "retrievers": benchmark_retrievers(golden, args.k, args.repeat),
+        "annoy": benchmark_annoy(golden, args.k, args.repeat, args.trees, args.search_k),
+    }
+    print_report(report, args.k)
+
+    if args.output:
+        args.output.write_text(json.dumps(report, indent=2))
+        print(f"\nWrote {args.output}")
+    else:
+        print("\n" + json.dumps(report, indent=2))
+
+    if args.baseline:
+        regressions = compare(report, json.loads(args.baseline.read_text()), args.k)
+        print(f"\nCompared with {args.baseline}: {len(regressions)} regression(s)")
+        for regression in regressions:
+            print(f"  ✗ {regression}")
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
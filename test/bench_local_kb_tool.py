@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+"""
+Microbenchmark: per-call overhead of obtaining the local KB tool.
+
+Compares what every search call used to do (construct a LocalKBTool, which
+re-runs load_dotenv() and genai.configure()) with the process-wide
+singleton, and puts both next to the cost of a keyword search.
+
+Runs offline. Usage: python test/bench_local_kb_tool.py [iterations]
+"""
+
+import sys
+import time
+import logging
+import statistics
+from pathlib import Path
+
+# Add the project root to Python path
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from feynmancraft_adk.tools.kb.local import LocalKBTool, get_local_kb_tool
+
+logging.basicConfig(level=logging.WARNING)
+
+
+def time_calls(func, iterations: int) -> list:
+    """Time each call of func in microseconds."""
+    samples = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        func()
+        samples.append((time.perf_counter() - start) * 1e6)
+    return samples
+
+
+def per_call_construction():
+    """What every search call did before the singleton."""
+    tool = object.__new__(LocalKBTool)
+    tool._configure()
+    return tool
+
+
+def report(name: str, samples: list):
+    samples = sorted(samples)
+    p95 = samples[int(len(samples) * 0.95) - 1]
+    print(f"{name:<32} median {statistics.median(samples):10.2f} us   p95 {p95:10.2f} us")
+
+
+def main():
+    iterations = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+    tool = get_local_kb_tool()
+    
+    print(f"🏁 LocalKBTool overhead ({iterations} iterations)")
+    print("=" * 70)
+    construction = time_calls(per_call_construction, iterations)
+    singleton = time_calls(get_local_kb_tool, iterations)
+    search = time_calls(lambda: tool.keyword_search("electron positron annihilation", 5), iterations)
+    
+    report("new LocalKBTool per call", construction)
+    report("get_local_kb_tool()", singleton)
+    report("keyword_search (reference)", search)
+    saved = statistics.median(construction) - statistics.median(singleton)
+    print(f"\nOverhead removed per call: {saved:.2f} us")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,156 @@
+#!/usr/bin/env python3
+"""
+Microbenchmark: particle extraction from queries.
+
+Compares the three extractors the parsers used before (the agent search
+keyword dict, the validator's regex list and the physics tools' substring
+list, each scanning the whole query once per keyword or pattern) with the
+shared extractor: cold (all caches cleared before each call), for a new
+query whose spellings were looked up before, and for a repeated query. The
+particles each one finds are printed next to each other.
+
+Runs offline. Usage: python test/bench_particle_extraction.py [iterations]
+"""
+
+import re
+import sys
+import time
+import logging
+import statistics
+from pathlib import Path
+
+# Add the project root to Python path
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from feynmancraft_adk.tools.physics.conservation import resolve_particle
+from feynmancraft_adk.tools.physics.particle_extractor import _extract, _lookup, extract_particles
+
+logging.basicConfig(level=logging.WARNING)
+
+QUERIES = [
+    "electron positron annihilation into two photons",
+    "Draw the Feynman diagram for muon decay",
+    "e^+e^- \\to \\mu^+\\mu^-",
+    "Higgs decay to W bosons with neutrinos in the final state",
+    "two up quarks and one down quark",
+    "What is the s-channel amplitude for top quark pair production?",
+    "n -> p e- nu_e_bar",
+    "Explain the p-wave contribution, e.g. in the email from the group",
+]
+
+# --- Legacy extractors, as they were in the parsers ---
+
+LEGACY_KEYWORDS = {
+    "electron": ["electron", "e-", "e+", "positron"],
+    "muon": ["muon", "mu-", "mu+", "antimuon"],
+    "tau": ["tau", "tau-", "tau+", "tauon"],
+    "neutrino": ["neutrino", "nu_e", "nu_mu", "nu_tau"],
+    "photon": ["photon", "gamma", "light"],
+    "proton": ["proton", "p"],
+    "neutron": ["neutron", "n"],
+    "pion": ["pion", "pi+", "pi-", "pi0"],
+    "kaon": ["kaon", "k+", "k-", "k0"],
+    "quark": ["quark", "up", "down", "charm", "strange", "top", "bottom"],
+    "gluon": ["gluon", "g"],
+    "w_boson": ["w boson", "w+", "w-"],
+    "z_boson": ["z boson", "z0", "z"],
+    "higgs": ["higgs", "h"],
+}
+
+LEGACY_PATTERNS = [
+    r'\b(electron|positron|muon|tau|neutrino)\b',
+    r'\b(photon|gamma|gluon)\b',
+    r'\b(proton|neutron|pion|kaon)\b',
+    r'\b(quark|up|down|strange|charm|bottom|top)\b',
+    r'\b(W|Z|Higgs)\s*boson\b',
+    r'\b[a-zA-Z]+\+\b|\b[a-zA-Z]+\-\b',
+]
+
+LEGACY_COMMON_PARTICLES = [
+    'electron', 'positron', 'muon', 'photon', 'proton', 'neutron',
+    'up quark', 'upquark', 'down quark', 'downquark', 'strange quark', 'charm quark', 'bottom quark', 'top quark',
+    'neutrino', 'antineutrino', 'w boson', 'z boson', 'higgs', 'gluon',
+]
+
+
+def legacy_agent_search(query: str) -> list:
+    query_lower = query.lower()
+    return [particle for particle, keywords in LEGACY_KEYWORDS.items() if any(k in query_lower for k in keywords)]
+
+
+def legacy_validator(query: str) -> list:
+    particles = []
+    for pattern in LEGACY_PATTERNS:
+        particles.extend(re.findall(pattern, query, re.IGNORECASE))
+    re.findall(r'\b(decay|scattering|annihilation|production|emission|absorption)\b', query, re.IGNORECASE)
+    return list(set(particles))
+
+
+def legacy_physics_tools(query: str) -> list:
+    query_lower = query.lower()
+    return [particle for particle in LEGACY_COMMON_PARTICLES if particle in query_lower]
+
+
+def legacy_all(query: str) -> None:
+    """What one query cost when all three parsers extracted particles."""
+    legacy_agent_search(query)
+    legacy_validator(query)
+    legacy_physics_tools(query)
+
+
+def shared_cold(query: str) -> None:
+    _extract.cache_clear()
+    _lookup.cache_clear()
+    resolve_particle.cache_clear()
+    extract_particles(query)
+
+
+def shared_new_query(query: str) -> None:
+    _extract.cache_clear()
+    extract_particles(query)
+
+
+def time_calls(func, iterations: int) -> list:
+    """Time each pass of func over all queries in microseconds per query."""
+    samples = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        for query in QUERIES:
+            func(query)
+        samples.append((time.perf_counter() - start) * 1e6 / len(QUERIES))
+    return samples
+
+
+def report(name: str, samples: list):
+    samples = sorted(samples)
+    p95 = samples[int(len(samples) * 0.95) - 1]
+    print(f"{name:<32} median {statistics.median(samples):10.2f} us   p95 {p95:10.2f} us")
+
+
+def main():
+    iterations = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+
+    print(f"🏁 Particle extraction ({iterations} iterations, {len(QUERIES)} queries)")
+    print("=" * 70)
+    report("legacy agent search", time_calls(legacy_agent_search, iterations))
+    report("legacy validator regexes", time_calls(legacy_validator, iterations))
+    report("legacy physics tools", time_calls(legacy_physics_tools, iterations))
+    report("legacy, all three parsers", time_calls(legacy_all, iterations))
+    report("extract_particles (cold)", time_calls(shared_cold, iterations))
+    report("extract_particles (new query)", time_calls(shared_new_query, iterations))
+    report("extract_particles (repeated)", time_calls(extract_particles, iterations))
+
+    print("\nParticles found")
+    print("-" * 70)
+    for query in QUERIES:
+        print(query)
+        print(f"  agent search : {legacy_agent_search(query)}")
+        print(f"  validator    : {sorted(legacy_validator(query))}")
+        print(f"  physics tools: {legacy_physics_tools(query)}")
+        print(f"  shared       : {extract_particles(query).names}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
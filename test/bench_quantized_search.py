@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+"""
+Benchmark: int8 quantized search with exact re-ranking versus float search.
+
+Reports memory, recall@5 against exact float top-5 and per-query latency for
+several re-rank factors, on the bundled KB and physics rules (local n-gram
+embeddings) and on a synthetic clustered corpus of 768-dim vectors.
+
+Runs offline. Usage: python test/bench_quantized_search.py [num_vectors]
+"""
+
+import sys
+import time
+import logging
+import statistics
+from pathlib import Path
+
+import numpy as np
+
+# Add the project root to Python path
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from feynmancraft_adk.tools.kb.data_loader import load_kb_examples
+from feynmancraft_adk.tools.kb.embedding_backends import HashedNgramEmbeddingBackend
+from feynmancraft_adk.tools.kb.embeddings import normalize_rows, top_k_cosine
+from feynmancraft_adk.tools.kb.index_builder import record_index_text
+from feynmancraft_adk.tools.kb.quantized_store import QuantizedIndex
+from feynmancraft_adk.tools.physics.data_loader import load_physics_rules
+from feynmancraft_adk.tools.physics.embedding_manager import RulesEmbeddingManager
+
+logging.basicConfig(level=logging.WARNING)
+
+K = 5
+RERANK_FACTORS = [1, 2, 4, 8]
+KB_QUERIES = [
+    "electron positron annihilation", "muon decay", "Compton scattering",
+    "Higgs decay to two photons", "beta decay of the neutron", "gluon fusion",
+    "Drell-Yan", "pair production", "W boson decay", "quark antiquark to gluons",
+]
+RULES_QUERIES = [
+    "charge conservation", "lepton number conservation in muon decay", "baryon number",
+    "antiparticle rule", "QCD color confinement", "helicity suppression", "CP violation",
+    "photon couples to charged particles", "gluon self-interaction", "neutrino oscillation",
+]
+
+
+def synthetic_corpus(num_vectors: int, dim: int = 768, num_queries: int = 200):
+    """Clustered unit vectors, a rough stand-in for text embeddings."""
+    rng = np.random.default_rng(0)
+    centers = rng.normal(size=(max(1, num_vectors // 50), dim))
+    matrix = normalize_rows(
+        centers[rng.integers(0, len(centers), num_vectors)] + 0.7 * rng.normal(size=(num_vectors, dim))
+    )
+    queries = centers[rng.integers(0, len(centers), num_queries)] + 0.7 * rng.normal(size=(num_queries, dim))
+    return matrix, list(queries)
+
+
+def kb_corpus():
+    """The bundled KB embedded with the local n-gram backend."""
+    backend = HashedNgramEmbeddingBackend()
+    records = load_kb_examples()
+    matrix = normalize_rows(backend.embed_documents([record_index_text(r) for r in records]))
+    return matrix, [backend.embed_query(q) for q in KB_QUERIES]
+
+
+def rules_corpus():
+    """The physics rules embedded with the local n-gram backend, as the rules index embeds them."""
+    backend = HashedNgramEmbeddingBackend()
+    rules = [rule for rule in load_physics_rules() if rule.get("content")]
+    matrix = normalize_rows(backend.embed_documents([RulesEmbeddingManager._get_text_for_embedding(r) for r in rules]))
+    return matrix, [backend.embed_query(q) for q in RULES_QUERIES]
+
+
+def median_us(func, queries) -> float:
+    samples = []
+    for query in queries:
+        start = time.perf_counter()
+        func(query)
+        samples.append((time.perf_counter() - start) * 1e6)
+    return statistics.median(samples)
+
+
+def run(name: str, matrix: np.ndarray, queries: list):
+    print(f"\n{name}: {matrix.shape[0]} x {matrix.shape[1]}, {len(queries)} queries")
+    print("-" * 70)
+    index = QuantizedIndex(matrix)
+    expected = [{row for row, _ in top_k_cosine(matrix, q, K)} for q in queries]
+    
+    float_us = median_us(lambda q: top_k_cosine(matrix, q, K), queries)
+    print(f"{'float32 exact':<22} {matrix.nbytes / 1e6:8.2f} MB   recall@{K} 1.000   median {float_us:9.1f} us")
+    for factor in RERANK_FACTORS:
+        hits = sum(
+            len({row for row, _ in index.search(q, K, rerank_factor=factor)} & exp)
+            for q, exp in zip(queries, expected)
+        )
+        recall = hits / (K * len(queries))
+        latency = median_us(lambda q: index.search(q, K, rerank_factor=factor), queries)
+        label = f"int8 + rerank {factor}x"
+        print(f"{label:<22} {index.nbytes / 1e6:8.2f} MB   recall@{K} {recall:.3f}   median {latency:9.1f} us")
+    print(f"Memory reduction: {matrix.nbytes / index.nbytes:.2f}x")
+
+
+def main():
+    num_vectors = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    
+    print("🏁 Quantized KB search")
+    print("=" * 70)
+    run("Bundled KB (local-ngram)", *kb_corpus())
+    run("Physics rules (local-ngram)", *rules_corpus())
+    run("Synthetic clustered", *synthetic_corpus(num_vectors))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,173 @@
+#!/usr/bin/env python3
+"""
+Tests for the quantum-number conservation checks.
+
+Runs offline on the built-in particle table.
+"""
+
+import sys
+import asyncio
+import logging
+import time
+from fractions import Fraction
+from pathlib import Path
+
+# Add the project root to Python path
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from feynmancraft_adk.integrations.mcp.particlephysics_mcp_client import validate_quantum_numbers_mcp
+from feynmancraft_adk.tools.physics.conservation import (
+    PARTICLE_TABLE,
+    check_conservation,
+    parse_process,
+    resolve_particle,
+)
+from feynmancraft_adk.tools.physics.search import validate_process_against_rules
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+def laws(process):
+    return [v["law"] for v in check_conservation(process).violations]
+
+
+def test_particle_names():
+    """Particles resolve from LaTeX, Unicode and words; antiparticles are conjugated."""
+    spellings = {
+        "nu_e_bar": ["\\bar{\\nu}_e", "ν̄ₑ", "electron antineutrino", "anti-nu_e", "nu_e~"],
+        "e+": ["e^+", "e⁺", "positron", "e^{+}"],
+        "u_bar": ["\\bar{u}", "ū", "anti-up quark", "u~"],
+        "W-": ["W^-", "W⁻", "w-"],
+        "p_bar": ["antiproton", "\\bar{p}"],
+        "gamma": ["\\gamma", "γ", "photon"],
+    }
+    for name, aliases in spellings.items():
+        for alias in aliases:
+            particle = resolve_particle(alias)
+            assert particle is not None and particle.name == name, (alias, particle)
+
+    for particle in PARTICLE_TABLE.values():
+        anti = PARTICLE_TABLE[particle.antiparticle]
+        assert anti.antiparticle == particle.name
+        assert anti.charge == -particle.charge and anti.baryon_number == -particle.baryon_number
+    assert resolve_particle("u_bar").color == "3bar"
+    assert resolve_particle("d").charge == Fraction(-1, 3)
+
+    # Ambiguous or unknown names are not guessed
+    assert resolve_particle("W") is None
+    assert resolve_particle("neutrino") is None
+    logger.info("✓ Particle names")
+
+
+def test_parse_process():
+    """Arrows in any notation; concatenated symbols are split."""
+    assert parse_process("e+ e- -> mu+ mu-") == (["e+", "e-"], ["mu+", "mu-"])
+    assert parse_process("e^+e^- → γγ") == (["e^+", "e^-"], ["γ", "γ"])
+    assert parse_process("n \\to p + e^- + \\bar{\\nu}_e") == (["n"], ["p", "e^-", "\\bar{\\nu}_e"])
+    assert parse_process("n -> p electron antineutrino e-")[1] == ["p", "electron antineutrino", "e-"]
+    for bad in ("electron positron annihilation", "a -> b -> c", "-> gamma"):
+        try:
+            parse_process(bad)
+            assert False, bad
+        except ValueError:
+            pass
+    logger.info("✓ Parse process")
+
+
+def test_conservation_laws():
+    """Known allowed processes pass; forbidden ones name the violated laws."""
+    allowed = [
+        "mu- -> e- nu_e_bar nu_mu",
+        "\\mu^- \\to e^- \\bar{\\nu}_e \\nu_\\mu",
+        "n -> p e- nu_e_bar",
+        "e+ e- -> gamma gamma",
+        "pi+ -> mu+ nu_mu",
+        "u u_bar -> g",
+        "H -> b b~",
+        "W+ -> e+ nu_e",
+        "u d_bar -> W+",
+    ]
+    for process in allowed:
+        report = check_conservation(process)
+        assert report.allowed is True, (process, report.violations)
+
+    assert laws("p -> e+ gamma") == ["baryon_number", "L_e"]
+    assert laws("mu- -> e- gamma") == ["L_e", "L_mu"]
+    assert laws("n -> p e-") == ["L_e", "fermion_parity"]
+    assert laws("e- -> gamma") == ["charge", "L_e", "fermion_parity"]
+    assert "color_triality" in laws("g -> u gamma")
+
+    report = check_conservation("n -> p e- nu_e")
+    assert report.violations[0]["initial"] == "0" and report.violations[0]["final"] == "2"
+
+    unknown = check_conservation("X -> e+ e-")
+    assert unknown.allowed is None and unknown.unknown == ["X"] and not unknown.violations
+    assert check_conservation((["mu-"], ["e-", "nu_e_bar", "nu_mu"])).allowed
+    logger.info("✓ Conservation laws")
+
+
+def test_validation_reports_violations():
+    """Process validation fills violations from the conservation checks."""
+    forbidden = validate_process_against_rules("p -> e+ gamma", ["p", "e+", "gamma"])
+    assert forbidden["validation_status"] == "violations_found"
+    assert [v["law"] for v in forbidden["violations"]] == ["baryon_number", "L_e"]
+    assert forbidden["recommendations"] and forbidden["applicable_rules"]
+
+    allowed = validate_process_against_rules("e+ e- -> mu+ mu-", ["e+", "e-", "mu+", "mu-"])
+    assert allowed["validation_status"] == "conservation_satisfied" and allowed["violations"] == []
+
+    prose = validate_process_against_rules("electron positron annihilation", ["e-", "e+"])
+    assert prose["validation_status"] == "rules_identified" and prose["conservation"] is None
+
+    result = asyncio.run(validate_quantum_numbers_mcp("mu- -> e- gamma"))
+    assert result["valid"] is False and result["status"] == "forbidden"
+    result = asyncio.run(validate_quantum_numbers_mcp({"name": "proton", "charge": 1, "spin": "1/2"}))
+    assert result["valid"] is True and result["particle"] == "p"
+    assert asyncio.run(validate_quantum_numbers_mcp({"name": "p", "charge": 0}))["valid"] is False
+    assert asyncio.run(validate_quantum_numbers_mcp("graviphoton"))["valid"] is None
+    logger.info("✓ Validation reports violations")
+
+
+def test_check_latency():
+    """A repeated conservation check takes microseconds."""
+    process = "mu- -> e- nu_e_bar nu_mu"
+    check_conservation(process)
+    start = time.perf_counter()
+    for _ in range(1000):
+        check_conservation(process)
+    elapsed = (time.perf_counter() - start) / 1000
+    assert elapsed < 1e-3, f"{elapsed * 1e6:.0f} µs per check"
+    logger.info(f"✓ Check latency ({elapsed * 1e6:.0f} µs per check)")
+
+
+def main():
+    """Run conservation tests."""
+    print("🧪 CONSERVATION CHECK TEST SUITE")
+    print("=" * 50)
+
+    test_suites = [
+        ("Particle names", test_particle_names),
+        ("Parse process", test_parse_process),
+        ("Conservation laws", test_conservation_laws),
+        ("Validation reports violations", test_validation_reports_violations),
+        ("Check latency", test_check_latency),
+    ]
+
+    failed = 0
+    for test_name, test_func in test_suites:
+        try:
+            test_func()
+            print(f"✓ PASS   {test_name}")
+        except Exception as e:
+            failed += 1
+            print(f"✗ FAIL   {test_name}: {e}")
+
+    print(f"\nResult: {len(test_suites) - failed}/{len(test_suites)} tests passed")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
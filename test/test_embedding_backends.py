@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+"""
+Tests for the pluggable embedding backends.
+
+Uses the local hashed n-gram backend only, so no API key is required.
+"""
+
+import sys
+import asyncio
+import logging
+import tempfile
+from pathlib import Path
+from unittest import mock
+
+import numpy as np
+
+# Add the project root to Python path
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from feynmancraft_adk.tools.kb.embedding_backends import (
+    GeminiEmbeddingBackend,
+    HashedNgramEmbeddingBackend,
+    get_embedding_backend,
+)
+from feynmancraft_adk.tools.kb import embedding_manager as em
+from feynmancraft_adk.tools.kb.embedding_manager import KBEmbeddingManager
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+def test_backend_selection():
+    """EMBEDDING_MODEL picks the backend and its index file suffix."""
+    gemini = get_embedding_backend("text-embedding-004")
+    assert isinstance(gemini, GeminiEmbeddingBackend)
+    assert gemini.model_name == "models/text-embedding-004" and gemini.store_suffix == ""
+    
+    local = get_embedding_backend("local-ngram")
+    assert isinstance(local, HashedNgramEmbeddingBackend) and not local.remote
+    assert local.store_suffix == "_local_ngram_3_5_1024"
+    assert get_embedding_backend("local-ngram-256").dim == 256
+    assert get_embedding_backend("local-ngram") is local
+    logger.info("✓ Backend selection")
+
+
+def test_local_vectors():
+    """Local vectors are deterministic, unit-length and similarity-preserving."""
+    backend = HashedNgramEmbeddingBackend(dim=512)
+    query = np.asarray(backend.embed_query("muon decay to electron"))
+    
+    assert query.shape == (512,)
+    assert abs(np.linalg.norm(query) - 1.0) < 1e-5
+    assert np.array_equal(query, backend.embed_query("Muon  decay to electron"))
+    assert not any(backend.embed_query(""))
+    
+    related, unrelated = backend.embed_documents(["Muon decays into an electron", "Higgs boson production"])
+    assert query @ np.asarray(related) > query @ np.asarray(unrelated)
+    logger.info("✓ Local n-gram vectors")
+
+
+def test_manager_with_local_backend():
+    """The KB manager embeds and searches offline with the local backend."""
+    examples = [
+        {"topic": "Compton scattering", "reaction": "e^- \\gamma \\to e^- \\gamma"},
+        {"topic": "Muon decay", "reaction": "\\mu^- \\to e^- \\bar{\\nu}_e \\nu_\\mu"},
+        {"topic": "Higgs decay to photons", "reaction": "H \\to \\gamma \\gamma"},
+    ]
+    backend = get_embedding_backend("local-ngram")
+    manager = KBEmbeddingManager()
+    manager.reset()
+    try:
+        with tempfile.TemporaryDirectory() as tmp, \
+             mock.patch.object(em, "load_kb_examples", return_value=examples), \
+             mock.patch.object(manager, "backend", backend), \
+             mock.patch.object(KBEmbeddingManager, "cache_dir", new=property(lambda self: Path(tmp))):
+            asyncio.run(manager.initialize())
+            
+            assert manager.store_path.name == "kb_embeddings_local_ngram_3_5_1024"
+            assert manager.cache_file.exists()
+            hits = manager.search(backend.embed_query("muon decay"), top_k=1)
+            assert hits[0][0] == 1
+    finally:
+        manager.reset()
+    logger.info("✓ KB manager with local backend")
+
+
+def main():
+    """Run embedding backend tests."""
+    print("🧪 EMBEDDING BACKEND TEST SUITE")
+    print("=" * 50)
+    
+    test_suites = [
+        ("Backend selection", test_backend_selection),
+        ("Local n-gram vectors", test_local_vectors),
+        ("KB manager with local backend", test_manager_with_local_backend),
+    ]
+    
+    failed = 0
+    for test_name, test_func in test_suites:
+        try:
+            test_func()
+            print(f"✓ PASS   {test_name}")
+        except Exception as e:
+            failed += 1
+            print(f"✗ FAIL   {test_name}: {e}")
+    
+    print(f"\nResult: {len(test_suites) - failed}/{len(test_suites)} tests passed")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
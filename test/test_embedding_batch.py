@@ -0,0 +1,175 @@
+#!/usr/bin/env python3
+"""
+Tests for batched embedding requests (batch splitting, retries, progress)
+and for single query embeddings.
+
+Runs offline: the embedding API is replaced by a fake and retry delays are
+recorded instead of slept.
+"""
+
+import os
+import sys
+import logging
+from pathlib import Path
+from unittest import mock
+
+# Add the project root to Python path
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from google.api_core import exceptions as api_exceptions
+
+from feynmancraft_adk.shared_libraries.config import config
+from feynmancraft_adk.tools.kb import embeddings
+from feynmancraft_adk.tools.kb.embeddings import embed_batch, get_embedding
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+class FakeEmbeddingAPI:
+    """Stands in for genai.embed_content; raises the queued errors first."""
+
+    def __init__(self, errors=()):
+        self.errors = list(errors)
+        self.calls = []
+
+    def __call__(self, model, content, task_type):
+        self.calls.append(list(content))
+        if self.errors:
+            raise self.errors.pop(0)
+        return {"embedding": [[float(len(text)), 1.0] for text in content]}
+
+
+def run_batch(api, texts, with_key=True, **kwargs):
+    """Run embed_batch against a fake API; returns (embeddings, retry delays)."""
+    delays = []
+    environ = {"GOOGLE_API_KEY": "test-key"} if with_key else {}
+    with mock.patch.dict(os.environ, environ, clear=False), \
+         mock.patch.object(config.api, "google_api_key", environ.get("GOOGLE_API_KEY")), \
+         mock.patch.object(config.knowledge_base, "embedding_cache_enabled", False), \
+         mock.patch.object(embeddings.genai, "embed_content", api), \
+         mock.patch.object(embeddings.time, "sleep", delays.append):
+        if not with_key:
+            os.environ.pop("GOOGLE_API_KEY", None)
+            os.environ.pop("GOOGLE_APPLICATION_CREDENTIALS", None)
+        result = embed_batch(texts, "models/test", **kwargs)
+    return result, delays
+
+
+def test_batch_splitting():
+    """Texts are sent in batch_size chunks and results stay aligned with the input."""
+    api = FakeEmbeddingAPI()
+    texts = ["a", "bb", "ccc", "dddd", "eeeee"]
+    result, delays = run_batch(api, texts, batch_size=2)
+    assert api.calls == [["a", "bb"], ["ccc", "dddd"], ["eeeee"]]
+    assert [vector[0] for vector in result] == [1.0, 2.0, 3.0, 4.0, 5.0]
+    assert delays == []
+    logger.info("✓ Batch splitting")
+
+
+def test_retry_then_success():
+    """Transient errors are retried with exponential backoff."""
+    api = FakeEmbeddingAPI([api_exceptions.ServiceUnavailable("busy"), api_exceptions.TooManyRequests("slow down")])
+    result, delays = run_batch(api, ["a", "bb"], max_retries=3, backoff_seconds=0.5)
+    assert len(api.calls) == 3
+    assert delays == [0.5, 1.0]
+    assert result == [[1.0, 1.0], [2.0, 1.0]]
+    logger.info("✓ Retry then success")
+
+
+def test_give_up_after_max_retries():
+    """A batch that keeps failing is given up after max_retries; later batches still run."""
+    api = FakeEmbeddingAPI([api_exceptions.InternalServerError("down")] * 3)
+    result, delays = run_batch(api, ["a", "bb", "ccc"], batch_size=2, max_retries=2)
+    assert len(api.calls) == 4, "three attempts for the first batch, one for the second"
+    assert delays == [1.0, 2.0]
+    assert result == [None, None, [3.0, 1.0]]
+    logger.info("✓ Give up after max_retries")
+
+
+def test_fail_fast():
+    """Non-transient errors and missing credentials are not retried."""
+    api = FakeEmbeddingAPI([api_exceptions.InvalidArgument("text too long")])
+    result, delays = run_batch(api, ["a", "bb", "ccc"], batch_size=2, max_retries=3)
+    assert len(api.calls) == 2 and delays == []
+    assert result == [None, None, [3.0, 1.0]]
+
+    # A rejected key fails every batch the same way, so the rest are skipped
+    api = FakeEmbeddingAPI([api_exceptions.PermissionDenied("API key not valid")])
+    result, delays = run_batch(api, ["a", "bb", "ccc"], batch_size=2, max_retries=3)
+    assert len(api.calls) == 1 and delays == [] and result == [None, None, None]
+
+    api = FakeEmbeddingAPI()
+    result, delays = run_batch(api, ["a", "bb"], with_key=False)
+    assert api.calls == [] and delays == [] and result == [None, None]
+    logger.info("✓ Fail fast")
+
+
+def test_progress_callback():
+    """Progress is reported after every batch and always reaches the total."""
+    progress = []
+    run_batch(FakeEmbeddingAPI(), ["a", "bb", "ccc", "dddd", "eeeee"], batch_size=2,
+              progress_callback=lambda done, total: progress.append((done, total)))
+    assert progress == [(0, 5), (2, 5), (4, 5), (5, 5)]
+
+    progress.clear()
+    run_batch(FakeEmbeddingAPI(), ["a", "bb"], with_key=False,
+              progress_callback=lambda done, total: progress.append((done, total)))
+    assert progress == [(0, 2), (2, 2)]
+    logger.info("✓ Progress callback")
+
+
+def test_query_failures_not_cached():
+    """A query embedded without credentials or during an outage is retried on the next call."""
+    outcomes = [ConnectionError("network down"), {"embedding": [0.5, 1.0]}]
+    calls = []
+    
+    def embed_content(model, content, task_type):
+        calls.append(content)
+        outcome = outcomes.pop(0)
+        if isinstance(outcome, Exception):
+            raise outcome
+        return outcome
+    
+    with mock.patch.object(config.knowledge_base, "embedding_cache_enabled", False), \
+         mock.patch.object(embeddings.genai, "embed_content", embed_content):
+        with mock.patch.object(embeddings, "embedding_credentials_available", return_value=False):
+            assert get_embedding("query not cached", "models/test") == []
+        with mock.patch.object(embeddings, "embedding_credentials_available", return_value=True):
+            assert get_embedding("query not cached", "models/test") == []
+            assert get_embedding("query not cached", "models/test") == [0.5, 1.0]
+    assert calls == ["query not cached"] * 2
+    logger.info("✓ Query embedding failures not cached")
+
+
+def main():
+    """Run batched embedding tests."""
+    print("🧪 BATCHED EMBEDDING TEST SUITE")
+    print("=" * 50)
+
+    test_suites = [
+        ("Batch splitting", test_batch_splitting),
+        ("Retry then success", test_retry_then_success),
+        ("Give up after max_retries", test_give_up_after_max_retries),
+        ("Fail fast", test_fail_fast),
+        ("Progress callback", test_progress_callback),
+        ("Query failures not cached", test_query_failures_not_cached),
+    ]
+
+    failed = 0
+    for test_name, test_func in test_suites:
+        try:
+            test_func()
+            print(f"✓ PASS   {test_name}")
+        except Exception as e:
+            failed += 1
+            print(f"✗ FAIL   {test_name}: {e}")
+
+    print(f"\nResult: {len(test_suites) - failed}/{len(test_suites)} tests passed")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+"""
+Tests for the persistent cross-process embedding cache.
+"""
+
+import sys
+import time
+import logging
+import sqlite3
+import tempfile
+from pathlib import Path
+
+# Add the project root to Python path
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from feynmancraft_adk.tools.kb.embedding_cache import EmbeddingCache, make_cache_key
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+def test_roundtrip_and_key_normalization():
+    """Vectors survive a reopen; whitespace variants share one key."""
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "cache.sqlite3"
+        cache = EmbeddingCache(path)
+        cache.put("electron  positron\nannihilation", "models/m", "retrieval_query", [0.5, -1.0, 2.0])
+        cache.close()
+        
+        reopened = EmbeddingCache(path)
+        assert reopened.get("electron positron annihilation", "models/m", "RETRIEVAL_QUERY") == [0.5, -1.0, 2.0]
+        assert reopened.get("electron positron annihilation", "models/other", "retrieval_query") is None
+        assert reopened.get("electron positron annihilation", "models/m", "retrieval_document") is None
+        reopened.close()
+    
+    assert make_cache_key("a  b", "m", "t") == make_cache_key(" a b ", "m", "T")
+    logger.info("✓ Embedding cache round trip and key normalization")
+
+
+def test_lru_eviction():
+    """Least recently used entries are evicted once the cache is over size."""
+    with tempfile.TemporaryDirectory() as tmp:
+        cache = EmbeddingCache(Path(tmp) / "cache.sqlite3", max_entries=3, access_update_interval=0)
+        for i in range(3):
+            cache.put(f"text {i}", "m", "t", [float(i)])
+        # Touch the oldest entry so it survives eviction
+        assert cache.get("text 0", "m", "t") == [0.0]
+        cache.put("text 3", "m", "t", [3.0])
+        
+        assert len(cache) == 3
+        assert cache.get("text 1", "m", "t") is None
+        assert cache.get("text 0", "m", "t") == [0.0]
+        assert cache.get("text 3", "m", "t") == [3.0]
+        cache.close()
+    logger.info("✓ Embedding cache LRU eviction")
+
+
+def test_hits_skip_recent_access_updates():
+    """A hit only rewrites last_access when the stored time is stale."""
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "cache.sqlite3"
+        cache = EmbeddingCache(path, access_update_interval=60)
+        cache.put("text", "m", "t", [1.0])
+        key = make_cache_key("text", "m", "t")
+        
+        def last_access():
+            conn = sqlite3.connect(str(path))
+            try:
+                return conn.execute("SELECT last_access FROM embeddings WHERE key = ?", (key,)).fetchone()[0]
+            finally:
+                conn.close()
+        
+        stored = last_access()
+        assert cache.get("text", "m", "t") == [1.0]
+        assert last_access() == stored, "a fresh hit should not write"
+        
+        stale = time.time() - 120
+        with cache._lock:
+            cache._connect().execute("UPDATE embeddings SET last_access = ? WHERE key = ?", (stale, key))
+            cache._conn.commit()
+        assert cache.get("text", "m", "t") == [1.0]
+        assert last_access() > stale
+        cache.close()
+    logger.info("✓ Embedding cache hits skip recent access updates")
+
+
+def main():
+    """Run embedding cache tests."""
+    print("🧪 EMBEDDING CACHE TEST SUITE")
+    print("=" * 50)
+    
+    test_suites = [
+        ("Round trip and key normalization", test_roundtrip_and_key_normalization),
+        ("LRU eviction", test_lru_eviction),
+        ("Hits skip recent access updates", test_hits_skip_recent_access_updates),
+    ]
+    
+    failed = 0
+    for test_name, test_func in test_suites:
+        try:
+            test_func()
+            print(f"✓ PASS   {test_name}")
+        except Exception as e:
+            failed += 1
+            print(f"✗ FAIL   {test_name}: {e}")
+    
+    print(f"\nResult: {len(test_suites) - failed}/{len(test_suites)} tests passed")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,210 @@
+#!/usr/bin/env python3
+"""
+Tests for near-duplicate detection and compaction of KB records.
+
+Runs offline on synthetic variants of the bundled KB records.
+"""
+
+import sys
+import json
+import logging
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+
+# Add the project root to Python path
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from feynmancraft_adk.tools.kb.data_loader import (
+    deduplicate_kb_examples,
+    load_kb_examples,
+    write_kb_examples,
+)
+from feynmancraft_adk.tools.kb.dedup import (
+    MinHasher,
+    find_duplicates,
+    lsh_params,
+    normalize_tikz,
+    physics_key,
+    tikz_shingles,
+)
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+Z_DECAY = (
+    "\\begin{tikzpicture}[thick]\\n  \\coordinate (v) at (0,0);\\n"
+    "  \\draw[boson] (-1.5,0) node[left] {$Z^0$} -- (v);\\n"
+    "  \\draw[fermion] (v) -- (1.5,1) node[right] {$\\mu^+$};\\n"
+    "  \\draw[fermionbar] (v) -- (1.5,-1) node[right] {$\\mu^-$};\\n"
+    "  \\fill (v) circle (1.5pt);\\n\\end{tikzpicture}"
+)
+# Same diagram: comments, whitespace and number formatting differ
+Z_DECAY_VARIANT = (
+    "% Z decay to muons\n\\begin{tikzpicture}[thick]\n\\coordinate (v) at (0.0, 0);\n"
+    "\\draw[boson]   (-1.50,0) node[left] {$Z^0$} -- (v); % incoming Z\n"
+    "\\draw[fermion] (v) -- (1.5,1.0) node[right] {$\\mu^+$};\n"
+    "\\draw[fermionbar] (v) -- (1.5,-1) node[right] {$\\mu^-$};\n"
+    "\\fill (v) circle (1.5pt);\n\\end{tikzpicture}"
+)
+
+
+def z_record(tikz, particles=("Z^0", "\\mu^+", "\\mu^-"), **extra):
+    record = {
+        "topic": "Z boson decay",
+        "reaction": "Z^0 \\to \\mu^+ \\mu^-",
+        "particles": list(particles),
+        "tikz": tikz,
+    }
+    record.update(extra)
+    return record
+
+
+def test_normalization():
+    """Comments, whitespace and numbers are normalized; \\nu survives."""
+    assert normalize_tikz(Z_DECAY) == normalize_tikz(Z_DECAY_VARIANT)
+    assert "\\nu" in normalize_tikz("\\draw (a) -- (b) node {$\\nu_e$};\\n")
+    assert tikz_shingles(Z_DECAY) == tikz_shingles(Z_DECAY_VARIANT)
+    assert tikz_shingles("% only a comment") == []
+    assert physics_key({"particles": ["\\mu^-", "Z"]}) == physics_key({"particles": ["Z^0", "μ⁻"]})
+    logger.info("✓ Normalization")
+
+
+def test_minhash_and_lsh_params():
+    """Signatures estimate Jaccard similarity; LSH catches pairs at the threshold."""
+    hasher = MinHasher(256)
+    a = [f"s{i}" for i in range(100)]
+    b = a[:80] + [f"t{i}" for i in range(20)]  # Jaccard 80/120
+    estimate = MinHasher.jaccard(hasher.signature(a), hasher.signature(b))
+    assert abs(estimate - 80 / 120) < 0.1, estimate
+    assert hasher.signature([]) is None
+
+    bands, rows = lsh_params(0.9, 128)
+    assert bands * rows <= 128
+    assert 1 - (1 - 0.9 ** rows) ** bands >= 0.99
+    assert 1 - (1 - 0.5 ** rows) ** bands < 0.1, "dissimilar pairs should rarely collide"
+    logger.info("✓ MinHash and LSH parameters")
+
+
+def test_tikz_duplicates():
+    """TikZ near-duplicates of one process cluster; other processes do not."""
+    records = [
+        z_record(Z_DECAY),
+        z_record(Z_DECAY_VARIANT, description="Z decay to a muon pair", source="https://example.org"),
+        # Same layout with electrons: a different process
+        z_record(Z_DECAY.replace("\\mu", "e"), particles=("Z^0", "e^+", "e^-"), reaction="Z^0 \\to e^+ e^-"),
+        z_record("% TikZ code not yet available."),
+    ]
+    report = find_duplicates(records)
+
+    assert len(report.clusters) == 1
+    cluster = report.clusters[0]
+    assert cluster.members == [0, 1]
+    assert cluster.canonical == 1, "the more complete record is kept"
+    assert cluster.signals == ["tikz"]
+    assert report.removed == [0]
+    assert report.keep_positions() == [1, 2, 3]
+    logger.info("✓ TikZ duplicates")
+
+
+def test_embedding_duplicates():
+    """Records with near-identical embeddings cluster even if their TikZ differs."""
+    records = [
+        z_record(Z_DECAY),
+        z_record("\\begin{tikzpicture}\\feynmandiagram [horizontal=a to b] { a -- b };\\end{tikzpicture}"),
+        z_record("\\begin{tikzpicture}\\draw (0,0) -- (1,1);\\end{tikzpicture}"),
+    ]
+    rng = np.random.RandomState(0)
+    base = rng.standard_normal(64)
+    vectors = np.vstack([base, base + 0.01 * rng.standard_normal(64), rng.standard_normal(64)])
+
+    assert not find_duplicates(records).clusters
+    report = find_duplicates(records, vectors=vectors)
+    assert [c.members for c in report.clusters] == [[0, 1]]
+    assert report.clusters[0].signals == ["embedding"]
+
+    # Zero rows (records that could not be embedded) are skipped
+    vectors[1] = 0.0
+    assert not find_duplicates(records, vectors=vectors).clusters
+    logger.info("✓ Embedding duplicates")
+
+
+def test_compaction_of_kb():
+    """The bundled KB has no duplicates; a KB with injected copies compacts back to it."""
+    examples = load_kb_examples()
+    compacted, report = deduplicate_kb_examples(examples)
+    assert not report.clusters and compacted == examples
+
+    copies = [dict(e, tikz=e["tikz"] + "\n% copy") for e in examples[:5] if tikz_shingles(e["tikz"])]
+    compacted, report = deduplicate_kb_examples(examples + copies)
+    assert len(report.removed) == len(copies)
+    assert len(compacted) == len(examples)
+    assert {(e["topic"], e["reaction"]) for e in compacted} == {(e["topic"], e["reaction"]) for e in examples}
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for name in ("kb.json", "kb.jsonl"):
+            path = str(Path(tmp) / name)
+            write_kb_examples(compacted, path)
+            assert load_kb_examples(path) == compacted
+        assert json.loads((Path(tmp) / "kb.json").read_text(encoding="utf-8")) == compacted
+        assert sorted(p.name for p in Path(tmp).iterdir()) == ["kb.json", "kb.jsonl"]
+    logger.info("✓ Compaction of the KB")
+
+
+def test_scales_linearly():
+    """Work grows about linearly: a 4x larger corpus takes well under 16x longer."""
+    examples = [e for e in load_kb_examples() if tikz_shingles(e["tikz"])]
+
+    def corpus(n):
+        # Distinct records: every copy gets its own coordinates and labels
+        return [
+            dict(examples[i % len(examples)], particles=[f"X_{i}"],
+                 tikz=examples[i % len(examples)]["tikz"].replace("(v)", f"(v{i})"))
+            for i in range(n)
+        ]
+
+    timings = []
+    for n in (500, 2000):
+        records = corpus(n)
+        start = time.perf_counter()
+        report = find_duplicates(records)
+        timings.append(time.perf_counter() - start)
+        assert not report.clusters
+        assert report.candidates <= n * 32
+    assert timings[1] < timings[0] * 10, timings
+    logger.info(f"✓ Linear scaling ({timings[0]:.2f}s for 500, {timings[1]:.2f}s for 2000)")
+
+
+def main():
+    """Run dedup tests."""
+    print("🧪 KB DEDUP TEST SUITE")
+    print("=" * 50)
+
+    test_suites = [
+        ("Normalization", test_normalization),
+        ("MinHash and LSH parameters", test_minhash_and_lsh_params),
+        ("TikZ duplicates", test_tikz_duplicates),
+        ("Embedding duplicates", test_embedding_duplicates),
+        ("Compaction of the KB", test_compaction_of_kb),
+        ("Linear scaling", test_scales_linearly),
+    ]
+
+    failed = 0
+    for test_name, test_func in test_suites:
+        try:
+            test_func()
+            print(f"✓ PASS   {test_name}")
+        except Exception as e:
+            failed += 1
+            print(f"✗ FAIL   {test_name}: {e}")
+
+    print(f"\nResult: {len(test_suites) - failed}/{len(test_suites)} tests passed")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
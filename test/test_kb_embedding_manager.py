@@ -0,0 +1,192 @@
+#!/usr/bin/env python3
+"""
+Tests for KBEmbeddingManager persistence.
+
+The embedding API is replaced by a deterministic fake, so no API key is
+required and the number of texts sent for embedding can be checked.
+"""
+
+import os
+import sys
+import asyncio
+import logging
+import tempfile
+from pathlib import Path
+from unittest import mock
+
+import numpy as np
+
+# Add the project root to Python path
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from feynmancraft_adk.tools.kb import embedding_manager as em
+from feynmancraft_adk.tools.kb import vector_store
+from feynmancraft_adk.shared_libraries.config import config
+from feynmancraft_adk.tools.kb.embedding_backends import EmbeddingBackend
+from feynmancraft_adk.tools.kb.embedding_manager import KBEmbeddingManager
+from feynmancraft_adk.tools.kb.vector_store import load_vector_store, save_vector_store
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+EXAMPLES = [
+    {"topic": "Compton scattering", "reaction": "e^- \\gamma \\to e^- \\gamma", "particles": ["e^-", "\\gamma"]},
+    {"topic": "Pair annihilation", "reaction": "e^- e^+ \\to \\gamma \\gamma", "particles": ["e^-", "e^+"]},
+    {"topic": "Muon decay", "reaction": "\\mu^- \\to e^- \\bar{\\nu}_e \\nu_\\mu", "particles": ["\\mu^-"]},
+]
+
+
+def fake_embed_batch(texts, model_name, **kwargs):
+    """Embed each text as a vector derived from its length and first char."""
+    fake_embed_batch.calls.append(len(texts))
+    return [[float(len(t)), float(ord(t[0])), 1.0] for t in texts]
+
+
+fake_embed_batch.calls = []
+
+
+class FakeBackend(EmbeddingBackend):
+    """Backend that embeds with fake_embed_batch."""
+    
+    model_name = "models/fake"
+    dim = 3
+    
+    def embed_documents(self, texts, **kwargs):
+        return fake_embed_batch(texts, self.model_name, **kwargs)
+
+
+def run_initialize(manager, examples, cache_dir):
+    """Initialize the manager against a temporary cache directory."""
+    with mock.patch.object(em, "load_kb_examples", return_value=examples), \
+         mock.patch.object(manager, "backend", FakeBackend()), \
+         mock.patch.object(KBEmbeddingManager, "cache_dir", new=property(lambda self: Path(cache_dir))):
+        asyncio.run(manager.initialize(force_regenerate=manager.is_initialized))
+
+
+def test_incremental_reembedding():
+    """Inserting a record only embeds that record and keeps vectors aligned."""
+    manager = KBEmbeddingManager()
+    manager.reset()
+    fake_embed_batch.calls.clear()
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            run_initialize(manager, EXAMPLES, tmp)
+            assert fake_embed_batch.calls == [3]
+            
+            inserted = {"topic": "Top quark decay", "reaction": "t \\to W^+ b", "particles": ["t"]}
+            edited = EXAMPLES[:1] + [inserted] + EXAMPLES[1:]
+            manager.reset()
+            run_initialize(manager, edited, tmp)
+            
+            assert fake_embed_batch.calls == [3, 1]
+            for i, example in enumerate(edited):
+                text = manager._get_text_for_embedding(example)
+                expected = np.asarray(fake_embed_batch([text], None)[0])
+                actual = np.asarray(manager.get_embedding(i))
+                # Stored vectors are unit-length; compare directions
+                assert np.allclose(actual / np.linalg.norm(actual), expected / np.linalg.norm(expected))
+        logger.info("✓ Only new KB examples are re-embedded")
+    finally:
+        manager.reset()
+
+
+def test_memory_mapped_store():
+    """The store round-trips through a read-only memory map."""
+    with tempfile.TemporaryDirectory() as tmp:
+        base = Path(tmp) / "vectors"
+        assert save_vector_store(base, ["a", "b"], [[3.0, 4.0], [0.0, 2.0]], "models/m", ["h1", "h2"])
+        
+        matrix, manifest = load_vector_store(base)
+        assert isinstance(matrix, np.memmap) and not matrix.flags.writeable
+        assert matrix.dtype == np.float32
+        assert np.allclose(matrix, [[0.6, 0.8], [0.0, 1.0]])
+        assert manifest["ids"] == ["a", "b"] and manifest["content_hashes"] == ["h1", "h2"]
+        assert manifest["model_name"] == "models/m"
+    logger.info("✓ Vector store round trip via mmap")
+
+
+def test_failed_write_keeps_store():
+    """A write that fails leaves the previous store and no temporary files."""
+    with tempfile.TemporaryDirectory() as tmp:
+        base = Path(tmp) / "vectors"
+        assert save_vector_store(base, ["a"], [[1.0, 0.0]], "models/m", ["h1"])
+        for path in Path(tmp).iterdir():
+            assert os.stat(path).st_mode & 0o777 == 0o644
+        
+        with mock.patch.object(vector_store.np, "save", side_effect=OSError("disk full")):
+            assert not save_vector_store(base, ["b"], [[0.0, 1.0]], "models/m", ["h2"])
+        
+        assert sorted(p.name for p in Path(tmp).iterdir()) == ["vectors.json", "vectors.npy"]
+        matrix, manifest = load_vector_store(base)
+        assert manifest["ids"] == ["a"] and np.allclose(matrix, [[1.0, 0.0]])
+    logger.info("✓ Failed write keeps the previous store")
+
+
+def test_initialize_uses_mapped_matrix():
+    """An unchanged KB is searched straight from the memory-mapped store."""
+    manager = KBEmbeddingManager()
+    manager.reset()
+    fake_embed_batch.calls.clear()
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            run_initialize(manager, EXAMPLES, tmp)
+            manager.reset()
+            run_initialize(manager, EXAMPLES, tmp)
+            
+            assert fake_embed_batch.calls == [3]
+            assert isinstance(manager.embedding_matrix, np.memmap)
+            assert manager.search(manager.get_embedding(1), top_k=1)[0][0] == 1
+        logger.info("✓ Unchanged KB loads without re-embedding or copying")
+    finally:
+        manager.reset()
+
+
+def test_quantized_index_reranks_from_store():
+    """Freshly embedded examples are served and re-ranked from the memory-mapped store."""
+    manager = KBEmbeddingManager()
+    manager.reset()
+    try:
+        with tempfile.TemporaryDirectory() as tmp, \
+             mock.patch.object(config.search, "quantized_search", True):
+            run_initialize(manager, EXAMPLES, tmp)
+            
+            snapshot = manager.snapshot
+            assert isinstance(snapshot.embedding_matrix, np.memmap)
+            assert snapshot.quantized_index.matrix is snapshot.embedding_matrix
+            assert all(isinstance(manager.get_embedding(i), np.memmap) for i in range(len(EXAMPLES)))
+            assert manager.search(manager.get_embedding(2), top_k=1)[0][0] == 2
+        logger.info("✓ Quantized index re-ranks from the mapped store")
+    finally:
+        manager.reset()
+
+
+def main():
+    """Run KB embedding manager tests."""
+    print("🧪 KB EMBEDDING MANAGER TEST SUITE")
+    print("=" * 50)
+    
+    test_suites = [
+        ("Incremental re-embedding", test_incremental_reembedding),
+        ("Memory-mapped store", test_memory_mapped_store),
+        ("Failed write keeps store", test_failed_write_keeps_store),
+        ("Initialize uses mapped matrix", test_initialize_uses_mapped_matrix),
+        ("Quantized index re-ranks from store", test_quantized_index_reranks_from_store),
+    ]
+    
+    failed = 0
+    for test_name, test_func in test_suites:
+        try:
+            test_func()
+            print(f"✓ PASS   {test_name}")
+        except Exception as e:
+            failed += 1
+            print(f"✗ FAIL   {test_name}: {e}")
+    
+    print(f"\nResult: {len(test_suites) - failed}/{len(test_suites)} tests passed")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+"""
+Tests for the KB retrieval benchmark's golden query set and metrics.
+"""
+
+import sys
+import logging
+from pathlib import Path
+
+# Add the project root and this directory to Python path
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+sys.path.insert(0, str(Path(__file__).parent))
+
+from bench_kb_retrieval import compare, load_golden, percentile, recall_at_k, reciprocal_rank
+from feynmancraft_adk.tools.kb.data_loader import load_kb_examples
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+def test_golden_queries_reference_kb():
+    """Every expected reaction is the reaction of a KB record."""
+    reactions = {record["reaction"] for record in load_kb_examples()}
+    golden = load_golden()
+    
+    assert len(golden) >= 30
+    assert len({entry["query"] for entry in golden}) == len(golden)
+    for entry in golden:
+        assert entry["expected_reactions"], entry["query"]
+        missing = set(entry["expected_reactions"]) - reactions
+        assert not missing, f"{entry['query']}: {missing}"
+    logger.info("✓ Golden queries reference KB records")
+
+
+def test_metrics():
+    """recall@k, reciprocal rank, percentiles and baseline comparison."""
+    assert recall_at_k(["a", "b", "c"], ["c", "d"], 3) == 0.5
+    assert recall_at_k(["a", "b", "c"], ["c"], 2) == 0.0
+    assert reciprocal_rank(["a", "b", "c"], ["c", "b"]) == 0.5
+    assert reciprocal_rank(["a"], ["z"]) == 0.0
+    assert percentile(list(range(1, 101)), 95) == 95
+    assert percentile([3.0], 99) == 3.0
+    
+    old = {"retrievers": {"hybrid": {"recall@5": 0.9, "mrr": 0.8, "p95_ms": 1.0}}, "annoy": []}
+    same = {"retrievers": {"hybrid": {"recall@5": 0.895, "mrr": 0.8, "p95_ms": 1.2}}, "annoy": []}
+    worse = {"retrievers": {"hybrid": {"recall@5": 0.8, "mrr": 0.8, "p95_ms": 2.0}}, "annoy": []}
+    assert compare(same, old, 5) == []
+    assert len(compare(worse, old, 5)) == 2
+    logger.info("✓ Benchmark metrics")
+
+
+def main():
+    """Run golden query tests."""
+    print("🧪 KB GOLDEN QUERY TEST SUITE")
+    print("=" * 50)
+    
+    test_suites = [
+        ("Golden queries reference KB", test_golden_queries_reference_kb),
+        ("Benchmark metrics", test_metrics),
+    ]
+    
+    failed = 0
+    for test_name, test_func in test_suites:
+        try:
+            test_func()
+            print(f"✓ PASS   {test_name}")
+        except Exception as e:
+            failed += 1
+            print(f"✗ FAIL   {test_name}: {e}")
+    
+    print(f"\nResult: {len(test_suites) - failed}/{len(test_suites)} tests passed")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
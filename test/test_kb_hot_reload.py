@@ -0,0 +1,340 @@
+#!/usr/bin/env python3
+"""
+Tests for hot reload of the KB.
+
+Runs offline: the local KB is reloaded from a temporary copy with the index
+build stubbed out, and the embedding manager uses a fake backend.
+"""
+
+import sys
+import json
+import asyncio
+import logging
+import tempfile
+import threading
+import time
+from pathlib import Path
+from unittest import mock
+
+# Add the project root to Python path
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from feynmancraft_adk.tools.kb import embedding_manager as em
+from feynmancraft_adk.tools.kb import local
+from feynmancraft_adk.tools.kb.embedding_backends import EmbeddingBackend
+from feynmancraft_adk.tools.kb.embedding_manager import KBEmbeddingManager
+from feynmancraft_adk.tools.kb.hot_reload import KBWatcher, get_kb_watcher
+from feynmancraft_adk.tools.kb.local import LocalKBTool, get_local_kb_tool
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+EXAMPLES = [
+    {"topic": "Compton scattering", "reaction": "e^- \\gamma \\to e^- \\gamma", "particles": ["e^-", "\\gamma"]},
+    {"topic": "Pair annihilation", "reaction": "e^- e^+ \\to \\gamma \\gamma", "particles": ["e^-", "e^+"]},
+    {"topic": "Muon decay", "reaction": "\\mu^- \\to e^- \\bar{\\nu}_e \\nu_\\mu", "particles": ["\\mu^-"]},
+]
+
+
+class FakeBackend(EmbeddingBackend):
+    """Backend that embeds each text from its length and first character."""
+
+    model_name = "models/fake"
+    dim = 3
+
+    def __init__(self):
+        self.calls = []
+
+    def embed_documents(self, texts, **kwargs):
+        self.calls.append(len(texts))
+        return [[float(len(t)), float(ord(t[0])), 1.0] for t in texts]
+
+
+def write_kb(path: Path, records):
+    path.write_text(json.dumps(records), encoding="utf-8")
+
+
+def test_watcher_waits_for_stable_files():
+    """A change is reloaded once the file stopped changing for one poll."""
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "kb.json"
+        write_kb(path, EXAMPLES[:1])
+        reloads = []
+        watcher = KBWatcher(interval=0.05)
+        watcher.register("test", lambda: [path], lambda: reloads.append(1) or True)
+
+        # First sighting of the files: confirmed on the next poll
+        assert watcher.poll() == 0
+        assert watcher.poll() == 1
+        assert watcher.poll() == 0
+
+        write_kb(path, EXAMPLES)
+        assert watcher.poll() == 0, "a change is only acted on once it is stable"
+        assert watcher.poll() == 1
+        assert len(reloads) == 2
+
+        # The polling thread picks up the next change by itself
+        watcher.start()
+        try:
+            write_kb(path, EXAMPLES[:2])
+            deadline = time.monotonic() + 5
+            while len(reloads) < 3 and time.monotonic() < deadline:
+                time.sleep(0.02)
+            assert len(reloads) == 3
+        finally:
+            watcher.stop()
+        assert not watcher.running
+    logger.info("✓ Watcher waits for stable files")
+
+
+def test_failed_reload_is_retried():
+    """A reload that fails does not mark the change as seen, so it is retried."""
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "kb.json"
+        write_kb(path, EXAMPLES)
+        outcomes = [RuntimeError("KB is locked"), True]
+
+        def reload_fn():
+            outcome = outcomes.pop(0)
+            if isinstance(outcome, Exception):
+                raise outcome
+            return outcome
+
+        watcher = KBWatcher(interval=0.05)
+        watcher.register("test", lambda: [path], reload_fn)
+        assert watcher.poll() == 0
+        assert watcher.poll() == 0, "the first reload fails"
+        assert watcher.poll() == 0
+        assert watcher.poll() == 1, "the unchanged files are reloaded again"
+        assert watcher.poll() == 0 and not outcomes
+        assert watcher._watches["test"].errors == ["KB is locked"]
+    logger.info("✓ Failed reload is retried")
+
+
+def test_local_reload_keeps_in_flight_search():
+    """A search started before a reload finishes on the old snapshot."""
+    tool = get_local_kb_tool()
+    watcher = get_kb_watcher()
+    was_running = watcher.running
+    watcher.stop()
+    saved = local.current_snapshot()
+
+    started = threading.Event()
+    release = threading.Event()
+
+    def blocked_vector_hits(query, k, candidates=None, snapshot=None):
+        started.set()
+        release.wait(5)
+        return [(0, 0.9)]
+
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            kb_path = Path(tmp) / "feynman_kb.json"
+            write_kb(kb_path, EXAMPLES[:2])
+            with mock.patch.object(local, "KB_JSON_PATH", kb_path), \
+                 mock.patch.object(LocalKBTool, "_prepare_index", lambda self, snapshot: None):
+                assert tool.reload(force=True)
+                old = local.current_snapshot()
+                assert [r["topic"] for r in old.records] == ["Compton scattering", "Pair annihilation"]
+                assert not tool.reload(), "unchanged files are not reloaded"
+
+                results = []
+                with mock.patch.object(LocalKBTool, "_vector_hits", side_effect=blocked_vector_hits):
+                    search = threading.Thread(target=lambda: results.extend(tool.vector_search("q", k=1)))
+                    search.start()
+                    assert started.wait(5)
+
+                    write_kb(kb_path, list(reversed(EXAMPLES)))
+                    assert tool.reload()
+                    release.set()
+                    search.join(5)
+
+                    assert results[0]["topic"] == "Compton scattering", "in-flight search saw the new KB"
+                    assert tool.vector_search("q", k=1)[0]["topic"] == "Muon decay"
+
+                new = local.current_snapshot()
+                assert new.version > old.version
+                assert tool.snapshot is new
+                assert len(old.records) == 2 and len(new.records) == 3
+                assert tool.keyword_search("muon decay", k=1)[0]["topic"] == "Muon decay"
+
+                # An unreadable KB file keeps the current snapshot
+                kb_path.write_text("[{", encoding="utf-8")
+                try:
+                    tool.reload()
+                    assert False, "broken KB file was loaded"
+                except ValueError:
+                    pass
+                assert local.current_snapshot() is new
+    finally:
+        release.set()
+        local._snapshot = saved
+        if was_running:
+            watcher.start()
+    logger.info("✓ Local reload keeps in-flight search")
+
+
+def test_local_reload_embeds_only_missing_records():
+    """A reload embeds only records missing from the index; unembeddable ones don't trigger rebuilds."""
+    tool = get_local_kb_tool()
+    watcher = get_kb_watcher()
+    was_running = watcher.running
+    watcher.stop()
+    saved = local.current_snapshot()
+
+    class PickyBackend(FakeBackend):
+        """Cannot embed muon records."""
+
+        def embed_documents(self, texts, **kwargs):
+            self.calls.append(len(texts))
+            return [None if "Muon" in t else [float(len(t)), float(ord(t[0])), 1.0] for t in texts]
+
+    backend = PickyBackend()
+    extra = {"topic": "Beta decay", "reaction": "n \\to p e^- \\bar{\\nu}_e", "particles": ["n"]}
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            kb_path = Path(tmp) / "feynman_kb.json"
+            paths = (Path(tmp) / "kb.ann", Path(tmp) / "kb_id_map.json", Path(tmp) / "kb_item_index.json")
+            write_kb(kb_path, EXAMPLES[:2])
+            with mock.patch.object(local, "KB_JSON_PATH", kb_path), \
+                 mock.patch.object(tool, "backend", backend), \
+                 mock.patch.object(LocalKBTool, "_index_paths", lambda self: paths):
+                assert tool.reload(force=True)
+                assert backend.calls == [2]
+
+                write_kb(kb_path, EXAMPLES)
+                assert tool.reload()
+                assert backend.calls == [2, 1], "only the new record is embedded"
+                assert len(local.current_snapshot().item_by_position) == 2
+
+                assert tool.reload(force=True)
+                assert backend.calls == [2, 1], "the unembeddable record triggered a rebuild"
+
+                write_kb(kb_path, EXAMPLES + [extra])
+                assert tool.reload()
+                assert backend.calls == [2, 1, 2], "indexed records were embedded again"
+                assert sorted(local.current_snapshot().item_by_position) == [0, 1, 3]
+    finally:
+        local._snapshot = saved
+        if was_running:
+            watcher.start()
+    logger.info("✓ Local reload embeds only missing records")
+
+
+def test_manager_reload_swaps_snapshot():
+    """The embedding manager embeds only new examples and swaps its snapshot."""
+    manager = KBEmbeddingManager()
+    manager.reset()
+    backend = FakeBackend()
+    examples = {"current": EXAMPLES[:2]}
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            kb_path = Path(tmp) / "feynman_kb.json"
+            write_kb(kb_path, examples["current"])
+            with mock.patch.object(em, "load_kb_examples", side_effect=lambda: examples["current"]), \
+                 mock.patch.object(em, "get_kb_data_path", return_value=str(kb_path)), \
+                 mock.patch.object(manager, "backend", backend), \
+                 mock.patch.object(KBEmbeddingManager, "cache_dir", new=property(lambda self: Path(tmp))):
+                assert not manager.reload(), "an uninitialized manager is not reloaded"
+                asyncio.run(manager.initialize())
+                old = manager.snapshot
+                assert len(old.kb_examples) == 2 and backend.calls == [2]
+                assert not manager.reload()
+
+                examples["current"] = EXAMPLES
+                write_kb(kb_path, EXAMPLES)
+                assert manager.reload()
+                new = manager.snapshot
+
+                assert backend.calls == [2, 1], "only the new example is embedded"
+                assert new.version == old.version + 1
+                assert len(new.kb_examples) == 3 and len(new.matrix_indices) == 3
+                assert len(old.kb_examples) == 2 and len(old.matrix_indices) == 2
+
+                query = backend.embed_documents([manager._get_text_for_embedding(EXAMPLES[2])])[0]
+                assert new.search(query, top_k=1)[0][0] == 2
+                assert all(index < 2 for index, _ in old.search(query, top_k=3))
+                assert manager.embedding_matrix is new.embedding_matrix
+    finally:
+        manager.reset()
+    logger.info("✓ Manager reload swaps snapshot")
+
+
+def test_superseded_load_is_discarded():
+    """A load that finishes after a newer one neither replaces its state nor its store."""
+    manager = KBEmbeddingManager()
+    manager.reset()
+    embedding = threading.Event()
+    release = threading.Event()
+
+    class BlockingBackend(FakeBackend):
+        def embed_documents(self, texts, **kwargs):
+            if len(self.calls) == 0:
+                self.calls.append(len(texts))
+                embedding.set()
+                release.wait(5)
+                return [[float(len(t)), float(ord(t[0])), 1.0] for t in texts]
+            return super().embed_documents(texts, **kwargs)
+
+    backend = BlockingBackend()
+    examples = {"current": EXAMPLES[:1]}
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            kb_path = Path(tmp) / "feynman_kb.json"
+            write_kb(kb_path, EXAMPLES)
+            with mock.patch.object(em, "load_kb_examples", side_effect=lambda: examples["current"]), \
+                 mock.patch.object(em, "get_kb_data_path", return_value=str(kb_path)), \
+                 mock.patch.object(manager, "backend", backend), \
+                 mock.patch.object(KBEmbeddingManager, "cache_dir", new=property(lambda self: Path(tmp))):
+                stale = threading.Thread(target=lambda: asyncio.run(manager._load()))
+                stale.start()
+                assert embedding.wait(5)
+
+                examples["current"] = EXAMPLES
+                asyncio.run(manager._load())
+                newer = manager.snapshot
+                release.set()
+                stale.join(5)
+
+                assert manager.snapshot is newer and len(newer.kb_examples) == 3
+                assert manager.kb_examples is newer.kb_examples and len(manager.embeddings_cache) == 3
+                manager.reset()
+                manager.kb_examples = EXAMPLES
+                assert manager.load_embeddings(), "the newer load's store was overwritten"
+    finally:
+        release.set()
+        manager.reset()
+    logger.info("✓ Superseded load is discarded")
+
+
+def main():
+    """Run hot reload tests."""
+    print("🧪 KB HOT RELOAD TEST SUITE")
+    print("=" * 50)
+
+    test_suites = [
+        ("Watcher waits for stable files", test_watcher_waits_for_stable_files),
+        ("Failed reload is retried", test_failed_reload_is_retried),
+        ("Local reload keeps in-flight search", test_local_reload_keeps_in_flight_search),
+        ("Local reload embeds only missing records", test_local_reload_embeds_only_missing_records),
+        ("Manager reload swaps snapshot", test_manager_reload_swaps_snapshot),
+        ("Superseded load is discarded", test_superseded_load_is_discarded),
+    ]
+
+    failed = 0
+    for test_name, test_func in test_suites:
+        try:
+            test_func()
+            print(f"✓ PASS   {test_name}")
+        except Exception as e:
+            failed += 1
+            print(f"✗ FAIL   {test_name}: {e}")
+
+    print(f"\nResult: {len(test_suites) - failed}/{len(test_suites)} tests passed")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+"""
+Tests for score-fusion hybrid search in LocalKBTool.
+
+Runs offline: vector retrieval is replaced by canned or slow hit lists.
+"""
+
+import sys
+import time
+import logging
+from pathlib import Path
+from unittest.mock import patch
+
+# Add the project root to Python path
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from feynmancraft_adk.shared_libraries.config import config
+from feynmancraft_adk.tools.kb import local
+from feynmancraft_adk.tools.kb.local import LocalKBTool, _fuse_scores
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+def test_fuse_scores():
+    """Scores are scaled per retriever and summed with their weights."""
+    vector_hits = [(0, 0.9), (1, 0.45)]
+    keyword_hits = [(1, 8.0), (2, 4.0)]
+    fused = dict(_fuse_scores([(vector_hits, 0.6), (keyword_hits, 0.4)]))
+    
+    assert abs(fused[0] - 0.6) < 1e-9
+    assert abs(fused[1] - (0.6 * 0.5 + 0.4 * 1.0)) < 1e-9
+    assert abs(fused[2] - 0.2) < 1e-9
+    assert [doc for doc, _ in _fuse_scores([(vector_hits, 0.6), (keyword_hits, 0.4)])] == [1, 0, 2]
+    assert _fuse_scores([([], 0.6), (keyword_hits, 0.0)]) == []
+    logger.info("✓ Weighted score fusion")
+
+
+def test_hybrid_merges_by_record():
+    """A record found by both retrievers appears once with both scores."""
+    tool = LocalKBTool()
+    keyword_hits = tool._keyword_hits("Higgs decay to two photons", 10)
+    top = keyword_hits[0][0]
+    
+    with patch.object(LocalKBTool, "_vector_hits", return_value=[(top, 0.8), (0, 0.7)]):
+        local._vector_unavailable_until = 0.0
+        results = tool.hybrid_search("Higgs decay to two photons", k=5)
+    
+    reactions = [r["reaction"] for r in results]
+    assert len(reactions) == len(set(reactions))
+    assert results[0]["reaction"] == local.current_snapshot().records[top]["reaction"]
+    assert "similarity_score" in results[0] and "keyword_score" in results[0]
+    assert all("hybrid_score" in r for r in results)
+    logger.info("✓ Hybrid search merges retrievers by record")
+
+
+def test_slow_embedding_falls_back_to_keywords():
+    """A slow vector retriever is abandoned and then skipped during cool-down."""
+    tool = LocalKBTool()
+    calls = []
+    
+    def slow_vector_hits(query, k, candidates=None, snapshot=None):
+        calls.append(query)
+        time.sleep(1.0)
+        return [(0, 1.0)]
+    
+    original_timeout = config.search.hybrid_vector_timeout_seconds
+    config.search.hybrid_vector_timeout_seconds = 0.1
+    try:
+        with patch.object(LocalKBTool, "_vector_hits", side_effect=slow_vector_hits):
+            local._vector_unavailable_until = 0.0
+            start = time.monotonic()
+            results = tool.hybrid_search("top quark decay", k=3)
+            first_elapsed = time.monotonic() - start
+            
+            results_again, vectors_used = tool.hybrid_search_with_status("top quark decay", k=3)
+    finally:
+        config.search.hybrid_vector_timeout_seconds = original_timeout
+        local._vector_unavailable_until = 0.0
+    
+    assert first_elapsed < 0.8, f"hybrid search waited {first_elapsed:.2f}s"
+    assert results and results[0]["reaction"] == "t \\to W^+ b"
+    assert "similarity_score" not in results[0]
+    assert [r["reaction"] for r in results_again] == [r["reaction"] for r in results]
+    assert len(calls) == 1, "vector retrieval should be skipped during cool-down"
+    assert not vectors_used
+    logger.info("✓ Slow embedding falls back to keyword results")
+
+
+def main():
+    """Run hybrid search tests."""
+    print("🧪 KB HYBRID SEARCH TEST SUITE")
+    print("=" * 50)
+    
+    test_suites = [
+        ("Weighted score fusion", test_fuse_scores),
+        ("Merge by record", test_hybrid_merges_by_record),
+        ("Slow embedding fallback", test_slow_embedding_falls_back_to_keywords),
+    ]
+    
+    failed = 0
+    for test_name, test_func in test_suites:
+        try:
+            test_func()
+            print(f"✓ PASS   {test_name}")
+        except Exception as e:
+            failed += 1
+            print(f"✗ FAIL   {test_name}: {e}")
+    
+    print(f"\nResult: {len(test_suites) - failed}/{len(test_suites)} tests passed")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
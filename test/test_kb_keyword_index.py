@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+"""
+Tests for the BM25 keyword index used by LocalKBTool.keyword_search.
+
+Runs offline against the bundled feynman_kb.json.
+"""
+
+import sys
+import json
+import logging
+from pathlib import Path
+
+# Add the project root to Python path
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from feynmancraft_adk.tools.kb.keyword_index import BM25Index, tokenize
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+KB_PATH = project_root / "feynmancraft_adk" / "data" / "feynman_kb.json"
+
+
+def load_kb():
+    with open(KB_PATH, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def test_particle_notation_normalization():
+    """LaTeX, Unicode and plain-word spellings map to the same terms."""
+    assert set(tokenize("e+")) == set(tokenize("e^+")) == set(tokenize("e⁺")) == set(tokenize("positron"))
+    assert "electron" in tokenize("e^-") and "electron" in tokenize("e⁻")
+    assert "antineutrino" in tokenize("\\bar{\\nu}_e") and "antineutrino" in tokenize("ν̄ₑ")
+    assert "photon" in tokenize("\\gamma") and "photon" in tokenize("γ")
+    # A hyphen between words is not a charge
+    assert tokenize("electron-positron") == tokenize("electron positron")
+    logger.info("✓ Particle notation normalization")
+
+
+def test_hyphenated_letters_are_not_particles():
+    """Letters in hyphenated words ("s-channel") are not quarks; "W-boson" still is a particle."""
+    assert tokenize("s-channel top quark pair") == ["channel", "top_quark", "quark", "pair"]
+    assert tokenize("t-channel") == ["channel"]
+    assert tokenize("e-mail about p-wave") == ["mail", "about", "wave"]
+    assert tokenize("W-boson") == ["w_boson", "boson"]
+    assert tokenize("b-quark") == ["bottom_quark", "quark", "quark"]
+    assert tokenize("e-p scattering") == ["electron", "proton", "scattering"]
+    assert "down_quark" in tokenize("u d-bar")
+    assert tokenize("e- e+") == ["electron", "positron", "electron"]
+    # ± is both charges, not the positive one
+    assert "positron" not in tokenize("e±") and "electron" in tokenize("e±")
+    
+    kb = load_kb()
+    index = BM25Index(kb)
+    channel_hits = {kb[doc_id]["reaction"] for doc_id, _ in index.search("t-channel", k=len(kb))}
+    quark_records = {r["reaction"] for r in kb if "top_quark" in tokenize(r["reaction"])}
+    assert not channel_hits & quark_records, channel_hits & quark_records
+    logger.info("✓ Hyphenated letters are not particles")
+
+
+def test_flavour_words_in_prose_are_not_quarks():
+    """Flavour words and apostrophe letters are quarks only with quark context or notation."""
+    assert tokenize("bottom up approach") == ["bottom", "up", "approach"]
+    assert tokenize("scroll down") == ["scroll", "down"]
+    assert tokenize("the electron's charge") == ["electron", "charge"]
+    assert tokenize("don't stop") == ["don", "stop"]
+    assert tokenize("up and down quarks") == ["up_quark", "down_quark", "quark"]
+    assert tokenize("charm meson") == ["charm_quark", "meson"]
+    assert "up_quark" in tokenize("anti-up")
+    assert "top_quark" in tokenize("top -> W b")
+    assert tokenize("top") == ["top_quark"]
+    assert "strange_quark" in tokenize("b \\to s \\gamma")
+    
+    kb = load_kb()
+    index = BM25Index(kb)
+    quark_records = {doc_id for doc_id, r in enumerate(kb) if "bottom_quark" in tokenize(r["reaction"])}
+    assert not {doc_id for doc_id, _ in index.search("bottom up approach", k=len(kb))} & quark_records
+    logger.info("✓ Flavour words in prose are not quarks")
+
+
+def test_multi_word_queries():
+    """Multi-word queries in any notation rank the matching record first."""
+    kb = load_kb()
+    index = BM25Index(kb)
+    
+    expectations = {
+        "electron positron annihilation to photons": "e^- e^+ \\to \\gamma \\gamma",
+        "e⁺ e⁻ → γγ": "e^- e^+ \\to \\gamma \\gamma",
+        "Higgs decay to two photons": "H \\to \\gamma \\gamma",
+        "top quark decay": "t \\to W^+ b",
+        "penguin diagram": "b \\to s \\gamma",
+    }
+    for query, reaction in expectations.items():
+        hits = index.search(query, k=3)
+        assert hits, f"no hits for {query!r}"
+        assert kb[hits[0][0]]["reaction"] == reaction, f"{query!r} -> {kb[hits[0][0]]['reaction']!r}"
+    
+    assert index.search("zzzz unknown words", k=3) == []
+    logger.info("✓ Multi-word BM25 queries")
+
+
+def main():
+    """Run keyword index tests."""
+    print("🧪 KB KEYWORD INDEX TEST SUITE")
+    print("=" * 50)
+    
+    test_suites = [
+        ("Particle notation normalization", test_particle_notation_normalization),
+        ("Hyphenated letters are not particles", test_hyphenated_letters_are_not_particles),
+        ("Flavour words in prose", test_flavour_words_in_prose_are_not_quarks),
+        ("Multi-word queries", test_multi_word_queries),
+    ]
+    
+    failed = 0
+    for test_name, test_func in test_suites:
+        try:
+            test_func()
+            print(f"✓ PASS   {test_name}")
+        except Exception as e:
+            failed += 1
+            print(f"✗ FAIL   {test_name}: {e}")
+    
+    print(f"\nResult: {len(test_suites) - failed}/{len(test_suites)} tests passed")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+"""
+Tests for the process-wide LocalKBTool instance.
+
+Runs offline.
+"""
+
+import sys
+import logging
+import threading
+from pathlib import Path
+from unittest.mock import patch
+
+import numpy as np
+from annoy import AnnoyIndex
+
+# Add the project root to Python path
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from feynmancraft_adk.tools.kb import local
+from feynmancraft_adk.tools.kb.local import KBSnapshot, LocalKBTool, get_local_kb_tool
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+def test_configured_once_across_threads():
+    """Concurrent first use configures a single shared instance once."""
+    original = LocalKBTool._instance
+    LocalKBTool._instance = None
+    try:
+        with patch.object(local, "load_dotenv") as load_dotenv:
+            barrier = threading.Barrier(8)
+            tools = []
+            
+            def worker():
+                barrier.wait()
+                tools.append(LocalKBTool())
+            
+            threads = [threading.Thread(target=worker) for _ in range(8)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+            
+            assert len({id(tool) for tool in tools}) == 1
+            assert get_local_kb_tool() is tools[0]
+            assert load_dotenv.call_count == 1
+            assert tools[0].keyword_search("muon decay", 1)
+    finally:
+        LocalKBTool._instance = original
+    logger.info("✓ LocalKBTool is configured once")
+
+
+def test_duplicate_reactions_resolve_by_item_id():
+    """Records sharing a reaction each get their own Annoy item; hits resolve to the right record."""
+    reaction = "e^+ e^- \\to \\mu^+ \\mu^-"
+    records = [
+        {"reaction": reaction, "topic": "QED s-channel", "description": "Photon exchange"},
+        {"reaction": "\\mu^- \\to e^- \\bar{\\nu}_e \\nu_\\mu", "topic": "Muon decay"},
+        {"reaction": reaction, "topic": "Z exchange", "description": "Neutral current"},
+    ]
+    tool = get_local_kb_tool()
+    dim = tool.backend.dim
+    rng = np.random.default_rng(0)
+    vectors = rng.normal(size=(3, dim)).astype(np.float32)
+    
+    # Annoy items in a different order than the records
+    item_index = [2, 0, 1]
+    id_map = [records[p]["reaction"] for p in item_index]
+    index = AnnoyIndex(dim, "angular")
+    for item_id, position in enumerate(item_index):
+        index.add_item(item_id, vectors[position].tolist())
+    index.build(5)
+    
+    positions = tool._resolve_item_positions(item_index, id_map, records)
+    assert positions == [2, 0, 1], positions
+    snapshot = KBSnapshot.from_records(records)
+    snapshot.attach_index(index, tool.backend.model_name, id_map, positions)
+    
+    for position in (0, 2):
+        with patch.object(LocalKBTool, "get_embedding", return_value=vectors[position].tolist()):
+            hits = tool._vector_hits("q", 1, snapshot=snapshot)
+            exact = tool._vector_hits("q", 1, candidates={0, 2}, snapshot=snapshot)
+        assert hits[0][0] == position and exact[0][0] == position, (position, hits, exact)
+    
+    # An entry whose record changed reaction is dropped, not matched to another record
+    changed = [dict(record) for record in records]
+    changed[2]["reaction"] = "Z \\to q \\bar{q}"
+    assert tool._resolve_item_positions(item_index, id_map, changed) == [None, 0, 1]
+    logger.info("✓ Duplicate reactions resolve by item id")
+
+
+def main():
+    """Run LocalKBTool tests."""
+    print("🧪 LOCAL KB TOOL TEST SUITE")
+    print("=" * 50)
+    
+    test_suites = [
+        ("Configured once across threads", test_configured_once_across_threads),
+        ("Duplicate reactions resolve by item id", test_duplicate_reactions_resolve_by_item_id),
+    ]
+    
+    failed = 0
+    for test_name, test_func in test_suites:
+        try:
+            test_func()
+            print(f"✓ PASS   {test_name}")
+        except Exception as e:
+            failed += 1
+            print(f"✗ FAIL   {test_name}: {e}")
+    
+    print(f"\nResult: {len(test_suites) - failed}/{len(test_suites)} tests passed")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+"""
+Tests for the KB metadata posting lists and filtered search.
+
+Runs offline: query embeddings are taken from the stored Annoy index.
+"""
+
+import sys
+import logging
+from pathlib import Path
+from unittest.mock import patch
+
+# Add the project root to Python path
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from feynmancraft_adk.tools.kb import local
+from feynmancraft_adk.tools.kb.data_loader import filter_kb_by_particles, filter_kb_by_topic
+from feynmancraft_adk.tools.kb.local import LocalKBTool
+from feynmancraft_adk.tools.kb.metadata_index import KBFilter, MetadataIndex
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+def scan_by_particles(records, particles, k):
+    """The linear scan search_by_particles used before the posting lists."""
+    results = []
+    particles_lower = [p.lower() for p in particles]
+    for record in records:
+        record_particles = [p.lower() for p in record.get('particles', [])]
+        matches = sum(1 for p in particles_lower if any(p in rp for rp in record_particles))
+        if matches > 0:
+            result = record.copy()
+            result['particle_match_score'] = matches / len(particles)
+            results.append(result)
+    results.sort(key=lambda x: x['particle_match_score'], reverse=True)
+    return results[:k]
+
+
+def test_lookups_match_linear_scans():
+    """Posting-list lookups return what the old linear scans returned."""
+    tool = LocalKBTool()
+    records = local.current_snapshot().records
+    
+    for particles in (["e^-"], ["\\mu", "e^+"], ["W", "Z^0", "g"], ["nothing"]):
+        assert tool.search_by_particles(particles, k=10) == scan_by_particles(records, particles, 10)
+    for process_type in ("decay", "SCATTERING", "none"):
+        expected = [r for r in records if r.get('process_type', '').lower() == process_type.lower()]
+        assert tool.search_by_process_type(process_type) == expected
+    
+    for topic in ("decay", "Higgs", "xyz"):
+        expected = [r for r in records if topic.lower() in r.get("topic", "").lower()]
+        assert filter_kb_by_topic(records, topic) == expected
+    for particles in (["\\gamma"], ["E^-", "g"]):
+        lowered = [p.lower() for p in particles]
+        expected = [r for r in records if any(p.lower() in lowered for p in r.get("particles", []))]
+        assert filter_kb_by_particles(records, particles) == expected
+    logger.info("✓ Posting lists match linear scans")
+
+
+def test_filter_candidates():
+    """Particles match in any notation and conditions intersect."""
+    records = [
+        {"topic": "Muon decay", "process_type": "decay", "particles": ["\\mu^-", "e^-"]},
+        {"topic": "Z boson decay to leptons", "process_type": "decay", "particles": ["Z^0", "\\mu^+", "\\mu^-"]},
+        {"topic": "Electron-muon scattering", "process_type": "scattering", "particles": ["e^-", "\\mu^-", "\\gamma"]},
+        {"topic": "Z boson decay to quarks", "process_type": "decay", "particles": ["Z", "q"]},
+    ]
+    index = MetadataIndex(records)
+    
+    assert index.candidates(None) is None
+    assert index.candidates(KBFilter()) is None
+    assert index.candidates(KBFilter(particles=["muon"])) == {0, 1, 2}
+    assert index.candidates(KBFilter(particles=["μ⁻"])) == {0, 1, 2}
+    assert index.candidates(KBFilter(particles=["mu+"])) == {1}
+    assert index.candidates(KBFilter(particles=["Z", "muon"], process_type="Decay")) == {1}
+    assert index.candidates(KBFilter(topic="z boson", particles=["photon"])) == set()
+    assert index.candidates(KBFilter(where=lambda r: len(r["particles"]) == 3)) == {1, 2}
+    logger.info("✓ Filter candidates")
+
+
+def test_filtered_search():
+    """Vector and keyword search only return records that satisfy the filter."""
+    tool = LocalKBTool()
+    index, _ = tool._load_index()
+    snapshot = local.current_snapshot()
+    records = snapshot.records
+    kb_filter = KBFilter(particles=["muon"])
+    allowed = snapshot.metadata_index.candidates(kb_filter)
+    assert allowed
+    
+    # Query with the indexed vector of an allowed record: it must rank first
+    target = min(allowed)
+    query_vector = index.get_item_vector(snapshot.item_by_position[target])
+    with patch.object(LocalKBTool, "get_embedding", return_value=query_vector):
+        exact = tool._vector_hits("q", 3, allowed)
+        with patch.object(local, "FILTER_EXACT_MAX_CANDIDATES", 0):
+            overfetched = tool._vector_hits("q", 3, allowed)
+        results = tool.vector_search("q", k=3, filters=kb_filter)
+    
+    assert exact[0][0] == target and abs(exact[0][1] - 1.0) < 1e-3
+    assert [p for p, _ in overfetched] == [p for p, _ in exact][:len(overfetched)]
+    assert all(p in allowed for p, _ in exact + overfetched)
+    assert results[0]["reaction"] == records[target]["reaction"]
+    
+    keyword = tool.keyword_search("decay", k=10, filters=kb_filter)
+    allowed_topics = {records[p]["topic"] for p in allowed}
+    assert keyword and all(r["topic"] in allowed_topics for r in keyword)
+    assert tool.keyword_search("decay", filters=KBFilter(particles=["nonexistent"])) == []
+    
+    with patch.object(LocalKBTool, "_vector_hits", return_value=[]):
+        hybrid = tool.hybrid_search("Z boson decay", k=5, filters=KBFilter(particles=["Z"], process_type="decay"))
+    assert hybrid and all(r["process_type"] == "decay" for r in hybrid)
+    logger.info("✓ Filtered vector, keyword and hybrid search")
+
+
+def main():
+    """Run metadata index tests."""
+    print("🧪 KB METADATA INDEX TEST SUITE")
+    print("=" * 50)
+    
+    test_suites = [
+        ("Lookups match linear scans", test_lookups_match_linear_scans),
+        ("Filter candidates", test_filter_candidates),
+        ("Filtered search", test_filtered_search),
+    ]
+    
+    failed = 0
+    for test_name, test_func in test_suites:
+        try:
+            test_func()
+            print(f"✓ PASS   {test_name}")
+        except Exception as e:
+            failed += 1
+            print(f"✗ FAIL   {test_name}: {e}")
+    
+    print(f"\nResult: {len(test_suites) - failed}/{len(test_suites)} tests passed")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""
+Tests for maximal-marginal-relevance diversification of KB results.
+
+Runs offline: vectors come from the stored Annoy index.
+"""
+
+import sys
+import logging
+from pathlib import Path
+
+import numpy as np
+
+# Add the project root to Python path
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from feynmancraft_adk.shared_libraries.config import config
+from feynmancraft_adk.tools.kb import local
+from feynmancraft_adk.tools.kb.embeddings import mmr_select, normalize_rows
+from feynmancraft_adk.tools.kb.local import get_local_kb_tool
+from feynmancraft_adk.tools.kb.search import diversify_results, search_tikz_examples
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+def test_mmr_select():
+    """Near-duplicates are skipped unless relevance alone is requested."""
+    matrix = normalize_rows([[1.0, 0.0, 0.0], [0.99, 0.1, 0.0], [0.0, 1.0, 0.0], [0.0, 0.0, 0.0]])
+    relevance = [1.0, 0.95, 0.6, 0.1]
+    
+    assert mmr_select(relevance, matrix, 3, lambda_mult=1.0) == [0, 1, 2]
+    assert mmr_select(relevance, matrix, 3, lambda_mult=0.5) == [0, 2, 3]
+    assert mmr_select(relevance, matrix, 10, lambda_mult=0.5) == [0, 2, 3, 1]
+    assert mmr_select(relevance, matrix, 0) == []
+    assert mmr_select([], np.zeros((0, 3), dtype=np.float32), 3) == []
+    logger.info("✓ MMR selection")
+
+
+def test_diversify_results():
+    """Results are re-ordered by MMR and fall back to the ranking without vectors."""
+    results = [{"topic": t, "final_score": s} for t, s in (("a", 0.9), ("a'", 0.85), ("b", 0.5))]
+    vectors = normalize_rows([[1.0, 0.0], [1.0, 0.05], [0.0, 1.0]])
+    
+    assert [r["topic"] for r in diversify_results(results, vectors, k=2, lambda_mult=0.5)] == ["a", "b"]
+    assert [r["topic"] for r in diversify_results(results, None, k=2)] == ["a", "a'"]
+    logger.info("✓ diversify_results")
+
+
+def test_search_with_mmr():
+    """Search returns distinct results led by the most relevant one."""
+    tool = get_local_kb_tool()
+    records = local.current_snapshot().records
+    vectors = tool.record_vectors([records[3], {"topic": "not in the KB"}])
+    assert vectors is not None
+    assert abs(np.linalg.norm(vectors[0]) - 1.0) < 1e-5 and not vectors[1].any()
+    
+    search_config = config.search
+    saved = (search_config.mmr_enabled, search_config.mmr_lambda, search_config.mmr_top_k)
+    try:
+        search_config.mmr_enabled = False
+        plain = search_tikz_examples("electron positron annihilation", k=5)
+        search_config.mmr_enabled, search_config.mmr_lambda = True, 0.5
+        diverse = search_tikz_examples("electron positron annihilation", k=5)
+        search_config.mmr_top_k = 3
+        trimmed = search_tikz_examples("electron positron annihilation", k=5)
+    finally:
+        search_config.mmr_enabled, search_config.mmr_lambda, search_config.mmr_top_k = saved
+    
+    assert len(diverse) == 5 and len({r["topic"] for r in diverse}) == 5
+    assert diverse[0]["topic"] == plain[0]["topic"]
+    assert all("final_score" in r for r in diverse)
+    assert [r["topic"] for r in trimmed] == [r["topic"] for r in diverse[:3]]
+    logger.info("✓ Search with MMR")
+
+
+def main():
+    """Run MMR tests."""
+    print("🧪 KB MMR DIVERSIFICATION TEST SUITE")
+    print("=" * 50)
+    
+    test_suites = [
+        ("MMR selection", test_mmr_select),
+        ("Diversify results", test_diversify_results),
+        ("Search with MMR", test_search_with_mmr),
+    ]
+    
+    failed = 0
+    for test_name, test_func in test_suites:
+        try:
+            test_func()
+            print(f"✓ PASS   {test_name}")
+        except Exception as e:
+            failed += 1
+            print(f"✗ FAIL   {test_name}: {e}")
+    
+    print(f"\nResult: {len(test_suites) - failed}/{len(test_suites)} tests passed")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""
+Tests for the int8 quantized vector index with exact re-ranking.
+
+Runs offline on random vectors.
+"""
+
+import sys
+import logging
+from pathlib import Path
+
+import numpy as np
+
+# Add the project root to Python path
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from feynmancraft_adk.tools.kb.embeddings import normalize_rows, top_k_cosine
+from feynmancraft_adk.tools.kb.quantized_store import QuantizedIndex, quantize_int8
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+def test_quantization_error_and_size():
+    """Codes reconstruct unit rows closely at a quarter of the float size."""
+    rng = np.random.default_rng(0)
+    matrix = normalize_rows(rng.normal(size=(500, 768)))
+    codes, scales = quantize_int8(matrix, chunk_rows=64)
+    
+    reconstructed = codes.astype(np.float32) * scales[:, None]
+    assert np.abs(reconstructed - matrix).max() <= scales.max() / 2 + 1e-7
+    
+    index = QuantizedIndex(matrix)
+    assert matrix.nbytes / index.nbytes > 3.9
+    
+    # All-zero rows do not divide by zero
+    codes, scales = quantize_int8(np.zeros((2, 4), dtype=np.float32))
+    assert not codes.any() and np.isfinite(scales).all()
+    logger.info("✓ int8 codes are accurate and ~4x smaller")
+
+
+def test_search_matches_exact():
+    """Re-ranked results carry exact scores and match brute-force top-k."""
+    rng = np.random.default_rng(1)
+    centers = rng.normal(size=(50, 256))
+    matrix = normalize_rows(centers[rng.integers(0, 50, 5000)] + 0.5 * rng.normal(size=(5000, 256)))
+    index = QuantizedIndex(matrix, rerank_factor=4)
+    
+    hits = 0
+    for _ in range(50):
+        query = centers[rng.integers(0, 50)] + 0.5 * rng.normal(size=256)
+        expected = top_k_cosine(matrix, query, 5)
+        results = index.search(query, 5)
+        hits += len({row for row, _ in results} & {row for row, _ in expected})
+        
+        # Scores are exact cosine similarities, sorted descending
+        exact = dict(top_k_cosine(matrix, query, len(matrix)))
+        assert all(abs(score - exact[row]) < 1e-5 for row, score in results)
+        assert [s for _, s in results] == sorted((s for _, s in results), reverse=True)
+    
+    recall = hits / (50 * 5)
+    assert recall >= 0.98, recall
+    logger.info(f"✓ recall@5 = {recall:.3f}")
+
+
+def test_search_edge_cases():
+    """Zero queries, dimension mismatches and k larger than the index."""
+    index = QuantizedIndex(normalize_rows([[1.0, 0.0], [0.0, 1.0], [0.6, 0.8]]))
+    
+    assert index.search([0.0, 0.0], 3) == []
+    assert index.search([1.0, 0.0, 0.0], 3) == []
+    assert index.search([1.0, 0.0], 0) == []
+    assert [row for row, _ in index.search([1.0, 0.1], 10)] == [0, 2, 1]
+    logger.info("✓ Quantized search edge cases handled")
+
+
+def main():
+    """Run quantized index tests."""
+    print("🧪 KB QUANTIZED STORE TEST SUITE")
+    print("=" * 50)
+    
+    test_suites = [
+        ("Quantization error and size", test_quantization_error_and_size),
+        ("Search matches exact top-k", test_search_matches_exact),
+        ("Search edge cases", test_search_edge_cases),
+    ]
+    
+    failed = 0
+    for test_name, test_func in test_suites:
+        try:
+            test_func()
+            print(f"✓ PASS   {test_name}")
+        except Exception as e:
+            failed += 1
+            print(f"✗ FAIL   {test_name}: {e}")
+    
+    print(f"\nResult: {len(test_suites) - failed}/{len(test_suites)} tests passed")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,236 @@
+#!/usr/bin/env python3
+"""
+Tests for the KB search result cache (TTL, LRU, version invalidation, metrics).
+
+Runs offline; the hybrid search is replaced by a counting stub.
+"""
+
+import sys
+import time
+import asyncio
+import logging
+import tempfile
+from pathlib import Path
+from unittest.mock import patch
+
+# Add the project root to Python path
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from feynmancraft_adk.tool_metrics import get_cache_stats
+from feynmancraft_adk.tools.kb import search as kb_search
+from feynmancraft_adk.tools.kb import local as kb_local
+from feynmancraft_adk.tools.kb.local import KBSnapshot, LocalKBTool
+from feynmancraft_adk.tools.kb.result_cache import (
+    QueryResultCache,
+    files_version,
+    get_result_cache,
+    normalize_query,
+)
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+RESULTS = [{"reaction": "e^- e^+ \\to \\gamma \\gamma", "particles": ["e^-", "e^+"]}]
+
+
+def test_normalized_keys_and_copies():
+    """Near-identical queries share an entry and callers get private copies."""
+    assert normalize_query("  Electron   POSITRON annihilation? ") == "electron positron annihilation"
+    
+    cache = QueryResultCache("test_cache_keys")
+    cache.put("search", "electron positron annihilation", 5, "v1", RESULTS)
+    hit = cache.get("search", "Electron positron annihilation?", 5, "v1")
+    assert hit == RESULTS
+    hit[0]["final_score"] = 1.0
+    assert "final_score" not in cache.get("search", "electron positron annihilation", 5, "v1")[0]
+    assert cache.get("search", "electron positron annihilation", 3, "v1") is None
+    
+    stats = get_cache_stats("test_cache_keys")
+    assert stats["hits"] == 2 and stats["misses"] == 1
+    logger.info("✓ Normalized keys and defensive copies")
+
+
+def test_ttl_lru_and_version():
+    """Entries expire, the least recently used is evicted, version changes clear all."""
+    cache = QueryResultCache("test_cache_policy", max_entries=2, ttl_seconds=0.05)
+    cache.put("search", "a", 5, "v1", RESULTS)
+    time.sleep(0.1)
+    assert cache.get("search", "a", 5, "v1") is None
+    
+    cache.ttl_seconds = 60
+    cache.put("search", "a", 5, "v1", RESULTS)
+    cache.put("search", "b", 5, "v1", RESULTS)
+    cache.get("search", "a", 5, "v1")
+    cache.put("search", "c", 5, "v1", RESULTS)
+    assert cache.get("search", "b", 5, "v1") is None
+    assert cache.get("search", "a", 5, "v1") is not None
+    
+    assert cache.get("search", "a", 5, "v2") is None
+    assert len(cache) == 0
+    
+    stats = get_cache_stats("test_cache_policy")
+    assert stats["expirations"] == 1 and stats["evictions"] == 1
+    assert stats["invalidations"] == 2, "invalidations should count the dropped entries"
+    assert stats["size"] == 0
+    logger.info("✓ TTL, LRU eviction and version invalidation")
+
+
+def test_files_version_tracks_changes():
+    """Rewriting a tracked file changes the version token."""
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "feynman_kb.json"
+        missing = files_version([path], "model")
+        path.write_text("[]")
+        first = files_version([path], "model")
+        path.write_text("[{}]")
+        assert len({missing, first, files_version([path], "model")}) == 3
+        assert files_version([path], "other-model") != files_version([path], "model")
+    logger.info("✓ File version tokens")
+
+
+def test_search_async_uses_cache():
+    """Repeated async searches skip the hybrid search entirely."""
+    cache = get_result_cache()
+    if cache is None:
+        logger.info("Result cache disabled; skipping")
+        return
+    cache.clear()
+    
+    calls = []
+    
+    def fake_hybrid_search(self, query, k=5):
+        calls.append(query)
+        return [dict(r) for r in RESULTS], True
+    
+    with patch.object(LocalKBTool, "hybrid_search_with_status", fake_hybrid_search), \
+         patch.object(kb_search, "_kb_version", return_value="test-version"):
+        first = asyncio.run(kb_search.search_tikz_examples_async("Z boson decay", k=2))
+        second = asyncio.run(kb_search.search_tikz_examples_async("z boson decay ", k=2))
+    
+    assert calls == ["Z boson decay"]
+    assert first == second and second[0]["source_type"] == "local"
+    cache.clear()
+    logger.info("✓ search_tikz_examples_async served from cache")
+
+
+def test_keyword_only_results_cached_by_mode():
+    """Keyword-only results are cached too, apart from hybrid results."""
+    cache = get_result_cache()
+    if cache is None:
+        logger.info("Result cache disabled; skipping")
+        return
+    cache.clear()
+    
+    calls = []
+    vectors = {"used": True}
+    
+    def fake_hybrid_search(self, query, k=5):
+        calls.append(query)
+        return [dict(r) for r in RESULTS], vectors["used"] and kb_local.vector_search_available()
+    
+    def search():
+        return asyncio.run(kb_search.search_tikz_examples_async("Z boson decay", k=2))
+    
+    with patch.object(LocalKBTool, "hybrid_search_with_status", fake_hybrid_search), \
+         patch.object(kb_search, "_kb_version", return_value="test-version"):
+        with patch.object(kb_local, "_vector_unavailable_until", time.monotonic() + 60):
+            search()
+            search()
+        assert len(calls) == 1, "keyword-only results should be served from cache"
+        search()
+        assert len(calls) == 2, "hybrid search should not reuse keyword-only results"
+        search()
+        assert len(calls) == 2
+        
+        # Vector retrieval failed without a cooldown: not cached as hybrid
+        cache.clear()
+        vectors["used"] = False
+        search()
+        vectors["used"] = True
+        search()
+        assert len(calls) == 4, "keyword-only results were cached as hybrid"
+        search()
+        assert len(calls) == 4
+    cache.clear()
+    logger.info("✓ Keyword-only results cached by mode")
+
+
+def test_version_taken_after_kb_load():
+    """A cold search caches its results under the version of the loaded KB."""
+    cache = get_result_cache()
+    if cache is None:
+        logger.info("Result cache disabled; skipping")
+        return
+    cache.clear()
+    
+    events = []
+    real_get_local_kb_tool = kb_local.get_local_kb_tool
+    
+    def loading_tool():
+        events.append("load")
+        return real_get_local_kb_tool()
+    
+    def version():
+        events.append("version")
+        return "test-version"
+    
+    def fake_hybrid_search(self, query, k=5):
+        return [dict(r) for r in RESULTS], True
+    
+    with patch.object(kb_local, "get_local_kb_tool", loading_tool), \
+         patch.object(LocalKBTool, "hybrid_search_with_status", fake_hybrid_search), \
+         patch.object(kb_search, "_kb_version", side_effect=version):
+        asyncio.run(kb_search.search_tikz_examples_async("Z boson decay", k=2))
+    
+    assert events[:2] == ["load", "version"], events
+    cache.clear()
+    logger.info("✓ Cache version taken after the KB is loaded")
+
+
+def test_kb_version_uses_snapshot_counters():
+    """The version follows snapshot swaps and index attachment without reading files."""
+    kb_search._kb_version()
+    snapshot = KBSnapshot.from_records([dict(r) for r in RESULTS])
+    with patch.object(kb_local, "_snapshot", snapshot), \
+         patch("os.stat", side_effect=AssertionError("_kb_version read a file")):
+        first = kb_search._kb_version()
+        assert kb_search._kb_version() == first
+        snapshot.attach_index(object(), "test-model", ["reaction"], [0])
+        attached = kb_search._kb_version()
+        snapshot.version += 1
+        assert len({first, attached, kb_search._kb_version()}) == 3
+    logger.info("✓ KB version from snapshot counters")
+
+
+def main():
+    """Run result cache tests."""
+    print("🧪 KB RESULT CACHE TEST SUITE")
+    print("=" * 50)
+    
+    test_suites = [
+        ("Normalized keys and copies", test_normalized_keys_and_copies),
+        ("TTL, LRU and version", test_ttl_lru_and_version),
+        ("File version tokens", test_files_version_tracks_changes),
+        ("Async search uses cache", test_search_async_uses_cache),
+        ("Keyword-only results cached by mode", test_keyword_only_results_cached_by_mode),
+        ("Version taken after KB load", test_version_taken_after_kb_load),
+        ("KB version from snapshot counters", test_kb_version_uses_snapshot_counters),
+    ]
+    
+    failed = 0
+    for test_name, test_func in test_suites:
+        try:
+            test_func()
+            print(f"✓ PASS   {test_name}")
+        except Exception as e:
+            failed += 1
+            print(f"✗ FAIL   {test_name}: {e}")
+    
+    print(f"\nResult: {len(test_suites) - failed}/{len(test_suites)} tests passed")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
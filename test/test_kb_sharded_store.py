@@ -0,0 +1,204 @@
+#!/usr/bin/env python3
+"""
+Tests for the sharded KB layout (JSONL shards with per-shard Annoy indexes).
+
+Uses the local n-gram embedding backend, so no API key is required.
+"""
+
+import sys
+import json
+import logging
+import tempfile
+from pathlib import Path
+from unittest.mock import patch
+
+import numpy as np
+
+# Add the project root to Python path
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from feynmancraft_adk.tools.kb import local
+from feynmancraft_adk.tools.kb.data_loader import iter_kb_examples, load_kb_examples
+from feynmancraft_adk.tools.kb.embedding_backends import HashedNgramEmbeddingBackend
+from feynmancraft_adk.tools.kb.sharded_store import ShardedKB, write_sharded_kb
+from feynmancraft_adk.tools.kb.embeddings import top_k_cosine
+from feynmancraft_adk.tools.kb.index_builder import record_index_text
+from feynmancraft_adk.tools.kb.local import KBSnapshot, LocalKBTool, get_local_kb_tool
+from feynmancraft_adk.tools.kb.metadata_index import KBFilter
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+KB_PATH = project_root / "feynmancraft_adk" / "data" / "feynman_kb.json"
+
+
+def test_sharded_roundtrip_and_search():
+    """Shards round-trip records and fan-out search matches a flat search."""
+    records = load_kb_examples(str(KB_PATH))
+    backend = HashedNgramEmbeddingBackend(dim=256)
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        manifest = write_sharded_kb(iter(records), Path(tmp), backend=backend, shard_size=10, n_trees=20, n_jobs=1)
+        assert len(manifest["shards"]) == 5 and manifest["num_records"] == len(records)
+        
+        kb = ShardedKB(Path(tmp), max_workers=4, max_open_shards=2)
+        try:
+            assert kb.open_shard_count() == 0
+            assert kb.get_record(23) == records[23]
+            assert kb.open_shard_count() == 1
+            assert list(iter_kb_examples(tmp)) == records
+            try:
+                load_kb_examples(tmp)
+                raise AssertionError("a sharded KB should not be loaded whole")
+            except ValueError:
+                pass
+            
+            # Exact search over all records as the reference
+            matrix = np.asarray(backend.embed_documents([record_index_text(r) for r in records]), dtype=np.float32)
+            for query in ["muon decay", "Higgs to two photons", "quark gluon vertex"]:
+                vector = backend.embed_query(query)
+                expected = [i for i, _ in top_k_cosine(matrix, vector, 3)]
+                hits = kb.search(vector, k=3)
+                assert [position for position, _ in hits] == expected, query
+                # Scores are cosine similarities, like every other vector search
+                assert np.allclose([score for _, score in hits], [c for _, c in top_k_cosine(matrix, vector, 3)], atol=1e-4)
+            
+            assert kb.open_shard_count() == 2
+            # Restricting to one shard only searches (and opens) that shard
+            expected = [i for i, _ in top_k_cosine(matrix[:10], vector, 3)]
+            assert [p for p, _ in kb.search(vector, k=3, shard_ids=[0])] == expected
+        finally:
+            kb.close()
+    logger.info("✓ Sharded KB round trip and fan-out search")
+
+
+def write_test_kb(root, records, backend, **kwargs):
+    return write_sharded_kb(iter(records), Path(root), backend=backend, n_trees=10, n_jobs=1, **kwargs)
+
+
+def test_shards_close_explicitly():
+    """Evicted shards close after their last user; close() closes the rest."""
+    records = load_kb_examples(str(KB_PATH))[:20]
+    backend = HashedNgramEmbeddingBackend(dim=64)
+    with tempfile.TemporaryDirectory() as tmp:
+        write_test_kb(tmp, records, backend, shard_size=10)
+        kb = ShardedKB(Path(tmp), max_open_shards=1)
+        with kb._shard(0) as first:
+            assert kb.get_record(15) == records[15]
+            assert first.released and first.fd is not None, "in use, so not closed yet"
+        assert first.fd is None
+        
+        with kb._shard(1) as second:
+            pass
+        kb.close()
+        assert second.fd is None and kb.open_shard_count() == 0
+    logger.info("✓ Shards are closed explicitly")
+
+
+def test_local_tool_searches_shards():
+    """With a sharded KB, every LocalKBTool search reads from the shards and matches a flat KB."""
+    records = load_kb_examples(str(KB_PATH))
+    backend = HashedNgramEmbeddingBackend(dim=256)
+    tool = get_local_kb_tool()
+    with tempfile.TemporaryDirectory() as tmp:
+        write_test_kb(tmp, records, backend, shard_size=10)
+        kb = ShardedKB(Path(tmp))
+        flat = KBSnapshot.from_records(records)
+        query = "Higgs to two photons"
+        try:
+            with patch.object(local, "_snapshot", KBSnapshot.from_sharded(kb)), \
+                 patch.object(LocalKBTool, "get_embedding", lambda self, text: backend.embed_query(text)):
+                expected = [kb.get_record(p) for p, _ in kb.search(backend.embed_query(query), 3)]
+                vector = tool.vector_search(query, k=3)
+                assert [r["reaction"] for r in vector] == [r["reaction"] for r in expected]
+                assert all("similarity_score" in r for r in vector)
+                assert tool.record_vectors(vector) is None
+                
+                # Keyword scores use the statistics of the whole KB, so they equal a flat index's
+                for text in ["muon decay", "electron positron annihilation", "gluon"]:
+                    sharded_hits = [(r["reaction"], round(r["keyword_score"], 9)) for r in tool.keyword_search(text, 5)]
+                    flat_hits = [(records[p]["reaction"], round(score, 9)) for p, score in flat.keyword_index.search(text, 5)]
+                    assert sharded_hits == flat_hits, text
+                hybrid = tool.hybrid_search(query, k=3)
+                assert len(hybrid) == 3 and all("hybrid_score" in r for r in hybrid)
+                
+                # Filters are resolved from the shards' metadata indexes
+                kb_filter = KBFilter(process_type="decay")
+                allowed = flat.metadata_index.candidates(kb_filter)
+                assert kb.candidates(kb_filter) == allowed
+                for result in tool.vector_search(query, 5, kb_filter) + tool.hybrid_search(query, 5, kb_filter):
+                    assert result["process_type"].lower() == "decay"
+                matrix = np.asarray(backend.embed_documents([record_index_text(r) for r in records]), dtype=np.float32)
+                rows = sorted(allowed)
+                exact = [rows[i] for i, _ in top_k_cosine(matrix[rows], backend.embed_query(query), 3)]
+                assert [r["reaction"] for r in tool.vector_search(query, 3, kb_filter)] == [records[p]["reaction"] for p in exact]
+                
+                by_particles = tool.search_by_particles(["mu"], k=50)
+                assert by_particles and all(any("mu" in p.lower() for p in r["particles"]) for r in by_particles)
+                assert len(tool.search_by_process_type("decay")) == len(allowed)
+                with_diagram = next(p for p, signature in enumerate(flat.topology_index.signatures) if signature)
+                topology = tool.search_by_topology(records[with_diagram]["tikz"], k=3)
+                flat_topology = flat.topology_index.search(records[with_diagram]["tikz"], 3)
+                assert [(r["reaction"], r["topology_score"]) for r in topology] == \
+                    [(records[p]["reaction"], score) for p, score in flat_topology]
+                assert topology[0]["topology_score"] == 1.0
+        finally:
+            kb.close()
+    logger.info("✓ LocalKBTool searches the sharded KB")
+
+
+def test_sharded_kb_is_not_loaded_whole():
+    """Loading and reloading a sharded KB reads only its manifest, never the JSON KB."""
+    records = load_kb_examples(str(KB_PATH))[:20]
+    backend = HashedNgramEmbeddingBackend(dim=64)
+    tool = get_local_kb_tool()
+    saved = local.current_snapshot()
+    with tempfile.TemporaryDirectory() as tmp:
+        write_test_kb(tmp, records, backend, shard_size=10)
+        kb = ShardedKB(Path(tmp))
+        try:
+            with patch.object(local, "get_sharded_kb", return_value=kb), \
+                 patch.object(LocalKBTool, "_read_records", side_effect=AssertionError("the JSON KB was read")), \
+                 patch.object(LocalKBTool, "_prepare_index", side_effect=AssertionError("the JSON KB was indexed")):
+                local._snapshot = None
+                tool._load_kb_data()
+                assert local.current_snapshot().sharded_kb is kb and not local.current_snapshot().records
+                assert tool.reload(force=True)
+                assert local.current_snapshot().num_records == 20
+                assert kb.open_shard_count() == 0, "no shard is opened before a search"
+                assert tool.keyword_search("decay", 3)
+        finally:
+            local._snapshot = saved
+            kb.close()
+    logger.info("✓ Sharded KB is not loaded whole")
+
+
+def main():
+    """Run sharded KB tests."""
+    print("🧪 KB SHARDED STORE TEST SUITE")
+    print("=" * 50)
+    
+    test_suites = [
+        ("Round trip and fan-out search", test_sharded_roundtrip_and_search),
+        ("Shards close explicitly", test_shards_close_explicitly),
+        ("LocalKBTool searches shards", test_local_tool_searches_shards),
+        ("Sharded KB is not loaded whole", test_sharded_kb_is_not_loaded_whole),
+    ]
+    
+    failed = 0
+    for test_name, test_func in test_suites:
+        try:
+            test_func()
+            print(f"✓ PASS   {test_name}")
+        except Exception as e:
+            failed += 1
+            print(f"✗ FAIL   {test_name}: {e}")
+    
+    print(f"\nResult: {len(test_suites) - failed}/{len(test_suites)} tests passed")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
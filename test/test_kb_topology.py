@@ -0,0 +1,215 @@
+#!/usr/bin/env python3
+"""
+Tests for topology parsing and topology search of KB TikZ diagrams.
+
+Runs offline on synthetic diagrams in TikZ-Feynman and plain TikZ syntax.
+"""
+
+import sys
+import logging
+from pathlib import Path
+
+# Add the project root to Python path
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from feynmancraft_adk.tools.kb.data_loader import load_kb_examples
+from feynmancraft_adk.tools.kb.local import KBSnapshot, get_local_kb_tool
+from feynmancraft_adk.tools.kb.topology import (
+    FEATURE_NAMES,
+    TopologyIndex,
+    graph_hash,
+    is_isomorphic,
+    parse_tikz,
+    topology_signature,
+)
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+S_CHANNEL = (
+    "\\feynmandiagram [horizontal=a to b] {\n"
+    "  i1 [particle=\\(e^{-}\\)] -- [fermion] a -- [fermion] i2 [particle=\\(e^{+}\\)],\n"
+    "  a -- [photon, edge label=\\(\\gamma\\)] b,\n"
+    "  f1 [particle=\\(\\mu^{+}\\)] -- [fermion] b -- [fermion] f2 [particle=\\(\\mu^{-}\\)],\n"
+    "};"
+)
+# The same diagram drawn with plain TikZ paths (comments and extra markers included)
+S_CHANNEL_PLAIN = (
+    "\\begin{tikzpicture}[thick]\n"
+    "  % incoming pair\n"
+    "  \\draw[fermion] (-2,1) node[left] {$e^-$} -- (-1,0);\n"
+    "  \\draw[fermion] (-1,0) -- (-2,-1) node[left] {$e^+$};\n"
+    "  \\draw[photon] (-1,0) -- (1,0);\n"
+    "  \\draw[fermion] (2,1) node[right] {$\\mu^+$} -- (1,0);\n"
+    "  \\draw[fermion] (1,0) -- (2,-1) node[right] {$\\mu^-$};\n"
+    "  \\draw[->] (-0.5,0.3) -- (0.5,0.3);\n"
+    "  \\fill (-1,0) circle (1.5pt);\n"
+    "\\end{tikzpicture}"
+)
+# t-channel exchange: incoming and outgoing legs are told apart by position
+T_CHANNEL = (
+    "\\begin{tikzpicture}\n\\begin{feynman}\n"
+    "  \\vertex (p1) at (-2,1) {\\(e^-\\)};\n  \\vertex (p2) at (2,1) {\\(e^-\\)};\n"
+    "  \\vertex (a) at (0,1);\n  \\vertex (b) at (0,-1);\n"
+    "  \\vertex (p3) at (-2,-1) {\\(\\mu^-\\)};\n  \\vertex (p4) at (2,-1) {\\(\\mu^-\\)};\n"
+    "  \\diagram* {\n"
+    "    (p1) -- [fermion] (a) -- [fermion] (p2),\n"
+    "    (a) -- [photon] (b),\n"
+    "    (p3) -- [fermion] (b) -- [fermion] (p4),\n"
+    "  };\n"
+    "\\end{feynman}\n\\end{tikzpicture}"
+)
+BOX = (
+    "\\feynmandiagram {\n"
+    "  {[edges=fermion] i1 -- a -- b -- f1},\n"
+    "  {[edges=fermion] i2 -- c -- d -- f2},\n"
+    "  a -- [boson] c, b -- [boson] d,\n"
+    "};"
+)
+PENGUIN = (
+    "\\feynmandiagram {\n"
+    "  i1 -- [fermion] a -- [fermion] b -- [fermion] c -- [fermion] f1,\n"
+    "  a -- [boson, half left] c,\n"
+    "  b -- [gluon] d,\n"
+    "  i2 -- [fermion] d -- [fermion] f2,\n"
+    "};"
+)
+
+
+def test_parse_both_syntaxes():
+    """TikZ-Feynman and plain TikZ drawings of a diagram give the same graph."""
+    feynman = parse_tikz(S_CHANNEL)
+    plain = parse_tikz(S_CHANNEL_PLAIN)
+
+    assert sorted(e[2] for e in feynman.edges) == ["fermion"] * 4 + ["photon"]
+    assert feynman.vertices["i1"] == "\\(e^{-}\\)"
+    assert len(plain.edges) == 5, "the momentum arrow and the vertex dot are not lines"
+    assert plain.vertices["(-2,1)"] == "$e^-$"
+    assert len(feynman.external_vertices()) == 4 and len(feynman.internal_vertices()) == 2
+    assert is_isomorphic(feynman, plain)
+    assert graph_hash(feynman) == graph_hash(plain)
+
+    # The Z decay drawn in the bundled KB: named coordinate plus numeric endpoints
+    z_decay = next(e for e in load_kb_examples() if "coordinate" in e["tikz"])
+    graph = parse_tikz(z_decay["tikz"])
+    assert sorted(e[2] for e in graph.edges) == ["boson", "fermion", "fermion"]
+    assert graph.internal_vertices() == ["v"]
+
+    assert parse_tikz("% TikZ code not yet available.").is_empty()
+    logger.info("✓ Both syntaxes")
+
+
+def test_canonical_hash():
+    """The hash ignores names and drawing order but not particle types."""
+    renamed = "\\feynmandiagram { p -- [fermion] u -- [fermion] q, u -- [photon] w, r -- [fermion] w -- [fermion] s };"
+    reordered = "\\feynmandiagram { f2 -- [fermion] b, b -- [fermion] f1, b -- [photon] a, i2 -- [fermion] a, a -- [fermion] i1 };"
+    gluon = S_CHANNEL.replace("photon", "gluon")
+
+    base = graph_hash(parse_tikz(S_CHANNEL))
+    assert graph_hash(parse_tikz(renamed)) == base
+    assert graph_hash(parse_tikz(reordered)) == base
+    assert graph_hash(parse_tikz(gluon)) != base
+    assert graph_hash(parse_tikz(gluon), typed=False) == graph_hash(parse_tikz(S_CHANNEL), typed=False)
+    assert not is_isomorphic(parse_tikz(gluon), parse_tikz(S_CHANNEL))
+    assert is_isomorphic(parse_tikz(gluon), parse_tikz(S_CHANNEL), typed=False)
+    assert graph_hash(parse_tikz(BOX)) != graph_hash(parse_tikz(PENGUIN))
+    logger.info("✓ Canonical hash")
+
+
+def test_classification_and_features():
+    """Common topologies are named and counted."""
+    names = {
+        "s-channel": S_CHANNEL,
+        "t-channel": T_CHANNEL,
+        "box": BOX,
+        "penguin": PENGUIN,
+        "vertex": "\\feynmandiagram { a -- [boson] v, v -- [fermion] b, v -- [anti fermion] c };",
+        "self-energy": "\\feynmandiagram { i -- [photon] a -- [fermion, half left] b -- [photon] f, a -- [fermion, half right] b };",
+    }
+    for name, source in names.items():
+        signature = topology_signature(parse_tikz(source))
+        assert signature.name == name, (name, signature.name)
+
+    features = dict(zip(FEATURE_NAMES, topology_signature(parse_tikz(BOX)).features))
+    assert features["external_legs"] == 4
+    assert features["loops"] == 1
+    assert features["propagators"] == 4
+    assert features["fermion"] == 6 and features["boson"] == 2
+    assert features["trivalent_vertices"] == 4
+    assert topology_signature(parse_tikz("")) is None
+    logger.info("✓ Classification and features")
+
+
+def test_topology_index_search():
+    """Exact matches come first and the rest are filled by the nearest topologies."""
+    records = [
+        {"topic": "Bhabha s-channel", "tikz": S_CHANNEL},
+        {"topic": "Moller t-channel", "tikz": T_CHANNEL},
+        {"topic": "Mixing box", "tikz": BOX},
+        {"topic": "Gluonic penguin", "tikz": PENGUIN},
+        {"topic": "No diagram", "tikz": "% TikZ code not yet available."},
+    ]
+    index = KBSnapshot.from_records(records).topology_index
+    assert isinstance(index, TopologyIndex)
+    assert index.signatures[4] is None and index.features.shape == (4, len(FEATURE_NAMES))
+
+    hits = index.search(S_CHANNEL_PLAIN, k=3)
+    # s- and t-channel are the same graph; only the drawing differs
+    assert [p for p, s in hits if s == 1.0] == [0, 1]
+    assert len(hits) == 3 and hits[2][1] < 1.0
+
+    assert index.search(S_CHANNEL_PLAIN, k=3, exact_only=True) == [(0, 1.0), (1, 1.0)]
+    assert index.search(S_CHANNEL.replace("photon", "gluon"), k=5, exact_only=True) == []
+    assert len(index.search(S_CHANNEL.replace("photon", "gluon"), k=5, typed=False, exact_only=True)) == 2
+    assert index.search("box") == [(2, 1.0)]
+    assert index.search(index.signatures[3].hash) == [(3, 1.0)]
+    assert index.search("no diagram here") == []
+    logger.info("✓ Topology index search")
+
+
+def test_local_tool_search_by_topology():
+    """The local KB finds its Z decay example from a redrawn copy."""
+    redrawn = (
+        "\\feynmandiagram [horizontal=z to v] {"
+        " z [particle=\\(Z\\)] -- [boson] v -- [fermion] f1 [particle=\\(\\ell^+\\)],"
+        " v -- [anti fermion] f2 [particle=\\(\\ell^-\\)] };"
+    )
+    results = get_local_kb_tool().search_by_topology(redrawn, k=1, exact_only=True)
+    assert len(results) == 1
+    assert "coordinate" in results[0]["tikz"]
+    assert results[0]["topology_score"] == 1.0
+    assert results[0]["topology"] == "vertex"
+    assert results[0]["topology_hash"] == graph_hash(parse_tikz(redrawn))
+    logger.info("✓ Local tool topology search")
+
+
+def main():
+    """Run topology tests."""
+    print("🧪 KB TOPOLOGY TEST SUITE")
+    print("=" * 50)
+
+    test_suites = [
+        ("Both syntaxes", test_parse_both_syntaxes),
+        ("Canonical hash", test_canonical_hash),
+        ("Classification and features", test_classification_and_features),
+        ("Topology index search", test_topology_index_search),
+        ("Local tool topology search", test_local_tool_search_by_topology),
+    ]
+
+    failed = 0
+    for test_name, test_func in test_suites:
+        try:
+            test_func()
+            print(f"✓ PASS   {test_name}")
+        except Exception as e:
+            failed += 1
+            print(f"✗ FAIL   {test_name}: {e}")
+
+    print(f"\nResult: {len(test_suites) - failed}/{len(test_suites)} tests passed")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""
+Tests for the vectorized KB similarity search.
+
+Uses the stored KB embeddings, so no API key is required.
+"""
+
+import sys
+import logging
+from pathlib import Path
+
+import numpy as np
+
+# Add the project root to Python path
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from feynmancraft_adk.tools.kb.embeddings import (
+    cosine_similarity,
+    normalize_rows,
+    top_k_cosine,
+)
+from feynmancraft_adk.tools.kb.embedding_manager import KBEmbeddingManager
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+def test_top_k_matches_brute_force():
+    """Matrix top-k must agree with the per-pair cosine loop."""
+    rng = np.random.default_rng(0)
+    vectors = rng.normal(size=(200, 32))
+    query = rng.normal(size=32)
+    
+    expected = sorted(
+        ((cosine_similarity(list(v), list(query)), i) for i, v in enumerate(vectors)),
+        reverse=True,
+    )[:7]
+    results = top_k_cosine(normalize_rows(vectors), query, 7)
+    
+    assert [row for row, _ in results] == [i for _, i in expected]
+    for (_, score), (expected_score, _) in zip(results, expected):
+        assert abs(score - expected_score) < 1e-5
+    logger.info("✓ top_k_cosine matches brute-force cosine similarity")
+
+
+def test_top_k_edge_cases():
+    """Zero vectors, dimension mismatches and k larger than the matrix."""
+    matrix = normalize_rows([[1.0, 0.0], [0.0, 0.0], [0.0, 2.0]])
+    
+    assert top_k_cosine(matrix, [0.0, 0.0], 3) == []
+    assert top_k_cosine(matrix, [1.0, 0.0, 0.0], 3) == []
+    assert top_k_cosine(matrix, [1.0, 0.0], 0) == []
+    assert [row for row, _ in top_k_cosine(matrix, [1.0, 0.1], 10)] == [0, 2, 1]
+    logger.info("✓ top_k_cosine edge cases handled")
+
+
+def test_manager_search_with_stored_embeddings():
+    """The KB manager returns the example itself as its own best match."""
+    manager = KBEmbeddingManager()
+    manager.reset()
+    try:
+        from feynmancraft_adk.tools.kb.data_loader import load_kb_examples
+        manager.kb_examples = load_kb_examples()
+        assert manager.load_embeddings(), "stored KB embeddings could not be loaded"
+        manager.build_embedding_matrix()
+        
+        assert manager.embedding_matrix.dtype == np.float32
+        assert manager.embedding_matrix.shape[0] == len(manager.matrix_indices)
+        
+        for idx in (0, 17, len(manager.kb_examples) - 1):
+            hits = manager.search(manager.get_embedding(idx), top_k=3)
+            assert hits[0][0] == idx
+            assert abs(hits[0][1] - 1.0) < 1e-4
+        logger.info("✓ KB manager matrix search finds each example first")
+    finally:
+        manager.reset()
+
+
+def main():
+    """Run vector search tests."""
+    print("🧪 KB VECTOR SEARCH TEST SUITE")
+    print("=" * 50)
+    
+    test_suites = [
+        ("Top-k vs brute force", test_top_k_matches_brute_force),
+        ("Top-k edge cases", test_top_k_edge_cases),
+        ("Manager search", test_manager_search_with_stored_embeddings),
+    ]
+    
+    failed = 0
+    for test_name, test_func in test_suites:
+        try:
+            test_func()
+            print(f"✓ PASS   {test_name}")
+        except Exception as e:
+            failed += 1
+            print(f"✗ FAIL   {test_name}: {e}")
+    
+    print(f"\nResult: {len(test_suites) - failed}/{len(test_suites)} tests passed")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
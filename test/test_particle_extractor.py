@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+"""
+Tests for the shared particle extractor.
+
+Runs offline on the built-in particle table.
+"""
+
+import sys
+import logging
+from pathlib import Path
+
+# Add the project root to Python path
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from feynmancraft_adk.integrations.agent_search_integration import extract_particles_from_query
+from feynmancraft_adk.tools.physics.particle_extractor import _extract, extract_particles
+from feynmancraft_adk.tools.physics.physics_tools import parse_natural_language_physics
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+def test_notations():
+    """Words, LaTeX, Unicode and symbols give the same canonical names."""
+    same = {
+        ("e-", "nu_e_bar"): [
+            "electron and electron antineutrino",
+            "e^- and \\bar{\\nu}_e",
+            "e⁻ and ν̄ₑ",
+            "e- and anti-nu_e",
+        ],
+        ("u", "u", "d"): ["an up quark, an up quark and a down quark", "\\(u\\) \\(u\\) \\(d\\)"],
+        ("e+", "e-", "gamma", "gamma"): ["e^+e^- → γγ", "e+ e- -> gamma gamma", "positron, electron: photon, photon"],
+    }
+    for expected, queries in same.items():
+        for query in queries:
+            extraction = extract_particles(query)
+            assert extraction.particles == expected, (query, extraction.particles)
+
+    assert extract_particles("electron antineutrino").particles == ("nu_e_bar",), "longest name wins"
+    assert extract_particles("muon neutrino").particles == ("nu_mu",)
+    assert extract_particles("(e^-) and \"muon\".").particles == ("e-", "mu-")
+    assert extract_particles("u u d -> p").particles == ("u", "u", "d", "p")
+    assert extract_particles("J/psi and nu(e)").particles == ("J/psi", "nu_e")
+    logger.info("✓ Notations")
+
+
+def test_prose_is_not_particles():
+    """Letters and flavour words in ordinary prose are not read as particles."""
+    for query in (
+        "Top of the list, e.g. the e-mail about p-wave states",
+        "Scale it up and down by a factor",
+        "What is the s-channel or t-channel amplitude?",
+    ):
+        assert extract_particles(query).mentions == (), query
+
+    # With notation or inside a process they are particles
+    assert extract_particles("top quark pair").particles == ("t",)
+    assert extract_particles("\\bar{t} and b~").particles == ("t_bar", "b_bar")
+    assert extract_particles("u d~ -> W+").particles == ("u", "d_bar", "W+")
+    assert extract_particles("Z decay to leptons").particles == ("Z0",)
+    logger.info("✓ Prose is not particles")
+
+
+def test_families_and_process():
+    """Family words keep all candidates; process notation is parsed."""
+    extraction = extract_particles("tau decay with neutrinos and a W boson")
+    assert extraction.particles == ("tau-",)
+    assert [m.names for m in extraction.mentions if m.ambiguous] == [("nu_e", "nu_mu", "nu_tau"), ("W+", "W-")]
+    assert extraction.names == ["tau-", "nu_e", "nu_mu", "nu_tau", "W+", "W-"]
+    assert extraction.process_terms == ("decay",)
+    assert extraction.process is None
+
+    assert extract_particles("W± and pions").names == ["W+", "W-", "pi+", "pi-", "pi0"]
+
+    process = extract_particles("\\mu^- \\to e^- \\bar{\\nu}_e \\nu_\\mu")
+    assert process.process == (("mu-",), ("e-", "nu_e_bar", "nu_mu"))
+    assert extract_particles("X -> e+ e-").process is None
+
+    mention = extract_particles("the muon decays").mentions[0]
+    assert (mention.text, mention.start, mention.end) == ("muon", 4, 8)
+    assert extract_particles("the muon decays").process_terms == ("decay",)
+    logger.info("✓ Families and process")
+
+
+def test_cache():
+    """Queries that differ only in whitespace share one cached extraction."""
+    _extract.cache_clear()
+    first = extract_particles("electron  positron\tannihilation")
+    second = extract_particles(" electron positron annihilation ")
+    assert first is second
+    assert _extract.cache_info().hits == 1
+    logger.info("✓ Cache")
+
+
+def test_parsers_agree():
+    """The physics tools parser and the agent search extraction report the same particles."""
+    for query in (
+        "electron muon scattering with photon exchange",
+        "two up quarks and one down quark",
+        "Higgs decay to W bosons",
+        "e^+e^- → μ^+μ^-",
+    ):
+        parsed = parse_natural_language_physics(query)
+        assert parsed["identified_particles"] == extract_particles_from_query(query), query
+
+    assert extract_particles_from_query("electron muon scattering with photon exchange") == ["e-", "mu-", "gamma"]
+    interpreted = parse_natural_language_physics("electron and positron collide")
+    assert interpreted["status"] == "success" and interpreted["identified_particles"] == ["e-", "e+"]
+    assert parse_natural_language_physics("what is physics")["status"] == "unclear"
+    logger.info("✓ Parsers agree")
+
+
+def main():
+    """Run particle extractor tests."""
+    print("🧪 PARTICLE EXTRACTOR TEST SUITE")
+    print("=" * 50)
+
+    test_suites = [
+        ("Notations", test_notations),
+        ("Prose is not particles", test_prose_is_not_particles),
+        ("Families and process", test_families_and_process),
+        ("Cache", test_cache),
+        ("Parsers agree", test_parsers_agree),
+    ]
+
+    failed = 0
+    for test_name, test_func in test_suites:
+        try:
+            test_func()
+            print(f"✓ PASS   {test_name}")
+        except Exception as e:
+            failed += 1
+            print(f"✗ FAIL   {test_name}: {e}")
+
+    print(f"\nResult: {len(test_suites) - failed}/{len(test_suites)} tests passed")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,205 @@
+#!/usr/bin/env python3
+"""
+Tests for the local PDG particle snapshot.
+
+Runs offline: stores are written from hand-made records into a temporary
+directory, so the pdg package is not needed.
+"""
+
+import sys
+import asyncio
+import logging
+import sqlite3
+import tempfile
+import time
+from pathlib import Path
+from types import SimpleNamespace
+from unittest import mock
+
+# Add the project root to Python path
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from feynmancraft_adk.shared_libraries.config import config
+from feynmancraft_adk.tools.physics import physics_tools
+from feynmancraft_adk.tools.physics.particle_store import (
+    MC_IDS,
+    ParticleRecord,
+    ParticleStore,
+    _conjugate,
+    _record_from_pdg,
+    get_particle_store,
+    write_particle_store,
+)
+from feynmancraft_adk.tools.physics.conservation import PARTICLE_NAMES
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+def sample_records():
+    muon = ParticleRecord(
+        name="mu-", description="mu-", pdgid="S004", mcid=13,
+        mass=0.1056583755, mass_error=2.3e-12, lifetime=2.1969811e-6, charge=-1.0, spin="1/2",
+        quantum_numbers={"J": "1/2"}, antiparticle="mu+", aliases=["mu-"],
+        decays=[{"description": "mu- --> e- nubar(e) nu(mu)", "branching_fraction": 1.0, "display": "~100%"}],
+    )
+    pion = ParticleRecord(
+        name="pi+", description="pi+", pdgid="S008", mcid=211,
+        mass=0.13957039, width=None, charge=1.0, spin="0",
+        quantum_numbers={"J": "0", "P": "-", "I": "1", "G": "-"}, antiparticle="pi-", aliases=["pi+"],
+        decays=[
+            {"description": "pi+ --> mu+ nu(mu)", "branching_fraction": 0.9998770, "display": "(99.98770 +- 0.00004) %"},
+            {"description": "pi+ --> e+ nu(e)", "branching_fraction": 1.230e-4, "display": "(1.230 +- 0.004) E-4"},
+        ],
+    )
+    return [muon, _conjugate(muon, "mu+"), pion]
+
+
+def test_store_round_trip():
+    """Records written to a store read back unchanged, including decays."""
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "particles.sqlite3"
+        assert write_particle_store(sample_records(), path, {"pdg_edition": "2024"}) == 3
+        assert not [p for p in Path(tmp).iterdir() if p != path], "temporary file left behind"
+
+        store = ParticleStore(path)
+        assert len(store) == 3 and store.metadata["pdg_edition"] == "2024"
+        pion = store.get("pi+")
+        assert pion.quantum_numbers == {"J": "0", "P": "-", "I": "1", "G": "-"}
+        assert [d["branching_fraction"] for d in pion.decays] == [0.9998770, 1.230e-4]
+        assert pion.to_dict("MeV")["mass"] == 0.13957039 * 1000
+
+        anti = store.get("mu+")
+        assert anti.charge == 1.0 and anti.mcid == -13 and anti.mass == store.get("mu-").mass
+
+        # Stores from another schema version are rejected
+        conn = sqlite3.connect(path)
+        conn.execute("UPDATE meta SET value = '0' WHERE key = 'schema_version'")
+        conn.commit()
+        conn.close()
+        try:
+            ParticleStore(path)
+            assert False, "old schema accepted"
+        except ValueError as e:
+            assert "rebuild" in str(e)
+    logger.info("✓ Store round trip")
+
+
+def test_lookup_in_any_notation():
+    """Lookups resolve conservation-table aliases, PDG names and Monte Carlo numbers."""
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "particles.sqlite3"
+        write_particle_store(sample_records(), path)
+        store = ParticleStore(path)
+
+        for name in ("muon", "\\mu^-", "μ⁻", "13", "MU-"):
+            assert store.get(name) is store.records["mu-"], name
+        assert store.get("-13") is store.records["mu+"]
+        assert store.get("kaon") is None and "K+" not in store
+
+        assert [r.name for r in store.search("pion")] == ["pi+"]
+        assert [r.name for r in store.search("mu")] == ["mu-", "mu+"]
+
+        record, decays, conjugated = store.decays("mu+")
+        assert record.name == "mu+" and conjugated and decays[0]["description"].startswith("mu-")
+        assert store.decays("pi+", limit=1)[1] == store.records["pi+"].decays[:1]
+        assert store.decays("graviphoton") == (None, [], False)
+    logger.info("✓ Lookup in any notation")
+
+
+def test_record_from_pdg_objects():
+    """PDG API objects map onto records; missing values and limits are skipped."""
+    modes = [
+        SimpleNamespace(description="pi0 --> gamma gamma", value=0.98823, display_value_text="(98.823 +- 0.034) %", is_limit=False),
+        SimpleNamespace(description="pi0 --> e+ e- gamma", value=0.01174, display_value_text="(1.174 +- 0.035) %", is_limit=False),
+        SimpleNamespace(description="pi0 --> 4 gamma", value=2e-8, display_value_text="< 2E-8", is_limit=True),
+    ]
+    pdg_particle = SimpleNamespace(
+        name="pi0", pdgid="S009", mcid=111, mass=0.1349768, mass_error=5e-7, width=7.81e-9, lifetime=None,
+        charge=0.0, quantum_J="0", quantum_P="-", quantum_C="+", quantum_I="1", quantum_G=None,
+        exclusive_branching_fractions=lambda: reversed(modes),
+    )
+    record = _record_from_pdg("pi0", pdg_particle, top_decays=5)
+    assert record.mass == 0.1349768 and record.lifetime is None and record.mcid == 111
+    assert record.quantum_numbers == {"J": "0", "P": "-", "C": "+", "I": "1"}
+    assert [d["description"] for d in record.decays] == ["pi0 --> gamma gamma", "pi0 --> e+ e- gamma"]
+    assert record.antiparticle == "pi0"
+
+    assert set(PARTICLE_NAMES) <= set(MC_IDS), "every tabulated particle has a Monte Carlo number"
+    logger.info("✓ Record from PDG objects")
+
+
+def test_physics_tools_prefer_store():
+    """Physics tools answer from the store without the MCP server and fall back for missing particles."""
+    async def no_mcp(*args, **kwargs):
+        raise AssertionError("MCP server called")
+
+    async def mcp_answer(*args, **kwargs):
+        return {"result": "from MCP"}
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "particles.sqlite3"
+        write_particle_store(sample_records(), path)
+        with mock.patch.object(config.validation, "particle_store_path", path), \
+             mock.patch.object(config.validation, "particle_store_enabled", True):
+            with mock.patch.multiple(
+                physics_tools,
+                search_particle_mcp=no_mcp,
+                get_particle_properties_mcp=no_mcp,
+                get_branching_fractions_mcp=no_mcp,
+                compare_particles_mcp=no_mcp,
+                check_particle_properties_mcp=no_mcp,
+            ):
+                found = asyncio.run(physics_tools.search_particle("muon"))
+                assert found["source"] == physics_tools.LOCAL_SOURCE and found["particles"][0]["name"] == "mu-"
+                props = asyncio.run(physics_tools.get_particle_properties("π⁺", units_preference="MeV"))
+                assert props["units"] == "MeV" and abs(props["mass"] - 139.57039) < 1e-9
+                decays = asyncio.run(physics_tools.get_branching_fractions("mu+"))
+                assert "note" in decays and decays["decays"][0]["branching_fraction"] == 1.0
+                compared = asyncio.run(physics_tools.compare_particles("mu-, pi+", "mass,P"))
+                assert compared["particles"]["pi+"]["P"] == "-"
+                checked = asyncio.run(physics_tools.check_particle_properties("mu-"))
+                assert checked["valid"], checked["issues"]
+
+            with mock.patch.object(physics_tools, "search_particle_mcp", mcp_answer):
+                assert asyncio.run(physics_tools.search_particle("Upsilon")) == {"result": "from MCP"}
+
+            # A rebuilt snapshot is picked up
+            store = get_particle_store()
+            time.sleep(0.01)
+            write_particle_store(sample_records()[:1], path)
+            assert get_particle_store() is not store and len(get_particle_store()) == 1
+
+        assert get_particle_store(Path(tmp) / "missing.sqlite3") is None
+    logger.info("✓ Physics tools prefer the store")
+
+
+def main():
+    """Run particle store tests."""
+    print("🧪 PARTICLE STORE TEST SUITE")
+    print("=" * 50)
+
+    test_suites = [
+        ("Store round trip", test_store_round_trip),
+        ("Lookup in any notation", test_lookup_in_any_notation),
+        ("Record from PDG objects", test_record_from_pdg_objects),
+        ("Physics tools prefer the store", test_physics_tools_prefer_store),
+    ]
+
+    failed = 0
+    for test_name, test_func in test_suites:
+        try:
+            test_func()
+            print(f"✓ PASS   {test_name}")
+        except Exception as e:
+            failed += 1
+            print(f"✗ FAIL   {test_name}: {e}")
+
+    print(f"\nResult: {len(test_suites) - failed}/{len(test_suites)} tests passed")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
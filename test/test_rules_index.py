@@ -0,0 +1,262 @@
+#!/usr/bin/env python3
+"""
+Tests for the physics rules semantic index.
+
+Runs offline with the local n-gram embedding backend; embeddings are
+stored in a temporary directory.
+"""
+
+import sys
+import asyncio
+import logging
+import tempfile
+import time
+from pathlib import Path
+from unittest import mock
+
+import numpy as np
+
+# Add the project root to Python path
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from feynmancraft_adk.tools.kb.embedding_backends import HashedNgramEmbeddingBackend
+from feynmancraft_adk.tools.physics import embedding_manager as rem
+from feynmancraft_adk.tools.physics.data_loader import load_physics_rules
+from feynmancraft_adk.tools.physics.embedding_manager import RulesEmbeddingManager, RulesIndexError
+from feynmancraft_adk.tools.physics.search import search_physics_rules
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+class CountingBackend(HashedNgramEmbeddingBackend):
+    """Local n-gram backend that records how many texts it embedded."""
+
+    def __init__(self):
+        super().__init__()
+        self.calls = []
+
+    def embed_documents(self, texts, **kwargs):
+        self.calls.append(len(texts))
+        return super().embed_documents(texts, **kwargs)
+
+
+class FailingBackend(HashedNgramEmbeddingBackend):
+    """Backend whose document embeddings all fail."""
+
+    def __init__(self):
+        super().__init__()
+        self.calls = []
+
+    def embed_documents(self, texts, **kwargs):
+        self.calls.append(kwargs)
+        return [None] * len(texts)
+
+
+class KeylessRemoteBackend(FailingBackend):
+    """Remote backend without credentials: nothing gets embedded."""
+
+    remote = True
+    model_name = "models/test-remote"
+
+
+def run_with_manager(backend, rules, tmp, coroutine_fn):
+    """Run a coroutine against a fresh manager using ``backend``, ``rules`` and a temporary store."""
+    manager = RulesEmbeddingManager()
+    manager.reset()
+    with mock.patch.object(rem, "load_physics_rules", return_value=rules), \
+         mock.patch.object(manager, "backend", backend), \
+         mock.patch.object(RulesEmbeddingManager, "cache_dir", new=property(lambda self: Path(tmp))):
+        try:
+            return asyncio.run(coroutine_fn(manager))
+        finally:
+            manager.reset()
+
+
+def test_index_is_normalized_matrix():
+    """Title, category and content are embedded into one unit-row matrix."""
+    rules = load_physics_rules()
+    with tempfile.TemporaryDirectory() as tmp:
+        async def check(manager):
+            await manager.initialize()
+            index = manager.index
+            assert len(index) == len([r for r in rules if r.get("content")])
+            assert index.matrix.dtype == np.float32
+            assert np.allclose(np.linalg.norm(index.matrix, axis=1), 1.0, atol=1e-5)
+
+            text = manager._get_text_for_embedding(rules[1])
+            assert rules[1]["title"] in text and rules[1]["category"] in text and rules[1]["content"] in text
+
+            results = await search_physics_rules("Antiparticle rule", top_k=3)
+            assert results[0]["rule_number"] == 2, results[0]
+            assert results[0]["similarity_score"] >= results[-1]["similarity_score"]
+            assert len(results) == 3
+
+        run_with_manager(HashedNgramEmbeddingBackend(), rules, tmp, check)
+    logger.info("✓ Normalized index")
+
+
+def test_index_is_cached_by_embedded_text():
+    """A restart loads the stored index; an edited title re-embeds the rules."""
+    rules = [dict(rule) for rule in load_physics_rules()[:10]]
+    backend = CountingBackend()
+    with tempfile.TemporaryDirectory() as tmp:
+        async def initialize(manager):
+            await manager.initialize()
+            return manager.index
+
+        first = run_with_manager(backend, rules, tmp, initialize)
+        second = run_with_manager(backend, rules, tmp, initialize)
+        assert backend.calls == [10], "the stored index was not reused"
+        assert np.allclose(first.matrix, second.matrix)
+
+        rules[3]["title"] = "Renamed rule"
+        run_with_manager(backend, rules, tmp, initialize)
+        assert backend.calls == [10, 10]
+    logger.info("✓ Cached index")
+
+
+def test_empty_index_fails_loudly():
+    """An index without rows raises at startup; searches return an error entry, not an empty list."""
+    rules = load_physics_rules()[:5]
+    with tempfile.TemporaryDirectory() as tmp:
+        async def initialize(manager):
+            try:
+                await manager.initialize()
+                assert False, "empty index was accepted"
+            except RulesIndexError as e:
+                assert "empty" in str(e)
+            assert not manager.is_initialized
+            assert not list(Path(tmp).iterdir()), "an empty store was written"
+
+        async def search(manager):
+            results = await search_physics_rules("charge conservation")
+            assert len(results) == 1 and "index unavailable" in results[0]["error"], results
+
+        run_with_manager(FailingBackend(), rules, tmp, initialize)
+        run_with_manager(FailingBackend(), rules, tmp, search)
+    logger.info("✓ Empty index fails loudly")
+
+
+def test_failure_is_remembered():
+    """After a failed build, searches fail at once until the retry interval has passed."""
+    rules = load_physics_rules()[:5]
+    backend = FailingBackend()
+    with tempfile.TemporaryDirectory() as tmp:
+        async def repeat(manager):
+            for _ in range(3):
+                results = await search_physics_rules("charge conservation")
+                assert "error" in results[0], results
+            assert len(backend.calls) == 1, "the rules were embedded again"
+            assert rem.check_rules_index() is False
+
+            with mock.patch.object(rem.config.validation, "rules_index_retry_seconds", 0):
+                manager._failed_until = 0.0
+                try:
+                    await manager.initialize()
+                except RulesIndexError:
+                    pass
+            assert len(backend.calls) == 2, "the build was not retried after the interval"
+
+        run_with_manager(backend, rules, tmp, repeat)
+    logger.info("✓ Failure is remembered")
+
+
+def test_keyless_remote_falls_back_to_local():
+    """Without an API key the rules are indexed offline instead of failing."""
+    rules = load_physics_rules()
+    backend = KeylessRemoteBackend()
+    with tempfile.TemporaryDirectory() as tmp:
+        async def check(manager):
+            start = time.perf_counter()
+            assert rem.check_rules_index() is True
+            assert time.perf_counter() - start < 5
+            assert backend.calls[0]["max_retries"] == 0
+            assert manager.model_name.startswith("local-ngram")
+            results = await search_physics_rules("Antiparticle rule", top_k=3)
+            assert results[0]["rule_number"] == 2, results[0]
+            assert any(path.name.startswith("rules_embeddings_local_ngram") for path in Path(tmp).iterdir())
+
+        with mock.patch.object(rem, "embedding_credentials_available", return_value=False):
+            run_with_manager(backend, rules, tmp, check)
+    logger.info("✓ Keyless remote falls back to local")
+
+
+def test_search_latency():
+    """Scoring a query against all rules takes well under a millisecond."""
+    rules = load_physics_rules()
+    backend = HashedNgramEmbeddingBackend()
+    query = backend.embed_query("lepton number conservation in muon decay")
+    with tempfile.TemporaryDirectory() as tmp:
+        async def measure(manager):
+            await manager.initialize()
+            index = manager.index
+            index.search(query, 5)
+            start = time.perf_counter()
+            for _ in range(200):
+                hits = index.search(query, 5)
+            return (time.perf_counter() - start) / 200, hits
+
+        elapsed, hits = run_with_manager(backend, rules, tmp, measure)
+    assert len(hits) == 5
+    assert elapsed < 1e-3, f"{elapsed * 1e3:.3f} ms per query"
+    logger.info(f"✓ Search latency ({elapsed * 1e6:.0f} µs per query)")
+
+
+def test_quantized_rules_search():
+    """With QUANTIZED_SEARCH the rules are scored on int8 codes and re-ranked exactly."""
+    rules = load_physics_rules()
+    backend = HashedNgramEmbeddingBackend()
+    queries = ["lepton number conservation in muon decay", "charge conservation", "Antiparticle rule", "QCD color"]
+    with tempfile.TemporaryDirectory() as tmp:
+        async def compare(manager):
+            await manager.initialize()
+            index = manager.index
+            assert index.quantized_index is None, "quantized search is opt-in"
+            with mock.patch.object(rem.config.search, "quantized_search", True):
+                manager.build_index()
+            quantized = manager.index
+            assert quantized.quantized_index is not None and quantized.quantized_index.nbytes < quantized.matrix.nbytes
+            for text in queries:
+                query = backend.embed_query(text)
+                exact = index.search(query, 5)
+                hits = quantized.search(query, 5)
+                assert [p for p, _ in hits] == [p for p, _ in exact], text
+                assert np.allclose([c for _, c in hits], [c for _, c in exact], atol=1e-5)
+
+        run_with_manager(backend, rules, tmp, compare)
+    logger.info("✓ Quantized rules search")
+
+
+def main():
+    """Run rules index tests."""
+    print("🧪 PHYSICS RULES INDEX TEST SUITE")
+    print("=" * 50)
+
+    test_suites = [
+        ("Normalized index", test_index_is_normalized_matrix),
+        ("Cached index", test_index_is_cached_by_embedded_text),
+        ("Empty index fails loudly", test_empty_index_fails_loudly),
+        ("Failure is remembered", test_failure_is_remembered),
+        ("Quantized rules search", test_quantized_rules_search),
+        ("Keyless remote falls back to local", test_keyless_remote_falls_back_to_local),
+        ("Search latency", test_search_latency),
+    ]
+
+    failed = 0
+    for test_name, test_func in test_suites:
+        try:
+            test_func()
+            print(f"✓ PASS   {test_name}")
+        except Exception as e:
+            failed += 1
+            print(f"✗ FAIL   {test_name}: {e}")
+
+    print(f"\nResult: {len(test_suites) - failed}/{len(test_suites)} tests passed")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
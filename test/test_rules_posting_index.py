@@ -0,0 +1,171 @@
+#!/usr/bin/env python3
+"""
+Tests for the posting-list index over the physics rules.
+
+Runs offline on the bundled pprules.json; results are compared with the
+full scans the rule lookups used to do.
+"""
+
+import sys
+import logging
+from pathlib import Path
+from unittest import mock
+
+# Add the project root to Python path
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from feynmancraft_adk.tools.physics.data_loader import load_physics_rules
+from feynmancraft_adk.tools.physics.embedding_manager import get_rules_manager
+from feynmancraft_adk.tools.physics.posting_index import RULE_TYPE_KEYWORDS, RulePostingIndex
+from feynmancraft_adk.tools.physics.search import (
+    filter_rules_by_type,
+    get_conservation_rules,
+    rank_rules,
+    search_rules_by_particles,
+    search_rules_by_process,
+    validate_process_against_rules,
+)
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+def numbers(rules):
+    return [rule["rule_number"] for rule in rules]
+
+
+def test_phrase_lookups_match_scans():
+    """Rule type, conservation and process lookups return what a full scan finds."""
+    rules = load_physics_rules()
+
+    for rule_type, keywords in list(RULE_TYPE_KEYWORDS.items()) + [("parity", ["parity"])]:
+        expected = [
+            r for r in rules
+            if any(k in r.get("content", "").lower() or k in r.get("category", "").lower() for k in keywords)
+        ]
+        assert numbers(filter_rules_by_type(rules, rule_type)) == numbers(expected), rule_type
+
+    expected = [
+        r for r in rules
+        if "conservation" in r["content"].lower() or "conserved" in r["content"].lower()
+        or "conservation" in r["category"].lower()
+    ]
+    assert numbers(get_conservation_rules()) == numbers(expected)
+
+    # Scoring of the process search, as a scan
+    description = "muon decay with charge conservation"
+    key_terms = ["decay", "lifetime", "branching", "conservation", "conserved"]
+    scored = []
+    for position, rule in enumerate(rules):
+        content, category = rule["content"].lower(), rule["category"].lower()
+        score = sum(0.4 * (t in content) + 0.3 * (t in category) for t in key_terms)
+        if any(w in content for w in description.split() if len(w) > 3):
+            score += 0.5
+        if score > 0:
+            scored.append((-score, position))
+    expected = [rules[position]["rule_number"] for _, position in sorted(scored)[:10]]
+    results = search_rules_by_process(description, top_k=10)
+    assert numbers(results) == expected
+    assert results[0]["process_relevance_score"] == -sorted(scored)[0][0]
+    logger.info("✓ Phrase lookups match scans")
+
+
+def test_particles_in_any_notation():
+    """A particle matches its mentions in LaTeX, Unicode or words."""
+    assert numbers(search_rules_by_particles(["W^+"])) == numbers(search_rules_by_particles(["W±"]))
+    assert numbers(search_rules_by_particles(["photon"])) == numbers(search_rules_by_particles(["γ"]))
+    assert 1 in numbers(search_rules_by_particles(["Z^0"], top_k=50)), "rule 1 lists Z⁰"
+
+    results = search_rules_by_particles(["photon", "electron"], top_k=5)
+    scores = [r["relevance_score"] for r in results]
+    assert scores == sorted(scores, reverse=True)
+    assert search_rules_by_particles(["graviphoton"]) == []
+
+    # Rules with an explicit particles list get the listed-particle bonus
+    index = RulePostingIndex([{"rule_number": 1, "content": "Lepton rule.", "particles": ["mu-"]}])
+    assert index.with_listed_particle("MU-") == {0}
+    logger.info("✓ Particles in any notation")
+
+
+def test_rule_numbers_and_categories():
+    """Rule numbers are a dictionary lookup; categories are posting lists."""
+    manager = get_rules_manager()
+    assert manager.get_rule_by_number(2)["title"] == "Antiparticle rule"
+    assert manager.get_rule_by_number("2") is manager.get_rule_by_number(2)
+    assert manager.get_rule_by_number(10_000) is None
+
+    qed = manager.get_rules_by_category("qed")
+    assert qed and all("qed" in r["category"].lower() for r in qed)
+    assert manager.search_rules_by_content("dirac sea")[0]["rule_number"] == 2
+    logger.info("✓ Rule numbers and categories")
+
+
+def test_unindexed_rules():
+    """Rules that are not in the index (edited copies, ad-hoc rules) are checked directly."""
+    rules = load_physics_rules()
+    custom = {"rule_number": "x1", "content": "Baryon number is conserved.", "category": "Custom"}
+    edited = dict(rules[1], content="A rule about spin.")
+
+    filtered = filter_rules_by_type([custom, edited, rules[1]], "conservation")
+    assert filtered == [custom]
+    assert filter_rules_by_type([edited], "quantum_numbers") == [edited]
+
+    ranked = rank_rules([dict(custom, similarity_score=0.1), dict(rules[1], similarity_score=0.1)], "conserved baryon")
+    assert ranked[0]["rule_number"] == "x1"
+    assert abs(ranked[0]["final_score"] - 0.3) < 1e-9
+    logger.info("✓ Unindexed rules")
+
+
+def test_validation_does_not_rescan():
+    """Repeated validation of a process touches no rule text."""
+    posting_index = get_rules_manager().load_rules()
+    args = ("electron positron annihilation into photons", ["e-", "e+", "gamma"])
+    first = validate_process_against_rules(*args)
+    assert first["total_rules_checked"] > 0
+
+    with mock.patch.object(RulePostingIndex, "_scan", side_effect=AssertionError("full scan")):
+        second = validate_process_against_rules(*args)
+        filter_rules_by_type(posting_index.rules, "decay")
+        get_conservation_rules()
+    assert second["applicable_rules"] == first["applicable_rules"]
+
+    # Query phrases are kept in a bounded cache
+    small = RulePostingIndex(load_physics_rules()[:5], phrase_cache_size=2)
+    fixed = len(small._phrases)
+    for phrase in ("alpha", "beta", "gamma", "delta"):
+        small.phrase_counts(phrase)
+    assert len(small._phrases) == fixed + 2
+    assert small.with_rule_type("decay") == small.rule_types["decay"]
+    logger.info("✓ Validation does not rescan")
+
+
+def main():
+    """Run rules posting index tests."""
+    print("🧪 PHYSICS RULES POSTING INDEX TEST SUITE")
+    print("=" * 50)
+
+    test_suites = [
+        ("Phrase lookups match scans", test_phrase_lookups_match_scans),
+        ("Particles in any notation", test_particles_in_any_notation),
+        ("Rule numbers and categories", test_rule_numbers_and_categories),
+        ("Unindexed rules", test_unindexed_rules),
+        ("Validation does not rescan", test_validation_does_not_rescan),
+    ]
+
+    failed = 0
+    for test_name, test_func in test_suites:
+        try:
+            test_func()
+            print(f"✓ PASS   {test_name}")
+        except Exception as e:
+            failed += 1
+            print(f"✗ FAIL   {test_name}: {e}")
+
+    print(f"\nResult: {len(test_suites) - failed}/{len(test_suites)} tests passed")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())